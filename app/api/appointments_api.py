@@ -7,7 +7,7 @@ Implements Phase 2: Feature Integration & Direct Replacement
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Query
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Query, Response
 from pydantic import BaseModel, Field, field_validator
 from enum import Enum
 import asyncio
@@ -17,7 +17,8 @@ from ..services.unified_appointment_service import (
     UnifiedAppointmentService,
     AppointmentRequest,
     AppointmentType,
-    AppointmentStatus
+    AppointmentStatus,
+    APPOINTMENT_LIST_COLUMNS
 )
 from ..services.external_calendar_service import ExternalCalendarService
 
@@ -377,6 +378,7 @@ async def cancel_appointment(
 
 @router.get("/", response_model=List[AppointmentListResponse])
 async def list_appointments(
+    response: Response,
     doctor_id: Optional[str] = None,
     patient_id: Optional[str] = None,
     clinic_id: Optional[str] = None,
@@ -385,6 +387,7 @@ async def list_appointments(
     status: Optional[AppointmentStatusEnum] = None,
     limit: int = Query(100, ge=1, le=1000),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
     service: UnifiedAppointmentService = Depends(get_appointment_service)
 ):
     """
@@ -397,7 +400,12 @@ async def list_appointments(
     - **date_to**: End date filter (YYYY-MM-DD)
     - **status**: Filter by appointment status
     - **limit**: Maximum number of results
-    - **offset**: Number of results to skip
+    - **offset**: Number of results to skip (ignored when a cursor is given)
+    - **cursor**: Opaque cursor from the previous page's `X-Next-Cursor` header
+
+    When more results exist, the `X-Next-Cursor` response header carries the
+    cursor for the next page. Cursor pagination stays fast on deep pages where
+    large offsets do not.
     """
     try:
         # Validate date formats if provided
@@ -413,23 +421,31 @@ async def list_appointments(
             except ValueError:
                 raise HTTPException(status_code=400, detail="Invalid date_to format. Use YYYY-MM-DD.")
 
-        appointments = await service.get_appointments(
-            doctor_id=doctor_id,
-            patient_id=patient_id,
-            clinic_id=clinic_id,
-            date_from=date_from,
-            date_to=date_to,
-            status=status.value if status else None
-        )
+        try:
+            appointments, next_cursor = await service.get_appointments_page(
+                limit=limit,
+                cursor=cursor,
+                offset=offset,
+                doctor_id=doctor_id,
+                patient_id=patient_id,
+                clinic_id=clinic_id,
+                date_from=date_from,
+                date_to=date_to,
+                status=status.value if status else None
+            )
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
 
-        # Apply pagination
-        paginated_appointments = appointments[offset:offset + limit]
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
 
         return [
             AppointmentListResponse(**appointment)
-            for appointment in paginated_appointments
+            for appointment in appointments
         ]
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to list appointments: {e}")
         raise HTTPException(status_code=500, detail="Failed to retrieve appointments")
@@ -441,8 +457,9 @@ async def get_appointment(
 ):
     """Get a specific appointment by ID"""
     try:
-        appointments = await service.get_appointments()
-        appointment = next((apt for apt in appointments if apt['id'] == appointment_id), None)
+        appointment = await service.get_appointment_by_id(
+            appointment_id, columns=APPOINTMENT_LIST_COLUMNS
+        )
 
         if not appointment:
             raise HTTPException(status_code=404, detail="Appointment not found")
@@ -468,8 +485,7 @@ async def confirm_appointment(
     """
     try:
         # Get appointment and update status
-        appointments = await service.get_appointments()
-        appointment = next((apt for apt in appointments if apt['id'] == appointment_id), None)
+        appointment = await service.get_appointment_by_id(appointment_id, columns='id,status')
 
         if not appointment:
             raise HTTPException(status_code=404, detail="Appointment not found")
@@ -831,10 +847,12 @@ async def get_availability_fallback(
     duration_minutes: int
 ) -> List[AvailableSlotWithRoom]:
     """
-    Fallback method using iterative checks when optimized query fails.
-    """
-    from uuid import UUID
+    Fallback method used when the optimized query fails.
 
+    Schedules, time-off and room occupancy for the whole window are loaded in
+    bulk up front (ConstraintEngine.load_window); every slot and room check is
+    then answered in memory. Rooms are assigned first-fit in room order.
+    """
     available_slots = []
 
     # Get doctors
@@ -854,27 +872,32 @@ async def get_availability_fallback(
         # Cache the rooms
         await room_cache.set(clinic_id, rooms)
 
+    window = await constraint_engine.load_window(
+        doctor_ids=[doctor['id'] for doctor in doctors_result.data],
+        room_ids=[room['id'] for room in rooms],
+        start_date=start_date,
+        end_date=end_date
+    )
+
+    # Room scores do not depend on the slot
+    room_scores = []
+    for room in rooms:
+        score = 10.0
+        if room.get('cleaning_duration_minutes', 15) <= 15:
+            score += 5.0
+        if room.get('accessibility_features'):
+            score += len(room['accessibility_features'])
+        room_scores.append((room['id'], score))
+
     # Iterate through dates
     current_date = start_date
     while current_date <= end_date:
-        day_name = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"][current_date.weekday()]
-
         for doctor in doctors_result.data:
-            # Get doctor schedule for this day
-            schedule_result = db.table("doctor_schedules")\
-                .select("*")\
-                .eq("doctor_id", doctor['id'])\
-                .eq("day_of_week", day_name)\
-                .execute()
-
-            if not schedule_result.data:
+            # Whole-day time-off rules out every slot for this doctor
+            if not window.doctor_not_off(doctor['id'], current_date):
                 continue
 
-            for schedule in schedule_result.data:
-                # Parse schedule times
-                work_start = datetime.strptime(schedule["start_time"], "%H:%M").time()
-                work_end = datetime.strptime(schedule["end_time"], "%H:%M").time()
-
+            for work_start, work_end in window.working_periods(doctor['id'], current_date.date()):
                 # Generate time slots
                 slot_time = datetime.combine(current_date.date(), work_start)
                 end_of_day = datetime.combine(current_date.date(), work_end)
@@ -882,33 +905,14 @@ async def get_availability_fallback(
                 while slot_time + timedelta(minutes=duration_minutes) <= end_of_day:
                     slot_end = slot_time + timedelta(minutes=duration_minutes)
 
-                    # Check doctor availability
-                    doctor_available = await constraint_engine.check_doctor_schedule(
-                        UUID(doctor['id']), slot_time, duration_minutes
-                    )
-                    doctor_not_off = await constraint_engine.check_doctor_time_off(
-                        UUID(doctor['id']), slot_time
-                    )
-
-                    if doctor_available and doctor_not_off:
+                    if window.doctor_scheduled(doctor['id'], slot_time, duration_minutes):
                         # Find available room
-                        for room in rooms:
-                            room_available = await constraint_engine.check_room_availability(
-                                UUID(room['id']), slot_time, slot_end
-                            )
-
-                            if room_available:
-                                # Calculate score
-                                score = 10.0
-                                if room.get('cleaning_duration_minutes', 15) <= 15:
-                                    score += 5.0
-                                if room.get('accessibility_features'):
-                                    score += len(room['accessibility_features'])
-
+                        for room_id, score in room_scores:
+                            if window.room_free(room_id, slot_time, slot_end):
                                 available_slots.append(AvailableSlotWithRoom(
                                     time=slot_time.isoformat(),
                                     doctor_id=doctor['id'],
-                                    room_id=room['id'],
+                                    room_id=room_id,
                                     score=score,
                                     duration_minutes=duration_minutes
                                 ))
@@ -57,3 +57,36 @@ async def verify_whatsapp_connection(instance_name: str) -> bool:
     """
     status = await get_real_connection_status(instance_name)
     return status.get("is_truly_connected", False)
+
+
+def mask_phone(phone: Optional[str]) -> str:
+    """Mask a phone number or JID for PHI-safe logging."""
+    if not phone:
+        return "-"
+    phone = phone.split("@")[0]
+    if len(phone) > 7:
+        return f"{phone[:3]}***{phone[-4:]}"
+    return f"{phone[:3]}***"
+
+
+def summarize_webhook_payload(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    PHI-safe summary of an Evolution webhook payload for logging.
+
+    Keeps routing and shape metadata only: no message text, names or
+    media URLs, and the sender number is masked.
+    """
+    message_data = data.get("data") or data.get("message") or {}
+    if not isinstance(message_data, dict):
+        return {"event": data.get("event")}
+    key = message_data.get("key") or {}
+    nested_message = message_data.get("message") or {}
+    return {
+        "event": data.get("event"),
+        "instance": data.get("instance"),
+        "message_id": key.get("id"),
+        "from": mask_phone(key.get("remoteJid")),
+        "from_me": bool(key.get("fromMe")),
+        "message_types": sorted(nested_message) if isinstance(nested_message, dict) else [],
+        "message_timestamp": message_data.get("messageTimestamp"),
+    }
@@ -5,18 +5,29 @@ This webhook handles messages from Evolution API using the expected URL pattern:
 /webhooks/evolution/{instance_name}
 """
 
-from fastapi import APIRouter, Request, Path, Body, HTTPException
-from typing import Any, Dict, Optional
-from enum import Enum
-import os
+import asyncio
 import json
 import logging
-import asyncio
-from app.schemas.messages import MessageRequest
+import os
+import time
+from enum import Enum
+from typing import Any, Dict, Optional
+
+import aiohttp
+from fastapi import APIRouter, Body, HTTPException, Path, Request
+
+from app.api.evolution_utils import mask_phone, summarize_webhook_payload
 from app.api.pipeline_message_processor import get_message_processor
+from app.schemas.messages import MessageRequest
 from app.security.webhook_verification import verify_webhook_signature
-from app.services.language_service import LanguageService
-import aiohttp
+from app.services.message_analysis import analyze
+from app.utils.logging_config import LazyJSON
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:  # pragma: no cover - orjson is in requirements
+    _loads = json.loads
 
 
 class MessageType(Enum):
@@ -130,7 +141,7 @@ async def _switch_session_to_human_control(
         # Find the session for this phone/instance combination
         # Sessions are stored in healthcare.conversation_sessions
         result = supabase.schema('healthcare').table('conversation_sessions').select(
-            'id, control_mode'
+            'id, control_mode, metadata'
         ).eq(
             'phone_number', phone_number
         ).order(
@@ -163,6 +174,9 @@ async def _switch_session_to_human_control(
             update_data
         ).eq('id', session_id).execute()
 
+        from app.services.hitl_state_cache import control_state_from_row, publish_control_change
+        await publish_control_change(control_state_from_row({**result.data[0], **update_data}))
+
         logger.info(
             f"✅ Session {session_id[:8]}... switched to HUMAN control mode "
             f"(triggered by staff message)"
@@ -226,35 +240,31 @@ async def whatsapp_webhook_v2(
         logger.info(f"[WhatsApp Webhook V2] FSM disabled - messages should go to claude-agent")
         return {"status": "ok", "message": "FSM webhook disabled - use claude-agent"}
 
-    import datetime
-    timestamp = datetime.datetime.now().isoformat()
-
-    print(f"\n{'='*80}")
-    print(f"[{timestamp}] TOKEN-BASED WEBHOOK RECEIVED")
-    print(f"[WhatsApp Webhook V2] Token: {webhook_token[:8]}...")
-    print(f"[WhatsApp Webhook V2] Body type: {type(body)}")
-    print(f"[WhatsApp Webhook V2] Body keys: {list(body.keys()) if body else 'None'}")
+    # Raw bytes as received (cached by Starlette after body parsing): the
+    # signature covers these, and the background task parses them once
+    body_bytes = await request.body()
 
     # Verify webhook signature (OPTIONAL - Evolution doesn't send signatures by default)
     evolution_webhook_secret = os.getenv("EVOLUTION_WEBHOOK_SECRET", "")
     signature = request.headers.get("X-Webhook-Signature")
 
-    # Convert body to JSON bytes for signature verification
-    body_bytes = json.dumps(body, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
-
     if evolution_webhook_secret and signature:
         # Verify signature if both are present
-        if verify_webhook_signature('evolution', body=body_bytes, signature=signature):
-            print(f"[WhatsApp Webhook V2] ✅ Signature verified")
-        else:
-            print(f"[WhatsApp Webhook V2] ⚠️  Invalid signature - continuing anyway (optional verification)")
+        signature_status = (
+            "verified" if verify_webhook_signature('evolution', body=body_bytes, signature=signature)
+            else "invalid (continuing, verification is optional)"
+        )
     else:
-        print(f"[WhatsApp Webhook V2] ⚠️  No signature verification (secret={bool(evolution_webhook_secret)}, signature={bool(signature)})")
+        signature_status = f"skipped (secret={bool(evolution_webhook_secret)}, signature={bool(signature)})"
 
     # Create background task for processing (CRITICAL: return immediately)
     asyncio.create_task(process_webhook_by_token(webhook_token, body_bytes))
 
-    print(f"[WhatsApp Webhook V2] 🏁 Returning response immediately")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "[WhatsApp Webhook V2] Received token=%s... bytes=%d signature=%s payload=%s",
+            webhook_token[:8], len(body_bytes), signature_status, LazyJSON(summarize_webhook_payload(body)),
+        )
 
     # IMMEDIATE response (Evolution timeout is ~5 seconds)
     return {"status": "ok", "token": webhook_token[:8] + "..."}
@@ -266,30 +276,21 @@ async def process_webhook_by_token(webhook_token: str, body_bytes: bytes):
 
     This is the NEW processing path with zero-DB-query cache hits.
     """
-    import datetime
-    timestamp = datetime.datetime.now().isoformat()
-
-    print(f"\n{'='*80}")
-    print(f"[{timestamp}] TOKEN-BASED ASYNC PROCESSING STARTED")
-    print(f"[Token Async] Token: {webhook_token[:8]}...")
-    print(f"[Token Async] Processing {len(body_bytes)} bytes")
-    print(f"{'='*80}")
-
     try:
         # Parse webhook body
-        data = json.loads(body_bytes)
+        data = _loads(body_bytes)
         # Evolution API payload structure: {"event": "...", "instance": "...", "data": {...}}
         # The actual message data is inside data["data"], not data["message"]
         message_data = data.get("data", {}) or data.get("message", {})
 
         if not message_data:
-            print(f"[Token Async] ⚠️  No message data, ignoring")
+            logger.debug("[Token Async] No message data, ignoring (token=%s...)", webhook_token[:8])
             return
 
         # Idempotency check (same as existing flow)
         message_id = message_data.get("key", {}).get("id")
         if not message_id:
-            print(f"[Token Async] ⚠️  No message ID, cannot check idempotency")
+            logger.debug("[Token Async] No message ID, cannot check idempotency (token=%s...)", webhook_token[:8])
             return
 
         # Redis SETNX for idempotency
@@ -300,11 +301,9 @@ async def process_webhook_by_token(webhook_token: str, body_bytes: bytes):
         is_first_time = redis_client.set(idempotency_key, "1", nx=True, ex=3600)
 
         if not is_first_time:
-            print(f"[Token Async] ⏭️  Duplicate message {message_id}, skipping")
+            logger.debug("[Token Async] Duplicate message %s, skipping", message_id)
             return
 
-        print(f"[Token Async] ✅ Idempotency check passed: {message_id}")
-
         # ZERO-QUERY LOOKUP via token cache
         from app.services.whatsapp_clinic_cache import get_whatsapp_clinic_cache
         cache = get_whatsapp_clinic_cache()
@@ -312,14 +311,10 @@ async def process_webhook_by_token(webhook_token: str, body_bytes: bytes):
         clinic_info = await cache.get_or_fetch_clinic_info_by_token(webhook_token)
 
         if not clinic_info:
-            print(f"[Token Async] ❌ No clinic found for token {webhook_token[:8]}...")
+            logger.warning("[Token Async] No clinic found for token %s...", webhook_token[:8])
             return
 
         clinic_id = clinic_info['clinic_id']
-        organization_id = clinic_info['organization_id']
-        clinic_name = clinic_info.get('name', 'Unknown')
-
-        print(f"[Token Async] ✅ Resolved: token → clinic {clinic_name} ({clinic_id[:8]}...)")
 
         # Extract message details
         from_number = message_data.get("key", {}).get("remoteJid", "").split("@")[0]
@@ -335,8 +330,10 @@ async def process_webhook_by_token(webhook_token: str, body_bytes: bytes):
                 ""
             )
 
-        print(f"[Token Async] From: {from_number}")
-        print(f"[Token Async] Message: {message_text[:100]}...")
+        logger.info(
+            "[Token Async] Message %s from %s → clinic %s... (%d chars)",
+            message_id, mask_phone(from_number), clinic_id[:8], len(message_text),
+        )
 
         # Process with pipeline processor
         processor = await get_message_processor_instance()
@@ -353,8 +350,6 @@ async def process_webhook_by_token(webhook_token: str, body_bytes: bytes):
         response_obj = await asyncio.wait_for(processor.process_message(request_obj), timeout=30.0)
         ai_response = response_obj.response
 
-        print(f"[Token Async] ✅ AI response: {ai_response[:100]}...")
-
         # Send response via Evolution API (use instance_name from config)
         instance_name = clinic_info.get('instance_name')
         if instance_name:
@@ -367,7 +362,7 @@ async def process_webhook_by_token(webhook_token: str, body_bytes: bytes):
                 clinic_id
             )
         else:
-            print(f"[Token Async] ⚠️  No instance_name in clinic_info, cannot send response")
+            logger.warning("[Token Async] No instance_name in clinic_info, cannot send response")
 
     except Exception as e:
         logger.error(f"[Token Async] ❌ Error processing webhook: {e}", exc_info=True)
@@ -375,58 +370,40 @@ async def process_webhook_by_token(webhook_token: str, body_bytes: bytes):
 
 async def process_webhook_async(instance_name: str, body_bytes: bytes):
     """Process webhook in background after returning response"""
-    import datetime
-    start_time = datetime.datetime.now()
-
-    print(f"\n{'='*80}")
-    print(f"[{start_time.isoformat()}] ASYNC PROCESSING STARTED")
-    print(f"[Async Process] Instance: {instance_name}")
-    print(f"[Async Process] Processing {len(body_bytes)} bytes")
-    print(f"[Async Process] Task running in background")
-    print(f"{'='*80}\n")
+    start = time.perf_counter()
 
     try:
-        # Process the message
-        print(f"[Async Process] Calling process_evolution_message...")
         await process_evolution_message(instance_name, body_bytes)
-
-        end_time = datetime.datetime.now()
-        duration = (end_time - start_time).total_seconds()
-        print(f"\n[Async Process] ✅ COMPLETED in {duration:.2f} seconds")
+        logger.debug("[Async Process] Completed in %.2fs (instance=%s)", time.perf_counter() - start, instance_name)
 
     except Exception as e:
-        end_time = datetime.datetime.now()
-        duration = (end_time - start_time).total_seconds()
-        print(f"\n[Async Process] ❌ FAILED after {duration:.2f} seconds")
-        print(f"[Async Process] Error: {e}")
-        import traceback
-        print(f"[Async Process] Full traceback:\n{traceback.format_exc()}")
+        logger.error(
+            f"[Async Process] ❌ Failed after {time.perf_counter() - start:.2f}s (instance={instance_name}): {e}",
+            exc_info=True
+        )
 
 
 async def process_evolution_message(instance_name: str, body_bytes: bytes):
     """Process Evolution API webhook message in background"""
-    import datetime
-    process_start = datetime.datetime.now()
-
-    print(f"\n{'='*80}")
-    print(f"[{process_start.isoformat()}] MESSAGE PROCESSING STARTED")
-    print(f"[Background] Instance: {instance_name}")
-    print(f"[Background] Processing {len(body_bytes)} bytes")
-    print(f"{'='*80}\n")
+    process_start = time.perf_counter()
 
     try:
         # Parse JSON from bytes
-        print(f"[Background] Step 1: Parsing JSON from bytes...")
         try:
-            data = json.loads(body_bytes.decode('utf-8'))
-            print(f"[Background] ✅ Successfully parsed JSON")
-            print(f"[Background] JSON keys: {list(data.keys())}")
-            print(f"[Background] Full JSON data:\n{json.dumps(data, indent=2)[:1000]}")
-        except json.JSONDecodeError as e:
-            print(f"[Background] ❌ Failed to parse JSON: {e}")
-            print(f"[Background] Raw data that failed to parse: {body_bytes[:500]}")
+            data = _loads(body_bytes)
+        except ValueError as e:
+            logger.warning(
+                "[Background] ❌ Failed to parse JSON (%d bytes, instance=%s): %s",
+                len(body_bytes), instance_name, e,
+            )
             return
 
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "[Background] Processing %d bytes (instance=%s): %s",
+                len(body_bytes), instance_name, LazyJSON(summarize_webhook_payload(data)),
+            )
+
         # IDEMPOTENCY CHECK: Reject duplicate messages using Redis SETNX
         # Extract message ID for deduplication
         # Evolution API payload structure: {"event": "...", "instance": "...", "data": {...}}
@@ -434,6 +411,7 @@ async def process_evolution_message(instance_name: str, body_bytes: bytes):
         message_data = data.get("data", {}) or data.get("message", {})
         key = message_data.get("key", {})
         message_id = key.get("id")
+        nested_message = message_data.get("message", {}) or {}
 
         if message_id:
             from app.config import get_redis_client
@@ -444,37 +422,31 @@ async def process_evolution_message(instance_name: str, body_bytes: bytes):
             # Try to set the key (SETNX - set if not exists)
             # Returns 1 if key was set (first time seeing this message)
             # Returns 0 if key already exists (duplicate message)
-            idempotency_start = datetime.datetime.now()
             is_first_time = redis_client.set(idempotency_key, "1", nx=True, ex=idempotency_ttl)
-            idempotency_duration = (datetime.datetime.now() - idempotency_start).total_seconds() * 1000
 
             if not is_first_time:
-                print(f"[Background] ⏭️ DUPLICATE MESSAGE DETECTED (idempotency check: {idempotency_duration:.2f}ms)")
-                print(f"[Background] Message ID: {message_id}")
-                print(f"[Background] Skipping processing - message already handled")
+                logger.debug("[Background] ⏭️ Duplicate message %s, skipping", message_id)
                 return
-            else:
-                print(f"[Background] ✅ Idempotency check passed ({idempotency_duration:.2f}ms)")
-                print(f"[Background] Message ID: {message_id} (first time processing)")
         else:
-            print(f"[Background] ⚠️ No message ID found - skipping idempotency check")
+            logger.debug("[Background] No message ID found - skipping idempotency check")
 
         # Check if this is a CONNECTION_UPDATE event (not a message)
         event_type = data.get("event")
         if event_type == "CONNECTION_UPDATE":
-            print(f"[Background] 📡 CONNECTION_UPDATE event received")
             connection_data = data.get("data", {})
             state = connection_data.get("state")
             phone = connection_data.get("phone")
             connected = connection_data.get("connected", False)
 
-            print(f"[Background] Connection state: {state}")
-            print(f"[Background] Phone number: {phone}")
-            print(f"[Background] Connected: {connected}")
+            logger.info(
+                "[Background] 📡 CONNECTION_UPDATE instance=%s state=%s connected=%s",
+                instance_name, state, connected,
+            )
 
             # Update integration status in database
             if state == "open" and connected:
-                print(f"[Background] ✅ WhatsApp connected! Updating integration status...")
+                import datetime
+
                 from app.main import supabase
 
                 try:
@@ -489,33 +461,24 @@ async def process_evolution_message(instance_name: str, body_bytes: bytes):
                         "enabled": True
                     }).eq("config->>instance_name", instance_name).execute()
 
-                    print(f"[Background] ✅ Integration status updated to connected")
-                    print(f"[Background] Updated records: {len(result.data) if result.data else 0}")
+                    logger.info(
+                        "[Background] ✅ Integration status updated to connected (%d records)",
+                        len(result.data) if result.data else 0,
+                    )
                 except Exception as db_error:
-                    print(f"[Background] ⚠️  Failed to update integration status: {db_error}")
+                    logger.warning(f"[Background] ⚠️ Failed to update integration status: {db_error}")
 
             # CONNECTION_UPDATE events don't have messages, so return early
             return
 
         # Evolution API sends both instanceName in body AND in URL path
         # The URL path is more reliable
-        print(f"[Background] Step 2: Extracting message data...")
         actual_instance = instance_name  # Use the path parameter
 
-        print(f"[Background] Using instance from URL path: {actual_instance}")
-        print(f"[Background] Message data keys: {list(message_data.keys())}")
-        if message_data:
-            print(f"[Background] Message data content:\n{json.dumps(message_data, indent=2)[:500]}")
-
         # Extract message details (key and message_data already extracted above for idempotency)
-        print(f"[Background] Step 3: Extracting sender details...")
         from_number = key.get("remoteJid", "").replace("@s.whatsapp.net", "")
         is_from_me = key.get("fromMe", False)
 
-        print(f"[Background] Key data: {key}")
-        print(f"[Background] From number: {from_number}")
-        print(f"[Background] Is from me: {is_from_me}")
-
         # HITL Phase 3: Check if fromMe message is agent-sent or human-sent
         if is_from_me:
             # Check if this message was sent by the agent
@@ -528,17 +491,19 @@ async def process_evolution_message(instance_name: str, body_bytes: bytes):
 
             if is_agent_message:
                 # This is an echo of agent's message - skip processing
-                print(f"[Background] ⏭️ Ignoring agent message echo (id: {message_id})")
+                logger.debug("[Background] ⏭️ Ignoring agent message echo (id: %s)", message_id)
                 return
             else:
                 # This is a human-sent message from WhatsApp app!
-                print(f"[Background] 👤 HUMAN MESSAGE DETECTED from clinic staff")
-                print(f"[Background] Switching session to human control mode")
+                logger.info(
+                    "[Background] 👤 Human staff message to %s - switching session to human control",
+                    mask_phone(from_number),
+                )
 
                 # Get session and switch control mode
                 await _switch_session_to_human_control(
                     remote_jid=key.get("remoteJid", ""),
-                    instance_name=actual_instance if 'actual_instance' in dir() else instance_name,
+                    instance_name=actual_instance,
                     message_text=message_text
                 )
 
@@ -550,7 +515,6 @@ async def process_evolution_message(instance_name: str, body_bytes: bytes):
 
         # Extract text from various message formats
         text = ""
-        nested_message = message_data.get("message", {})
         if nested_message:
             text = (
                 nested_message.get("conversation") or
@@ -569,11 +533,10 @@ async def process_evolution_message(instance_name: str, body_bytes: bytes):
             from_number = message_data.get("from", "")
 
         if not text or not from_number:
-            print(f"[Background] ⚠️ Ignoring message - missing required data")
-            print(f"[Background] Text present: {bool(text)} (length: {len(text) if text else 0})")
-            print(f"[Background] From number present: {bool(from_number)}")
-            print(f"[Background] Text content: '{text}'")
-            print(f"[Background] From: '{from_number}'")
+            logger.debug(
+                "[Background] Ignoring message %s - missing required data (text=%s, from=%s)",
+                message_id, bool(text), bool(from_number),
+            )
             return
 
         # OPTIMIZATION: Use prewarm cache to resolve instance → clinic (zero DB queries!)
@@ -583,8 +546,10 @@ async def process_evolution_message(instance_name: str, body_bytes: bytes):
         clinic_info = await cache.get_or_fetch_clinic_info(actual_instance)
 
         if not clinic_info:
-            print(f"[Background] ❌ Could not resolve clinic for instance: {actual_instance}")
-            print(f"[Background] Cache miss and DB lookup failed - rejecting message")
+            logger.warning(
+                "[Background] ❌ Could not resolve clinic for instance %s - rejecting message",
+                actual_instance,
+            )
             return  # Do NOT process message if we can't resolve clinic
 
         # Extract clinic info from cache
@@ -592,16 +557,10 @@ async def process_evolution_message(instance_name: str, body_bytes: bytes):
         actual_organization_id = clinic_info.get('organization_id')
         clinic_name = clinic_info.get('name', 'Clinic')
 
-        print(f"[Background] ✅ Resolved from cache (ZERO DB queries!)")
-        print(f"[Background] Organization ID: {actual_organization_id}")
-        print(f"[Background] Clinic ID: {clinic_id}")
-        print(f"[Background] Clinic name: {clinic_name}")
-
-        print(f"\n[Background] Step 4: Valid message received!")
-        print(f"[Background] From: {from_number} ({push_name})")
-        print(f"[Background] Message text: '{text}'")
-        print(f"[Background] Organization ID: {actual_organization_id}")
-        print(f"[Background] Clinic ID: {clinic_id}")
+        logger.info(
+            "[Background] Message %s from %s → clinic %s (org %s, %d chars)",
+            message_id, mask_phone(from_number), clinic_id, actual_organization_id, len(text),
+        )
 
         # MULTI-AGENT: Load orchestrator agent for organization
         from app.services.agent_service import get_agent_service
@@ -614,11 +573,16 @@ async def process_evolution_message(instance_name: str, body_bytes: bytes):
         )
 
         if not orchestrator_agent:
-            print(f"[Background] ⚠️ No orchestrator agent found for organization {actual_organization_id}")
-            print(f"[Background] Falling back to legacy processing")
+            logger.debug(
+                "[Background] No orchestrator agent for organization %s - using legacy processing",
+                actual_organization_id,
+            )
             # Continue with legacy flow
         else:
-            print(f"[Background] ✅ Loaded orchestrator: {orchestrator_agent.name} (type={orchestrator_agent.type})")
+            logger.debug(
+                "[Background] Loaded orchestrator: %s (type=%s)",
+                orchestrator_agent.name, orchestrator_agent.type,
+            )
 
         # MULTI-AGENT: Send quick ack in parallel (non-blocking)
         # DISABLED: Quick ack temporarily disabled
@@ -633,67 +597,49 @@ async def process_evolution_message(instance_name: str, body_bytes: bytes):
             async def send_quick_ack_delayed():
                 """Send quick ack after delay, can be cancelled if response comes first"""
                 try:
-                    print(f"[Background] 🚀 Multi-Agent: Starting quick ack task...")
-
                     # Stage 1: Show typing indicator immediately
                     typing_success = await send_typing_indicator(actual_instance, from_number)
-                    if typing_success:
-                        print(f"[Background] ✅ Typing indicator sent")
-                    else:
-                        print(f"[Background] ⚠️ Typing indicator failed (non-critical)")
+                    if not typing_success:
+                        logger.debug("[Background] Typing indicator failed (non-critical)")
 
                     # Stage 2: Wait configured delay, then send quick ack
                     quick_ack_delay = quick_ack_config.get("delay_ms", 500) / 1000.0
-                    print(f"[Background] ⏰ Waiting {quick_ack_delay}s before sending quick ack...")
                     await asyncio.sleep(quick_ack_delay)
 
                     # If we got here, the delay expired - send quick ack
-                    # Detect language for quick ack (use LanguageService - single source of truth)
-                    language_service = LanguageService()
-                    detected_language = language_service.detect_sync(text)
-                    print(f"[Background] Detected language: {detected_language}")
+                    # Detect language for quick ack (computed once, reused by the pipeline)
+                    detected_language = analyze(text).language
 
                     # Get language-specific quick ack message from agent config
                     quick_ack_message = orchestrator_agent.get_quick_ack_message(detected_language)
                     if quick_ack_message:
                         ack_success = await send_quick_ack(actual_instance, from_number, quick_ack_message)
                         if ack_success:
-                            print(f"[Background] ✅ Quick ack sent: '{quick_ack_message}' (lang={detected_language})")
+                            logger.debug("[Background] Quick ack sent (lang=%s)", detected_language)
                             return True  # Mark that quick ack was sent
                         else:
-                            print(f"[Background] ⚠️ Quick ack failed (non-critical)")
+                            logger.debug("[Background] Quick ack failed (non-critical)")
                             return False
                     else:
-                        print(f"[Background] ⚠️ No quick ack message configured for language: {detected_language}")
+                        logger.debug("[Background] No quick ack message configured for language: %s", detected_language)
                         return False
                 except asyncio.CancelledError:
-                    print(f"[Background] ⚠️ Quick ack cancelled - actual response arrived first (< {quick_ack_config.get('delay_ms', 500)}ms)")
+                    logger.debug("[Background] Quick ack cancelled - actual response arrived first")
                     raise
 
             # Start quick ack task in background (non-blocking)
             quick_ack_task = asyncio.create_task(send_quick_ack_delayed())
-            print(f"[Background] 🎯 Quick ack task started in parallel")
 
         # Determine message type (text vs voice note)
         message_type = MessageType.TEXT
-        nested_message = message_data.get("message", {})
         if nested_message and nested_message.get("audioMessage"):
             message_type = MessageType.VOICE_NOTE
-            print(f"[Background] Detected VOICE NOTE message")
-        else:
-            print(f"[Background] Detected TEXT message")
 
         # Create session ID from phone number
         session_id = f"whatsapp_{from_number}_{actual_instance}"
 
-        # Process message through pipeline
-        print(f"\n[Background] Step 5: Processing message...")
-        print(f"[Background] Message type: {message_type.value}")
-        print(f"[Background] Session ID: {session_id}")
+        ai_start = time.perf_counter()
 
-        ai_start = datetime.datetime.now()
-
-        print(f"[Background] 🔄 Processing with pipeline processor...")
         try:
             # Use the pipeline message processor
             request_obj = MessageRequest(
@@ -726,55 +672,30 @@ async def process_evolution_message(instance_name: str, body_bytes: bytes):
             routing_path = message_response.metadata.get("routing_path", "pipeline_processor")
             latency_ms = message_response.metadata.get("processing_time_ms", 0)
 
-            print(f"[Background] ✅ Message processed successfully via {routing_path}")
-
         except asyncio.TimeoutError:
-            print(f"[Background] ⏰ Processing timed out after 30s - using fallback response")
+            logger.warning("[Background] ⏰ Processing timed out after 30s - using fallback response")
             # Use fallback response on timeout
             ai_response = "Thank you for your message. We're processing your request and will respond shortly."
             routing_path = "timeout_fallback"
             latency_ms = 30000
             # Continue to send this fallback message
         except Exception as routing_error:
-            print(f"[Background] ❌ Processing error: {routing_error}")
-            import traceback
-            print(f"[Background] Processing traceback:\n{traceback.format_exc()}")
+            logger.error(f"[Background] ❌ Processing error: {routing_error}", exc_info=True)
             # Use error fallback
             ai_response = "We received your message. Please try again or contact us directly."
             routing_path = "error_fallback"
             latency_ms = 0
 
-        ai_end = datetime.datetime.now()
-        ai_duration = (ai_end - ai_start).total_seconds()
-
-        print(f"[Background] ✅ Response received via {routing_path} in {ai_duration:.2f}s ({latency_ms:.2f}ms)")
-        print(f"[Background] AI response length: {len(ai_response)} chars")
-        print(f"[Background] AI response: {ai_response[:300]}...")
+        ai_duration = time.perf_counter() - ai_start
 
         # Log performance metrics
         if latency_ms > 500 and message_type == MessageType.TEXT:
-            print(f"[Background] ⚠️ Text response exceeded 500ms target: {latency_ms:.2f}ms")
-        elif latency_ms <= 500 and message_type == MessageType.TEXT:
-            print(f"[Background] ✅ Text response met <500ms target: {latency_ms:.2f}ms")
+            logger.debug("[Background] Text response exceeded 500ms target: %.2fms", latency_ms)
 
         # Check if quick ack was sent or should be cancelled
-        quick_ack_was_sent = False
-        quick_ack_delay_s = quick_ack_config.get("delay_ms", 500) / 1000.0 if quick_ack_task else 0
         if quick_ack_task:
-            if quick_ack_task.done():
-                # Quick ack task completed - check if it was sent
-                try:
-                    quick_ack_was_sent = quick_ack_task.result()
-                    if quick_ack_was_sent:
-                        print(f"[Background] ℹ️ Quick ack was already sent (response took {ai_duration:.2f}s > {quick_ack_delay_s:.2f}s delay)")
-                except asyncio.CancelledError:
-                    print(f"[Background] ℹ️ Quick ack was cancelled earlier")
-            else:
+            if not quick_ack_task.done():
                 # Quick ack still waiting - cancel it since actual response is ready
-                if ai_duration < quick_ack_delay_s:
-                    print(f"[Background] 🚫 Cancelled quick ack - actual response ready in {ai_duration:.2f}s (< {quick_ack_delay_s:.2f}s delay)")
-                else:
-                    print(f"[Background] ⚠️ Quick ack task still running after {ai_duration:.2f}s (> {quick_ack_delay_s:.2f}s) - cancelling")
                 quick_ack_task.cancel()
                 try:
                     await quick_ack_task
@@ -782,8 +703,7 @@ async def process_evolution_message(instance_name: str, body_bytes: bytes):
                     pass  # Expected
 
         # Send response back via Evolution API
-        print(f"\n[Background] Step 6: Sending WhatsApp response...")
-        send_start = datetime.datetime.now()
+        send_start = time.perf_counter()
         send_result = await send_whatsapp_via_evolution(
             actual_instance,
             from_number,
@@ -791,44 +711,29 @@ async def process_evolution_message(instance_name: str, body_bytes: bytes):
             session_id,
             clinic_id
         )
-        send_end = datetime.datetime.now()
-        send_duration = (send_end - send_start).total_seconds()
+        send_duration = time.perf_counter() - send_start
 
-        if send_result:
-            print(f"[Background] ✅ Successfully sent response in {send_duration:.2f}s")
-        else:
-            print(f"[Background] ❌ Failed to send response after {send_duration:.2f}s")
-
-        process_end = datetime.datetime.now()
-        total_duration = (process_end - process_start).total_seconds()
-        print(f"\n[Background] 🏁 Total processing time: {total_duration:.2f} seconds")
-        print(f"[Background] Breakdown: AI={ai_duration:.2f}s, Send={send_duration:.2f}s")
+        logger.info(
+            "[Background] %s Message %s handled via %s (%s): total=%.2fs ai=%.2fs send=%.2fs response=%d chars",
+            "✅" if send_result else "❌ send failed,",
+            message_id, routing_path, message_type.value,
+            time.perf_counter() - process_start, ai_duration, send_duration, len(ai_response),
+        )
 
     except Exception as e:
-        process_end = datetime.datetime.now()
-        total_duration = (process_end - process_start).total_seconds()
-        print(f"\n[Background] ❌ Error after {total_duration:.2f} seconds")
-        print(f"[Background] Error type: {type(e).__name__}")
-        print(f"[Background] Error message: {e}")
-        import traceback
-        print(f"[Background] Full traceback:\n{traceback.format_exc()}")
+        logger.error(
+            f"[Background] ❌ Error after {time.perf_counter() - process_start:.2f}s "
+            f"({type(e).__name__}): {e}",
+            exc_info=True
+        )
 
 
 async def get_ai_response_with_rag(user_message: str, from_number: str, clinic_id: str, user_name: str) -> str:
     """Generate AI response using RAG-enabled multilingual processor"""
-    import datetime
-    rag_start = datetime.datetime.now()
-
-    print(f"\n{'='*80}")
-    print(f"[{rag_start.isoformat()}] AI RESPONSE GENERATION")
-    print(f"[RAG] User message: '{user_message}'")
-    print(f"[RAG] From: {from_number} ({user_name})")
-    print(f"[RAG] Clinic ID: {clinic_id}")
-    print(f"{'='*80}\n")
+    rag_start = time.perf_counter()
 
     try:
         # Create message request for RAG processor
-        print(f"[RAG] Step 1: Creating MessageRequest object...")
         message_sid = f"whatsapp_{from_number}_{os.urandom(8).hex()}"
 
         message_request = MessageRequest(
@@ -843,44 +748,25 @@ async def get_ai_response_with_rag(user_message: str, from_number: str, clinic_i
             metadata={}
         )
 
-        print(f"[RAG] Message SID: {message_sid}")
-        print(f"[RAG] Request object created successfully")
-
         # Process with feature-flagged processor
-        print(f"\n[RAG] Step 2: Processing with feature-flagged processor...")
-        print(f"[RAG] Calling processor.process_message()...")
-
-        process_start = datetime.datetime.now()
         processor = await get_message_processor_instance()
         response = await processor.process_message(message_request)
-        process_end = datetime.datetime.now()
-        process_duration = (process_end - process_start).total_seconds()
 
-        print(f"[RAG] ✅ Processing completed in {process_duration:.2f}s")
-        print(f"[RAG] Response type: {type(response)}")
-        print(f"[RAG] Response message length: {len(response.message)} chars")
-        print(f"[RAG] Response preview: {response.message[:300]}...")
-
-        rag_end = datetime.datetime.now()
-        total_duration = (rag_end - rag_start).total_seconds()
-        print(f"\n[RAG] Total AI generation time: {total_duration:.2f}s")
+        logger.debug(
+            "[RAG] Response for %s (clinic %s) in %.2fs: %d chars",
+            mask_phone(from_number), clinic_id, time.perf_counter() - rag_start, len(response.message),
+        )
 
         return response.message
 
     except Exception as e:
-        rag_end = datetime.datetime.now()
-        total_duration = (rag_end - rag_start).total_seconds()
-
-        print(f"\n[RAG] ❌ Error after {total_duration:.2f}s")
-        print(f"[RAG] Error type: {type(e).__name__}")
-        print(f"[RAG] Error message: {e}")
-
-        import traceback
-        print(f"[RAG] Full traceback:\n{traceback.format_exc()}")
+        logger.error(
+            f"[RAG] ❌ Error after {time.perf_counter() - rag_start:.2f}s ({type(e).__name__}): {e}",
+            exc_info=True
+        )
 
         # Fallback to basic response
         fallback = "I apologize, but I'm having trouble processing your message. Please try again or call our clinic directly at +1-234-567-8900."
-        print(f"[RAG] Returning fallback response: {fallback}")
         return fallback
 
 
@@ -912,10 +798,10 @@ async def send_whatsapp_via_evolution(
 
     message_id = str(uuid.uuid4())
 
-    print(f"[SendMessage] Writing message {message_id} to outbox for {to_number}")
-    print(f"[SendMessage] Instance: {instance_name}")
-    print(f"[SendMessage] Text length: {len(text)} chars")
-    print(f"[SendMessage] Text preview: {text[:100]}...")
+    logger.debug(
+        "[SendMessage] Writing message %s to outbox for %s (instance=%s, %d chars)",
+        message_id, mask_phone(to_number), instance_name, len(text),
+    )
 
     async def _write_to_outbox():
         try:
@@ -929,24 +815,19 @@ async def send_whatsapp_via_evolution(
                 message_id=message_id
             )
 
-            if success:
-                print(f"[SendMessage] ✅ Message written to outbox (id: {message_id})")
-                return True
-            else:
-                print(f"[SendMessage] ❌ Failed to write message to outbox")
-                return False
+            if not success:
+                logger.warning("[SendMessage] ❌ Failed to write message %s to outbox", message_id)
+            return bool(success)
 
         except Exception as e:
-            print(f"[SendMessage] ❌ Outbox write error: {e}")
-            import traceback
-            print(f"[SendMessage] Traceback: {traceback.format_exc()[:300]}")
+            logger.error(f"[SendMessage] ❌ Outbox write error: {e}", exc_info=True)
             return False
 
     try:
         # Cap write operation at 1s - don't block on slow database
         return await asyncio.wait_for(_write_to_outbox(), timeout=1.0)
     except asyncio.TimeoutError:
-        print(f"[SendMessage] ⚠️ Outbox write timed out (>1s), continuing")
+        logger.warning("[SendMessage] ⚠️ Outbox write timed out (>1s), continuing")
         # Return True optimistically - the write may still complete
         return True
 
@@ -1075,7 +956,7 @@ def extract_org_id_from_instance(instance_name: str) -> str:
 
 
 # NOTE: detect_language_simple was removed in Phase 1B.
-# Use LanguageService.detect_sync() instead (single source of truth).
+# Use analyze(text).language instead (LanguageService, computed once per message).
 
 
 @router.post("/{instance_name}")
@@ -1104,10 +985,7 @@ async def evolution_webhook_legacy(
         logger.info(f"[Legacy Webhook] FSM disabled - messages should go to claude-agent")
         return {"status": "ok", "message": "FSM webhook disabled - use claude-agent"}
 
-    import datetime
-    timestamp = datetime.datetime.now().isoformat()
-
-    logger.info(f"[Legacy Webhook] Received from instance: {instance_name}")
+    logger.debug("[Legacy Webhook] Received from instance: %s", instance_name)
 
     # SECURITY: Verify instance exists in database before processing
     # This prevents processing of spoofed webhooks with fake instance names
@@ -1125,14 +1003,14 @@ async def evolution_webhook_legacy(
         # Attacker can't distinguish between valid and invalid instances
         return {"status": "ok", "instance": instance_name}
 
-    logger.info(
-        f"[Legacy Webhook] VERIFIED - instance: {instance_name}, "
-        f"clinic_id: {clinic_info.get('clinic_id')}"
+    logger.debug(
+        "[Legacy Webhook] VERIFIED - instance: %s, clinic_id: %s",
+        instance_name, clinic_info.get('clinic_id'),
     )
 
-    # Return immediately, process in background
+    # Return immediately, process in background (raw bytes, parsed once there)
     if body:
-        body_bytes = json.dumps(body).encode('utf-8')
+        body_bytes = await request.body()
         asyncio.create_task(process_webhook_async(instance_name, body_bytes))
 
     return {"status": "ok", "instance": instance_name}
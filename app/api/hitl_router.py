@@ -12,7 +12,13 @@ from typing import Optional, List
 from datetime import datetime, timezone
 import logging
 
-from app.db.supabase_client import get_supabase_client
+from app.database import get_healthcare_client_async
+from app.services.hitl_state_cache import (
+    CONTROL_STATE_COLUMNS,
+    control_state_from_row,
+    get_hitl_state_cache,
+    publish_control_change,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -100,14 +106,14 @@ async def unlock_session(
         HTTPException 400: If session is not currently under human control
     """
     try:
-        supabase = get_supabase_client()
+        supabase = await get_healthcare_client_async()
 
-        # Get current session state
-        result = supabase.schema('healthcare').table('conversation_sessions').select(
-            'id, control_mode, locked_by, lock_reason, user_identifier'
-        ).eq('id', session_id).single().execute()
+        # Get current session state (from the database: this decides the transition)
+        result = await supabase.table('conversation_sessions').select(
+            CONTROL_STATE_COLUMNS
+        ).eq('id', session_id).maybe_single().execute()
 
-        if not result.data:
+        if not result or not result.data:
             raise HTTPException(status_code=404, detail=f"Session {session_id} not found")
 
         session = result.data
@@ -137,10 +143,12 @@ async def unlock_session(
             'updated_at': datetime.now(timezone.utc).isoformat()
         }
 
-        supabase.schema('healthcare').table('conversation_sessions').update(
+        await supabase.table('conversation_sessions').update(
             update_data
         ).eq('id', session_id).execute()
 
+        await publish_control_change(control_state_from_row({**session, **update_data}))
+
         logger.info(
             f"✅ Session {session_id[:8]}... unlocked by user {user_id}, "
             f"control mode: {current_mode} → agent, "
@@ -186,61 +194,34 @@ async def list_human_controlled_sessions(
         HumanControlledSessionsResponse with list of sessions
     """
     try:
-        supabase = get_supabase_client()
-
-        # If organization_id is provided, look up all clinic IDs for that organization
-        clinic_ids_to_filter = []
-        if organization_id:
-            clinics_result = supabase.schema('healthcare').table('clinics').select(
-                'id'
-            ).eq('organization_id', organization_id).execute()
-
-            clinic_ids_to_filter = [c['id'] for c in (clinics_result.data or [])]
-            logger.debug(f"Found {len(clinic_ids_to_filter)} clinics for organization {organization_id}")
-        elif clinic_id:
-            clinic_ids_to_filter = [clinic_id]
-
-        # Build query
-        query = supabase.schema('healthcare').table('conversation_sessions').select(
-            'id, control_mode, locked_by, locked_at, lock_reason, lock_source, '
-            'unread_for_human_count, last_human_message_at, user_identifier, metadata'
-        ).in_('control_mode', ['human', 'paused'])
-
-        if clinic_ids_to_filter:
-            # Filter by clinic_id in metadata using 'in' for multiple clinics
-            query = query.in_('metadata->>clinic_id', clinic_ids_to_filter)
-
-        # Order by most recently locked first
-        query = query.order('locked_at', desc=True).range(offset, offset + limit - 1)
-
-        result = query.execute()
-
-        sessions = []
-        for row in result.data or []:
-            sessions.append(SessionControlStatus(
-                session_id=row['id'],
-                control_mode=row['control_mode'],
-                locked_by=row.get('locked_by'),
-                locked_at=row.get('locked_at'),
-                lock_reason=row.get('lock_reason'),
-                lock_source=row.get('lock_source'),
-                unread_for_human_count=row.get('unread_for_human_count', 0),
-                last_human_message_at=row.get('last_human_message_at')
-            ))
-
-        # Get total count
-        count_query = supabase.schema('healthcare').table('conversation_sessions').select(
-            'id', count='exact'
-        ).in_('control_mode', ['human', 'paused'])
-
-        if clinic_ids_to_filter:
-            count_query = count_query.in_('metadata->>clinic_id', clinic_ids_to_filter)
-
-        count_result = count_query.execute()
-        total = count_result.count if hasattr(count_result, 'count') else len(sessions)
+        supabase = await get_healthcare_client_async()
+
+        try:
+            # Sessions joined to clinics by organization, page + total in one
+            # round trip (see docs/hitl_sessions_rpc.md)
+            result = await supabase.rpc('list_hitl_sessions', {
+                'p_organization_id': organization_id,
+                # organization_id takes precedence, as in the table-level path
+                'p_clinic_id': None if organization_id else clinic_id,
+                'p_limit': limit,
+                'p_offset': offset,
+            }).execute()
+            rows = result.data or []
+            if rows:
+                total = rows[0]['total_count']
+            elif offset == 0:
+                total = 0
+            else:
+                # Page past the end: the window total has no row to ride on
+                total = await _count_human_controlled_sessions(supabase, organization_id, clinic_id)
+        except Exception as e:
+            logger.warning(f"list_hitl_sessions RPC unavailable, querying tables directly: {e}")
+            rows, total = await _list_human_controlled_sessions_fallback(
+                supabase, organization_id, clinic_id, limit, offset
+            )
 
         return HumanControlledSessionsResponse(
-            sessions=sessions,
+            sessions=[SessionControlStatus(**_status_fields(control_state_from_row(row))) for row in rows],
             total=total
         )
 
@@ -252,6 +233,61 @@ async def list_human_controlled_sessions(
         )
 
 
+def _status_fields(state: dict) -> dict:
+    """Control state minus fields that SessionControlStatus does not expose."""
+    return {k: v for k, v in state.items() if k != 'clinic_id'}
+
+
+async def _resolve_clinic_ids(supabase, organization_id: Optional[str], clinic_id: Optional[str]) -> List[str]:
+    if organization_id:
+        clinics_result = await supabase.table('clinics').select(
+            'id'
+        ).eq('organization_id', organization_id).execute()
+        return [c['id'] for c in (clinics_result.data or [])]
+    return [clinic_id] if clinic_id else []
+
+
+async def _count_human_controlled_sessions(supabase, organization_id: Optional[str], clinic_id: Optional[str]) -> int:
+    clinic_ids = await _resolve_clinic_ids(supabase, organization_id, clinic_id)
+    if organization_id and not clinic_ids:
+        return 0
+
+    count_query = supabase.table('conversation_sessions').select(
+        'id', count='exact'
+    ).in_('control_mode', ['human', 'paused']).limit(1)
+    if clinic_ids:
+        count_query = count_query.in_('metadata->>clinic_id', clinic_ids)
+
+    count_result = await count_query.execute()
+    return count_result.count or 0
+
+
+async def _list_human_controlled_sessions_fallback(
+    supabase,
+    organization_id: Optional[str],
+    clinic_id: Optional[str],
+    limit: int,
+    offset: int
+) -> tuple:
+    """Table-level queries used until the list_hitl_sessions RPC is deployed."""
+    clinic_ids = await _resolve_clinic_ids(supabase, organization_id, clinic_id)
+    if organization_id and not clinic_ids:
+        return [], 0
+
+    query = supabase.table('conversation_sessions').select(
+        CONTROL_STATE_COLUMNS, count='exact'
+    ).in_('control_mode', ['human', 'paused'])
+
+    if clinic_ids:
+        # Filter by clinic_id in metadata using 'in' for multiple clinics
+        query = query.in_('metadata->>clinic_id', clinic_ids)
+
+    # Order by most recently locked first; count rides on the same request
+    result = await query.order('locked_at', desc=True).range(offset, offset + limit - 1).execute()
+    rows = result.data or []
+    return rows, result.count if result.count is not None else len(rows)
+
+
 @router.get("/session/{session_id}/status", response_model=SessionControlStatus)
 async def get_session_control_status(
     session_id: str,
@@ -267,27 +303,22 @@ async def get_session_control_status(
         SessionControlStatus with current control mode and lock info
     """
     try:
-        supabase = get_supabase_client()
+        cache = get_hitl_state_cache()
+        state = await cache.get_session_state(session_id)
 
-        result = supabase.schema('healthcare').table('conversation_sessions').select(
-            'id, control_mode, locked_by, locked_at, lock_reason, lock_source, '
-            'unread_for_human_count, last_human_message_at'
-        ).eq('id', session_id).single().execute()
+        if state is None:
+            supabase = await get_healthcare_client_async()
+            result = await supabase.table('conversation_sessions').select(
+                CONTROL_STATE_COLUMNS
+            ).eq('id', session_id).maybe_single().execute()
 
-        if not result.data:
-            raise HTTPException(status_code=404, detail=f"Session {session_id} not found")
+            if not result or not result.data:
+                raise HTTPException(status_code=404, detail=f"Session {session_id} not found")
 
-        row = result.data
-        return SessionControlStatus(
-            session_id=row['id'],
-            control_mode=row.get('control_mode', 'agent'),
-            locked_by=row.get('locked_by'),
-            locked_at=row.get('locked_at'),
-            lock_reason=row.get('lock_reason'),
-            lock_source=row.get('lock_source'),
-            unread_for_human_count=row.get('unread_for_human_count', 0),
-            last_human_message_at=row.get('last_human_message_at')
-        )
+            state = control_state_from_row(result.data)
+            await cache.set_session_state(state)
+
+        return SessionControlStatus(**_status_fields(state))
 
     except HTTPException:
         raise
@@ -319,15 +350,15 @@ async def lock_session_for_human(
         Updated session control status
     """
     try:
-        supabase = get_supabase_client()
+        supabase = await get_healthcare_client_async()
         user_id = current_user.get('id') if current_user else None
 
-        # Get current session state
-        result = supabase.schema('healthcare').table('conversation_sessions').select(
-            'id, control_mode'
-        ).eq('id', session_id).single().execute()
+        # Get current session state (from the database: this decides the transition)
+        result = await supabase.table('conversation_sessions').select(
+            CONTROL_STATE_COLUMNS
+        ).eq('id', session_id).maybe_single().execute()
 
-        if not result.data:
+        if not result or not result.data:
             raise HTTPException(status_code=404, detail=f"Session {session_id} not found")
 
         current_mode = result.data.get('control_mode', 'agent')
@@ -351,10 +382,12 @@ async def lock_session_for_human(
             'updated_at': datetime.now(timezone.utc).isoformat()
         }
 
-        supabase.schema('healthcare').table('conversation_sessions').update(
+        await supabase.table('conversation_sessions').update(
             update_data
         ).eq('id', session_id).execute()
 
+        await publish_control_change(control_state_from_row({**result.data, **update_data}))
+
         logger.info(
             f"✅ Session {session_id[:8]}... locked by user {user_id}, "
             f"control mode: {current_mode} → human, "
@@ -410,19 +443,25 @@ async def get_hitl_settings(
         HITLSettingsResponse with current settings
     """
     try:
-        supabase = get_supabase_client()
+        cache = get_hitl_state_cache()
+        settings = await cache.get_settings(clinic_id)
 
-        result = supabase.schema('healthcare').table('clinics').select(
-            'id, hitl_auto_release_hours'
-        ).eq('id', clinic_id).single().execute()
+        if settings is None:
+            supabase = await get_healthcare_client_async()
+            result = await supabase.table('clinics').select(
+                'id, hitl_auto_release_hours'
+            ).eq('id', clinic_id).maybe_single().execute()
 
-        if not result.data:
-            raise HTTPException(status_code=404, detail=f"Clinic {clinic_id} not found")
+            if not result or not result.data:
+                raise HTTPException(status_code=404, detail=f"Clinic {clinic_id} not found")
 
-        return HITLSettingsResponse(
-            clinic_id=result.data['id'],
-            hitl_auto_release_hours=result.data.get('hitl_auto_release_hours', 24) or 24
-        )
+            settings = {
+                'clinic_id': result.data['id'],
+                'hitl_auto_release_hours': result.data.get('hitl_auto_release_hours', 24) or 24
+            }
+            await cache.set_settings(settings)
+
+        return HITLSettingsResponse(**settings)
 
     except HTTPException:
         raise
@@ -451,24 +490,21 @@ async def update_hitl_settings(
         HITLSettingsResponse with updated settings
     """
     try:
-        supabase = get_supabase_client()
-
-        # Verify clinic exists first
-        check_result = supabase.schema('healthcare').table('clinics').select(
-            'id'
-        ).eq('id', clinic_id).single().execute()
+        supabase = await get_healthcare_client_async()
 
-        if not check_result.data:
-            raise HTTPException(status_code=404, detail=f"Clinic {clinic_id} not found")
-
-        # Update settings
-        result = supabase.schema('healthcare').table('clinics').update({
+        # Update settings; no row back means the clinic does not exist
+        result = await supabase.table('clinics').update({
             'hitl_auto_release_hours': request.hitl_auto_release_hours,
             'updated_at': datetime.now(timezone.utc).isoformat()
         }).eq('id', clinic_id).execute()
 
         if not result.data:
-            raise HTTPException(status_code=500, detail="Failed to update settings")
+            raise HTTPException(status_code=404, detail=f"Clinic {clinic_id} not found")
+
+        await get_hitl_state_cache().set_settings({
+            'clinic_id': clinic_id,
+            'hitl_auto_release_hours': request.hitl_auto_release_hours
+        })
 
         logger.info(
             f"HITL settings updated for clinic {clinic_id[:8]}...: "
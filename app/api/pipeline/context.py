@@ -12,6 +12,7 @@ from typing import Optional, Dict, List, Any, Set, Tuple, TYPE_CHECKING
 from datetime import datetime
 
 from app.services.conversation_constraints import ConversationConstraints
+from app.services.message_analysis import MessageAnalysis, analyze
 
 if TYPE_CHECKING:
     from app.domain.preferences.narrowing import NarrowingInstruction
@@ -70,6 +71,7 @@ class PipelineContext:
     patient_name: Optional[str] = None
     conversation_history: List[Dict[str, Any]] = field(default_factory=list)
     session_messages: List[Dict[str, str]] = field(default_factory=list)
+    context_summary: Optional[str] = None  # Rolling summary of turns folded out of session_messages
     user_preferences: Dict[str, Any] = field(default_factory=dict)
     profile: Optional[Any] = None  # PatientProfile from ProfileManager
     conversation_state: Optional[Any] = None  # ConversationState from ProfileManager
@@ -144,6 +146,17 @@ class PipelineContext:
         """Return the resolved clinic ID or fallback to original."""
         return self.resolved_clinic_id or self.clinic_id
 
+    @property
+    def analysis(self) -> MessageAnalysis:
+        """
+        Compute-once text analysis of the inbound message.
+
+        Language, normalized forms, tokens and time anchors are computed on
+        first access and shared by every step (and by services that call
+        analyze() on the same text).
+        """
+        return analyze(self.message)
+
     @property
     def masked_phone(self) -> str:
         """Return masked phone number for PII-safe logging."""
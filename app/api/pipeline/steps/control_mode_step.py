@@ -166,22 +166,24 @@ class ControlModeGateStep(PipelineStep):
                     'increment_unread_count',
                     {'p_session_id': session_id}
                 ).execute()
-                return
             except Exception:
-                pass
+                # Fallback: direct update (not atomic but usually okay)
+                result = self._supabase.table('conversation_sessions').select(
+                    'unread_for_human_count'
+                ).eq('id', session_id).single().execute()
 
-            # Fallback: direct update (not atomic but usually okay)
-            result = self._supabase.table('conversation_sessions').select(
-                'unread_for_human_count'
-            ).eq('id', session_id).single().execute()
+                current_count = 0
+                if result.data:
+                    current_count = result.data.get('unread_for_human_count', 0) or 0
 
-            current_count = 0
-            if result.data:
-                current_count = result.data.get('unread_for_human_count', 0) or 0
-
-            self._supabase.table('conversation_sessions').update({
-                'unread_for_human_count': current_count + 1
-            }).eq('id', session_id).execute()
+                self._supabase.table('conversation_sessions').update({
+                    'unread_for_human_count': current_count + 1
+                }).eq('id', session_id).execute()
 
         except Exception as e:
             logger.warning(f"Failed to increment unread count: {e}")
+            return
+
+        # The cached control state carries the unread count
+        from app.services.hitl_state_cache import invalidate_session_state
+        await invalidate_session_state(session_id)
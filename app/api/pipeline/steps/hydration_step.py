@@ -24,18 +24,20 @@ class ContextHydrationStep(PipelineStep):
     1. Fetch clinic profile, services, doctors, FAQs
     2. Fetch patient profile and conversation state
     3. Fetch conversation history
-    4. Build session messages for LLM context
+    4. Build session messages for LLM context (bounded by the context compactor)
     5. Build additional context (pending actions, etc.)
     """
 
-    def __init__(self, context_hydrator=None):
+    def __init__(self, context_hydrator=None, context_compactor=None):
         """
         Initialize with MessageContextHydrator.
 
         Args:
             context_hydrator: MessageContextHydrator instance
+            context_compactor: SessionContextCompactor instance (optional)
         """
         self._hydrator = context_hydrator
+        self._compactor = context_compactor
 
     @property
     def name(self) -> str:
@@ -48,7 +50,7 @@ class ContextHydrationStep(PipelineStep):
         Sets on context:
         - clinic_profile, clinic_services, clinic_doctors, clinic_faqs
         - patient_profile, patient_name, patient_id
-        - conversation_history, session_messages
+        - conversation_history, session_messages, context_summary
         - user_preferences, profile, conversation_state
         - additional_context
         """
@@ -110,6 +112,13 @@ class ContextHydrationStep(PipelineStep):
         # Build session messages for LLM context
         ctx.session_messages = self._build_session_messages(ctx.conversation_history)
 
+        # Fold older turns into the rolling summary, keep the newest within the token budget
+        if self._compactor:
+            try:
+                self._compactor.compact(ctx)
+            except Exception as e:
+                logger.warning(f"[Compaction] Skipped, sending full history: {e}")
+
         # Resolve clinic name
         resolved_clinic_name = (
             ctx.clinic_profile.get('name')
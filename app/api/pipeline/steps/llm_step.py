@@ -19,6 +19,7 @@ from typing import Tuple, Dict, Any, List, Optional
 from ..base import PipelineStep
 from ..context import PipelineContext
 from app.domain.preferences.narrowing import NarrowingAction, NarrowingInstruction
+from app.services.llm.concurrency import LLMOverloadedError, LLMPriority
 from app.prompts import (
     PromptComposer,
     build_doctors_text,
@@ -142,6 +143,13 @@ class LLMGenerationStep(PipelineStep):
             ctx.llm_metrics['error_occurred'] = True
             ctx.llm_metrics['error_message'] = 'LLM timeout'
 
+        except LLMOverloadedError as e:
+            # Shed by the provider concurrency limiter: answer now instead of queueing
+            logger.warning(f"LLM overloaded, using fallback: {e}")
+            ctx.response = self._get_timeout_fallback(ctx)
+            ctx.llm_metrics['error_occurred'] = True
+            ctx.llm_metrics['error_message'] = 'LLM overloaded'
+
         except Exception as e:
             logger.error(f"Error generating AI response: {e}", exc_info=True)
             ctx.response = self._get_error_fallback(ctx.detected_language)
@@ -227,7 +235,8 @@ class LLMGenerationStep(PipelineStep):
                     tools=tool_schemas,
                     model=None,
                     temperature=1.0,
-                    max_tokens=300
+                    max_tokens=300,
+                    priority=LLMPriority.INTERACTIVE
                 ),
                 timeout=20.0
             )
@@ -321,7 +330,8 @@ class LLMGenerationStep(PipelineStep):
                         tools=tool_schemas,
                         model=None,
                         temperature=0.7,
-                        max_tokens=300
+                        max_tokens=300,
+                        priority=LLMPriority.INTERACTIVE
                     )
 
                     if not llm_response.tool_calls:
@@ -182,6 +182,11 @@ class PostProcessingStep(PipelineStep):
                 response_analysis.get('promises_followup')):
 
                 await self._schedule_followup(ctx, response_analysis)
+            elif (self._followup_scheduler and
+                  ctx.turn_status == 'agent_action_pending' and
+                  new_turn_status != 'agent_action_pending'):
+                # The pending action was answered: its indexed follow-up is moot
+                await self._followup_scheduler.cancel_scheduled_followup(ctx.session_id)
 
         # 7.5. Phase 5.2: Persist session language for language inertia
         if self._supabase and ctx.session_id and ctx.session_language:
@@ -217,16 +217,16 @@ class RoutingStep(PipelineStep):
         Returns:
             Detected language code
         """
-        message = ctx.message.strip()
-        word_count = len(message.split())
-        char_count = len(message)
-        message_lower = message.lower()
+        analysis = ctx.analysis
+        message = analysis.stripped
+        word_count = analysis.word_count
+        char_count = analysis.char_count
 
         # Rule 1: Short text handling with strong indicator override
         if word_count < 4 or char_count < 20:
             if ctx.session_language:
                 # Phase 3: Check for strong language indicators that override inertia
-                detected_lang = self._check_strong_indicators(message_lower)
+                detected_lang = self._check_strong_indicators(analysis.word_set)
                 if detected_lang:
                     if detected_lang != ctx.session_language:
                         logger.info(
@@ -248,7 +248,7 @@ class RoutingStep(PipelineStep):
 
         # Detect fresh for substantial text using language service or fallback
         if self._language_service:
-            detected = self._language_service.detect_sync(message)
+            detected = analysis.language
         else:
             detected = self._detect_language_fallback(message)
 
@@ -260,7 +260,7 @@ class RoutingStep(PipelineStep):
 
         return detected
 
-    def _check_strong_indicators(self, message_lower: str) -> str | None:
+    def _check_strong_indicators(self, words: Set[str]) -> str | None:
         """
         Check if message contains strong language indicators.
 
@@ -269,14 +269,11 @@ class RoutingStep(PipelineStep):
         the user's intended language.
 
         Args:
-            message_lower: Lowercased message text
+            words: Lowercased whitespace-split words of the message
 
         Returns:
             Language code if strong indicator found, else None
         """
-        # Split into words for token-level matching
-        words = set(message_lower.split())
-
         for lang, indicators in STRONG_LANGUAGE_INDICATORS.items():
             # Check for any word match
             if words & indicators:
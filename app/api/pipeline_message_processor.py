@@ -12,6 +12,7 @@ from typing import Optional
 from pydantic import BaseModel, Field
 
 from app.api.pipeline import PipelineContext, MessageProcessingPipeline
+from app.observability.io_accounting import track_io
 from app.api.pipeline.steps import (
     SessionManagementStep,
     ControlModeGateStep,
@@ -74,6 +75,7 @@ class PipelineMessageProcessor:
         from app.services.state_echo_formatter import StateEchoFormatter
         from app.services.tools.executor import ToolExecutor
         from app.services.message_context_hydrator import MessageContextHydrator
+        from app.services.context_compaction import get_context_compactor
         from app.services.session_controller import SessionController
         from app.services.language_service import LanguageService
         from app.services.router_service import RouterService
@@ -108,6 +110,7 @@ class PipelineMessageProcessor:
 
         # Context hydration
         self.context_hydrator = MessageContextHydrator(self.memory_manager, self.profile_manager)
+        self.context_compactor = get_context_compactor()
 
         # Escalation and follow-up
         self.escalation_handler = EscalationHandler()
@@ -173,7 +176,8 @@ class PipelineMessageProcessor:
                 memory_manager=self.memory_manager
             ),
             ContextHydrationStep(
-                context_hydrator=self.context_hydrator
+                context_hydrator=self.context_hydrator,
+                context_compactor=self.context_compactor
             ),
             EscalationCheckStep(
                 escalation_handler=self.escalation_handler,
@@ -215,8 +219,15 @@ class PipelineMessageProcessor:
             ),
         ])
 
-        # Execute pipeline
-        ctx = await pipeline.execute(ctx)
+        # Execute pipeline, accounting every backend call made for this message
+        with track_io("whatsapp_message", channel=ctx.channel, clinic_id=ctx.clinic_id) as io:
+            ctx = await pipeline.execute(ctx)
+            io.fields.update(
+                session_id=ctx.session_id,
+                lane=ctx.lane,
+                total_ms=round(ctx.step_timings.get('_total', 0.0), 1),
+                failed_step=ctx.response_metadata.get('failed_step'),
+            )
 
         # Build response
         return MessageResponse(
@@ -362,6 +362,7 @@ async def preview_composed_prompt(
     mock_ctx.constraints = None
     mock_ctx.narrowing_instruction = None
     mock_ctx.session_messages = []
+    mock_ctx.context_summary = None
     mock_ctx.previous_session_summary = None
     mock_ctx.additional_context = ""
 
@@ -4,8 +4,10 @@ Superadmin Platform API — cross-org aggregation endpoints.
 Protected by require_superadmin() — only users with is_superadmin=TRUE can access.
 """
 import logging
+import re
 from datetime import datetime, timezone, timedelta
 
+from cachetools import TTLCache
 from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import Optional
 
@@ -17,6 +19,15 @@ logger = logging.getLogger(__name__)
 
 SCHEMA = "sales"
 
+# Dashboard responses are cached briefly so repeated page loads and polling
+# do not re-run the aggregation queries. Invalidated on organization delete.
+RESPONSE_CACHE_TTL_SECONDS = 30
+_overview_cache: TTLCache = TTLCache(maxsize=1, ttl=RESPONSE_CACHE_TTL_SECONDS)
+_organizations_cache: TTLCache = TTLCache(maxsize=256, ttl=RESPONSE_CACHE_TTL_SECONDS)
+
+# Characters with meaning in PostgREST filter strings / LIKE patterns
+_SEARCH_UNSAFE_CHARS = re.compile(r'[,()*%\\:"]')
+
 
 def _get_supabase():
     """Get Supabase client bound to the sales schema."""
@@ -46,6 +57,78 @@ def _previous_month_range():
     return prev_start.isoformat(), current_start.isoformat()
 
 
+def _clear_response_caches():
+    """Drop cached dashboard responses after a write that changes them."""
+    _overview_cache.clear()
+    _organizations_cache.clear()
+
+
+def _usage_totals(rows):
+    """Sum usage_logs rows into the per-period KPI shape."""
+    return {
+        "total_messages": sum((r.get('messages_in') or 0) + (r.get('messages_out') or 0) for r in rows),
+        "total_tokens": sum((r.get('llm_input_tokens') or 0) + (r.get('llm_output_tokens') or 0) for r in rows),
+        "total_leads": sum(r.get('leads_created') or 0 for r in rows),
+        "total_escalations": sum(r.get('escalations') or 0 for r in rows),
+        "active_orgs": len(set(r.get('organization_id') for r in rows if r.get('organization_id'))),
+    }
+
+
+def _aggregate_platform_overview(supabase, cur_start, cur_end, prev_start, prev_end):
+    """
+    Compute platform KPIs from the base tables.
+
+    Fallback for databases where the get_platform_kpis rollup RPC has not
+    been deployed yet; downloads every row, so cost grows with the platform.
+    """
+    # --- Organizations by status ---
+    orgs = supabase.schema(SCHEMA).table('organizations') \
+        .select('id, activation_status, subscription_plan') \
+        .execute().data or []
+
+    # --- Team members ---
+    members = supabase.schema(SCHEMA).table('team_members') \
+        .select('id, is_superadmin') \
+        .execute().data or []
+
+    # --- Usage: current and previous month ---
+    usage_columns = 'organization_id, messages_in, messages_out, llm_input_tokens, llm_output_tokens, leads_created, escalations'
+    cur_usage = supabase.schema(SCHEMA).table('usage_logs') \
+        .select(usage_columns) \
+        .gte('period_start', cur_start) \
+        .lt('period_start', cur_end) \
+        .execute().data or []
+    prev_usage = supabase.schema(SCHEMA).table('usage_logs') \
+        .select(usage_columns) \
+        .gte('period_start', prev_start) \
+        .lt('period_start', prev_end) \
+        .execute().data or []
+
+    # --- Onboarding funnel ---
+    onboarding = supabase.schema(SCHEMA).table('onboarding_progress') \
+        .select('organization_id, company_basics, product_knowledge, qualification, whatsapp_setup, test_and_launch') \
+        .execute().data or []
+
+    return {
+        "total_organizations": len(orgs),
+        "active_organizations": sum(1 for o in orgs if o.get('activation_status') == 'active'),
+        "trial_organizations": sum(1 for o in orgs if o.get('subscription_plan') == 'trial'),
+        "paused_organizations": sum(1 for o in orgs if o.get('activation_status') == 'paused'),
+        "total_users": len(members),
+        "total_superadmins": sum(1 for m in members if m.get('is_superadmin')),
+        "current_month": _usage_totals(cur_usage),
+        "previous_month": _usage_totals(prev_usage),
+        "onboarding_funnel": {
+            "total": len(orgs),
+            "company_basics_done": sum(1 for o in onboarding if o.get('company_basics')),
+            "product_knowledge_done": sum(1 for o in onboarding if o.get('product_knowledge')),
+            "qualification_done": sum(1 for o in onboarding if o.get('qualification')),
+            "whatsapp_connected": sum(1 for o in onboarding if o.get('whatsapp_setup')),
+            "test_and_launch_done": sum(1 for o in onboarding if o.get('test_and_launch')),
+        },
+    }
+
+
 # ============================================================================
 # Endpoint 1: Platform Overview
 # ============================================================================
@@ -55,89 +138,33 @@ async def get_platform_overview(user: TokenPayload = Depends(require_superadmin(
     """
     Aggregated platform KPIs: org counts, user counts, usage totals, onboarding funnel.
     """
+    cached = _overview_cache.get('overview')
+    if cached is not None:
+        return cached
+
     supabase = _get_supabase()
 
     try:
-        # --- Organizations by status ---
-        orgs_result = supabase.schema(SCHEMA).table('organizations') \
-            .select('id, activation_status, subscription_plan') \
-            .execute()
-
-        orgs = orgs_result.data or []
-        total_organizations = len(orgs)
-        active_organizations = sum(1 for o in orgs if o.get('activation_status') == 'active')
-        trial_organizations = sum(1 for o in orgs if o.get('subscription_plan') == 'trial')
-        paused_organizations = sum(1 for o in orgs if o.get('activation_status') == 'paused')
-
-        # --- Team members ---
-        members_result = supabase.schema(SCHEMA).table('team_members') \
-            .select('id, is_superadmin') \
-            .execute()
-
-        members = members_result.data or []
-        total_users = len(members)
-        total_superadmins = sum(1 for m in members if m.get('is_superadmin'))
-
-        # --- Usage: current month ---
         cur_start, cur_end = _current_month_range()
-        cur_usage_result = supabase.schema(SCHEMA).table('usage_logs') \
-            .select('organization_id, messages_in, messages_out, llm_input_tokens, llm_output_tokens, leads_created, escalations') \
-            .gte('period_start', cur_start) \
-            .lt('period_start', cur_end) \
-            .execute()
-
-        cur_usage = cur_usage_result.data or []
-        current_month = {
-            "total_messages": sum((r.get('messages_in') or 0) + (r.get('messages_out') or 0) for r in cur_usage),
-            "total_tokens": sum((r.get('llm_input_tokens') or 0) + (r.get('llm_output_tokens') or 0) for r in cur_usage),
-            "total_leads": sum(r.get('leads_created') or 0 for r in cur_usage),
-            "total_escalations": sum(r.get('escalations') or 0 for r in cur_usage),
-            "active_orgs": len(set(r.get('organization_id') for r in cur_usage if r.get('organization_id'))),
-        }
-
-        # --- Usage: previous month ---
         prev_start, prev_end = _previous_month_range()
-        prev_usage_result = supabase.schema(SCHEMA).table('usage_logs') \
-            .select('organization_id, messages_in, messages_out, llm_input_tokens, llm_output_tokens, leads_created, escalations') \
-            .gte('period_start', prev_start) \
-            .lt('period_start', prev_end) \
-            .execute()
 
-        prev_usage = prev_usage_result.data or []
-        previous_month = {
-            "total_messages": sum((r.get('messages_in') or 0) + (r.get('messages_out') or 0) for r in prev_usage),
-            "total_tokens": sum((r.get('llm_input_tokens') or 0) + (r.get('llm_output_tokens') or 0) for r in prev_usage),
-            "total_leads": sum(r.get('leads_created') or 0 for r in prev_usage),
-            "total_escalations": sum(r.get('escalations') or 0 for r in prev_usage),
-            "active_orgs": len(set(r.get('organization_id') for r in prev_usage if r.get('organization_id'))),
-        }
-
-        # --- Onboarding funnel ---
-        onboarding_result = supabase.schema(SCHEMA).table('onboarding_progress') \
-            .select('organization_id, company_basics, product_knowledge, qualification, whatsapp_setup, test_and_launch') \
-            .execute()
-
-        onboarding = onboarding_result.data or []
-        onboarding_funnel = {
-            "total": total_organizations,
-            "company_basics_done": sum(1 for o in onboarding if o.get('company_basics')),
-            "product_knowledge_done": sum(1 for o in onboarding if o.get('product_knowledge')),
-            "qualification_done": sum(1 for o in onboarding if o.get('qualification')),
-            "whatsapp_connected": sum(1 for o in onboarding if o.get('whatsapp_setup')),
-            "test_and_launch_done": sum(1 for o in onboarding if o.get('test_and_launch')),
-        }
-
-        return {
-            "total_organizations": total_organizations,
-            "active_organizations": active_organizations,
-            "trial_organizations": trial_organizations,
-            "paused_organizations": paused_organizations,
-            "total_users": total_users,
-            "total_superadmins": total_superadmins,
-            "current_month": current_month,
-            "previous_month": previous_month,
-            "onboarding_funnel": onboarding_funnel,
-        }
+        try:
+            # Pre-aggregated rollups maintained by triggers (see docs/superadmin_kpi_rollups.md)
+            result = supabase.schema(SCHEMA).rpc('get_platform_kpis', {
+                'p_current_start': cur_start,
+                'p_current_end': cur_end,
+                'p_previous_start': prev_start,
+                'p_previous_end': prev_end,
+            }).execute()
+            overview = result.data
+            if not overview:
+                raise ValueError("get_platform_kpis returned no data")
+        except Exception as e:
+            logger.warning(f"KPI rollup RPC unavailable, aggregating from base tables: {e}")
+            overview = _aggregate_platform_overview(supabase, cur_start, cur_end, prev_start, prev_end)
+
+        _overview_cache['overview'] = overview
+        return overview
 
     except HTTPException:
         raise
@@ -162,32 +189,37 @@ async def get_organizations(
     """
     List all organizations with usage and status. Supports search, filter, pagination.
     """
+    cache_key = (search, status, sort, page, per_page)
+    cached = _organizations_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     supabase = _get_supabase()
 
     try:
-        # Fetch all orgs
+        # Filter, count and paginate in the database
         query = supabase.schema(SCHEMA).table('organizations') \
-            .select('id, name, slug, activation_status, subscription_plan, subscription_status, trial_ends_at, created_at')
+            .select('id, name, slug, activation_status, subscription_plan, subscription_status, trial_ends_at, created_at', count='exact')
 
         if status:
             query = query.eq('activation_status', status)
 
-        orgs_result = query.order('created_at', desc=True).execute()
-        orgs = orgs_result.data or []
-
-        # Client-side search (Supabase PostgREST textSearch requires FTS config)
-        if search:
-            search_lower = search.lower()
-            orgs = [o for o in orgs if search_lower in (o.get('name') or '').lower() or search_lower in (o.get('slug') or '').lower()]
+        # Case-insensitive substring match on name/slug (served by trigram indexes)
+        search_term = _SEARCH_UNSAFE_CHARS.sub(' ', search).strip() if search else ''
+        if search_term:
+            query = query.or_(f"name.ilike.*{search_term}*,slug.ilike.*{search_term}*")
 
-        total = len(orgs)
-
-        # Paginate
         start = (page - 1) * per_page
-        orgs_page = orgs[start:start + per_page]
+        orgs_result = query.order('created_at', desc=True) \
+            .range(start, start + per_page - 1) \
+            .execute()
+        orgs_page = orgs_result.data or []
+        total = orgs_result.count if orgs_result.count is not None else start + len(orgs_page)
 
         if not orgs_page:
-            return {"organizations": [], "total": total, "page": page, "per_page": per_page}
+            response = {"organizations": [], "total": total, "page": page, "per_page": per_page}
+            _organizations_cache[cache_key] = response
+            return response
 
         org_ids = [o['id'] for o in orgs_page]
 
@@ -272,12 +304,14 @@ async def get_organizations(
                 "created_at": org.get('created_at'),
             })
 
-        return {
+        response = {
             "organizations": organizations,
             "total": total,
             "page": page,
             "per_page": per_page,
         }
+        _organizations_cache[cache_key] = response
+        return response
 
     except HTTPException:
         raise
@@ -401,6 +435,7 @@ async def delete_organization(
             raise HTTPException(status_code=400, detail=message)
 
         logger.info(f"Superadmin {user.sub} deleted organization {org_id}")
+        _clear_response_caches()
         return data
 
     except HTTPException:
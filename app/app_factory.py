@@ -6,6 +6,7 @@ Creates and configures the FastAPI application with:
 - CORS middleware
 - Rate limiting middleware
 - HIPAA audit middleware
+- Per-request I/O accounting (opt-in)
 """
 import logging
 from fastapi import FastAPI, Request
@@ -93,6 +94,21 @@ def configure_audit_middleware(app: FastAPI):
     app.add_middleware(HIPAAAuditMiddleware)
 
 
+def configure_io_accounting(app: FastAPI):
+    """Account backend calls per HTTP request (opt-in via IO_ACCOUNTING_ENABLED)."""
+    from app.observability.io_accounting import IO_ACCOUNTING_ENABLED, track_io
+
+    if not IO_ACCOUNTING_ENABLED:
+        return
+
+    @app.middleware("http")
+    async def io_accounting_middleware(request: Request, call_next):
+        with track_io("http_request", path=request.url.path, method=request.method) as io:
+            response = await call_next(request)
+            io.fields["status"] = response.status_code
+            return response
+
+
 def create_app() -> FastAPI:
     """
     Create and configure the FastAPI application.
@@ -130,5 +146,6 @@ Use the Authorize button above to set your JWT token.
     configure_cors(app)
     configure_rate_limiting(app)
     configure_audit_middleware(app)
+    configure_io_accounting(app)
 
     return app
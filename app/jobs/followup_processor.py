@@ -7,12 +7,20 @@ import asyncio
 
 logger = logging.getLogger(__name__)
 
+# Concurrent follow-ups when the table fallback is used (no per-clinic limits)
+FOLLOWUP_FALLBACK_CONCURRENCY = 5
+
+# Rows per page when reading pending follow-ups (PostgREST caps responses)
+FOLLOWUP_PAGE_SIZE = 1000
+
 class FollowupProcessor:
     """Processes scheduled follow-ups that are due"""
 
-    def __init__(self):
-        from app.memory.conversation_memory import get_memory_manager
-        self.manager = get_memory_manager()
+    def __init__(self, manager=None):
+        if manager is None:
+            from app.memory.conversation_memory import get_memory_manager
+            manager = get_memory_manager()
+        self.manager = manager
 
     async def get_due_followups(self) -> List[Dict[str, Any]]:
         """Get all conversations with scheduled follow-ups that are now due"""
@@ -30,8 +38,62 @@ class FollowupProcessor:
         logger.info(f"Found {len(result.data)} due follow-ups")
         return result.data
 
-    async def send_followup_message(self, session: Dict[str, Any]):
-        """Send follow-up message for a session"""
+    def get_pending_followups(self) -> List[Dict[str, Any]]:
+        """
+        Ids and due times of every scheduled follow-up (for rebuilding the Redis index)
+
+        Paged in id order until the exact count is reached, since the server
+        may cap a response below FOLLOWUP_PAGE_SIZE. Raises RuntimeError when
+        the rows stop short of the count, so a partial rebuild is not
+        mistaken for a complete one.
+        """
+
+        rows: List[Dict[str, Any]] = []
+        while True:
+            result = self.manager.supabase.table('conversation_sessions').select(
+                'id, scheduled_followup_at', count='exact'
+            ).not_.is_(
+                'scheduled_followup_at', 'null'
+            ).eq(
+                'turn_status', 'agent_action_pending'
+            ).is_(
+                'ended_at', 'null'
+            ).order('id').range(len(rows), len(rows) + FOLLOWUP_PAGE_SIZE - 1).execute()
+
+            page = result.data or []
+            rows.extend(page)
+            total = getattr(result, 'count', None)
+            if total is None:
+                if len(page) < FOLLOWUP_PAGE_SIZE:
+                    return rows
+            elif len(rows) >= total:
+                return rows
+            elif not page:
+                raise RuntimeError(f"Pending follow-ups truncated at {len(rows)} of {total} rows")
+
+    def get_sessions(self, session_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch session rows by id in one query"""
+
+        if not session_ids:
+            return {}
+
+        result = self.manager.supabase.table('conversation_sessions').select('*').in_(
+            'id', session_ids
+        ).execute()
+
+        return {row['id']: row for row in (result.data or [])}
+
+    @staticmethod
+    def is_pending(session: Dict[str, Any]) -> bool:
+        """Whether the session still waits for its scheduled follow-up"""
+        return (
+            bool(session.get('scheduled_followup_at'))
+            and session.get('turn_status') == 'agent_action_pending'
+            and not session.get('ended_at')
+        )
+
+    async def send_followup_message(self, session: Dict[str, Any]) -> bool:
+        """Send follow-up message for a session; returns whether it was processed"""
 
         session_id = session['id']
         user_identifier = session['user_identifier']
@@ -54,28 +116,50 @@ class FollowupProcessor:
 
         try:
             # Update session to mark follow-up as processed
-            self.manager.supabase.table('conversation_sessions').update({
+            update = self.manager.supabase.table('conversation_sessions').update({
                 'scheduled_followup_at': None,  # Clear scheduled time
                 'turn_status': 'agent_turn',  # Agent should respond now
                 'updated_at': datetime.utcnow().isoformat(),
                 'metadata': {
-                    **session.get('metadata', {}),
+                    **(session.get('metadata') or {}),
                     'last_followup_processed': datetime.utcnow().isoformat()
                 }
-            }).eq('id', session_id).execute()
+            }).eq('id', session_id)
+            await asyncio.to_thread(update.execute)
 
             logger.info(f"✅ Follow-up processed for {session_id}")
 
             # TODO: Actually trigger agent response via Evolution API or WhatsApp
+            return True
 
         except Exception as e:
             logger.error(f"Failed to process follow-up for {session_id}: {e}")
+            return False
 
     async def run(self):
-        """Main job loop - call this from cron/scheduler"""
+        """
+        One-shot sweep - call this from cron/scheduler.
+
+        Rebuilds the Redis follow-up index from the table and dispatches
+        everything due through FollowupDispatcher (concurrent, per-clinic
+        rate limited). Falls back to reading due rows from the table when
+        Redis is unavailable. The app normally runs the dispatcher
+        continuously instead.
+        """
 
         logger.info("🔄 Running follow-up processor...")
 
+        from app.workers.followup_dispatcher import FollowupDispatcher
+
+        try:
+            dispatcher = FollowupDispatcher(processor=self)
+            await dispatcher.rebuild()
+            processed = await dispatcher.run_once()
+            logger.info(f"✅ Dispatched {processed} follow-ups ({dispatcher.stats})")
+            return
+        except Exception as e:
+            logger.warning(f"Follow-up index unavailable ({e}), reading due follow-ups from the table")
+
         try:
             due_followups = await self.get_due_followups()
 
@@ -83,12 +167,15 @@ class FollowupProcessor:
                 logger.info("No due follow-ups")
                 return
 
-            # Process each follow-up
-            for session in due_followups:
-                await self.send_followup_message(session)
-                await asyncio.sleep(1)  # Rate limiting
+            semaphore = asyncio.Semaphore(FOLLOWUP_FALLBACK_CONCURRENCY)
+
+            async def _send(session: Dict[str, Any]) -> bool:
+                async with semaphore:
+                    return await self.send_followup_message(session)
+
+            sent = await asyncio.gather(*(_send(session) for session in due_followups))
 
-            logger.info(f"✅ Processed {len(due_followups)} follow-ups")
+            logger.info(f"✅ Processed {sum(sent)} of {len(due_followups)} follow-ups")
 
         except Exception as e:
             logger.error(f"Follow-up processor failed: {e}", exc_info=True)
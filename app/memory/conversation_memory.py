@@ -11,6 +11,8 @@ from typing import Dict, Any, List, Optional, TYPE_CHECKING, Set, Iterable, Tupl
 from supabase import create_client, Client
 import logging
 import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from time import perf_counter
 
 if TYPE_CHECKING:
@@ -23,6 +25,7 @@ except ImportError:
     Memory = None
 
 from app.memory.mem0_metrics import get_mem0_metrics_recorder
+from app.memory.mem0_write_pipeline import Mem0WritePipeline
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +34,19 @@ logger = logging.getLogger(__name__)
 # Enforce a floor of 800ms to prevent overly aggressive timeouts.
 MEM0_TIMEOUT_MS = max(int(os.getenv("MEM0_TIMEOUT_MS", "6000")), 800)
 
+# Write pipeline: shard workers keyed by user, each running one (coalesced) add at a time
+MEM0_WRITE_SHARDS = max(int(os.getenv("MEM0_WRITE_SHARDS", "4")), 1)
+# Pending jobs per shard before the overflow policy applies
+MEM0_WRITE_QUEUE_MAX = max(int(os.getenv("MEM0_WRITE_QUEUE_MAX", "128")), 1)
+# Most queued jobs of one user merged into a single add
+MEM0_WRITE_MAX_BATCH = max(int(os.getenv("MEM0_WRITE_MAX_BATCH", "8")), 1)
+# drop_oldest | reject
+MEM0_WRITE_OVERFLOW = os.getenv("MEM0_WRITE_OVERFLOW", "drop_oldest")
+# Dedicated mem0 threads (writes + lookups), kept off the default executor that
+# asyncio.to_thread DB calls use. Timed-out calls keep their thread until mem0
+# returns, so calls fail fast once every thread is taken.
+MEM0_EXECUTOR_WORKERS = max(int(os.getenv("MEM0_EXECUTOR_WORKERS", str(MEM0_WRITE_SHARDS + 4))), 1)
+
 # Module-global in-flight deduplication map
 _inflight: Dict[tuple, asyncio.Task] = {}
 
@@ -73,8 +89,9 @@ class ConversationMemoryManager:
         self._mem0_init_attempted = mem0_disabled  # Skip init if disabled
         if mem0_disabled:
             logger.info("🚫 mem0 explicitly disabled via DISABLE_MEM0=true environment variable")
-        self._mem0_write_queue: Optional[asyncio.Queue] = None
-        self._mem0_worker_task: Optional[asyncio.Task] = None
+        self._mem0_pipeline: Optional[Mem0WritePipeline] = None
+        self._mem0_executor: Optional[ThreadPoolExecutor] = None
+        self._mem0_executor_slots = threading.BoundedSemaphore(MEM0_EXECUTOR_WORKERS)
         self._mem0_warmup_clinics: Set[str] = set()
         self.mem0_metrics = get_mem0_metrics_recorder()
         self._last_metrics_snapshot: float = 0.0
@@ -278,21 +295,50 @@ class ConversationMemoryManager:
                 seen.add(candidate)
         return deduped
 
-    def _get_mem0_queue(self) -> asyncio.Queue:
-        """Lazy create the mem0 write queue."""
-        if self._mem0_write_queue is None:
-            self._mem0_write_queue = asyncio.Queue(maxsize=512)
-        return self._mem0_write_queue
+    def _get_mem0_pipeline(self) -> Mem0WritePipeline:
+        """Lazy create the sharded mem0 write pipeline."""
+        if self._mem0_pipeline is None:
+            self._mem0_pipeline = Mem0WritePipeline(
+                self._process_mem0_batch,
+                shards=MEM0_WRITE_SHARDS,
+                max_pending=MEM0_WRITE_QUEUE_MAX,
+                max_batch=MEM0_WRITE_MAX_BATCH,
+                overflow_policy=MEM0_WRITE_OVERFLOW,
+                metrics=self.mem0_metrics,
+            )
+        return self._mem0_pipeline
 
     async def _ensure_mem0_worker(self):
-        """Make sure the background mem0 writer is running."""
-        if self._mem0_worker_task and not self._mem0_worker_task.done():
-            return
+        """Make sure the background mem0 shard writers are running."""
+        self._get_mem0_pipeline().start()
+
+    async def _run_mem0(self, fn, timeout: Optional[float] = MEM0_TIMEOUT_MS / 1000.0):
+        """
+        Run a blocking mem0 call on the dedicated mem0 thread pool.
+
+        Raises asyncio.TimeoutError on timeout, and immediately when every
+        mem0 thread is still held by an earlier (timed-out) call.
+        """
+        if not self._mem0_executor_slots.acquire(blocking=False):
+            raise asyncio.TimeoutError("mem0 executor saturated")
 
-        loop = asyncio.get_running_loop()
-        queue = self._get_mem0_queue()
-        self._mem0_worker_task = loop.create_task(self._mem0_writer_loop(queue))
-        logger.info("Started mem0 background writer task")
+        if self._mem0_executor is None:
+            self._mem0_executor = ThreadPoolExecutor(
+                max_workers=MEM0_EXECUTOR_WORKERS,
+                thread_name_prefix="mem0",
+            )
+
+        try:
+            future = self._mem0_executor.submit(fn)
+        except Exception:
+            self._mem0_executor_slots.release()
+            raise
+        # Released when the call really finishes, not when the caller stops waiting
+        future.add_done_callback(lambda _: self._mem0_executor_slots.release())
+
+        if timeout is None:
+            return await asyncio.wrap_future(future)
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout=timeout)
 
     def _mem0_cache_key(self, user_id: str, query: Optional[str]) -> Tuple[str, str]:
         return (user_id, (query or "__all__").strip().lower())
@@ -339,113 +385,89 @@ class ConversationMemoryManager:
         except Exception as e:
             logger.debug(f"Redis cache invalidation failed (non-critical): {e}")
 
-    async def _mem0_writer_loop(self, queue: asyncio.Queue):
-        """Background worker that flushes mem0 operations off the critical path."""
-        while True:
-            job = await queue.get()
-            job_type = job.get('type', 'unknown')
-            start = perf_counter()
-            try:
-                if job_type == 'message':
-                    await self._process_mem0_message_job(job)
-                elif job_type == 'turn':
-                    await self._process_mem0_turn_job(job)
-                elif job_type == 'warmup':
-                    await self._process_mem0_warmup_job(job)
-                else:
-                    logger.warning(f"Unknown mem0 job type: {job_type}")
-            except Exception as exc:
-                logger.error(f"mem0 worker job failed: {exc}", exc_info=True)
-            finally:
-                queue.task_done()
-                latency_ms = (perf_counter() - start) * 1000.0
-                await self.mem0_metrics.record_job_complete(
-                    job_type=job_type,
-                    queue_size=queue.qsize(),
-                    latency_ms=latency_ms,
-                )
-                await self._persist_mem0_metrics_snapshot_if_needed()
+    async def _process_mem0_batch(self, jobs: List[Dict[str, Any]]):
+        """Pipeline handler: run one batch of same-user, same-type mem0 jobs."""
+        job_type = jobs[0].get('type', 'unknown')
+        if job_type == 'message':
+            await self._process_mem0_message_batch(jobs)
+        elif job_type == 'turn':
+            await self._process_mem0_turn_batch(jobs)
+        elif job_type == 'warmup':
+            # Repeated warmups of a clinic collapse into one probe
+            await self._process_mem0_warmup_job(jobs[-1])
+        else:
+            logger.warning(f"Unknown mem0 job type: {job_type}")
 
-    async def _process_mem0_message_job(self, job: Dict[str, Any]):
-        """
-        Persist a single message to mem0 and backfill Supabase metadata.
+        await self._persist_mem0_metrics_snapshot_if_needed()
 
-        This is truly fire-and-forget - spawns a background task and returns immediately,
-        preventing queue buildup from slow mem0 API calls.
+    async def _process_mem0_message_batch(self, jobs: List[Dict[str, Any]]):
         """
-        # Fire and forget - don't await, let it run in background
-        asyncio.create_task(self._fire_and_forget_mem0_message(job))
-
-    async def _fire_and_forget_mem0_message(self, job: Dict[str, Any]):
-        """Execute the actual mem0 add operation without blocking the worker queue."""
-        try:
-            message_id = job.get('message_id')
-            phone_number = job.get('phone_number', '')
-            clinic_id = job.get('clinic_id')
-            content = job.get('content', '')
-            base_metadata = dict(job.get('metadata') or {})
-            session_uuid = job.get('session_uuid')
-            external_session_id = job.get('external_session_id')
-            role = job.get('role')
-
-            mem0_metadata = {
-                'role': role,
-                'session_id': session_uuid,
-                'external_session_id': external_session_id,
-                'timestamp': datetime.utcnow().isoformat(),
-                'clinic_id': clinic_id,
-                **base_metadata
-            }
+        Persist queued messages of one user to mem0 with a single add and
+        backfill Supabase metadata of each message.
+        """
+        last = jobs[-1]
+        phone_number = last.get('phone_number', '')
+        clinic_id = last.get('clinic_id')
 
-            self._invalidate_mem0_lookup_cache(phone_number, clinic_id)
+        messages = [
+            {"role": job.get('role') or 'user', "content": job.get('content', '')}
+            for job in jobs
+        ]
+        mem0_metadata = {
+            'role': last.get('role'),
+            'session_id': last.get('session_uuid'),
+            'external_session_id': last.get('external_session_id'),
+            'timestamp': datetime.utcnow().isoformat(),
+            'clinic_id': clinic_id,
+            **dict(last.get('metadata') or {})
+        }
+        if len(jobs) > 1:
+            mem0_metadata['coalesced_messages'] = len(jobs)
+
+        result = await self.add_mem0_memory(
+            phone_number=phone_number,
+            content=messages,
+            metadata=mem0_metadata,
+            clinic_id=clinic_id
+        )
 
-            result = await self.add_mem0_memory(
-                phone_number=phone_number,
-                content=content,
-                metadata=mem0_metadata,
-                clinic_id=clinic_id
-            )
+        if not result or not result.get('summary'):
+            return
 
-            if not message_id or not result or not result.get('summary'):
-                return
+        for job in jobs:
+            message_id = job.get('message_id')
+            if not message_id:
+                continue
 
-            updated_metadata = dict(base_metadata)
+            updated_metadata = dict(job.get('metadata') or {})
             updated_metadata['mem0_summary'] = result['summary']
 
             if result.get('memory_id'):
                 updated_metadata['mem0_id'] = result['memory_id']
 
             await self._update_message_metadata(message_id, updated_metadata)
-        except Exception as e:
-            logger.error(f"Fire-and-forget mem0 add failed: {e}", exc_info=True)
-
-    async def _process_mem0_turn_job(self, job: Dict[str, Any]):
-        """
-        Store aggregated conversation turn in mem0 without touching Supabase.
 
-        This is truly fire-and-forget - spawns a background task and returns immediately.
-        """
-        # Fire and forget - don't await
-        asyncio.create_task(self._fire_and_forget_mem0_turn(job))
-
-    async def _fire_and_forget_mem0_turn(self, job: Dict[str, Any]):
-        """Execute the actual mem0 add operation for turn without blocking the worker queue."""
-        try:
-            phone_number = job.get('phone_number', '')
-            clinic_id = job.get('clinic_id')
+    async def _process_mem0_turn_batch(self, jobs: List[Dict[str, Any]]):
+        """Store queued conversation turns of one user in mem0 with a single add."""
+        last = jobs[-1]
+        messages: List[Dict[str, Any]] = []
+        for job in jobs:
             content = job.get('content', '')
-            metadata = job.get('metadata') or {}
+            if isinstance(content, str):
+                messages.append({"role": "user", "content": content})
+            else:
+                messages.extend(content)
 
-            self._invalidate_mem0_lookup_cache(phone_number, clinic_id)
+        metadata = dict(last.get('metadata') or {})
+        if len(jobs) > 1:
+            metadata['coalesced_turns'] = len(jobs)
 
-            await self.add_mem0_memory(
-                phone_number=phone_number,
-                content=content,
-                metadata=metadata,
-                clinic_id=clinic_id
-            )
-        except Exception as e:
-            logger.error(f"Fire-and-forget mem0 turn add failed: {e}", exc_info=True)
+        await self.add_mem0_memory(
+            phone_number=last.get('phone_number', ''),
+            content=messages,
+            metadata=metadata,
+            clinic_id=last.get('clinic_id')
+        )
 
     async def _process_mem0_warmup_job(self, job: Dict[str, Any]):
         """Touch the vector index so mem0 is hot before real traffic arrives."""
@@ -458,14 +480,7 @@ class ConversationMemoryManager:
         user_key = self._build_mem0_user_key(phone_number.replace("@s.whatsapp.net", ""), clinic_id)
 
         try:
-            loop = asyncio.get_running_loop()
-            await asyncio.wait_for(
-                loop.run_in_executor(
-                    None,
-                    lambda: self.memory.get_all(user_id=user_key, limit=1)
-                ),
-                timeout=MEM0_TIMEOUT_MS / 1000.0
-            )
+            await self._run_mem0(lambda: self.memory.get_all(user_id=user_key, limit=1))
             logger.info(f"mem0 warmup complete for clinic {clinic_id or 'global'}")
         except asyncio.TimeoutError:
             logger.warning(f"mem0 warmup timed out for clinic {clinic_id}")
@@ -498,17 +513,19 @@ class ConversationMemoryManager:
         if not self.mem0_available or not self.memory:
             return False
 
-        queue = self._get_mem0_queue()
+        pipeline = self._get_mem0_pipeline()
         await self._ensure_mem0_worker()
 
-        try:
-            queue.put_nowait(job)
-            await self.mem0_metrics.record_enqueue(queue.qsize())
-            return True
-        except asyncio.QueueFull:
-            logger.warning("mem0 write queue is full, dropping job")
-            await self.mem0_metrics.record_enqueue(queue.qsize())
-            return False
+        job_type = job.get('type', 'unknown')
+        clean_phone = (job.get('phone_number') or '').replace("@s.whatsapp.net", "")
+        clinic_id = job.get('clinic_id') or (job.get('metadata') or {}).get('clinic_id')
+        if job_type == 'warmup':
+            user_id = f"warmup:{clinic_id or 'global'}"
+        else:
+            # Same id add_mem0_memory writes to, so a user's jobs share a shard
+            user_id = self._candidate_mem0_user_ids(clean_phone, clinic_id)[0]
+
+        return await pipeline.submit(job, key=(job_type, user_id), shard_key=user_id)
 
     async def _schedule_mem0_warmup(self, clinic_id: Optional[str], phone_number: str, *, force: bool = False) -> bool:
         """Kick off a mem0 warmup for a clinic once per process."""
@@ -633,17 +650,12 @@ class ConversationMemoryManager:
             content = [{"role": role, "content": content}]
 
         try:
-            loop = asyncio.get_event_loop()
-            result = await asyncio.wait_for(
-                loop.run_in_executor(
-                    None,
-                    lambda: self.memory.add(
-                        content,  # Now always in List[Dict] format as required by mem0
-                        user_id=target_user_id,
-                        metadata=metadata_payload
-                    )
-                ),
-                timeout=MEM0_TIMEOUT_MS / 1000.0
+            result = await self._run_mem0(
+                lambda: self.memory.add(
+                    content,  # Now always in List[Dict] format as required by mem0
+                    user_id=target_user_id,
+                    metadata=metadata_payload
+                )
             )
 
             # Success - reset circuit breaker
@@ -1179,13 +1191,12 @@ class ConversationMemoryManager:
         candidates = self._candidate_mem0_user_ids(clean_phone, clinic_id)
 
         results: List[Dict[str, Any]] = []
-        loop = asyncio.get_running_loop()
 
         for user_id in candidates:
             try:
-                memories = await loop.run_in_executor(
-                    None,
-                    lambda uid=user_id: self.memory.get_all(user_id=uid, limit=limit)
+                memories = await self._run_mem0(
+                    lambda uid=user_id: self.memory.get_all(user_id=uid, limit=limit),
+                    timeout=None
                 )
                 results.append({
                     "user_id": user_id,
@@ -1452,7 +1463,6 @@ class ConversationMemoryManager:
                 (query[:50] if query else 'None')
             )
 
-            loop = asyncio.get_running_loop()
             candidates = self._candidate_mem0_user_ids(clean_phone, clinic_id)
 
             for user_id in candidates:
@@ -1483,20 +1493,12 @@ class ConversationMemoryManager:
                     lookup_start = perf_counter()
                     try:
                         if query:
-                            raw_memories = await asyncio.wait_for(
-                                loop.run_in_executor(
-                                    None,
-                                    lambda: self.memory.search(query, user_id=user_id, limit=remaining)
-                                ),
-                                timeout=MEM0_TIMEOUT_MS / 1000.0
+                            raw_memories = await self._run_mem0(
+                                lambda: self.memory.search(query, user_id=user_id, limit=remaining)
                             )
                         else:
-                            raw_memories = await asyncio.wait_for(
-                                loop.run_in_executor(
-                                    None,
-                                    lambda: self.memory.get_all(user_id=user_id, limit=remaining)
-                                ),
-                                timeout=MEM0_TIMEOUT_MS / 1000.0
+                            raw_memories = await self._run_mem0(
+                                lambda: self.memory.get_all(user_id=user_id, limit=remaining)
                             )
                     except asyncio.TimeoutError:
                         logger.warning("⏱️ mem0 search timed out for user %s - check Redis cache", user_id)
@@ -1606,16 +1608,10 @@ class ConversationMemoryManager:
             self._ensure_mem0_initialized()
 
             if self.mem0_available and self.memory:
-                loop = asyncio.get_event_loop()
-
                 for user_id in self._candidate_mem0_user_ids(clean_phone, clinic_id):
                     try:
-                        memories = await asyncio.wait_for(
-                            loop.run_in_executor(
-                                None,
-                                lambda uid=user_id: self.memory.get_all(user_id=uid, limit=20)
-                            ),
-                            timeout=MEM0_TIMEOUT_MS / 1000.0
+                        memories = await self._run_mem0(
+                            lambda uid=user_id: self.memory.get_all(user_id=uid, limit=20)
                         )
                     except (asyncio.TimeoutError, Exception):
                         continue
@@ -1693,7 +1689,11 @@ class ConversationMemoryManager:
     async def get_mem0_metrics_snapshot(self) -> Dict[str, Any]:
         """Return current mem0 queue metrics snapshot."""
 
-        return await self.mem0_metrics.snapshot()
+        snapshot = await self.mem0_metrics.snapshot()
+        if self._mem0_pipeline is not None:
+            snapshot['shard_queue_sizes'] = self._mem0_pipeline.shard_depths()
+            snapshot['in_flight_batches'] = self._mem0_pipeline.in_flight
+        return snapshot
 
 # Singleton instance
 _memory_manager = None
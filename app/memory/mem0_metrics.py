@@ -14,11 +14,17 @@ class _Mem0QueueMetrics:
     current_queue_size: int = 0
     max_queue_size: int = 0
     processed_jobs_total: int = 0
+    processed_batches_total: int = 0
+    coalesced_jobs_total: int = 0
+    dropped_jobs_total: int = 0
     job_type_counts: Counter = field(default_factory=Counter)
     total_latency_ms: float = 0.0
     last_job_latency_ms: float = 0.0
     last_updated_at: float = 0.0
     latency_breach_count: int = 0
+    total_lag_ms: float = 0.0
+    last_lag_ms: float = 0.0
+    max_lag_ms: float = 0.0
     lookup_requests: int = 0
     lookup_hits: int = 0
     lookup_timeouts: int = 0
@@ -26,8 +32,10 @@ class _Mem0QueueMetrics:
 
     def snapshot(self) -> Dict[str, Any]:
         avg_latency = 0.0
-        if self.processed_jobs_total:
-            avg_latency = self.total_latency_ms / self.processed_jobs_total
+        avg_lag = 0.0
+        if self.processed_batches_total:
+            avg_latency = self.total_latency_ms / self.processed_batches_total
+            avg_lag = self.total_lag_ms / self.processed_batches_total
 
         avg_lookup_latency = 0.0
         if self.lookup_hits:
@@ -37,11 +45,17 @@ class _Mem0QueueMetrics:
             "current_queue_size": self.current_queue_size,
             "max_queue_size": self.max_queue_size,
             "processed_jobs_total": self.processed_jobs_total,
+            "processed_batches_total": self.processed_batches_total,
+            "coalesced_jobs_total": self.coalesced_jobs_total,
+            "dropped_jobs_total": self.dropped_jobs_total,
             "job_type_counts": dict(self.job_type_counts),
             "average_latency_ms": round(avg_latency, 2),
             "last_job_latency_ms": round(self.last_job_latency_ms, 2),
             "last_updated_at": self.last_updated_at,
             "latency_breach_count": self.latency_breach_count,
+            "average_lag_ms": round(avg_lag, 2),
+            "last_lag_ms": round(self.last_lag_ms, 2),
+            "max_lag_ms": round(self.max_lag_ms, 2),
             "lookup_requests": self.lookup_requests,
             "lookup_hits": self.lookup_hits,
             "lookup_timeouts": self.lookup_timeouts,
@@ -57,21 +71,42 @@ class Mem0MetricsRecorder:
         self._lock = asyncio.Lock()
         self._latency_warn_ms = latency_warn_ms
 
-    async def record_enqueue(self, queue_size: int) -> None:
+    async def record_enqueue(self, queue_size: int, coalesced: bool = False) -> None:
         async with self._lock:
             self._metrics.current_queue_size = queue_size
+            if coalesced:
+                self._metrics.coalesced_jobs_total += 1
             if queue_size > self._metrics.max_queue_size:
                 self._metrics.max_queue_size = queue_size
             self._metrics.last_updated_at = perf_counter()
 
-    async def record_job_complete(self, job_type: str, queue_size: int, latency_ms: float) -> None:
+    async def record_dropped(self, count: int, queue_size: int) -> None:
+        async with self._lock:
+            self._metrics.dropped_jobs_total += count
+            self._metrics.current_queue_size = queue_size
+            self._metrics.last_updated_at = perf_counter()
+
+    async def record_job_complete(
+        self,
+        job_type: str,
+        queue_size: int,
+        latency_ms: float,
+        jobs: int = 1,
+        lag_ms: float = 0.0,
+    ) -> None:
+        """Record one processed batch of `jobs` jobs that waited `lag_ms` in the queue."""
         async with self._lock:
             metrics = self._metrics
             metrics.current_queue_size = queue_size
-            metrics.processed_jobs_total += 1
-            metrics.job_type_counts[job_type] += 1
+            metrics.processed_jobs_total += jobs
+            metrics.processed_batches_total += 1
+            metrics.job_type_counts[job_type] += jobs
             metrics.total_latency_ms += latency_ms
             metrics.last_job_latency_ms = latency_ms
+            metrics.total_lag_ms += lag_ms
+            metrics.last_lag_ms = lag_ms
+            if lag_ms > metrics.max_lag_ms:
+                metrics.max_lag_ms = lag_ms
             metrics.last_updated_at = perf_counter()
             if queue_size > metrics.max_queue_size:
                 metrics.max_queue_size = queue_size
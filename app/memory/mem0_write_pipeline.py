@@ -0,0 +1,233 @@
+"""
+Sharded, per-user coalescing write pipeline for mem0.
+
+mem0 `add` calls take several seconds, so a single writer falls behind as
+soon as traffic exceeds a fraction of a message per second. Jobs are routed
+to one of N shard workers by user key (a user's writes always land on the
+same shard, so they stay ordered) and each shard runs one batch at a time.
+Jobs queued for the same coalescing key while the shard is busy are merged
+into one batch, so several pending turns of a user become a single `add`.
+
+Each shard holds at most `max_pending` jobs. When it is full the overflow
+policy decides what gives:
+- drop_oldest: evict the oldest pending job of the shard (default; the
+  newest context is the most useful to remember)
+- reject: refuse the new job
+
+Queue depth, lag (enqueue -> start of write), coalesced and dropped jobs
+go to the mem0 metrics recorder and Prometheus.
+"""
+
+import asyncio
+import logging
+from collections import deque
+from time import perf_counter
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Optional
+
+from app.memory.mem0_metrics import Mem0MetricsRecorder
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_REJECT = "reject"
+OVERFLOW_POLICIES = (OVERFLOW_DROP_OLDEST, OVERFLOW_REJECT)
+
+BatchHandler = Callable[[List[Dict[str, Any]]], Awaitable[None]]
+
+
+def _observe(outcome: str, count: int = 1, depth: Optional[int] = None, lag_seconds: Optional[float] = None) -> None:
+    """Best-effort Prometheus export (prometheus_client is optional here)."""
+    try:
+        from app.observability.metrics import (
+            observe_mem0_queue_jobs,
+            observe_mem0_queue_lag,
+            observe_mem0_queue_size,
+        )
+        if count:
+            observe_mem0_queue_jobs(outcome, count)
+        if depth is not None:
+            observe_mem0_queue_size(depth)
+        if lag_seconds is not None:
+            observe_mem0_queue_lag(lag_seconds)
+    except Exception as e:
+        logger.debug(f"Failed to record mem0 queue metric: {e}")
+
+
+class _Batch:
+    __slots__ = ("key", "jobs", "enqueued_at")
+
+    def __init__(self, key: Hashable):
+        self.key = key
+        self.jobs: List[Dict[str, Any]] = []
+        self.enqueued_at = perf_counter()
+
+
+class _Shard:
+    __slots__ = ("index", "batches", "open", "depth", "wakeup", "task")
+
+    def __init__(self, index: int):
+        self.index = index
+        self.batches: Deque[_Batch] = deque()
+        # Coalescing key -> newest batch still accepting jobs
+        self.open: Dict[Hashable, _Batch] = {}
+        self.depth = 0
+        self.wakeup = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+
+class Mem0WritePipeline:
+    """Shard workers that run coalesced batches of mem0 jobs through a handler."""
+
+    def __init__(
+        self,
+        handler: BatchHandler,
+        *,
+        shards: int = 4,
+        max_pending: int = 128,
+        max_batch: int = 8,
+        overflow_policy: str = OVERFLOW_DROP_OLDEST,
+        metrics: Optional[Mem0MetricsRecorder] = None,
+    ):
+        """
+        Args:
+            handler: Coroutine called with the jobs of one batch (same key, in order)
+            shards: Number of shard workers (concurrent batches)
+            max_pending: Pending jobs allowed per shard
+            max_batch: Jobs merged into one batch at most
+            overflow_policy: drop_oldest or reject
+            metrics: Recorder for depth/lag/coalescing stats
+        """
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown mem0 overflow policy: {overflow_policy}")
+        self._handler = handler
+        self._shards = [_Shard(i) for i in range(max(shards, 1))]
+        self.max_pending = max(max_pending, 1)
+        self.max_batch = max(max_batch, 1)
+        self.overflow_policy = overflow_policy
+        self.metrics = metrics
+        self.depth = 0
+        self.in_flight = 0
+
+    @property
+    def shard_count(self) -> int:
+        return len(self._shards)
+
+    def shard_depths(self) -> List[int]:
+        return [shard.depth for shard in self._shards]
+
+    def start(self) -> None:
+        """Start (or restart) shard workers on the running loop."""
+        loop = asyncio.get_running_loop()
+        started = 0
+        for shard in self._shards:
+            if shard.task is None or shard.task.done():
+                shard.task = loop.create_task(self._run_shard(shard))
+                started += 1
+        if started:
+            logger.info(f"Started {started} mem0 writer shard(s)")
+
+    async def stop(self) -> None:
+        """Cancel shard workers; pending jobs are discarded."""
+        tasks = [shard.task for shard in self._shards if shard.task and not shard.task.done()]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def drain(self) -> None:
+        """Wait until every queued job has been handled."""
+        while self.depth or self.in_flight:
+            await asyncio.sleep(0.01)
+
+    async def submit(self, job: Dict[str, Any], *, key: Hashable, shard_key: str) -> bool:
+        """
+        Queue a job.
+
+        Args:
+            job: Job payload passed to the handler
+            key: Coalescing key; pending jobs with the same key share a batch
+            shard_key: Routing key (user id), so a user's jobs stay ordered
+
+        Returns:
+            False if the job was rejected by the overflow policy
+        """
+        shard = self._shards[hash(shard_key) % len(self._shards)]
+
+        dropped = 0
+        if shard.depth >= self.max_pending:
+            if self.overflow_policy == OVERFLOW_REJECT:
+                logger.warning(f"mem0 shard {shard.index} is full, rejecting job")
+                await self._record_dropped(1)
+                return False
+            self._drop_oldest(shard)
+            dropped = 1
+
+        batch = shard.open.get(key)
+        coalesced = batch is not None and len(batch.jobs) < self.max_batch
+        if not coalesced:
+            batch = _Batch(key)
+            shard.batches.append(batch)
+            shard.open[key] = batch
+        batch.jobs.append(job)
+        shard.depth += 1
+        self.depth += 1
+        shard.wakeup.set()
+
+        if dropped:
+            logger.warning(f"mem0 shard {shard.index} is full, dropped its oldest job")
+            await self._record_dropped(dropped)
+        if self.metrics:
+            await self.metrics.record_enqueue(self.depth, coalesced=coalesced)
+        _observe("coalesced" if coalesced else "enqueued", depth=self.depth)
+        return True
+
+    def _drop_oldest(self, shard: _Shard) -> None:
+        batch = shard.batches[0]
+        batch.jobs.pop(0)
+        if not batch.jobs:
+            shard.batches.popleft()
+            if shard.open.get(batch.key) is batch:
+                del shard.open[batch.key]
+        shard.depth -= 1
+        self.depth -= 1
+
+    async def _record_dropped(self, count: int) -> None:
+        if self.metrics:
+            await self.metrics.record_dropped(count, self.depth)
+        _observe("dropped", count, depth=self.depth)
+
+    async def _run_shard(self, shard: _Shard) -> None:
+        while True:
+            if not shard.batches:
+                shard.wakeup.clear()
+                await shard.wakeup.wait()
+                continue
+
+            batch = shard.batches.popleft()
+            if shard.open.get(batch.key) is batch:
+                del shard.open[batch.key]
+            shard.depth -= len(batch.jobs)
+            self.depth -= len(batch.jobs)
+            self.in_flight += 1
+
+            job_type = batch.jobs[0].get('type', 'unknown')
+            lag_ms = (perf_counter() - batch.enqueued_at) * 1000.0
+            start = perf_counter()
+            try:
+                await self._handler(batch.jobs)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.error(f"mem0 shard {shard.index} batch failed: {exc}", exc_info=True)
+            finally:
+                self.in_flight -= 1
+                latency_ms = (perf_counter() - start) * 1000.0
+                if self.metrics:
+                    await self.metrics.record_job_complete(
+                        job_type=job_type,
+                        queue_size=self.depth,
+                        latency_ms=latency_ms,
+                        jobs=len(batch.jobs),
+                        lag_ms=lag_ms,
+                    )
+                _observe("written", len(batch.jobs), depth=self.depth, lag_seconds=lag_ms / 1000.0)
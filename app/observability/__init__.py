@@ -4,6 +4,7 @@ Observability Module
 Provides metrics, tracing, and monitoring capabilities:
 - Prometheus metrics
 - OpenTelemetry tracing
+- Buffered, sampled span export (span_export)
 - Langfuse LLM observability
 - Grafana dashboards
 - Alert rules
@@ -16,6 +17,13 @@ from .metrics import (
     observe_cache_operation,
     observe_mem0_queue_size,
     observe_mem0_write,
+    observe_mem0_queue_jobs,
+    observe_mem0_queue_lag,
+    observe_summary_batch,
+    observe_websocket_fanout,
+    observe_websocket_frames,
+    observe_websocket_slow_consumer,
+    observe_llm_concurrency,
     observe_lane_classification,
     observe_db_query,
     observe_duplicate_message,
@@ -23,11 +31,22 @@ from .metrics import (
     observe_error,
     observe_hydration,
     observe_hydration_query,
+    observe_loop_block,
+    observe_request_io,
+    observe_request_loop_blocked,
+    observe_trace_spans,
     track_latency,
     get_metrics,
     get_metrics_summary,
 )
 
+from .span_export import (
+    span,
+    traced,
+    get_span_tracer,
+    shutdown_span_exporter,
+)
+
 from .langfuse_tracer import (
     llm_observability,
     LLMObservability,
@@ -43,6 +62,13 @@ __all__ = [
     'observe_cache_operation',
     'observe_mem0_queue_size',
     'observe_mem0_write',
+    'observe_mem0_queue_jobs',
+    'observe_mem0_queue_lag',
+    'observe_summary_batch',
+    'observe_websocket_fanout',
+    'observe_websocket_frames',
+    'observe_websocket_slow_consumer',
+    'observe_llm_concurrency',
     'observe_lane_classification',
     'observe_db_query',
     'observe_duplicate_message',
@@ -50,9 +76,18 @@ __all__ = [
     'observe_error',
     'observe_hydration',
     'observe_hydration_query',
+    'observe_loop_block',
+    'observe_request_io',
+    'observe_request_loop_blocked',
+    'observe_trace_spans',
     'track_latency',
     'get_metrics',
     'get_metrics_summary',
+    # Buffered span export
+    'span',
+    'traced',
+    'get_span_tracer',
+    'shutdown_span_exporter',
     # Langfuse LLM observability
     'llm_observability',
     'LLMObservability',
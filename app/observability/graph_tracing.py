@@ -6,17 +6,17 @@ IMPORTANT: Use as context managers to ensure spans are properly ended:
     with trace_graph_node("supervisor", thread_id, clinic_id):
         # node logic here
 
-Integrates with OpenTelemetry for span management and exports to
-configured backends (Langfuse, Arize, etc).
+Spans go through the buffered span exporter (span_export), which samples
+them and exports to the configured backends (Langfuse, Arize, etc) from a
+background thread, off the request path.
 """
-from opentelemetry import trace
 from contextlib import contextmanager
 from typing import Optional, Dict, Any, Generator
 import logging
 
-logger = logging.getLogger(__name__)
+from app.observability.span_export import Span, span as _span
 
-tracer = trace.get_tracer(__name__)
+logger = logging.getLogger(__name__)
 
 
 @contextmanager
@@ -27,7 +27,7 @@ def trace_graph_node(
     lane: Optional[str] = None,
     tool_name: Optional[str] = None,
     eval_result: Optional[str] = None,
-) -> Generator[trace.Span, None, None]:
+) -> Generator[Span, None, None]:
     """
     Create traced span for graph node execution.
 
@@ -44,22 +44,16 @@ def trace_graph_node(
         tool_name: Optional tool being executed in this node
         eval_result: Optional evaluation result for quality tracking
     """
-    with tracer.start_as_current_span(f"langgraph.node.{node_name}") as span:
-        span.set_attribute("thread_id", thread_id)
-        span.set_attribute("clinic_id", clinic_id)
-        span.set_attribute("node_name", node_name)
-        if lane:
-            span.set_attribute("lane", lane)
-        if tool_name:
-            span.set_attribute("tool_name", tool_name)
-        if eval_result:
-            span.set_attribute("eval_result", eval_result)
-        try:
-            yield span
-        except Exception as e:
-            span.set_status(trace.Status(trace.StatusCode.ERROR, str(e)))
-            span.record_exception(e)
-            raise
+    with _span(
+        f"langgraph.node.{node_name}",
+        thread_id=thread_id,
+        clinic_id=clinic_id,
+        node_name=node_name,
+        lane=lane,
+        tool_name=tool_name,
+        eval_result=eval_result,
+    ) as span:
+        yield span
 
 
 @contextmanager
@@ -68,7 +62,7 @@ def trace_tool_call(
     thread_id: str,
     arguments: Dict[str, Any],
     clinic_id: Optional[str] = None,
-) -> Generator[trace.Span, None, None]:
+) -> Generator[Span, None, None]:
     """
     Create traced span for tool execution.
 
@@ -83,20 +77,19 @@ def trace_tool_call(
         arguments: Tool arguments (truncated for safety)
         clinic_id: Optional clinic identifier
     """
-    with tracer.start_as_current_span(f"langgraph.tool.{tool_name}") as span:
-        span.set_attribute("thread_id", thread_id)
-        span.set_attribute("tool_name", tool_name)
-        span.set_attribute("tool_arguments", str(arguments)[:500])  # Truncate for safety
-        if clinic_id:
-            span.set_attribute("clinic_id", clinic_id)
+    with _span(
+        f"langgraph.tool.{tool_name}",
+        thread_id=thread_id,
+        tool_name=tool_name,
+        tool_arguments=str(arguments)[:500],  # Truncate for safety
+        clinic_id=clinic_id,
+    ) as span:
         try:
             yield span
             span.set_attribute("tool_success", True)
         except Exception as e:
             span.set_attribute("tool_success", False)
             span.set_attribute("tool_error", str(e))
-            span.set_status(trace.Status(trace.StatusCode.ERROR, str(e)))
-            span.record_exception(e)
             raise
 
 
@@ -106,7 +99,7 @@ def trace_graph_execution(
     thread_id: str,
     clinic_id: str,
     session_id: str,
-) -> Generator[trace.Span, None, None]:
+) -> Generator[Span, None, None]:
     """
     Create traced span for entire graph execution.
 
@@ -121,24 +114,24 @@ def trace_graph_execution(
         clinic_id: Clinic identifier
         session_id: Session identifier
     """
-    with tracer.start_as_current_span(f"langgraph.graph.{graph_name}") as span:
-        span.set_attribute("thread_id", thread_id)
-        span.set_attribute("clinic_id", clinic_id)
-        span.set_attribute("session_id", session_id)
-        span.set_attribute("graph_name", graph_name)
+    with _span(
+        f"langgraph.graph.{graph_name}",
+        thread_id=thread_id,
+        clinic_id=clinic_id,
+        session_id=session_id,
+        graph_name=graph_name,
+    ) as span:
         try:
             yield span
             span.set_attribute("graph_success", True)
         except Exception as e:
             span.set_attribute("graph_success", False)
             span.set_attribute("graph_error", str(e))
-            span.set_status(trace.Status(trace.StatusCode.ERROR, str(e)))
-            span.record_exception(e)
             raise
 
 
 def add_graph_attributes(
-    span: trace.Span,
+    span: Span,
     intent: Optional[str] = None,
     lane: Optional[str] = None,
     flow_state: Optional[str] = None,
@@ -150,7 +143,7 @@ def add_graph_attributes(
     Use this to enrich spans with state information after processing.
 
     Args:
-        span: OpenTelemetry span to add attributes to
+        span: Span to add attributes to
         intent: Detected intent (e.g., "appointment", "inquiry")
         lane: Processing lane (e.g., "SCHEDULING", "COMPLEX")
         flow_state: Current flow state (e.g., "collecting_slots", "awaiting_confirmation")
@@ -0,0 +1,292 @@
+"""
+Per-request I/O accounting
+
+Counts and times every backend call made while handling a request or
+message, attributed through contextvars (so asyncio tasks and
+asyncio.to_thread calls spawned by the request are included):
+- Supabase / PostgREST and any other HTTP traffic, via the httpx transports
+  (requests to SUPABASE_URL are reported as backend "db")
+- Redis commands and pipelines (sync and asyncio clients)
+
+Synchronous calls made on the event-loop thread are also summed as
+``sync_on_loop_ms``: time the loop could not serve other requests.
+
+Opt-in: set IO_ACCOUNTING_ENABLED=true and call install_io_instrumentation()
+at startup. Each outermost tracked scope emits Prometheus histograms and
+one structured ``io_summary`` log line; nested scopes are reported as part
+of it.
+
+Usage:
+    with track_io("whatsapp_message", clinic_id=clinic_id) as io:
+        ...
+        io.fields["lane"] = lane
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+from app.utils.trace_context import TraceContext
+
+logger = logging.getLogger(__name__)
+
+IO_ACCOUNTING_ENABLED = os.getenv("IO_ACCOUNTING_ENABLED", "false").lower() == "true"
+BACKENDS = ("db", "redis", "http")
+
+_installed = False
+_install_lock = threading.Lock()
+
+
+@dataclass
+class RequestIOStats:
+    """Backend calls made within one tracked scope."""
+    kind: str
+    calls: Counter = field(default_factory=Counter)       # backend -> calls
+    time_ms: Counter = field(default_factory=Counter)     # backend -> ms
+    targets: Counter = field(default_factory=Counter)     # "db:patients", "redis:GET", ...
+    sync_on_loop_ms: float = 0.0
+    loop_blocked_ms: float = 0.0  # Filled in by the loop watchdog
+    errors: int = 0
+    fields: Dict[str, Any] = field(default_factory=dict)
+    started: float = field(default_factory=time.perf_counter)
+    closed: bool = False
+
+    def record(self, backend: str, target: str, duration_ms: float, on_loop: bool, failed: bool) -> None:
+        self.calls[backend] += 1
+        self.time_ms[backend] += duration_ms
+        self.targets[f"{backend}:{target}"] += 1
+        if on_loop:
+            self.sync_on_loop_ms += duration_ms
+        if failed:
+            self.errors += 1
+
+    def merge(self, other: "RequestIOStats") -> None:
+        self.calls.update(other.calls)
+        self.time_ms.update(other.time_ms)
+        self.targets.update(other.targets)
+        self.sync_on_loop_ms += other.sync_on_loop_ms
+        self.loop_blocked_ms += other.loop_blocked_ms
+        self.errors += other.errors
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "trace_id": TraceContext.get_trace_id(),
+            "request_id": TraceContext.get_request_id(),
+            "duration_ms": round((time.perf_counter() - self.started) * 1000, 1),
+            "calls": {b: self.calls[b] for b in BACKENDS},
+            "io_ms": {b: round(self.time_ms[b], 1) for b in BACKENDS},
+            "sync_on_loop_ms": round(self.sync_on_loop_ms, 1),
+            "loop_blocked_ms": round(self.loop_blocked_ms, 1),
+            "errors": self.errors,
+            "top_targets": dict(self.targets.most_common(10)),
+            **self.fields,
+        }
+
+
+_io_stats_ctx: ContextVar[Optional[RequestIOStats]] = ContextVar("io_stats", default=None)
+
+
+def current_io_stats() -> Optional[RequestIOStats]:
+    """Stats for the scope the caller is running in, if any."""
+    return _io_stats_ctx.get()
+
+
+def _on_loop_thread() -> bool:
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+def _record(backend: str, target: str, started: float, sync: bool, failed: bool) -> None:
+    stats = _io_stats_ctx.get()
+    if stats is None:
+        return
+    duration_ms = (time.perf_counter() - started) * 1000
+    stats.record(backend, target, duration_ms, on_loop=sync and _on_loop_thread(), failed=failed)
+
+
+@contextmanager
+def track_io(kind: str, **fields):
+    """
+    Account backend calls made inside the block.
+
+    Nested scopes are folded into their parent on exit instead of being
+    emitted, so a webhook request that processes a message reports the
+    message's calls once. A scope that outlives its parent (a background
+    task spawned by the request) is emitted on its own.
+    """
+    stats = RequestIOStats(kind=kind, fields=dict(fields))
+    parent = _io_stats_ctx.get()
+    token = _io_stats_ctx.set(stats)
+    try:
+        yield stats
+    finally:
+        _io_stats_ctx.reset(token)
+        stats.closed = True
+        if parent is not None and not parent.closed:
+            parent.merge(stats)
+        elif _installed:
+            _emit(stats)
+
+
+def _emit(stats: RequestIOStats) -> None:
+    try:
+        from app.observability.metrics import observe_request_io, observe_request_loop_blocked
+
+        for backend in BACKENDS:
+            observe_request_io(stats.kind, backend, stats.calls[backend], stats.time_ms[backend] / 1000)
+        # Instrumented sync calls catch short stalls; the watchdog catches uninstrumented ones
+        observe_request_loop_blocked(stats.kind, max(stats.sync_on_loop_ms, stats.loop_blocked_ms) / 1000)
+    except Exception as e:
+        logger.debug(f"Failed to record I/O metrics: {e}")
+
+    summary = stats.summary()
+    logger.info("io_summary %s", json.dumps(summary, default=str), extra={"io_summary": summary})
+
+
+# =============================================================================
+# Instrumentation
+# =============================================================================
+
+def _classify_http(url, supabase_host: Optional[str]) -> tuple:
+    """Map a request URL to (backend, target)."""
+    host = url.host
+    path = url.path
+    if supabase_host and host == supabase_host:
+        if path.startswith("/rest/v1/"):
+            resource = path[len("/rest/v1/"):].strip("/")
+            if resource.startswith("rpc/"):
+                return "db", f"rpc:{resource[4:]}"
+            return "db", resource or "root"
+        return "db", path.strip("/").split("/")[0] or "root"
+    return "http", host
+
+
+def _instrument_httpx(supabase_host: Optional[str]) -> None:
+    import httpx
+
+    sync_handle = httpx.HTTPTransport.handle_request
+    async_handle = httpx.AsyncHTTPTransport.handle_async_request
+
+    def handle_request(self, request):
+        started = time.perf_counter()
+        failed = True
+        try:
+            response = sync_handle(self, request)
+            failed = response.status_code >= 500
+            return response
+        finally:
+            _record(*_classify_http(request.url, supabase_host), started, sync=True, failed=failed)
+
+    async def handle_async_request(self, request):
+        started = time.perf_counter()
+        failed = True
+        try:
+            response = await async_handle(self, request)
+            failed = response.status_code >= 500
+            return response
+        finally:
+            _record(*_classify_http(request.url, supabase_host), started, sync=False, failed=failed)
+
+    httpx.HTTPTransport.handle_request = handle_request
+    httpx.AsyncHTTPTransport.handle_async_request = handle_async_request
+
+
+def _instrument_redis() -> None:
+    import redis.asyncio.client
+    import redis.client
+
+    sync_execute = redis.client.Redis.execute_command
+    sync_pipeline = redis.client.Pipeline.execute
+    async_execute = redis.asyncio.client.Redis.execute_command
+    async_pipeline = redis.asyncio.client.Pipeline.execute
+
+    def execute_command(self, *args, **options):
+        started = time.perf_counter()
+        failed = True
+        try:
+            result = sync_execute(self, *args, **options)
+            failed = False
+            return result
+        finally:
+            _record("redis", str(args[0]) if args else "?", started, sync=True, failed=failed)
+
+    def pipeline_execute(self, *args, **kwargs):
+        started = time.perf_counter()
+        failed = True
+        try:
+            result = sync_pipeline(self, *args, **kwargs)
+            failed = False
+            return result
+        finally:
+            _record("redis", "PIPELINE", started, sync=True, failed=failed)
+
+    async def async_execute_command(self, *args, **options):
+        started = time.perf_counter()
+        failed = True
+        try:
+            result = await async_execute(self, *args, **options)
+            failed = False
+            return result
+        finally:
+            _record("redis", str(args[0]) if args else "?", started, sync=False, failed=failed)
+
+    async def async_pipeline_execute(self, *args, **kwargs):
+        started = time.perf_counter()
+        failed = True
+        try:
+            result = await async_pipeline(self, *args, **kwargs)
+            failed = False
+            return result
+        finally:
+            _record("redis", "PIPELINE", started, sync=False, failed=failed)
+
+    redis.client.Redis.execute_command = execute_command
+    redis.client.Pipeline.execute = pipeline_execute
+    redis.asyncio.client.Redis.execute_command = async_execute_command
+    redis.asyncio.client.Pipeline.execute = async_pipeline_execute
+
+
+def install_io_instrumentation(force: bool = False) -> bool:
+    """
+    Patch httpx and redis clients to feed per-request I/O stats.
+
+    Idempotent. Returns True if instrumentation is active.
+    """
+    global _installed
+
+    if not (IO_ACCOUNTING_ENABLED or force):
+        return False
+
+    with _install_lock:
+        if _installed:
+            return True
+
+        supabase_host = urlparse(os.getenv("SUPABASE_URL", "")).hostname
+        for name, instrument in (
+            ("httpx", lambda: _instrument_httpx(supabase_host)),
+            ("redis", _instrument_redis),
+        ):
+            try:
+                instrument()
+            except ImportError:
+                logger.warning(f"{name} not installed, I/O accounting skips it")
+            except Exception as e:
+                logger.warning(f"Failed to instrument {name} for I/O accounting: {e}")
+
+        _installed = True
+
+    logger.info("✅ Per-request I/O accounting enabled")
+    return True
@@ -1,13 +1,19 @@
 """
 Langfuse Integration for LLM Observability (v3 SDK)
 Tracks: cost per booking, prompt effectiveness, RAG quality, slot extraction accuracy
+
+Spans and generations go through the buffered span exporter (span_export),
+which reaches Langfuse via OpenTelemetry from a background thread. Scores
+(booking_success, extraction_confidence, rag_relevance) still use the
+Langfuse client directly, keyed by session_id as the trace id.
 """
 
-import os
 import logging
-from typing import Dict, List, Optional, Any
+import os
 from functools import wraps
-import asyncio
+from typing import Any, Dict, List, Optional
+
+from app.observability.span_export import span
 
 logger = logging.getLogger(__name__)
 
@@ -38,7 +44,7 @@ except ImportError as e:
 
 class LLMObservability:
     """
-    Wraps all LLM calls with automatic tracing using Langfuse v3 API.
+    Wraps LLM calls with buffered tracing; scores go to Langfuse directly.
     Tracks cost, latency, and quality metrics for optimization.
     """
 
@@ -55,82 +61,56 @@ class LLMObservability:
         llm_extractor: Any
     ) -> Dict:
         """
-        Wrap LLMSlotExtractor with Langfuse tracing using v3 API.
+        Wrap LLMSlotExtractor with buffered tracing.
         """
-        if not self.enabled or not langfuse_client:
-            # Fallback: call directly without tracing
-            return await llm_extractor.extract_slots(
-                message=message,
-                missing_slots=missing_slots,
-                clinic_id=clinic_id
-            )
-
-        # Use v3 context manager API
-        with langfuse_client.start_as_current_span(
-            name="slot-extraction",
-            metadata={
-                "clinic_id": clinic_id,
-                "fsm_state": fsm_state,
-                "missing_slots": missing_slots,
-                "session_id": session_id
-            }
-        ) as span:
-            # Create generation observation
-            with langfuse_client.start_as_current_observation(
-                name="extract-slots",
-                as_type="generation",
-                metadata={
-                    "model": os.getenv("TIER_TOOL_CALLING_MODEL", "gpt-5-mini"),
-                    "missing_slots": missing_slots,
-                    "message_length": len(message)
-                }
+        # Spans are buffered and exported off the request path (span_export)
+        with span(
+            "slot-extraction",
+            clinic_id=clinic_id,
+            fsm_state=fsm_state,
+            missing_slots=missing_slots,
+            session_id=session_id,
+        ):
+            with span(
+                "extract-slots",
+                kind="generation",
+                model=os.getenv("TIER_TOOL_CALLING_MODEL", "gpt-5-mini"),
+                message_length=len(message),
             ) as generation:
-                generation.update(input=message)
-
-                try:
-                    # Call actual LLM extraction
-                    result = await llm_extractor.extract_slots(
-                        message=message,
-                        missing_slots=missing_slots,
-                        clinic_id=clinic_id
-                    )
-
-                    # Extract metrics
-                    slots_extracted = list(result.keys())
-                    avg_confidence = (
-                        sum(s.get('confidence', 0) for s in result.values()) / len(result)
-                        if result else 0
-                    )
-
-                    # Update generation with output
-                    generation.update(
-                        output=result,
-                        metadata={
-                            "slots_extracted": slots_extracted,
-                            "extraction_count": len(slots_extracted),
-                            "avg_confidence": avg_confidence,
-                            "success": True
-                        }
-                    )
-
-                    # Score the extraction quality
-                    langfuse_client.score_current_trace(
-                        name="extraction_confidence",
-                        value=avg_confidence
-                    )
-
-                    return result
+                result = await llm_extractor.extract_slots(
+                    message=message,
+                    missing_slots=missing_slots,
+                    clinic_id=clinic_id
+                )
+
+                avg_confidence = (
+                    sum(s.get('confidence', 0) for s in result.values()) / len(result)
+                    if result else 0
+                )
+                generation.set_attributes({
+                    "slots_extracted": list(result.keys()),
+                    "extraction_count": len(result),
+                    "avg_confidence": avg_confidence,
+                })
+
+        # Score the extraction quality
+        self._score("extraction_confidence", avg_confidence, session_id)
+        return result
+
+    def _score(self, name: str, value: float, session_id: str, comment: Optional[str] = None):
+        """Send a score for the session's trace; never raises"""
+        if not self.enabled or not langfuse_client:
+            return
 
-                except Exception as e:
-                    # Log error to Langfuse
-                    generation.update(
-                        output=None,
-                        metadata={
-                            "error": str(e),
-                            "success": False
-                        }
-                    )
-                    raise
+        try:
+            langfuse_client.create_score(
+                name=name,
+                value=value,
+                comment=comment,
+                trace_id=session_id  # Use session_id as trace reference
+            )
+        except Exception as e:
+            logger.warning(f"Failed to send {name} score: {e}")
 
     def score_booking_outcome(
         self,
@@ -167,37 +147,26 @@ class LLMObservability:
         response_used_rag: bool
     ):
         """
-        Track RAG query performance and quality using v3 API.
+        Track RAG query performance and quality.
         """
-        if not self.enabled or not langfuse_client:
-            return
-
-        try:
-            with langfuse_client.start_as_current_span(
-                name="rag-query",
-                metadata={
-                    "session_id": session_id,
-                    "docs_retrieved": len(retrieved_docs),
-                    "used_in_response": response_used_rag,
-                    "doc_sources": [doc.get("source") for doc in retrieved_docs[:3]],
-                    "avg_score": (
-                        sum(doc.get("score", 0) for doc in retrieved_docs) / len(retrieved_docs)
-                        if retrieved_docs else 0
-                    )
-                }
-            ) as span:
-                span.update(input=query)
-
-                # Score RAG quality
-                if retrieved_docs:
-                    avg_score = sum(doc.get("score", 0) for doc in retrieved_docs) / len(retrieved_docs)
-                    langfuse_client.score_current_span(
-                        name="rag_relevance",
-                        value=avg_score
-                    )
-
-        except Exception as e:
-            logger.warning(f"Failed to track RAG query: {e}")
+        avg_score = (
+            sum(doc.get("score", 0) for doc in retrieved_docs) / len(retrieved_docs)
+            if retrieved_docs else 0
+        )
+        with span(
+            "rag-query",
+            session_id=session_id,
+            query_length=len(query),
+            docs_retrieved=len(retrieved_docs),
+            used_in_response=response_used_rag,
+            doc_sources=[doc.get("source") for doc in retrieved_docs[:3]],
+            avg_score=avg_score,
+        ):
+            pass  # Point-in-time span: the attributes carry the measurement
+
+        # Score RAG quality
+        if retrieved_docs:
+            self._score("rag_relevance", avg_score, session_id)
 
 
 # Global instance for easy access
@@ -209,7 +178,7 @@ def track_llm_call(
     model: Optional[str] = None
 ):
     """
-    Decorator to automatically track LLM calls with Langfuse v3 API.
+    Decorator to automatically track LLM calls as buffered generation spans.
 
     Usage:
         @track_llm_call(name="intent-classification", model="gpt-5-mini")
@@ -219,39 +188,17 @@ def track_llm_call(
     def decorator(func):
         @wraps(func)
         async def wrapper(*args, **kwargs):
-            if not LANGFUSE_ENABLED or not langfuse_client:
-                # If Langfuse not enabled, just call function
-                return await func(*args, **kwargs)
-
-            # Use v3 context manager
-            with langfuse_client.start_as_current_observation(
-                name=name,
-                as_type="generation",
-                metadata={
-                    "model": model or os.getenv("TIER_TOOL_CALLING_MODEL", "gpt-5-mini"),
-                    "function": func.__name__,
-                    "args_count": len(args),
-                    "kwargs_keys": list(kwargs.keys())
-                }
+            # Only cheap metadata is recorded inline; export happens in the background
+            with span(
+                name,
+                kind="generation",
+                model=model or os.getenv("TIER_TOOL_CALLING_MODEL", "gpt-5-mini"),
+                function=func.__name__,
             ) as generation:
-                try:
-                    result = await func(*args, **kwargs)
-
-                    # Update with success
-                    generation.update(
-                        output=result,
-                        metadata={"success": True}
-                    )
-
-                    return result
-
-                except Exception as e:
-                    # Update with error
-                    generation.update(
-                        output=None,
-                        metadata={"error": str(e), "success": False}
-                    )
-                    raise
+                result = await func(*args, **kwargs)
+                if isinstance(result, str):
+                    generation.set_attribute("output_length", len(result))
+                return result
 
         return wrapper
     return decorator
@@ -0,0 +1,181 @@
+"""
+Event Loop Watchdog
+
+Detects synchronous code that blocks the asyncio event loop.
+
+A heartbeat task on the loop stamps a timestamp every ``interval``; a
+daemon thread samples it. When the heartbeat is older than ``threshold``
+the loop is stuck in a single callback, so the thread captures that
+thread's current stack (the blocking frame) together with the trace
+context of the task that is running. When the loop recovers, the stall
+is logged once with the captured stack, recorded in the
+``event_loop_block_duration_seconds`` histogram and charged to the
+request's I/O stats (see io_accounting).
+
+Opt-in: LOOP_WATCHDOG_ENABLED=true
+Tuning: LOOP_WATCHDOG_THRESHOLD_MS (default 100), LOOP_WATCHDOG_INTERVAL_MS (default 20)
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+LOOP_WATCHDOG_ENABLED = os.getenv("LOOP_WATCHDOG_ENABLED", "false").lower() == "true"
+LOOP_WATCHDOG_THRESHOLD_MS = float(os.getenv("LOOP_WATCHDOG_THRESHOLD_MS", "100"))
+LOOP_WATCHDOG_INTERVAL_MS = float(os.getenv("LOOP_WATCHDOG_INTERVAL_MS", "20"))
+
+# Frames kept from the blocked stack (innermost last)
+STACK_DEPTH = 12
+
+
+@dataclass
+class _Stall:
+    started: float
+    stack: List[str]
+    task_name: Optional[str]
+    trace_id: Optional[str]
+    io_stats: Optional[object]
+
+
+class LoopWatchdog:
+    """Sampling watchdog for one event loop."""
+
+    def __init__(
+        self,
+        threshold_ms: float = LOOP_WATCHDOG_THRESHOLD_MS,
+        interval_ms: float = LOOP_WATCHDOG_INTERVAL_MS,
+    ):
+        self.threshold = threshold_ms / 1000
+        self.interval = interval_ms / 1000
+        self.stalls = 0
+        self.blocked_seconds = 0.0
+        self._last_beat = time.monotonic()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    async def _heartbeat(self) -> None:
+        while True:
+            self._last_beat = time.monotonic()
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Start watching the running loop (call from within the loop)."""
+        if self._thread is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._heartbeat_task = self._loop.create_task(self._heartbeat(), name="loop-watchdog-heartbeat")
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+        logger.info(
+            f"✅ Event loop watchdog started (threshold={self.threshold * 1000:.0f}ms, "
+            f"interval={self.interval * 1000:.0f}ms)"
+        )
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._heartbeat_task:
+            self._heartbeat_task.cancel()
+            try:
+                await self._heartbeat_task
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat_task = None
+        if self._thread:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    # ----- watchdog thread -----
+
+    def _watch(self) -> None:
+        stall: Optional[_Stall] = None
+        while not self._stop.wait(self.interval):
+            beat = self._last_beat
+            if stall is None:
+                if time.monotonic() - beat > self.threshold:
+                    stall = self._capture(beat)
+            elif beat > stall.started:
+                # Heartbeat resumed: the stall lasted until roughly this beat
+                self._report(stall, beat - stall.started - self.interval)
+                stall = None
+
+    def _capture(self, started: float) -> _Stall:
+        """Snapshot the loop thread's stack and the task that is blocking it."""
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = traceback.format_stack(frame)[-STACK_DEPTH:] if frame else []
+
+        task_name = trace_id = io_stats = None
+        try:
+            task = asyncio.current_task(self._loop)
+        except Exception:
+            task = None
+        if task is not None:
+            task_name = task.get_name()
+        # Task.get_context() is Python 3.12+
+        context = task.get_context() if hasattr(task, "get_context") else None
+        if context is not None:
+            from app.observability.io_accounting import _io_stats_ctx
+            from app.utils.trace_context import _trace_id_ctx
+            trace_id = context.get(_trace_id_ctx)
+            io_stats = context.get(_io_stats_ctx)
+
+        return _Stall(started, stack, task_name, trace_id, io_stats)
+
+    def _report(self, stall: _Stall, duration: float) -> None:
+        duration = max(duration, self.threshold)
+        self.stalls += 1
+        self.blocked_seconds += duration
+
+        if stall.io_stats is not None:
+            stall.io_stats.loop_blocked_ms += duration * 1000
+
+        try:
+            from app.observability.metrics import observe_loop_block
+            observe_loop_block(duration)
+        except Exception as e:
+            logger.debug(f"Failed to record loop block metric: {e}")
+
+        logger.warning(
+            f"⚠️ Event loop blocked for {duration * 1000:.0f}ms "
+            f"[task={stall.task_name or '-'}, trace={stall.trace_id or '-'}]\n"
+            f"{''.join(stall.stack)}",
+            extra={
+                'loop_blocked_ms': round(duration * 1000, 1),
+                'blocked_trace_id': stall.trace_id,
+                'blocked_task': stall.task_name,
+            }
+        )
+
+
+_watchdog: Optional[LoopWatchdog] = None
+
+
+def start_loop_watchdog(force: bool = False) -> Optional[LoopWatchdog]:
+    """Start the process-wide watchdog on the running loop if enabled."""
+    global _watchdog
+    if not (LOOP_WATCHDOG_ENABLED or force):
+        return None
+    if _watchdog is None:
+        _watchdog = LoopWatchdog()
+        _watchdog.start()
+    return _watchdog
+
+
+async def stop_loop_watchdog() -> None:
+    global _watchdog
+    if _watchdog is not None:
+        await _watchdog.stop()
+        _watchdog = None
@@ -104,6 +104,91 @@ MEM0_WRITE_LATENCY = Histogram(
     registry=registry
 )
 
+# Jobs through the sharded mem0 write pipeline
+MEM0_QUEUE_JOBS = Counter(
+    'mem0_write_queue_jobs_total',
+    'Jobs handled by the mem0 write pipeline',
+    ['outcome'],  # enqueued, coalesced, dropped, written
+    registry=registry
+)
+
+# Time a mem0 write batch waited between enqueue and start of write
+MEM0_QUEUE_LAG = Histogram(
+    'mem0_write_queue_lag_seconds',
+    'Time from enqueue to start of the mem0 write',
+    buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0),
+    registry=registry
+)
+
+# ==============================================================================
+# SESSION SUMMARY METRICS
+# ==============================================================================
+
+# Sessions summarized by the batch worker
+SUMMARY_SESSIONS = Counter(
+    'session_summaries_total',
+    'Sessions handled by the summary worker',
+    ['outcome'],  # llm, templated, failed
+    registry=registry
+)
+
+# One summary batch: fetch, LLM call(s) and bulk write
+SUMMARY_BATCH_LATENCY = Histogram(
+    'session_summary_batch_duration_seconds',
+    'Summary batch duration',
+    buckets=(0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0),
+    registry=registry
+)
+
+SUMMARY_LLM_TOKENS = Counter(
+    'session_summary_llm_tokens_total',
+    'LLM tokens spent on session summaries',
+    ['direction'],  # input, output
+    registry=registry
+)
+
+SUMMARY_LLM_COST = Counter(
+    'session_summary_llm_cost_usd_total',
+    'Estimated LLM cost of session summaries (USD)',
+    registry=registry
+)
+
+# ==============================================================================
+# WEBSOCKET FAN-OUT METRICS
+# ==============================================================================
+
+# Events fanned out to local sockets, by where they were published
+WS_EVENTS = Counter(
+    'websocket_events_total',
+    'Websocket events fanned out to local sockets',
+    ['origin'],  # local, backplane
+    registry=registry
+)
+
+# Frames handed to local send queues
+WS_FRAMES = Counter(
+    'websocket_frames_total',
+    'Websocket frames by outcome',
+    ['outcome'],  # queued, coalesced, dropped
+    registry=registry
+)
+
+# Sockets closed because they could not keep up
+WS_SLOW_CONSUMERS = Counter(
+    'websocket_slow_consumers_total',
+    'Websocket connections closed as slow consumers',
+    ['reason'],  # queue_full, send_timeout
+    registry=registry
+)
+
+# Time from publish to the last local socket queue
+WS_FANOUT_LATENCY = Histogram(
+    'websocket_fanout_duration_seconds',
+    'Time to serialize an event and queue it for every local recipient',
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1),
+    registry=registry
+)
+
 # ==============================================================================
 # ROUTER METRICS
 # ==============================================================================
@@ -196,6 +281,94 @@ HYDRATION_QUERIES = Counter(
     registry=registry
 )
 
+# ==============================================================================
+# EVENT LOOP / PER-REQUEST I/O METRICS
+# ==============================================================================
+
+# Event loop stalls detected by the loop watchdog
+EVENT_LOOP_BLOCK_DURATION = Histogram(
+    'event_loop_block_duration_seconds',
+    'Duration of event loop stalls above the watchdog threshold',
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0),
+    registry=registry
+)
+
+# Backend calls made while handling one request/message
+REQUEST_IO_CALLS = Histogram(
+    'request_io_calls',
+    'Backend calls per request',
+    ['kind', 'backend'],  # backend: db, redis, http
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200),
+    registry=registry
+)
+
+# Time spent waiting on backend calls per request
+REQUEST_IO_DURATION = Histogram(
+    'request_io_duration_seconds',
+    'Time spent in backend calls per request',
+    ['kind', 'backend'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0),
+    registry=registry
+)
+
+# Time the event loop was blocked while handling one request/message
+REQUEST_LOOP_BLOCKED = Histogram(
+    'request_loop_blocked_seconds',
+    'Event loop time blocked by synchronous calls per request',
+    ['kind'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0),
+    registry=registry
+)
+
+# ==============================================================================
+# LLM CONCURRENCY METRICS
+# ==============================================================================
+
+# Current adaptive concurrency limit per provider/model
+LLM_CONCURRENCY_LIMIT = Gauge(
+    'llm_concurrency_limit',
+    'Adaptive concurrency limit of LLM calls',
+    ['provider', 'model'],
+    registry=registry
+)
+
+# Time calls waited for a provider slot
+LLM_QUEUE_WAIT = Histogram(
+    'llm_queue_wait_seconds',
+    'Time LLM calls waited for a concurrency slot',
+    ['provider', 'priority'],  # priority: interactive, normal, background
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 120.0),
+    registry=registry
+)
+
+# Calls shed before reaching the provider
+LLM_SHED = Counter(
+    'llm_calls_shed_total',
+    'LLM calls shed by the concurrency limiter',
+    ['provider', 'priority', 'reason'],  # reason: estimated_wait, queue_timeout
+    registry=registry
+)
+
+# Overload answers from providers (429/503/529, timeouts)
+LLM_OVERLOADS = Counter(
+    'llm_provider_overloads_total',
+    'LLM provider overload errors',
+    ['provider'],
+    registry=registry
+)
+
+# ==============================================================================
+# TRACING EXPORT METRICS
+# ==============================================================================
+
+# Spans handled by the buffered span exporter
+TRACE_SPANS = Counter(
+    'trace_spans_total',
+    'Spans handled by the buffered span exporter',
+    ['outcome'],  # exported, dropped_buffer, dropped_sampling, dropped_trace_limit, export_failed
+    registry=registry
+)
+
 # ==============================================================================
 # HELPER FUNCTIONS
 # ==============================================================================
@@ -232,6 +405,71 @@ def observe_mem0_write(status: str, duration_seconds: float):
     MEM0_WRITE_LATENCY.observe(duration_seconds)
 
 
+def observe_mem0_queue_jobs(outcome: str, count: int = 1):
+    """Record jobs enqueued, coalesced, dropped or written by the mem0 pipeline"""
+    MEM0_QUEUE_JOBS.labels(outcome=outcome).inc(count)
+
+
+def observe_mem0_queue_lag(lag_seconds: float):
+    """Record how long a mem0 write batch waited in the queue"""
+    MEM0_QUEUE_LAG.observe(lag_seconds)
+
+
+def observe_summary_batch(
+    duration_seconds: float,
+    outcomes: dict,
+    input_tokens: int = 0,
+    output_tokens: int = 0,
+    cost_usd: float = 0.0
+):
+    """Record one session summary batch (outcomes: {outcome: sessions})"""
+    SUMMARY_BATCH_LATENCY.observe(duration_seconds)
+    for outcome, count in outcomes.items():
+        if count:
+            SUMMARY_SESSIONS.labels(outcome=outcome).inc(count)
+    SUMMARY_LLM_TOKENS.labels(direction='input').inc(input_tokens)
+    SUMMARY_LLM_TOKENS.labels(direction='output').inc(output_tokens)
+    SUMMARY_LLM_COST.inc(cost_usd)
+
+
+def observe_websocket_fanout(origin: str, recipients: int, coalesced: int, duration_seconds: float):
+    """Record one event fanned out to local sockets"""
+    WS_EVENTS.labels(origin=origin).inc()
+    WS_FRAMES.labels(outcome='queued').inc(recipients - coalesced)
+    if coalesced:
+        WS_FRAMES.labels(outcome='coalesced').inc(coalesced)
+    WS_FANOUT_LATENCY.observe(duration_seconds)
+
+
+def observe_websocket_frames(outcome: str, count: int = 1):
+    """Record websocket frames dropped with a closed socket's queue"""
+    WS_FRAMES.labels(outcome=outcome).inc(count)
+
+
+def observe_websocket_slow_consumer(reason: str):
+    """Record a socket closed because it could not keep up"""
+    WS_SLOW_CONSUMERS.labels(reason=reason).inc()
+
+
+def observe_llm_concurrency(
+    provider: str,
+    model: str,
+    priority: str,
+    wait_seconds: float,
+    limit: int,
+    shed_reason: str = None,
+    overload: bool = False
+):
+    """Record an LLM limiter event: a granted slot, a shed call or a provider overload"""
+    LLM_CONCURRENCY_LIMIT.labels(provider=provider, model=model).set(limit)
+    if overload:
+        LLM_OVERLOADS.labels(provider=provider).inc()
+        return
+    LLM_QUEUE_WAIT.labels(provider=provider, priority=priority).observe(wait_seconds)
+    if shed_reason:
+        LLM_SHED.labels(provider=provider, priority=priority, reason=shed_reason).inc()
+
+
 def observe_lane_classification(lane: str, duration_seconds: float):
     """Record lane classification"""
     LANE_CLASSIFICATION.labels(lane=lane).inc()
@@ -269,6 +507,27 @@ def observe_hydration_query(query_type: str):
     HYDRATION_QUERIES.labels(query_type=query_type).inc()
 
 
+def observe_loop_block(duration_seconds: float):
+    """Record an event loop stall"""
+    EVENT_LOOP_BLOCK_DURATION.observe(duration_seconds)
+
+
+def observe_request_io(kind: str, backend: str, calls: int, duration_seconds: float):
+    """Record backend calls made by one request"""
+    REQUEST_IO_CALLS.labels(kind=kind, backend=backend).observe(calls)
+    REQUEST_IO_DURATION.labels(kind=kind, backend=backend).observe(duration_seconds)
+
+
+def observe_request_loop_blocked(kind: str, duration_seconds: float):
+    """Record event loop time blocked by one request"""
+    REQUEST_LOOP_BLOCKED.labels(kind=kind).observe(duration_seconds)
+
+
+def observe_trace_spans(outcome: str, count: int):
+    """Record spans exported or dropped by the span exporter"""
+    TRACE_SPANS.labels(outcome=outcome).inc(count)
+
+
 # ==============================================================================
 # DECORATORS
 # ==============================================================================
@@ -373,6 +632,7 @@ def get_metrics_summary() -> dict:
         'mem0': {
             'queue_size': get_gauge(MEM0_QUEUE_SIZE),
             'writes': sum_counter(MEM0_WRITES),
+            'dropped': get_labeled_gauge(MEM0_QUEUE_JOBS, {'outcome': 'dropped'}),
         },
         'lanes': {
             'faq': get_labeled_gauge(LANE_CLASSIFICATION, {'lane': 'faq'}),
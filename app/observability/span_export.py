@@ -0,0 +1,549 @@
+"""
+Buffered Span Export
+
+Unified tracing facade that keeps span export off the request path:
+- Spans are plain records appended to a bounded in-memory ring buffer
+  (deque append/popleft are atomic under the GIL, so producers never lock)
+- A background thread drains the buffer in batches and hands them to an
+  exporter (OpenTelemetry bridge -> Langfuse/Arize/OTLP, gzip'd JSON over
+  HTTP, or the null exporter for tests)
+- Head sampling at the root span plus tail sampling when the trace ends:
+  errors and slow traces are always kept
+- Under backpressure spans are dropped, never queued without bound;
+  drops are counted and published as Prometheus counters
+
+Usage:
+    from app.observability.span_export import span, traced
+
+    with span("hydrate_context", clinic_id=clinic_id) as s:
+        ...
+        s.set_attribute("rows", len(rows))
+
+    @traced("llm.generate", kind="generation")
+    async def generate(...):
+        ...
+
+Configuration (env):
+    TRACE_EXPORTER           otel | http | null (default: otel when available)
+    TRACE_EXPORT_ENDPOINT    URL for the http exporter
+    TRACE_HEAD_SAMPLE_RATE   fraction of traces kept up front (default 0.1)
+    TRACE_SLOW_MS            traces slower than this are always kept (default 2000)
+    TRACE_BUFFER_CAPACITY    max buffered spans (default 10000)
+    TRACE_BATCH_SIZE         spans per export batch (default 256)
+    TRACE_FLUSH_INTERVAL_MS  max time a span waits in the buffer (default 1000)
+"""
+
+import asyncio
+import gzip
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+    import json
+
+logger = logging.getLogger(__name__)
+
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "otel").lower()
+TRACE_EXPORT_ENDPOINT = os.getenv("TRACE_EXPORT_ENDPOINT")
+TRACE_HEAD_SAMPLE_RATE = float(os.getenv("TRACE_HEAD_SAMPLE_RATE", "0.1"))
+TRACE_SLOW_MS = float(os.getenv("TRACE_SLOW_MS", "2000"))
+TRACE_BUFFER_CAPACITY = int(os.getenv("TRACE_BUFFER_CAPACITY", "10000"))
+TRACE_BATCH_SIZE = int(os.getenv("TRACE_BATCH_SIZE", "256"))
+TRACE_FLUSH_INTERVAL_MS = float(os.getenv("TRACE_FLUSH_INTERVAL_MS", "1000"))
+
+# Spans beyond this in one trace are dropped (runaway loops)
+MAX_SPANS_PER_TRACE = 512
+# Attribute values are truncated to keep records small
+MAX_ATTRIBUTE_LENGTH = 500
+
+
+# =============================================================================
+# Records
+# =============================================================================
+
+@dataclass(slots=True)
+class SpanRecord:
+    """A finished span, ready for export."""
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    name: str
+    kind: str  # span, generation
+    start_ns: int
+    end_ns: int
+    attributes: Dict[str, Any]
+    error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+def _new_id(bits: int) -> str:
+    # Cheaper than uuid4 on the hot path; ids need to be unique, not secret
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+class _TraceState:
+    """Spans of one in-flight trace, held until the root span decides sampling."""
+    __slots__ = ("trace_id", "head_sampled", "spans", "has_error", "decided", "keep")
+
+    def __init__(self, trace_id: str, head_sampled: bool):
+        self.trace_id = trace_id
+        self.head_sampled = head_sampled
+        self.spans: List[SpanRecord] = []
+        self.has_error = False
+        self.decided = False
+        self.keep = False
+
+
+@dataclass
+class ExportStats:
+    """Plain counters updated on the hot path; published by the exporter thread."""
+    exported: int = 0
+    dropped_buffer: int = 0
+    dropped_sampling: int = 0
+    dropped_trace_limit: int = 0
+    export_failed: int = 0
+    _published: Dict[str, int] = field(default_factory=dict)
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "exported": self.exported,
+            "dropped_buffer": self.dropped_buffer,
+            "dropped_sampling": self.dropped_sampling,
+            "dropped_trace_limit": self.dropped_trace_limit,
+            "export_failed": self.export_failed,
+        }
+
+
+# =============================================================================
+# Live span handle
+# =============================================================================
+
+class Span:
+    """Handle yielded by span(); mirrors the subset of the OTel Span API we use."""
+    __slots__ = ("_state", "span_id", "parent_id", "name", "kind", "attributes", "error", "start_ns")
+
+    def __init__(self, state: _TraceState, parent_id: Optional[str], name: str, kind: str, attributes: Dict[str, Any]):
+        self._state = state
+        self.span_id = _new_id(64)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self.error: Optional[str] = None
+        self.start_ns = time.time_ns()
+
+    @property
+    def trace_id(self) -> str:
+        return self._state.trace_id
+
+    @property
+    def is_recording(self) -> bool:
+        # Unsampled traces still record: tail sampling may keep them
+        return True
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        self.attributes.update(attributes)
+
+    def record_exception(self, exception: BaseException) -> None:
+        self.error = f"{type(exception).__name__}: {exception}"[:MAX_ATTRIBUTE_LENGTH]
+
+    def set_error(self, message: str) -> None:
+        self.error = message[:MAX_ATTRIBUTE_LENGTH]
+
+
+_active_span: ContextVar[Optional[Span]] = ContextVar("active_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _active_span.get()
+
+
+def _clean_attributes(attributes: Dict[str, Any]) -> Dict[str, Any]:
+    cleaned = {}
+    for key, value in attributes.items():
+        if value is None:
+            continue
+        if not isinstance(value, (bool, int, float)):
+            value = str(value)
+            if len(value) > MAX_ATTRIBUTE_LENGTH:
+                value = value[:MAX_ATTRIBUTE_LENGTH]
+        cleaned[key] = value
+    return cleaned
+
+
+# =============================================================================
+# Exporters
+# =============================================================================
+
+class SpanExporter:
+    """Receives batches of finished spans on the exporter thread."""
+
+    def export(self, batch: List[SpanRecord]) -> None:
+        raise NotImplementedError
+
+    def shutdown(self) -> None:
+        pass
+
+
+class NullExporter(SpanExporter):
+    """Discards spans but keeps them countable (and optionally inspectable) for tests."""
+
+    def __init__(self, keep: bool = False):
+        self.keep = keep
+        self.batches = 0
+        self.spans = 0
+        self.records: List[SpanRecord] = []
+
+    def export(self, batch: List[SpanRecord]) -> None:
+        self.batches += 1
+        self.spans += len(batch)
+        if self.keep:
+            self.records.extend(batch)
+
+
+class HttpJsonExporter(SpanExporter):
+    """POSTs gzip-compressed JSON batches to a collector endpoint."""
+
+    def __init__(self, endpoint: str, headers: Optional[Dict[str, str]] = None, timeout: float = 5.0):
+        import httpx
+
+        self.endpoint = endpoint
+        self._client = httpx.Client(
+            timeout=timeout,
+            headers={
+                "Content-Type": "application/json",
+                "Content-Encoding": "gzip",
+                **(headers or {}),
+            },
+        )
+
+    @staticmethod
+    def encode(batch: List[SpanRecord]) -> bytes:
+        payload = {"spans": [record.to_dict() for record in batch]}
+        raw = orjson.dumps(payload) if orjson else json.dumps(payload, default=str).encode()
+        return gzip.compress(raw, compresslevel=5)
+
+    def export(self, batch: List[SpanRecord]) -> None:
+        response = self._client.post(self.endpoint, content=self.encode(batch))
+        response.raise_for_status()
+
+    def shutdown(self) -> None:
+        self._client.close()
+
+
+class OTelBridgeExporter(SpanExporter):
+    """
+    Replays finished spans into the global OpenTelemetry tracer provider.
+
+    Langfuse (v3) and Arize both consume OTel spans, so this keeps their
+    SDK work on the exporter thread instead of inline around each call.
+    Compression is configured on the OTLP exporters themselves
+    (OTEL_EXPORTER_OTLP_COMPRESSION=gzip).
+    """
+
+    def __init__(self):
+        from opentelemetry import trace
+
+        self._trace = trace
+        self._tracer = trace.get_tracer("app.observability.span_export")
+
+    def export(self, batch: List[SpanRecord]) -> None:
+        trace = self._trace
+        live: Dict[str, Any] = {}
+        for record in sorted(batch, key=lambda r: r.start_ns):
+            parent = live.get(record.parent_id)
+            context = trace.set_span_in_context(parent) if parent is not None else None
+            attributes = dict(record.attributes)
+            attributes["trace.local_id"] = record.trace_id
+            if record.kind == "generation":
+                attributes["langfuse.observation.type"] = "generation"
+            otel_span = self._tracer.start_span(
+                record.name, context=context, attributes=attributes, start_time=record.start_ns
+            )
+            if record.error:
+                otel_span.set_status(trace.Status(trace.StatusCode.ERROR, record.error))
+            live[record.span_id] = otel_span
+        for record in batch:
+            live[record.span_id].end(end_time=record.end_ns)
+
+
+def _default_exporter() -> SpanExporter:
+    if TRACE_EXPORTER == "http" and TRACE_EXPORT_ENDPOINT:
+        return HttpJsonExporter(TRACE_EXPORT_ENDPOINT)
+    if TRACE_EXPORTER == "otel":
+        try:
+            return OTelBridgeExporter()
+        except ImportError:
+            logger.info("OpenTelemetry not installed, span export disabled")
+    return NullExporter()
+
+
+# =============================================================================
+# Tracer
+# =============================================================================
+
+class SpanTracer:
+    """Collects spans into a bounded buffer and exports them from a background thread."""
+
+    def __init__(
+        self,
+        exporter: Optional[SpanExporter] = None,
+        capacity: int = TRACE_BUFFER_CAPACITY,
+        batch_size: int = TRACE_BATCH_SIZE,
+        flush_interval_ms: float = TRACE_FLUSH_INTERVAL_MS,
+        head_sample_rate: float = TRACE_HEAD_SAMPLE_RATE,
+        slow_ms: float = TRACE_SLOW_MS,
+    ):
+        self.exporter = exporter
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.head_sample_rate = head_sample_rate
+        self.slow_ns = int(slow_ms * 1e6)
+        self.stats = ExportStats()
+        self._buffer: deque = deque()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    # ----- producer side (request path) -----
+
+    @contextmanager
+    def span(self, name: str, kind: str = "span", **attributes):
+        parent = _active_span.get()
+        if parent is None:
+            state = _TraceState(_new_id(128), random.random() < self.head_sample_rate)
+            parent_id = None
+        else:
+            state = parent._state
+            parent_id = parent.span_id
+
+        current = Span(state, parent_id, name, kind, attributes)
+        token = _active_span.set(current)
+        try:
+            yield current
+        except BaseException as e:
+            if not isinstance(e, (GeneratorExit, asyncio.CancelledError)):
+                current.record_exception(e)
+            raise
+        finally:
+            _active_span.reset(token)
+            self._finish(current, is_root=parent is None)
+
+    def _finish(self, current: Span, is_root: bool) -> None:
+        state = current._state
+        record = SpanRecord(
+            trace_id=state.trace_id,
+            span_id=current.span_id,
+            parent_id=current.parent_id,
+            name=current.name,
+            kind=current.kind,
+            start_ns=current.start_ns,
+            end_ns=time.time_ns(),
+            attributes=_clean_attributes(current.attributes),
+            error=current.error,
+        )
+        if record.error:
+            state.has_error = True
+
+        if state.decided:
+            # Late child (e.g. fire-and-forget task) of an already sampled trace
+            if state.keep:
+                self._enqueue(record)
+            else:
+                self.stats.dropped_sampling += 1
+            return
+
+        if len(state.spans) >= MAX_SPANS_PER_TRACE:
+            self.stats.dropped_trace_limit += 1
+        else:
+            state.spans.append(record)
+
+        if not is_root:
+            return
+
+        # Tail decision: head-sampled, failed or slow traces are kept
+        state.decided = True
+        state.keep = (
+            state.head_sampled
+            or state.has_error
+            or record.end_ns - record.start_ns >= self.slow_ns
+        )
+        spans, state.spans = state.spans, []
+        if state.keep:
+            for item in spans:
+                self._enqueue(item)
+        else:
+            self.stats.dropped_sampling += len(spans)
+
+    def _enqueue(self, record: SpanRecord) -> None:
+        if len(self._buffer) >= self.capacity:
+            self.stats.dropped_buffer += 1
+            return
+        self._buffer.append(record)
+        if self._thread is None:
+            self.start()
+        elif len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    # ----- consumer side (exporter thread) -----
+
+    def start(self) -> None:
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            if self.exporter is None:
+                self.exporter = _default_exporter()
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+            self._thread.start()
+
+    def _drain_batch(self) -> List[SpanRecord]:
+        batch = []
+        buffer = self._buffer
+        while buffer and len(batch) < self.batch_size:
+            batch.append(buffer.popleft())
+        return batch
+
+    def _export(self, batch: List[SpanRecord]) -> None:
+        try:
+            self.exporter.export(batch)
+            self.stats.exported += len(batch)
+        except Exception as e:
+            self.stats.export_failed += len(batch)
+            logger.warning(f"Span export failed ({len(batch)} spans dropped): {e}")
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+            self._publish_stats()
+
+    def flush(self) -> None:
+        """Export everything currently buffered (exporter thread or shutdown)."""
+        while True:
+            batch = self._drain_batch()
+            if not batch:
+                return
+            self._export(batch)
+
+    def _publish_stats(self) -> None:
+        try:
+            from app.observability.metrics import observe_trace_spans
+        except Exception:
+            return
+        published = self.stats._published
+        for outcome, total in self.stats.as_dict().items():
+            delta = total - published.get(outcome, 0)
+            if delta > 0:
+                observe_trace_spans(outcome, delta)
+                published[outcome] = total
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Stop the exporter thread and flush what is left."""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        if self.exporter is not None:
+            self.flush()
+            self._publish_stats()
+            self.exporter.shutdown()
+
+
+_tracer: Optional[SpanTracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_span_tracer() -> SpanTracer:
+    """Process-wide tracer (created on first use)."""
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = SpanTracer()
+    return _tracer
+
+
+def set_span_tracer(tracer: SpanTracer) -> Optional[SpanTracer]:
+    """Replace the process-wide tracer (tests, benchmarks); returns the previous one."""
+    global _tracer
+    previous, _tracer = _tracer, tracer
+    return previous
+
+
+def span(name: str, kind: str = "span", **attributes):
+    """Open a span on the process-wide tracer."""
+    return get_span_tracer().span(name, kind=kind, **attributes)
+
+
+def traced(
+    name: Optional[str] = None,
+    kind: str = "span",
+    result_attributes: Optional[Callable[[Any], Dict[str, Any]]] = None,
+):
+    """
+    Decorator wrapping an async function in a span.
+
+    Args:
+        name: Span name (defaults to the function's qualified name)
+        kind: "span" or "generation"
+        result_attributes: Optional callable deriving cheap attributes from the result
+    """
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            with get_span_tracer().span(span_name, kind=kind) as current:
+                result = await func(*args, **kwargs)
+                if result_attributes is not None:
+                    try:
+                        current.set_attributes(result_attributes(result))
+                    except Exception:
+                        pass
+                return result
+
+        return wrapper
+    return decorator
+
+
+async def shutdown_span_exporter() -> None:
+    """Flush and stop the background exporter (call on application shutdown)."""
+    if _tracer is not None:
+        await asyncio.to_thread(_tracer.shutdown)
+        logger.info(f"✅ Span exporter stopped: {_tracer.stats.as_dict()}")
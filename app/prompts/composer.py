@@ -174,7 +174,12 @@ class PromptComposer:
         if profile_section:
             sections.append(profile_section)
 
-        # 7. Conversation summary
+        # 7. Conversation summary (turns folded out of the history first)
+        if getattr(ctx, 'context_summary', None):
+            sections.append(
+                f"\nEARLIER IN THIS CONVERSATION:\n{ctx.context_summary}\n"
+                "(Older messages of this session, summarized; the recent messages follow)"
+            )
         summary = build_conversation_summary(ctx.session_messages or [])
         if summary:
             sections.append(summary)
@@ -249,7 +254,12 @@ class PromptComposer:
         if profile_section:
             sections.append(profile_section)
 
-        # 7. Conversation summary
+        # 7. Conversation summary (turns folded out of the history first)
+        if getattr(ctx, 'context_summary', None):
+            sections.append(
+                f"\nEARLIER IN THIS CONVERSATION:\n{ctx.context_summary}\n"
+                "(Older messages of this session, summarized; the recent messages follow)"
+            )
         summary = build_conversation_summary(ctx.session_messages or [])
         if summary:
             sections.append(summary)
@@ -80,6 +80,7 @@ class AutomatedRescheduler:
         self.preference_weight = 0.4
         self.availability_weight = 0.3
         self.conflict_weight = 0.3
+        self._conflict_predictor = None
 
     async def reschedule_appointment(
         self,
@@ -159,44 +160,218 @@ class AutomatedRescheduler:
     async def bulk_reschedule(
         self,
         requests: List[RescheduleRequest],
-        max_concurrent: int = 5
+        max_concurrent: int = 5,
+        auto_confirm: bool = False
     ) -> List[Dict[str, Any]]:
         """
-        Reschedule multiple appointments concurrently
+        Reschedule multiple appointments as one jointly planned batch
+
+        Used when a doctor calls in sick or a calendar conflict displaces many
+        appointments at once. All appointments, patient preferences and the
+        availability window are loaded once; conflict risk is computed once
+        per slot. Slots are then assigned greedily by request priority so no
+        two patients are offered the same slot.
 
         Args:
             requests: List of reschedule requests
-            max_concurrent: Maximum concurrent reschedule operations
+            max_concurrent: Maximum concurrent availability lookups
+            auto_confirm: Whether to confirm each request's assigned slot
 
         Returns:
-            List of reschedule results
+            List of reschedule results, in request order
         """
         logger.info(f"Starting bulk reschedule for {len(requests)} appointments")
 
-        # Create semaphore to limit concurrency
+        # 1. Load every affected appointment in one query
+        appointments = await self._get_appointments_bulk([req.appointment_id for req in requests])
+
+        # 2. Load missing patient preferences in one query
+        missing_preference_patients = {
+            appointments[req.appointment_id]['patient_id']
+            for req in requests
+            if req.appointment_id in appointments and not req.patient_preferences
+        }
+        preferences = await self._get_patient_preferences_bulk(list(missing_preference_patients))
+
+        results: Dict[int, Dict[str, Any]] = {}
+        planned: List[Tuple[int, RescheduleRequest, Dict[str, Any], datetime, datetime]] = []
+        for index, request in enumerate(requests):
+            appointment = appointments.get(request.appointment_id)
+            if not appointment:
+                results[index] = {
+                    "success": False,
+                    "error": f"Appointment {request.appointment_id} not found",
+                    "appointment_id": request.appointment_id
+                }
+                continue
+
+            if not request.patient_preferences:
+                request.patient_preferences = preferences.get(
+                    appointment['patient_id'], self._default_patient_preferences()
+                )
+
+            search_start, search_end = self._get_search_range(
+                appointment, request.target_date_range, request.patient_preferences
+            )
+            planned.append((index, request, appointment, search_start, search_end))
+
+        # 3. One availability lookup per (doctor, duration) over the union window
+        windows: Dict[Tuple[str, int], Tuple[datetime, datetime]] = {}
+        for _, _, appointment, search_start, search_end in planned:
+            key = (appointment['doctor_id'], appointment.get('duration_minutes', 30))
+            if key in windows:
+                start, end = windows[key]
+                windows[key] = (min(start, search_start), max(end, search_end))
+            else:
+                windows[key] = (search_start, search_end)
+
         semaphore = asyncio.Semaphore(max_concurrent)
 
-        async def _reschedule_with_semaphore(request):
+        async def _load_window(key):
             async with semaphore:
-                return await self.reschedule_appointment(request, auto_confirm=False)
+                try:
+                    return key, await self._get_available_slots(key[0], key[1], *windows[key])
+                except Exception as e:
+                    logger.error(f"Error loading availability for doctor {key[0]}: {str(e)}")
+                    return key, []
+
+        availability = dict(await asyncio.gather(*[_load_window(key) for key in windows]))
+
+        # 4. Conflict risk once per distinct slot
+        risk_keys = {
+            (doctor_id, datetime.fromisoformat(slot['start_time']), duration)
+            for (doctor_id, duration), slots in availability.items()
+            for slot in slots
+        }
 
-        # Execute reschedules concurrently
-        results = await asyncio.gather(
-            *[_reschedule_with_semaphore(req) for req in requests],
-            return_exceptions=True
-        )
+        async def _load_risk(key):
+            async with semaphore:
+                return key, await self._calculate_conflict_risk(key[1], key[0], key[2])
+
+        conflict_risks = dict(await asyncio.gather(*[_load_risk(key) for key in risk_keys]))
+
+        # 5. Score every candidate slot per request
+        candidates: Dict[int, List[RescheduleOption]] = {}
+        for index, request, appointment, search_start, search_end in planned:
+            doctor_id = appointment['doctor_id']
+            duration_minutes = appointment.get('duration_minutes', 30)
+            excluded = {d.date() for d in request.exclude_dates or []}
 
-        # Handle exceptions
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                results[i] = {
+            options = []
+            for slot in availability.get((doctor_id, duration_minutes), []):
+                slot_datetime = datetime.fromisoformat(slot['start_time'])
+                slot_date = slot_datetime.date()
+                if not (search_start.date() <= slot_date <= search_end.date()) or slot_date in excluded:
+                    continue
+                options.append(self._build_option(
+                    slot, slot_datetime, doctor_id, request.patient_preferences,
+                    conflict_risks[(doctor_id, slot_datetime, duration_minutes)]
+                ))
+            options.sort(key=lambda x: x.confidence, reverse=True)
+            candidates[index] = options
+
+        # 6. Assign slots jointly so no slot is offered to two patients
+        offered = self._assign_bulk_options(planned, candidates)
+
+        for index, request, appointment, _, _ in planned:
+            options = offered[index]
+            if not options:
+                results[index] = {
                     "success": False,
-                    "error": str(result),
-                    "appointment_id": requests[i].appointment_id
+                    "message": "No suitable reschedule options found",
+                    "appointment_id": request.appointment_id,
+                    "options": []
                 }
+                continue
+
+            result = {
+                "success": True,
+                "appointment_id": request.appointment_id,
+                "options": [self._option_to_dict(opt) for opt in options],
+                "original_datetime": appointment['appointment_date'],
+                "reason": request.reason.value,
+                "strategy": request.strategy.value
+            }
+            if auto_confirm:
+                result.update(await self._confirm_reschedule(appointment, options[0], request))
+            results[index] = result
+
+        ordered = [results[i] for i in range(len(requests))]
+        logger.info(f"Bulk reschedule completed: {sum(1 for r in ordered if r.get('success'))} succeeded")
+        return ordered
 
-        logger.info(f"Bulk reschedule completed: {sum(1 for r in results if r.get('success'))} succeeded")
-        return results
+    def _assign_bulk_options(
+        self,
+        planned: List[Tuple[int, RescheduleRequest, Dict[str, Any], datetime, datetime]],
+        candidates: Dict[int, List[RescheduleOption]]
+    ) -> Dict[int, List[RescheduleOption]]:
+        """
+        Greedy joint assignment by priority
+
+        First every request, highest priority first (ties by original time),
+        takes its best free slot; later rounds hand out alternates the same
+        way until each request has max_options. A slot is taken when it
+        overlaps any slot already offered for the same doctor.
+        """
+        order = sorted(
+            planned,
+            key=lambda item: (-item[1].priority, str(item[2].get('appointment_date', '')), item[0])
+        )
+        taken: Dict[str, List[Tuple[datetime, datetime]]] = {}
+        offered: Dict[int, List[RescheduleOption]] = {item[0]: [] for item in planned}
+        cursors = {item[0]: 0 for item in planned}
+
+        for _ in range(self.max_options):
+            for index, _, appointment, _, _ in order:
+                duration = timedelta(minutes=appointment.get('duration_minutes', 30))
+                options = candidates[index]
+                while cursors[index] < len(options):
+                    option = options[cursors[index]]
+                    cursors[index] += 1
+                    start, end = option.datetime, option.datetime + duration
+                    doctor_slots = taken.setdefault(option.doctor_id, [])
+                    if any(start < other_end and other_start < end for other_start, other_end in doctor_slots):
+                        continue
+                    doctor_slots.append((start, end))
+                    offered[index].append(option)
+                    break
+
+        return offered
+
+    async def _get_appointments_bulk(self, appointment_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get many appointments in one query, keyed by id"""
+        if not appointment_ids:
+            return {}
+        try:
+            result = await asyncio.to_thread(
+                self.supabase.table("appointments")
+                .select("*")
+                .in_("id", list(set(appointment_ids)))
+                .execute
+            )
+            return {row['id']: row for row in result.data or []}
+        except Exception as e:
+            logger.error(f"Error fetching appointments for bulk reschedule: {str(e)}")
+            return {}
+
+    async def _get_patient_preferences_bulk(self, patient_ids: List[str]) -> Dict[str, PatientPreferences]:
+        """Get preferences for many patients in one query, keyed by patient id"""
+        if not patient_ids:
+            return {}
+        try:
+            result = await asyncio.to_thread(
+                self.supabase.table("patient_preferences")
+                .select("*")
+                .in_("patient_id", patient_ids)
+                .execute
+            )
+            return {
+                row['patient_id']: self._preferences_from_row(row)
+                for row in result.data or []
+            }
+        except Exception as e:
+            logger.error(f"Error fetching patient preferences for bulk reschedule: {str(e)}")
+            return {}
 
     async def suggest_optimal_reschedule(
         self,
@@ -279,24 +454,10 @@ class AutomatedRescheduler:
                 .execute()
 
             if result.data:
-                prefs = result.data[0]
-                return PatientPreferences(
-                    preferred_days=prefs.get("preferred_days", ["monday", "tuesday", "wednesday", "thursday", "friday"]),
-                    preferred_times=[(time(9, 0), time(17, 0))],  # Default 9-5
-                    avoid_days=prefs.get("avoid_days", []),
-                    max_wait_days=prefs.get("max_wait_days", 30),
-                    notification_preferences=prefs.get("notification_preferences", {"sms": True, "email": False}),
-                    language=prefs.get("language", "en")
-                )
+                return self._preferences_from_row(result.data[0])
             else:
                 # Create default preferences
-                return PatientPreferences(
-                    preferred_days=["monday", "tuesday", "wednesday", "thursday", "friday"],
-                    preferred_times=[(time(9, 0), time(17, 0))],
-                    max_wait_days=30,
-                    notification_preferences={"sms": True, "email": False},
-                    language="en"
-                )
+                return self._default_patient_preferences()
 
         except Exception as e:
             logger.error(f"Error fetching patient preferences for {patient_id}: {str(e)}")
@@ -307,6 +468,27 @@ class AutomatedRescheduler:
                 max_wait_days=30
             )
 
+    def _preferences_from_row(self, prefs: Dict[str, Any]) -> PatientPreferences:
+        """Build preferences from a patient_preferences row"""
+        return PatientPreferences(
+            preferred_days=prefs.get("preferred_days", ["monday", "tuesday", "wednesday", "thursday", "friday"]),
+            preferred_times=[(time(9, 0), time(17, 0))],  # Default 9-5
+            avoid_days=prefs.get("avoid_days", []),
+            max_wait_days=prefs.get("max_wait_days", 30),
+            notification_preferences=prefs.get("notification_preferences", {"sms": True, "email": False}),
+            language=prefs.get("language", "en")
+        )
+
+    def _default_patient_preferences(self) -> PatientPreferences:
+        """Preferences used when a patient has none stored"""
+        return PatientPreferences(
+            preferred_days=["monday", "tuesday", "wednesday", "thursday", "friday"],
+            preferred_times=[(time(9, 0), time(17, 0))],
+            max_wait_days=30,
+            notification_preferences={"sms": True, "email": False},
+            language="en"
+        )
+
     def _get_search_range(
         self,
         appointment: Dict[str, Any],
@@ -343,14 +525,9 @@ class AutomatedRescheduler:
             duration_minutes = appointment.get('duration_minutes', 30)
 
             # Get available slots in the search range
-            availability_result = self.supabase.rpc("get_doctor_availability", {
-                "p_doctor_id": doctor_id,
-                "p_start_date": search_start.date().isoformat(),
-                "p_end_date": search_end.date().isoformat(),
-                "p_duration_minutes": duration_minutes
-            }).execute()
-
-            available_slots = availability_result.data or []
+            available_slots = await self._get_available_slots(
+                doctor_id, duration_minutes, search_start, search_end
+            )
 
             # Score each available slot
             for slot in available_slots:
@@ -360,36 +537,12 @@ class AutomatedRescheduler:
                 if request.exclude_dates and slot_datetime.date() in [d.date() for d in request.exclude_dates]:
                     continue
 
-                # Calculate scores
-                preference_score = self._calculate_preference_score(
-                    slot_datetime, request.patient_preferences
-                )
-                availability_score = slot.get('availability_score', 0.5)
                 conflict_risk = await self._calculate_conflict_risk(
                     slot_datetime, doctor_id, duration_minutes
                 )
-
-                # Calculate overall confidence
-                confidence = (
-                    preference_score * self.preference_weight +
-                    availability_score * self.availability_weight +
-                    (1 - conflict_risk) * self.conflict_weight
-                )
-
-                option = RescheduleOption(
-                    datetime=slot_datetime,
-                    doctor_id=doctor_id,
-                    confidence=confidence,
-                    preference_score=preference_score,
-                    availability_score=availability_score,
-                    conflict_risk=conflict_risk,
-                    reasoning=self._generate_reasoning(
-                        slot_datetime, preference_score, availability_score, conflict_risk
-                    ),
-                    metadata=slot
-                )
-
-                options.append(option)
+                options.append(self._build_option(
+                    slot, slot_datetime, doctor_id, request.patient_preferences, conflict_risk
+                ))
 
             # Sort by confidence and return top options
             options.sort(key=lambda x: x.confidence, reverse=True)
@@ -399,6 +552,56 @@ class AutomatedRescheduler:
             logger.error(f"Error finding reschedule options: {str(e)}")
             return []
 
+    async def _get_available_slots(
+        self,
+        doctor_id: str,
+        duration_minutes: int,
+        search_start: datetime,
+        search_end: datetime
+    ) -> List[Dict[str, Any]]:
+        """Get available slots for a doctor in a date range"""
+        availability_result = await asyncio.to_thread(
+            self.supabase.rpc("get_doctor_availability", {
+                "p_doctor_id": doctor_id,
+                "p_start_date": search_start.date().isoformat(),
+                "p_end_date": search_end.date().isoformat(),
+                "p_duration_minutes": duration_minutes
+            }).execute
+        )
+        return availability_result.data or []
+
+    def _build_option(
+        self,
+        slot: Dict[str, Any],
+        slot_datetime: datetime,
+        doctor_id: str,
+        preferences: PatientPreferences,
+        conflict_risk: float
+    ) -> RescheduleOption:
+        """Score a candidate slot for a patient"""
+        preference_score = self._calculate_preference_score(slot_datetime, preferences)
+        availability_score = slot.get('availability_score', 0.5)
+
+        # Calculate overall confidence
+        confidence = (
+            preference_score * self.preference_weight +
+            availability_score * self.availability_weight +
+            (1 - conflict_risk) * self.conflict_weight
+        )
+
+        return RescheduleOption(
+            datetime=slot_datetime,
+            doctor_id=doctor_id,
+            confidence=confidence,
+            preference_score=preference_score,
+            availability_score=availability_score,
+            conflict_risk=conflict_risk,
+            reasoning=self._generate_reasoning(
+                slot_datetime, preference_score, availability_score, conflict_risk
+            ),
+            metadata=slot
+        )
+
     def _calculate_preference_score(
         self,
         slot_datetime: datetime,
@@ -443,11 +646,12 @@ class AutomatedRescheduler:
         """Calculate risk of future conflicts for this slot"""
 
         try:
-            # Use predictive conflict prevention service
-            from app.services.predictive_conflict_prevention import PredictiveConflictPrevention
+            # Use predictive conflict prevention service (built once per rescheduler)
+            if self._conflict_predictor is None:
+                from app.services.predictive_conflict_prevention import PredictiveConflictPrevention
+                self._conflict_predictor = PredictiveConflictPrevention(self.supabase)
 
-            predictor = PredictiveConflictPrevention(self.supabase)
-            risk_assessment = await predictor.assess_slot_risk({
+            risk_assessment = await self._conflict_predictor.assess_slot_risk({
                 "doctor_id": doctor_id,
                 "start_time": slot_datetime.isoformat(),
                 "duration_minutes": duration_minutes
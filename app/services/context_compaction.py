@@ -0,0 +1,280 @@
+"""
+Rolling in-session context compaction.
+
+Keeps the history sent to the LLM within SESSION_HISTORY_TOKEN_BUDGET
+tokens. When the unsummarized history exceeds the budget, the oldest turns
+are folded into a rolling summary stored on the session
+(conversation_sessions.context_summary), by a background task off the
+message path. Each turn sends the summary plus the newest raw messages that
+fit the budget.
+
+Tool output and other non-dialogue rows are only kept among the most recent
+messages: what they established (service, doctor, booking, constraints)
+lives in conversation_state and the constraints, which the system prompt
+already carries.
+
+Folding down to SESSION_COMPACTION_TARGET_RATIO of the budget leaves room
+for the next few turns before the next fold.
+"""
+
+import asyncio
+import logging
+import os
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.utils.token_counter import split_to_budget
+
+logger = logging.getLogger(__name__)
+
+SESSION_COMPACTION_ENABLED = os.getenv("SESSION_COMPACTION_ENABLED", "true").lower() == "true"
+
+# Tokens of raw history sent per turn (the rolling summary comes on top)
+SESSION_HISTORY_TOKEN_BUDGET = int(os.getenv("SESSION_HISTORY_TOKEN_BUDGET", "1500"))
+
+# Share of the budget left as raw history after a fold
+SESSION_COMPACTION_TARGET_RATIO = float(os.getenv("SESSION_COMPACTION_TARGET_RATIO", "0.5"))
+
+# Most recent messages always sent raw, whatever their size
+SESSION_HISTORY_MIN_RECENT = int(os.getenv("SESSION_HISTORY_MIN_RECENT", "4"))
+
+SESSION_SUMMARY_MAX_TOKENS = int(os.getenv("SESSION_SUMMARY_MAX_TOKENS", "300"))
+
+# Sessions whose latest fold is remembered in-process (read-your-writes
+# while the session row in cache is older)
+RECENT_SUMMARIES_SIZE = 2048
+
+DIALOGUE_ROLES = ('user', 'assistant')
+
+ROLLING_SUMMARY_PROMPT = """You keep a running summary of an ongoing WhatsApp conversation between a patient and a dental clinic assistant.
+
+You receive the summary so far (possibly empty), facts that are already tracked elsewhere, and the next messages of the conversation. Return the updated summary:
+- Keep what the patient asked for, what they said about themselves (name, symptoms, preferences, dates that work or do not work), what the assistant offered or promised, and any open question.
+- Do not repeat the tracked facts.
+- Plain text, at most 8 short lines, in the language of the conversation. No preamble."""
+
+
+def _message_text(row: Dict[str, Any]) -> str:
+    # Database column is 'message_content', fallback to 'content' for compatibility
+    return row.get('message_content') or row.get('content') or ''
+
+
+def _timestamp(value: Any) -> Optional[datetime]:
+    """Parse a created_at value; naive timestamps are taken as UTC."""
+    if not value:
+        return None
+    if not isinstance(value, datetime):
+        try:
+            value = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+class SessionContextCompactor:
+    """Bounds per-turn history and folds older turns into a rolling session summary"""
+
+    def __init__(
+        self,
+        supabase_client=None,
+        llm_factory_getter=None,
+        token_budget: int = SESSION_HISTORY_TOKEN_BUDGET,
+        min_recent: int = SESSION_HISTORY_MIN_RECENT,
+    ):
+        self._supabase = supabase_client
+        self._llm_factory_getter = llm_factory_getter
+        self.token_budget = token_budget
+        self.min_recent = min_recent
+        # session_id -> fold task in flight (one per session)
+        self._folding: Dict[str, asyncio.Task] = {}
+        # session_id -> (summary, through) of the latest fold done here
+        self._recent: 'OrderedDict[str, Tuple[str, str]]' = OrderedDict()
+        self.stats = {'turns': 0, 'compacted': 0, 'folds': 0, 'fold_failures': 0}
+
+    @property
+    def supabase(self):
+        if self._supabase is None:
+            from app.database import get_main_client
+            self._supabase = get_main_client()
+        return self._supabase
+
+    async def _get_llm_factory(self):
+        if self._llm_factory_getter:
+            return await self._llm_factory_getter()
+        from app.services.llm.llm_factory import get_llm_factory
+        return await get_llm_factory()
+
+    def compact(self, ctx) -> None:
+        """
+        Bound ctx.session_messages to the token budget and set ctx.context_summary.
+
+        Runs on the message path, so it only counts tokens and slices; the
+        LLM call that folds older turns into the summary runs in the
+        background.
+        """
+        if not SESSION_COMPACTION_ENABLED or not ctx.session_id or not ctx.conversation_history:
+            return
+        self.stats['turns'] += 1
+
+        summary, through = self._current_summary(ctx)
+        through_at = _timestamp(through)
+        rows = [row for row in ctx.conversation_history if not self._covered(row, through_at)]
+
+        # Non-dialogue rows (tool output) only among the most recent messages
+        recent_start = max(len(rows) - self.min_recent, 0)
+        rows = [
+            row for index, row in enumerate(rows)
+            if index >= recent_start or row.get('role', 'user') in DIALOGUE_ROLES
+        ]
+        messages = [{'role': row.get('role', 'user'), 'content': _message_text(row)} for row in rows]
+
+        older, recent = split_to_budget(messages, self.token_budget, self.min_recent)
+        ctx.context_summary = summary or None
+        ctx.session_messages = recent
+        if not older:
+            return
+
+        self.stats['compacted'] += 1
+        logger.info(
+            f"[Compaction] Session {ctx.session_id}: sending {len(recent)}/{len(messages)} messages "
+            f"(budget {self.token_budget} tokens), summary={'yes' if summary else 'no'}"
+        )
+
+        # Fold down to the target share of the budget, so the next turns fit without another fold
+        to_fold, _ = split_to_budget(
+            messages, int(self.token_budget * SESSION_COMPACTION_TARGET_RATIO), self.min_recent
+        )
+        fold_rows = [row for row in rows[:len(to_fold)] if row.get('role', 'user') in DIALOGUE_ROLES]
+        if fold_rows and all(_timestamp(row.get('created_at')) for row in fold_rows):
+            self._schedule_fold(ctx, summary, fold_rows)
+
+    @staticmethod
+    def _covered(row: Dict[str, Any], through_at: Optional[datetime]) -> bool:
+        """Whether the rolling summary already covers this row (rows without created_at never are)."""
+        created_at = _timestamp(row.get('created_at'))
+        return through_at is not None and created_at is not None and created_at <= through_at
+
+    def _current_summary(self, ctx) -> Tuple[Optional[str], Optional[str]]:
+        """Rolling summary and the created_at of the last message it covers."""
+        session = ctx.session if isinstance(ctx.session, dict) else {}
+        summary = session.get('context_summary')
+        through = session.get('context_summary_through')
+        remembered = self._recent.get(ctx.session_id)
+        if remembered:
+            stored_at, remembered_at = _timestamp(through), _timestamp(remembered[1])
+            if stored_at is None or (remembered_at and remembered_at > stored_at):
+                summary, through = remembered
+        return summary, through
+
+    def _schedule_fold(self, ctx, summary: Optional[str], rows: List[Dict[str, Any]]):
+        session_id = ctx.session_id
+        if session_id in self._folding:
+            return  # The running fold covers most of these; the next turn picks up the rest
+        facts = self._tracked_facts(ctx)
+        task = asyncio.create_task(
+            self._fold(session_id, ctx.effective_clinic_id, summary, rows, facts)
+        )
+        self._folding[session_id] = task
+        task.add_done_callback(lambda _: self._folding.pop(session_id, None))
+
+    @staticmethod
+    def _tracked_facts(ctx) -> List[str]:
+        """Facts the system prompt already carries from conversation_state and constraints."""
+        facts = []
+        state = ctx.conversation_state
+        if state is not None:
+            if getattr(state, 'episode_type', None) and state.episode_type != 'GENERAL':
+                facts.append(f"episode: {state.episode_type}")
+            for key, value in (getattr(state, 'current_constraints', None) or {}).items():
+                if value:
+                    facts.append(f"{key}: {value}")
+            for key, value in (getattr(state, 'booking_state', None) or {}).items():
+                if value:
+                    facts.append(f"booking {key}: {value}")
+        constraints = ctx.constraints
+        if constraints is not None:
+            for key in ('desired_service', 'desired_doctor', 'excluded_doctors', 'excluded_services', 'time_window_display'):
+                value = getattr(constraints, key, None)
+                if value:
+                    facts.append(f"{key}: {value}")
+        if ctx.patient_name:
+            facts.append(f"patient name: {ctx.patient_name}")
+        return facts
+
+    async def _fold(
+        self,
+        session_id: str,
+        clinic_id: Optional[str],
+        summary: Optional[str],
+        rows: List[Dict[str, Any]],
+        facts: List[str],
+    ):
+        """Fold rows into the rolling summary and store it on the session."""
+        from app.services.llm.tiers import ModelTier
+
+        conversation = "\n".join(
+            f"{row.get('role', 'user').upper()}: {_message_text(row)}" for row in rows
+        )
+        user_prompt = (
+            f"Summary so far:\n{summary or '(none)'}\n\n"
+            f"Tracked facts:\n{chr(10).join(f'- {fact}' for fact in facts) or '(none)'}\n\n"
+            f"Next messages:\n{conversation}\n\n"
+            "Updated summary:"
+        )
+        try:
+            factory = await self._get_llm_factory()
+            response = await factory.generate_for_tier(
+                tier=ModelTier.SUMMARIZATION,
+                messages=[
+                    {"role": "system", "content": ROLLING_SUMMARY_PROMPT},
+                    {"role": "user", "content": user_prompt},
+                ],
+                max_tokens=SESSION_SUMMARY_MAX_TOKENS,
+                temperature=0.2,
+                clinic_id=clinic_id,
+                session_id=session_id,
+            )
+            new_summary = (response.content or '').strip()
+            if not new_summary:
+                raise ValueError("empty summary")
+
+            through = str(rows[-1]['created_at'])
+            self._recent[session_id] = (new_summary, through)
+            self._recent.move_to_end(session_id)
+            while len(self._recent) > RECENT_SUMMARIES_SIZE:
+                self._recent.popitem(last=False)
+
+            await asyncio.to_thread(
+                lambda: self.supabase.schema('healthcare').table('conversation_sessions').update({
+                    'context_summary': new_summary,
+                    'context_summary_through': through,
+                }).eq('id', session_id).execute()
+            )
+            self.stats['folds'] += 1
+            logger.info(f"[Compaction] Folded {len(rows)} messages into session {session_id} summary")
+        except Exception as e:
+            # The history stays raw (and truncated to the budget) until a later fold succeeds
+            self.stats['fold_failures'] += 1
+            logger.warning(f"[Compaction] Failed to fold session {session_id}: {e}")
+
+    async def drain(self, session_id: Optional[str] = None):
+        """Wait for folds in flight, of one session or all (shutdown, evals)."""
+        if session_id is not None:
+            tasks = [self._folding[session_id]] if session_id in self._folding else []
+        else:
+            tasks = list(self._folding.values())
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+# Singleton instance
+_compactor: Optional[SessionContextCompactor] = None
+
+
+def get_context_compactor() -> SessionContextCompactor:
+    """Get or create the session context compactor"""
+    global _compactor
+    if _compactor is None:
+        _compactor = SessionContextCompactor()
+    return _compactor
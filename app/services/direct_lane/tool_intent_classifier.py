@@ -6,7 +6,8 @@ import re
 from enum import Enum
 import time
 import logging
-from app.services.language_service import LanguageService
+from app.services.language_service import get_language_service
+from app.services.message_analysis import analyze
 
 logger = logging.getLogger(__name__)
 
@@ -104,7 +105,7 @@ class ToolIntentClassifier:
 
     def __init__(self):
         # Initialize LanguageService for unified detection
-        self.language_service = LanguageService()
+        self.language_service = get_language_service()
         # Compile patterns for performance
         self._compiled_patterns = {}
         for lang, patterns in self.PATTERNS.items():
@@ -133,8 +134,10 @@ class ToolIntentClassifier:
         start_time = time.time()
         message_lower = message.lower()
 
-        # Detect language using LanguageService (single source of truth)
-        language = self.language_service.detect_sync(message_lower)
+        # Detect language once per message (shared with the other stages).
+        # This reads the original text rather than message_lower; detection
+        # lowercases on its own, so the result is the same.
+        language = analyze(message).language
 
         # Get patterns for detected language
         patterns = self._compiled_patterns.get(language, self._compiled_patterns["en"])
@@ -171,7 +174,7 @@ class ToolIntentClassifier:
         )
 
     # NOTE: _detect_language was removed in Phase 1B.
-    # Use self.language_service.detect_sync() instead (single source of truth).
+    # Use analyze(text).language instead (LanguageService, computed once per message).
 
     def _match_faq(
         self,
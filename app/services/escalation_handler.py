@@ -83,6 +83,15 @@ class EscalationHandler:
                 update_data
             ).eq('id', session_id).execute()
 
+            from app.services.hitl_state_cache import locked_state, publish_control_change
+            await publish_control_change(locked_state(
+                session_id,
+                clinic_id=clinic_id,
+                lock_reason=reason,
+                lock_source='auto_escalation',
+                locked_at=update_data['locked_at']
+            ))
+
             # Create escalation record (for tracking)
             escalation_record = {
                 'session_id': session_id,
@@ -8,17 +8,23 @@ import redis.asyncio as redis
 import aiofiles
 import os
 import hashlib
+import shutil
+import struct
 from datetime import datetime, timezone
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from pathlib import Path
 import logging
 import asyncio
 import tarfile
 import io
+import zstandard as zstd
 from cryptography.fernet import Fernet
 
 logger = logging.getLogger(__name__)
 
+# Streaming Redis record: key length, payload length, PTTL in ms (0 = no expiry)
+_REDIS_RECORD_HEADER = struct.Struct(">IIq")
+
 
 class ExternalBackupService:
     """
@@ -27,8 +33,20 @@ class ExternalBackupService:
     - WhatsApp Evolution API authentication
     - Configuration files
     - Frontend localStorage data (via API)
+
+    Redis data is written in a streaming format: length-prefixed DUMP records
+    grouped into zstd-compressed, checksummed chunks plus a manifest. Backups
+    can be incremental against the previous manifest for the same tenant.
     """
 
+    REDIS_BACKUP_FORMAT = "redis-dump-stream"
+    REDIS_BACKUP_FORMAT_VERSION = "2.0"
+    REDIS_SCAN_BATCH_SIZE = 500
+    REDIS_CHUNK_SIZE_BYTES = 4 * 1024 * 1024  # 4MB of raw records per chunk
+    REDIS_COMPRESSION_LEVEL = 3
+    REDIS_RESTORE_BATCH_SIZE = 500
+    REDIS_RESTORE_CONCURRENCY = 4
+
     def __init__(self, redis_client: redis.Redis, backup_dir: str = "/data/backups"):
         self.redis_client = redis_client
         self.backup_dir = Path(backup_dir)
@@ -42,23 +60,38 @@ class ExternalBackupService:
             self.cipher = None
             logger.warning("No encryption key found, backups will not be encrypted")
 
-    async def backup_redis_data(self, tenant_id: Optional[str] = None) -> Dict[str, Any]:
+    async def backup_redis_data(
+        self,
+        tenant_id: Optional[str] = None,
+        base_manifest: Optional[Dict[str, Any]] = None,
+        output_dir: Optional[Path] = None
+    ) -> Dict[str, Any]:
         """
-        Backs up Redis data for a specific tenant or all tenants
+        Streams Redis data for a specific tenant or all tenants to disk
+
+        Keys are SCANned in batches and each batch is read with a pipelined
+        DUMP/PTTL, so values keep their Redis type and memory use is bounded
+        by the chunk size rather than the keyspace. Records are appended to
+        zstd-compressed chunk files and described by a ``manifest.json``.
 
         Args:
             tenant_id: Optional tenant ID to filter data
+            base_manifest: Previous manifest; when given, only keys whose
+                content hash changed since it are written (incremental backup)
+            output_dir: Directory for chunks and manifest (defaults to a new
+                timestamped directory under ``backup_dir``)
 
         Returns:
-            Dict containing backup metadata and data
+            Manifest describing the written chunks
         """
         try:
-            backup_data = {
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-                "type": "redis",
-                "tenant_id": tenant_id,
-                "data": {}
-            }
+            timestamp = datetime.now(timezone.utc)
+            if output_dir is None:
+                output_dir = self.backup_dir / (
+                    f"redis_{tenant_id or 'all'}_{timestamp.strftime('%Y%m%d_%H%M%S')}"
+                )
+            output_dir = Path(output_dir)
+            output_dir.mkdir(parents=True, exist_ok=True)
 
             # Define key patterns to backup
             patterns = [
@@ -73,44 +106,197 @@ class ExternalBackupService:
             if tenant_id:
                 patterns = [f"{tenant_id}:{pattern}" for pattern in patterns]
 
-            # Backup each pattern
+            previous_hashes = (base_manifest or {}).get("key_hashes", {})
+            key_hashes: Dict[str, str] = {}
+            chunks: List[Dict[str, Any]] = []
+            buffer = bytearray()
+            buffered_records = 0
+            changed_count = 0
+
+            async def flush_chunk():
+                nonlocal buffered_records
+                if not buffered_records:
+                    return
+                chunks.append(
+                    await self._write_redis_chunk(output_dir, len(chunks), bytes(buffer), buffered_records)
+                )
+                buffer.clear()
+                buffered_records = 0
+
+            async def consume(batch):
+                nonlocal buffered_records, changed_count
+                for key_str, pttl, payload in await self._dump_redis_batch(batch):
+                    if key_str in key_hashes:
+                        continue  # Same key matched by more than one pattern
+                    content_hash = hashlib.blake2b(payload, digest_size=16).hexdigest()
+                    key_hashes[key_str] = content_hash
+                    if previous_hashes.get(key_str) == content_hash:
+                        continue
+                    buffer.extend(self._encode_redis_record(key_str, pttl, payload))
+                    buffered_records += 1
+                    changed_count += 1
+                if len(buffer) >= self.REDIS_CHUNK_SIZE_BYTES:
+                    await flush_chunk()
+
             for pattern in patterns:
-                keys = []
-                async for key in self.redis_client.scan_iter(match=pattern):
-                    keys.append(key)
-
-                if keys:
-                    # Get all values in pipeline for efficiency
-                    pipe = self.redis_client.pipeline()
-                    for key in keys:
-                        pipe.get(key)
-                        pipe.ttl(key)  # Also get TTL for restoration
-
-                    results = await pipe.execute()
-
-                    # Process results (pairs of value, ttl)
-                    for i in range(0, len(results), 2):
-                        key_str = keys[i // 2].decode() if isinstance(keys[i // 2], bytes) else keys[i // 2]
-                        value = results[i]
-                        ttl = results[i + 1]
-
-                        if value:
-                            backup_data["data"][key_str] = {
-                                "value": value.decode() if isinstance(value, bytes) else value,
-                                "ttl": ttl if ttl > 0 else None
-                            }
-
-            # Calculate checksum
-            data_str = json.dumps(backup_data["data"], sort_keys=True)
-            backup_data["checksum"] = hashlib.sha256(data_str.encode()).hexdigest()
-
-            logger.info(f"Backed up {len(backup_data['data'])} Redis keys")
-            return backup_data
+                batch = []
+                async for key in self.redis_client.scan_iter(match=pattern, count=self.REDIS_SCAN_BATCH_SIZE):
+                    batch.append(key)
+                    if len(batch) >= self.REDIS_SCAN_BATCH_SIZE:
+                        await consume(batch)
+                        batch = []
+                if batch:
+                    await consume(batch)
+
+            await flush_chunk()
+
+            manifest = {
+                "version": self.REDIS_BACKUP_FORMAT_VERSION,
+                "format": self.REDIS_BACKUP_FORMAT,
+                "type": "redis",
+                "timestamp": timestamp.isoformat(),
+                "tenant_id": tenant_id,
+                "patterns": patterns,
+                "incremental": base_manifest is not None,
+                "base": base_manifest.get("path") if base_manifest else None,
+                "path": self._relative_backup_path(output_dir),
+                "chunks": chunks,
+                "key_count": len(key_hashes),
+                "changed_count": changed_count,
+                "deleted_keys": sorted(set(previous_hashes) - set(key_hashes)),
+                "key_hashes": key_hashes,
+                # Manifest-level checksum covers every chunk checksum in order
+                "checksum": hashlib.sha256(
+                    "".join(chunk["sha256"] for chunk in chunks).encode()
+                ).hexdigest()
+            }
+
+            manifest_file = output_dir / "manifest.json"
+            tmp_file = output_dir / "manifest.json.tmp"
+            async with aiofiles.open(tmp_file, 'w') as f:
+                await f.write(json.dumps(manifest))
+            os.replace(tmp_file, manifest_file)
+
+            logger.info(
+                f"Backed up {changed_count}/{len(key_hashes)} Redis keys "
+                f"in {len(chunks)} chunks to {output_dir}"
+            )
+            return manifest
 
         except Exception as e:
             logger.error(f"Redis backup failed: {e}")
             raise
 
+    async def _dump_redis_batch(self, keys: List[Any]) -> List[Tuple[str, int, bytes]]:
+        """Reads DUMP payloads and PTTLs for a batch of keys in one pipeline"""
+        pipe = self.redis_client.pipeline(transaction=False)
+        for key in keys:
+            pipe.dump(key)
+            pipe.pttl(key)
+
+        results = await pipe.execute()
+
+        records = []
+        for i, key in enumerate(keys):
+            payload = results[2 * i]
+            pttl = results[2 * i + 1]
+            if payload is None:
+                continue  # Key expired or was deleted between SCAN and DUMP
+            key_str = key.decode() if isinstance(key, bytes) else key
+            records.append((key_str, pttl if pttl and pttl > 0 else 0, payload))
+        return records
+
+    def _encode_redis_record(self, key: str, pttl: int, payload: bytes) -> bytes:
+        """Encodes one length-prefixed record: header, key, DUMP payload"""
+        key_bytes = key.encode()
+        return _REDIS_RECORD_HEADER.pack(len(key_bytes), len(payload), pttl) + key_bytes + payload
+
+    def _decode_redis_records(self, raw: bytes) -> List[Tuple[bytes, int, bytes]]:
+        """Decodes the length-prefixed records of one decompressed chunk"""
+        records = []
+        offset = 0
+        header_size = _REDIS_RECORD_HEADER.size
+        while offset < len(raw):
+            key_len, payload_len, pttl = _REDIS_RECORD_HEADER.unpack_from(raw, offset)
+            offset += header_size
+            key = raw[offset:offset + key_len]
+            offset += key_len
+            payload = raw[offset:offset + payload_len]
+            offset += payload_len
+            records.append((key, pttl, payload))
+        return records
+
+    async def _write_redis_chunk(
+        self,
+        output_dir: Path,
+        index: int,
+        raw: bytes,
+        record_count: int
+    ) -> Dict[str, Any]:
+        """Compresses one chunk off the event loop and writes it to disk"""
+        compressed = await asyncio.to_thread(
+            lambda: zstd.ZstdCompressor(level=self.REDIS_COMPRESSION_LEVEL).compress(raw)
+        )
+        chunk_name = f"chunk-{index:05d}.zst"
+        async with aiofiles.open(output_dir / chunk_name, 'wb') as f:
+            await f.write(compressed)
+
+        return {
+            "file": chunk_name,
+            "records": record_count,
+            "raw_bytes": len(raw),
+            "compressed_bytes": len(compressed),
+            "sha256": hashlib.sha256(compressed).hexdigest()
+        }
+
+    def _relative_backup_path(self, path: Path) -> str:
+        """Stores paths relative to backup_dir so extracted archives stay restorable"""
+        try:
+            return str(Path(path).resolve().relative_to(self.backup_dir.resolve()))
+        except ValueError:
+            return str(path)
+
+    def _resolve_backup_path(self, path: str) -> Path:
+        """Resolves a manifest path written by _relative_backup_path"""
+        resolved = Path(path)
+        return resolved if resolved.is_absolute() else self.backup_dir / resolved
+
+    async def _load_redis_manifest(self, path: str) -> Dict[str, Any]:
+        """Loads the full manifest of a streaming Redis backup"""
+        async with aiofiles.open(self._resolve_backup_path(path) / "manifest.json", 'r') as f:
+            return json.loads(await f.read())
+
+    async def _find_latest_redis_manifest(self, tenant_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Finds the newest streaming Redis manifest for a tenant, for incremental backups"""
+        latest = None
+        for manifest_file in self.backup_dir.glob("*/manifest.json"):
+            try:
+                async with aiofiles.open(manifest_file, 'r') as f:
+                    manifest = json.loads(await f.read())
+            except Exception as e:
+                logger.warning(f"Could not read Redis manifest {manifest_file}: {e}")
+                continue
+
+            if manifest.get("format") != self.REDIS_BACKUP_FORMAT:
+                continue
+            if manifest.get("tenant_id") != tenant_id:
+                continue
+            if latest is None or manifest["timestamp"] > latest["timestamp"]:
+                latest = manifest
+
+        return latest
+
+    async def _redis_chain_paths(self, path: str) -> List[str]:
+        """Paths of a Redis manifest and every base it depends on, newest first"""
+        paths = [path]
+        manifest = await self._load_redis_manifest(path)
+        while manifest.get("base"):
+            if manifest["base"] in paths:
+                raise ValueError(f"Redis backup chain of {path} loops at {manifest['base']}")
+            paths.append(manifest["base"])
+            manifest = await self._load_redis_manifest(manifest["base"])
+        return paths
+
     async def backup_whatsapp_auth(self) -> Dict[str, Any]:
         """
         Backs up WhatsApp Evolution API authentication and session data
@@ -200,29 +386,53 @@ class ExternalBackupService:
             logger.error(f"Configuration backup failed: {e}")
             raise
 
-    async def create_complete_backup(self, tenant_id: Optional[str] = None) -> str:
+    async def create_complete_backup(
+        self,
+        tenant_id: Optional[str] = None,
+        incremental: bool = False
+    ) -> str:
         """
         Creates a complete backup of all external data
 
         Args:
             tenant_id: Optional tenant ID for tenant-specific backup
+            incremental: Only back up Redis keys changed since the latest
+                Redis manifest for this tenant (falls back to full if none)
 
         Returns:
             Path to the backup file
         """
         try:
-            timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+            # Microseconds keep back-to-back backups from sharing (and overwriting) a directory
+            timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S_%f")
             backup_name = f"external_backup_{tenant_id or 'all'}_{timestamp}"
 
-            # Collect all backups
+            base_manifest = None
+            if incremental:
+                base_manifest = await self._find_latest_redis_manifest(tenant_id)
+                if base_manifest is None:
+                    logger.info("No previous Redis manifest found, taking a full backup")
+
+            redis_dir = self.backup_dir / f"{backup_name}_redis"
+            redis_manifest = await self.backup_redis_data(
+                tenant_id, base_manifest=base_manifest, output_dir=redis_dir
+            )
+
+            # Collect all backups; the Redis section only references its manifest
             backups = {
                 "metadata": {
-                    "version": "1.0",
+                    "version": self.REDIS_BACKUP_FORMAT_VERSION,
                     "timestamp": datetime.now(timezone.utc).isoformat(),
                     "tenant_id": tenant_id,
                     "encrypted": self.cipher is not None
                 },
-                "redis": await self.backup_redis_data(tenant_id),
+                "redis": {
+                    field: redis_manifest[field]
+                    for field in (
+                        "type", "format", "version", "timestamp", "tenant_id", "path",
+                        "base", "incremental", "key_count", "changed_count", "checksum"
+                    )
+                },
                 "whatsapp": await self.backup_whatsapp_auth(),
                 "configuration": await self.backup_configuration()
             }
@@ -232,10 +442,13 @@ class ExternalBackupService:
             async with aiofiles.open(backup_file, 'w') as f:
                 await f.write(json.dumps(backups, indent=2))
 
-            # Also create compressed archive
+            # Also create compressed archive; an incremental Redis backup is
+            # only restorable together with every base in its chain
             tar_file = self.backup_dir / f"{backup_name}.tar.gz"
             with tarfile.open(tar_file, "w:gz") as tar:
                 tar.add(backup_file, arcname=f"{backup_name}.json")
+                for chain_path in await self._redis_chain_paths(redis_manifest["path"]):
+                    tar.add(self._resolve_backup_path(chain_path), arcname=chain_path)
 
             logger.info(f"Complete backup created: {tar_file}")
             return str(tar_file)
@@ -248,39 +461,107 @@ class ExternalBackupService:
         """
         Restores Redis data from backup
 
+        Streaming backups are restored base-first along their incremental
+        chain; chunks of each manifest are verified and replayed with
+        RESTORE in parallel, bounded pipelines. Legacy inline JSON backups
+        are still accepted.
+
         Args:
-            backup_data: Redis backup data
+            backup_data: Redis backup data or manifest reference
 
         Returns:
             True if successful
         """
         try:
-            # Verify checksum
-            data_str = json.dumps(backup_data["data"], sort_keys=True)
-            checksum = hashlib.sha256(data_str.encode()).hexdigest()
+            if backup_data.get("format") != self.REDIS_BACKUP_FORMAT:
+                return await self._restore_legacy_redis_data(backup_data)
 
-            if checksum != backup_data.get("checksum"):
-                logger.error("Backup checksum verification failed")
-                return False
+            # Walk the incremental chain back to the full backup
+            chain = [
+                await self._load_redis_manifest(path)
+                for path in await self._redis_chain_paths(backup_data["path"])
+            ]
 
-            # Restore each key
-            pipe = self.redis_client.pipeline()
             restored_count = 0
+            for manifest in reversed(chain):
+                restored_count += await self._restore_redis_manifest(manifest)
 
-            for key, data in backup_data["data"].items():
-                pipe.set(key, data["value"])
-                if data.get("ttl"):
-                    pipe.expire(key, data["ttl"])
-                restored_count += 1
-
-            await pipe.execute()
-            logger.info(f"Restored {restored_count} Redis keys")
+            logger.info(f"Restored {restored_count} Redis keys from {len(chain)} manifest(s)")
             return True
 
         except Exception as e:
             logger.error(f"Redis restore failed: {e}")
             return False
 
+    async def _restore_redis_manifest(self, manifest: Dict[str, Any]) -> int:
+        """Restores every chunk of one manifest, then applies its deletions"""
+        manifest_dir = self._resolve_backup_path(manifest["path"])
+
+        checksum = hashlib.sha256(
+            "".join(chunk["sha256"] for chunk in manifest["chunks"]).encode()
+        ).hexdigest()
+        if checksum != manifest.get("checksum"):
+            raise ValueError(f"Manifest checksum verification failed for {manifest['path']}")
+
+        semaphore = asyncio.Semaphore(self.REDIS_RESTORE_CONCURRENCY)
+
+        async def restore_chunk(chunk: Dict[str, Any]) -> int:
+            async with semaphore:
+                return await self._restore_redis_chunk(manifest_dir, chunk)
+
+        counts = await asyncio.gather(*(restore_chunk(chunk) for chunk in manifest["chunks"]))
+
+        deleted_keys = manifest.get("deleted_keys", [])
+        for i in range(0, len(deleted_keys), self.REDIS_RESTORE_BATCH_SIZE):
+            await self.redis_client.delete(*deleted_keys[i:i + self.REDIS_RESTORE_BATCH_SIZE])
+
+        return sum(counts)
+
+    async def _restore_redis_chunk(self, manifest_dir: Path, chunk: Dict[str, Any]) -> int:
+        """Verifies, decompresses and replays one chunk in bounded pipelines"""
+        async with aiofiles.open(manifest_dir / chunk["file"], 'rb') as f:
+            compressed = await f.read()
+
+        if hashlib.sha256(compressed).hexdigest() != chunk["sha256"]:
+            raise ValueError(f"Chunk checksum verification failed for {chunk['file']}")
+
+        raw = await asyncio.to_thread(
+            lambda: zstd.ZstdDecompressor().decompress(compressed, max_output_size=chunk["raw_bytes"])
+        )
+        records = self._decode_redis_records(raw)
+
+        for i in range(0, len(records), self.REDIS_RESTORE_BATCH_SIZE):
+            pipe = self.redis_client.pipeline(transaction=False)
+            for key, pttl, payload in records[i:i + self.REDIS_RESTORE_BATCH_SIZE]:
+                pipe.restore(key, pttl, payload, replace=True)
+            await pipe.execute()
+
+        return len(records)
+
+    async def _restore_legacy_redis_data(self, backup_data: Dict[str, Any]) -> bool:
+        """Restores a version 1.0 backup with values inlined as JSON"""
+        # Verify checksum
+        data_str = json.dumps(backup_data["data"], sort_keys=True)
+        checksum = hashlib.sha256(data_str.encode()).hexdigest()
+
+        if checksum != backup_data.get("checksum"):
+            logger.error("Backup checksum verification failed")
+            return False
+
+        # Restore each key
+        pipe = self.redis_client.pipeline()
+        restored_count = 0
+
+        for key, data in backup_data["data"].items():
+            pipe.set(key, data["value"])
+            if data.get("ttl"):
+                pipe.expire(key, data["ttl"])
+            restored_count += 1
+
+        await pipe.execute()
+        logger.info(f"Restored {restored_count} Redis keys")
+        return True
+
     async def restore_whatsapp_auth(self, backup_data: Dict[str, Any]) -> bool:
         """
         Restores WhatsApp authentication from backup
@@ -371,9 +652,12 @@ class ExternalBackupService:
             if backup_file.suffix == ".gz":
                 with tarfile.open(backup_file, "r:gz") as tar:
                     tar.extractall(path=self.backup_dir)
-                    # Find the JSON file
-                    json_file = list(self.backup_dir.glob("*.json"))[0]
-                    backup_file = json_file
+                    # The backup JSON is the archive's only top-level file
+                    json_name = next(
+                        member.name for member in tar.getmembers()
+                        if member.isfile() and "/" not in member.name and member.name.endswith(".json")
+                    )
+                    backup_file = self.backup_dir / json_name
 
             # Load backup data
             async with aiofiles.open(backup_file, 'r') as f:
@@ -440,6 +724,9 @@ class ExternalBackupService:
         """
         Removes backups older than specified days
 
+        Redis backup directories that a kept incremental backup still
+        depends on (directly or through its chain) are kept as well.
+
         Args:
             days_to_keep: Number of days to keep backups
 
@@ -451,10 +738,32 @@ class ExternalBackupService:
         cutoff_date = datetime.now(timezone.utc) - timedelta(days=days_to_keep)
         deleted_count = 0
 
-        for backup_file in self.backup_dir.glob("*"):
-            if backup_file.stat().st_mtime < cutoff_date.timestamp():
+        expired = [
+            backup_file for backup_file in self.backup_dir.glob("*")
+            if backup_file.stat().st_mtime < cutoff_date.timestamp()
+        ]
+
+        # Bases of kept Redis backups must survive, however old
+        referenced = set()
+        for manifest_file in self.backup_dir.glob("*/manifest.json"):
+            if manifest_file.parent in expired:
+                continue
+            try:
+                chain = await self._redis_chain_paths(self._relative_backup_path(manifest_file.parent))
+            except Exception as e:
+                logger.warning(f"Could not read Redis backup chain of {manifest_file.parent.name}: {e}")
+                continue
+            referenced.update(self._resolve_backup_path(path).resolve() for path in chain[1:])
+
+        for backup_file in expired:
+            if backup_file.resolve() in referenced:
+                logger.info(f"Keeping old backup {backup_file.name}: a newer incremental backup depends on it")
+                continue
+            if backup_file.is_dir():
+                shutil.rmtree(backup_file)
+            else:
                 backup_file.unlink()
-                deleted_count += 1
-                logger.info(f"Deleted old backup: {backup_file.name}")
+            deleted_count += 1
+            logger.info(f"Deleted old backup: {backup_file.name}")
 
         return deleted_count
\ No newline at end of file
@@ -0,0 +1,169 @@
+# clinics/backend/app/services/followup_queue.py
+"""
+Redis sorted-set index of scheduled follow-ups.
+
+conversation_sessions.scheduled_followup_at stays the source of truth; this
+index only tells the dispatcher which sessions are due without scanning the
+table:
+
+    followups:due         session_id -> due time (epoch seconds)
+    followups:processing  session_id -> lease expiry (epoch seconds)
+
+claim_due() atomically moves due members to the processing set, so each
+follow-up is handed to one dispatcher even with several instances running.
+A claimed member is acked after processing; if its dispatcher dies the lease
+expires and requeue_expired() returns it to the due set. rebuild() re-indexes
+pending sessions from the table (on startup, or after Redis loses data).
+"""
+
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DUE_KEY = "followups:due"
+PROCESSING_KEY = "followups:processing"
+
+# How long a claimed follow-up may stay unacked before it is handed out again
+FOLLOWUP_LEASE_SECONDS = int(os.getenv("FOLLOWUP_LEASE_SECONDS", "300"))
+
+# Members per rebuild script call
+_REBUILD_CHUNK = 500
+
+
+class FollowupQueue:
+    """Due-time index of follow-ups backed by Redis sorted sets."""
+
+    # Move up to ARGV[2] members due by ARGV[1] into the processing set,
+    # leased until ARGV[3]. Returns [member, score, member, score, ...]
+    _CLAIM_SCRIPT = """
+    local items = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'WITHSCORES', 'LIMIT', 0, tonumber(ARGV[2]))
+    for i = 1, #items, 2 do
+        redis.call('ZREM', KEYS[1], items[i])
+        redis.call('ZADD', KEYS[2], ARGV[3], items[i])
+    end
+    return items
+    """
+
+    # Return members whose lease expired by ARGV[1] to the due set (keeping
+    # a newer due time if the session was rescheduled meanwhile)
+    _REQUEUE_SCRIPT = """
+    local items = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1])
+    for i = 1, #items do
+        redis.call('ZREM', KEYS[2], items[i])
+        redis.call('ZADD', KEYS[1], 'NX', ARGV[1], items[i])
+    end
+    return #items
+    """
+
+    # Index ARGV = [score, member, ...] unless the member is being processed
+    _REBUILD_SCRIPT = """
+    local added = 0
+    for i = 1, #ARGV, 2 do
+        if not redis.call('ZSCORE', KEYS[2], ARGV[i + 1]) then
+            added = added + redis.call('ZADD', KEYS[1], ARGV[i], ARGV[i + 1])
+        end
+    end
+    return added
+    """
+
+    def __init__(self, redis_client=None, lease_seconds: int = FOLLOWUP_LEASE_SECONDS):
+        if redis_client is None:
+            from app.config import get_redis_client
+            redis_client = get_redis_client()
+        self.redis = redis_client
+        self.lease_seconds = lease_seconds
+        self._claim_script = self.redis.register_script(self._CLAIM_SCRIPT)
+        self._requeue_script = self.redis.register_script(self._REQUEUE_SCRIPT)
+        self._rebuild_script = self.redis.register_script(self._REBUILD_SCRIPT)
+
+    def schedule(self, session_id: str, due_at: datetime) -> None:
+        """Index (or move) a session's follow-up at due_at."""
+        self.redis.zadd(DUE_KEY, {session_id: due_at.timestamp()})
+
+    def defer(self, session_id: str, due_ts: float) -> None:
+        """Put a claimed follow-up back as due at due_ts and release its lease."""
+        pipe = self.redis.pipeline()
+        pipe.zadd(DUE_KEY, {session_id: due_ts})
+        pipe.zrem(PROCESSING_KEY, session_id)
+        pipe.execute()
+
+    def cancel(self, session_id: str) -> None:
+        """Drop a session's follow-up from the due set."""
+        self.redis.zrem(DUE_KEY, session_id)
+
+    def claim_due(self, limit: int, now: Optional[float] = None) -> List[Tuple[str, float]]:
+        """
+        Atomically claim up to `limit` due follow-ups.
+
+        Returns:
+            [(session_id, due_ts)] in due order
+        """
+        now = time.time() if now is None else now
+        raw = self._claim_script(
+            keys=[DUE_KEY, PROCESSING_KEY],
+            args=[now, limit, now + self.lease_seconds],
+        )
+        return [
+            (_decode(raw[i]), float(raw[i + 1]))
+            for i in range(0, len(raw), 2)
+        ]
+
+    def ack(self, session_id: str) -> None:
+        """Release the lease of a processed follow-up."""
+        self.redis.zrem(PROCESSING_KEY, session_id)
+
+    def requeue_expired(self, now: Optional[float] = None) -> int:
+        """Return follow-ups with expired leases to the due set."""
+        now = time.time() if now is None else now
+        return int(self._requeue_script(keys=[DUE_KEY, PROCESSING_KEY], args=[now]))
+
+    def next_due(self) -> Optional[float]:
+        """Due time of the earliest follow-up, or None if none is indexed."""
+        head = self.redis.zrange(DUE_KEY, 0, 0, withscores=True)
+        return float(head[0][1]) if head else None
+
+    def depth(self) -> Tuple[int, int]:
+        """(indexed, in processing)"""
+        pipe = self.redis.pipeline()
+        pipe.zcard(DUE_KEY)
+        pipe.zcard(PROCESSING_KEY)
+        due, processing = pipe.execute()
+        return int(due), int(processing)
+
+    def rebuild(self, entries: Iterable[Tuple[str, float]]) -> int:
+        """
+        Index (session_id, due_ts) pairs read from the table.
+
+        Returns:
+            Number of follow-ups newly added to the due set
+        """
+        added = 0
+        chunk: List = []
+        for session_id, due_ts in entries:
+            chunk.extend((due_ts, session_id))
+            if len(chunk) >= 2 * _REBUILD_CHUNK:
+                added += int(self._rebuild_script(keys=[DUE_KEY, PROCESSING_KEY], args=chunk))
+                chunk = []
+        if chunk:
+            added += int(self._rebuild_script(keys=[DUE_KEY, PROCESSING_KEY], args=chunk))
+        return added
+
+
+def _decode(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+# Singleton instance
+_followup_queue: Optional[FollowupQueue] = None
+
+
+def get_followup_queue() -> FollowupQueue:
+    """Get or create singleton FollowupQueue instance"""
+    global _followup_queue
+    if _followup_queue is None:
+        _followup_queue = FollowupQueue()
+    return _followup_queue
@@ -1,10 +1,11 @@
 # clinics/backend/app/services/followup_scheduler.py
 
-import logging
-from typing import Dict, Any, Optional, List
-from datetime import datetime, timedelta, timezone
+import asyncio
 import json
+import logging
 import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -85,6 +86,7 @@ Urgency guidelines:
         try:
             logger.info(f"Analyzing conversation for follow-up scheduling...")
 
+            from app.services.llm.concurrency import LLMPriority
             from app.services.llm.tiers import ModelTier
             factory = await self._get_factory()
             response = await factory.generate_for_tier(
@@ -102,7 +104,8 @@ Urgency guidelines:
                 temperature=0.3,
                 clinic_id=clinic_id,
                 session_id=session_id,
-                response_format={"type": "json_object"}
+                response_format={"type": "json_object"},
+                priority=LLMPriority.BACKGROUND
             )
 
             analysis = json.loads(response.content)
@@ -189,6 +192,28 @@ Urgency guidelines:
 
         except Exception as e:
             logger.error(f"Failed to store scheduled follow-up: {e}")
+            return
+
+        # Index for the dispatcher; the row above stays the source of truth
+        # and the index is rebuilt from it on dispatcher startup
+        try:
+            from app.services.followup_queue import get_followup_queue
+            await asyncio.to_thread(get_followup_queue().schedule, session_id, followup_at)
+        except Exception as e:
+            logger.warning(
+                f"Failed to index follow-up for {session_id} (picked up on next rebuild): {e}"
+            )
+
+    async def cancel_scheduled_followup(self, session_id: str):
+        """Drop a session's follow-up from the dispatcher index (it no longer waits on the agent)"""
+
+        # A stale entry is harmless (the dispatcher re-reads the row and skips
+        # it), so a failure here is only logged
+        try:
+            from app.services.followup_queue import get_followup_queue
+            await asyncio.to_thread(get_followup_queue().cancel, session_id)
+        except Exception as e:
+            logger.warning(f"Failed to drop indexed follow-up for {session_id}: {e}")
 
     async def create_user_notification(
         self,
@@ -2,7 +2,7 @@
 
 import logging
 from datetime import datetime, timezone, timedelta
-from typing import Dict
+from typing import Dict, List
 from app.database import get_healthcare_client
 
 logger = logging.getLogger(__name__)
@@ -44,15 +44,9 @@ class FullHistorySearchService:
 
         try:
             # Get all user's session IDs
-            sessions_result = self.supabase.table('conversation_sessions').select('id').eq(
-                'user_identifier', clean_phone
-            ).filter(
-                'metadata->>clinic_id', 'eq', clinic_id
-            ).gte(
-                'started_at', cutoff_date.isoformat()
-            ).execute()
+            session_ids = self._get_session_ids(clean_phone, clinic_id, cutoff_date)
 
-            if not sessions_result.data:
+            if not session_ids:
                 return {
                     'found': False,
                     'messages': [],
@@ -60,8 +54,6 @@ class FullHistorySearchService:
                     'has_more': False
                 }
 
-            session_ids = [s['id'] for s in sessions_result.data]
-
             # Search message content
             # Build query with pagination
             query_builder = self.supabase.table('conversation_messages').select(
@@ -108,3 +100,27 @@ class FullHistorySearchService:
                 'has_more': False,
                 'error': str(e)
             }
+
+    def _get_session_ids(self, clean_phone: str, clinic_id: str, cutoff_date: datetime) -> List[str]:
+        """User's session ids at the clinic since cutoff_date."""
+        try:
+            # Generated clinic_id column, served by the composite
+            # (clinic_id, user_identifier, started_at) index (see docs/summary_search_rpc.md)
+            result = self.supabase.table('conversation_sessions').select('id').eq(
+                'clinic_id', clinic_id
+            ).eq(
+                'user_identifier', clean_phone
+            ).gte(
+                'started_at', cutoff_date.isoformat()
+            ).execute()
+        except Exception as e:
+            logger.warning(f"conversation_sessions.clinic_id unavailable, filtering on metadata: {e}")
+            result = self.supabase.table('conversation_sessions').select('id').eq(
+                'user_identifier', clean_phone
+            ).filter(
+                'metadata->>clinic_id', 'eq', clinic_id
+            ).gte(
+                'started_at', cutoff_date.isoformat()
+            ).execute()
+
+        return [s['id'] for s in (result.data or [])]
@@ -14,25 +14,20 @@ import asyncio
 import aiohttp
 from pathlib import Path
 import logging
-try:  # Optional dependency used only for PDF parsing
-    import fitz  # type: ignore  # PyMuPDF for PDF handling
-except ImportError:  # pragma: no cover
-    fitz = None
-
 try:
     from PIL import Image
 except ImportError:  # pragma: no cover
     Image = None
-import io
+
+from .pdf_page_extractor import extract_pdf_pages
 
 logger = logging.getLogger(__name__)
 
+# PDF pages read per request; pages past the cap are not extracted
+MAX_PDF_PAGES = int(os.getenv("GROK_PDF_MAX_PAGES", "10"))
 
-def _ensure_pymupdf_available():
-    if fitz is None:  # pragma: no cover - exercised only when dependency missing
-        raise RuntimeError(
-            "PyMuPDF (fitz) is required for PDF processing. Install 'pymupdf' to enable this feature."
-        )
+# Characters of text sent per request
+MAX_TEXT_CHARS = 30000
 
 
 def _ensure_pillow_available():
@@ -255,27 +250,34 @@ class GrokMultimodalParser:
         """
         if mime_type.startswith("image/"):
             # Direct image encoding
-            base64_content = base64.b64encode(file_content).decode('utf-8')
             return {
                 "type": "visual",
-                "content": f"data:{mime_type};base64,{base64_content}"
+                "content": [self._image_part(file_content, mime_type)]
             }
             
         elif mime_type == "application/pdf":
-            # Extract first few pages as images for better analysis
-            images = self._extract_pdf_pages_as_images(file_content, max_pages=5)
-            if images:
-                return {
-                    "type": "visual",
-                    "content": images[0]  # Use first page for discovery
-                }
-            else:
-                # Fallback to text extraction
-                text = self._extract_pdf_text(file_content)
+            # Pages are extracted off the event loop; text pages need no vision call
+            pages = await extract_pdf_pages(file_content, max_pages=MAX_PDF_PAGES)
+            if not any(page.is_image_only for page in pages):
                 return {
                     "type": "text",
-                    "content": text
+                    "content": "\n".join(page.text for page in pages)
                 }
+
+            # Scanned pages go as images and the others as their text, in page order
+            parts = []
+            text_budget = MAX_TEXT_CHARS
+            for page in pages:
+                if page.is_image_only:
+                    parts.append(self._image_part(page.image_png, "image/png"))
+                elif page.text and text_budget > 0:
+                    text = page.text[:text_budget]
+                    text_budget -= len(text)
+                    parts.append({"type": "text", "text": f"Page {page.page_number + 1}:\n{text}"})
+            return {
+                "type": "visual",
+                "content": parts
+            }
                 
         elif mime_type == "text/csv" or (filename and filename.endswith('.csv')):
             # CSV as text
@@ -293,47 +295,6 @@ class GrokMultimodalParser:
                 "content": text
             }
     
-    def _extract_pdf_pages_as_images(self, pdf_bytes: bytes, max_pages: int = 5) -> List[str]:
-        """Extract PDF pages as base64 images"""
-        images = []
-        try:
-            pdf_stream = io.BytesIO(pdf_bytes)
-            _ensure_pymupdf_available()
-            _ensure_pymupdf_available()
-            doc = fitz.open(stream=pdf_stream, filetype="pdf")
-            
-            pages_to_process = min(len(doc), max_pages)
-            
-            for page_num in range(pages_to_process):
-                page = doc[page_num]
-                mat = fitz.Matrix(2.0, 2.0)  # 2x zoom
-                pix = page.get_pixmap(matrix=mat)
-                img_data = pix.tobytes("png")
-                img_base64 = base64.b64encode(img_data).decode('utf-8')
-                images.append(f"data:image/png;base64,{img_base64}")
-                
-            doc.close()
-        except Exception as e:
-            logger.error(f"PDF image extraction failed: {e}")
-            
-        return images
-    
-    def _extract_pdf_text(self, pdf_bytes: bytes) -> str:
-        """Extract text from PDF"""
-        text = ""
-        try:
-            pdf_stream = io.BytesIO(pdf_bytes)
-            doc = fitz.open(stream=pdf_stream, filetype="pdf")
-            
-            for page in doc:
-                text += page.get_text()
-                
-            doc.close()
-        except Exception as e:
-            logger.error(f"PDF text extraction failed: {e}")
-            
-        return text
-    
     def _build_discovery_prompt(self) -> str:
         """Build prompt for entity discovery phase"""
         return """
@@ -494,8 +455,20 @@ class GrokMultimodalParser:
         Extract and return ALL data, maintaining data integrity and relationships.
         """
     
-    async def _call_grok_vision(self, image_data: str, prompt: str) -> str:
-        """Call Grok API for vision processing"""
+    @staticmethod
+    def _image_part(image_bytes: bytes, mime_type: str) -> Dict:
+        """Message content part carrying one image"""
+        base64_content = base64.b64encode(image_bytes).decode('utf-8')
+        return {
+            "type": "image_url",
+            "image_url": {
+                "url": f"data:{mime_type};base64,{base64_content}",
+                "detail": "high"
+            }
+        }
+
+    async def _call_grok_vision(self, content_parts: List[Dict], prompt: str) -> str:
+        """Call Grok API for vision processing (images, plus text of mixed PDFs)"""
         headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
@@ -503,14 +476,7 @@ class GrokMultimodalParser:
         
         messages = [{
             "role": "user",
-            "content": [
-                {
-                    "type": "image_url",
-                    "image_url": {
-                        "url": image_data,
-                        "detail": "high"
-                    }
-                },
+            "content": content_parts + [
                 {
                     "type": "text",
                     "text": prompt
@@ -543,8 +509,8 @@ class GrokMultimodalParser:
         }
         
         # Truncate if too long
-        if len(text_content) > 30000:
-            text_content = text_content[:30000] + "\n...[truncated]"
+        if len(text_content) > MAX_TEXT_CHARS:
+            text_content = text_content[:MAX_TEXT_CHARS] + "\n...[truncated]"
         
         full_prompt = f"{prompt}\n\nData to analyze:\n{text_content}"
         
@@ -0,0 +1,177 @@
+"""
+HITL Control State Cache
+
+Redis read-through cache for session control state and clinic HITL
+settings, so dashboards polling the HITL status/settings endpoints stop
+hitting the database on every poll.
+
+Every code path that changes a session's control mode calls
+publish_control_change(), which refreshes the cached state and pushes a
+``hitl_control_changed`` notification to the clinic's websocket
+subscribers; dashboards can react to the push instead of polling. Paths
+that only change unread_for_human_count (a patient message stored for the
+operator) call invalidate_session_state() so the next poll reads it fresh.
+
+Redis calls run in a worker thread (asyncio.to_thread), off the event loop.
+
+Cache structure:
+    Key: hitl:session:{session_id}
+    Value: JSON control state (SessionControlStatus fields + clinic_id)
+    TTL: 60s (auto-release happens in the database, so entries must expire)
+
+    Key: hitl:settings:{clinic_id}
+    Value: JSON {clinic_id, hitl_auto_release_hours}
+    TTL: 10 min (rewritten on update)
+"""
+
+import asyncio
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from app.config import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+SESSION_STATE_TTL = 60
+SETTINGS_TTL = 600
+
+# Columns needed to build a control state from a conversation_sessions row
+CONTROL_STATE_COLUMNS = (
+    'id, control_mode, locked_by, locked_at, lock_reason, lock_source, '
+    'unread_for_human_count, last_human_message_at, metadata'
+)
+
+
+def control_state_from_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalize a conversation_sessions row into the cached control state."""
+    metadata = row.get('metadata') or {}
+    return {
+        'session_id': row['id'],
+        'control_mode': row.get('control_mode') or 'agent',
+        'locked_by': row.get('locked_by'),
+        'locked_at': row.get('locked_at'),
+        'lock_reason': row.get('lock_reason'),
+        'lock_source': row.get('lock_source'),
+        'unread_for_human_count': row.get('unread_for_human_count') or 0,
+        'last_human_message_at': row.get('last_human_message_at'),
+        'clinic_id': row.get('clinic_id') or metadata.get('clinic_id'),
+    }
+
+
+class HITLStateCache:
+    """Redis cache for HITL session control state and clinic settings"""
+
+    def __init__(self, redis_client=None):
+        self.redis = redis_client or get_redis_client()
+
+    def _session_key(self, session_id: str) -> str:
+        return f"hitl:session:{session_id}"
+
+    def _settings_key(self, clinic_id: str) -> str:
+        return f"hitl:settings:{clinic_id}"
+
+    async def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            cached = await asyncio.to_thread(self.redis.get, key)
+            return json.loads(cached) if cached else None
+        except Exception as e:
+            logger.warning(f"HITL cache read failed for {key}: {e}")
+            return None
+
+    async def _set(self, key: str, value: Dict[str, Any], ttl: int) -> None:
+        try:
+            await asyncio.to_thread(self.redis.setex, key, ttl, json.dumps(value, default=str))
+        except Exception as e:
+            logger.warning(f"HITL cache write failed for {key}: {e}")
+
+    async def _delete(self, key: str) -> None:
+        try:
+            await asyncio.to_thread(self.redis.delete, key)
+        except Exception as e:
+            logger.warning(f"HITL cache invalidation failed for {key}: {e}")
+
+    async def get_session_state(self, session_id: str) -> Optional[Dict[str, Any]]:
+        return await self._get(self._session_key(session_id))
+
+    async def set_session_state(self, state: Dict[str, Any]) -> None:
+        await self._set(self._session_key(state['session_id']), state, SESSION_STATE_TTL)
+
+    async def invalidate_session_state(self, session_id: str) -> None:
+        await self._delete(self._session_key(session_id))
+
+    async def get_settings(self, clinic_id: str) -> Optional[Dict[str, Any]]:
+        return await self._get(self._settings_key(clinic_id))
+
+    async def set_settings(self, settings: Dict[str, Any]) -> None:
+        await self._set(self._settings_key(settings['clinic_id']), settings, SETTINGS_TTL)
+
+
+# Singleton instance
+_hitl_state_cache: Optional[HITLStateCache] = None
+
+
+def get_hitl_state_cache() -> HITLStateCache:
+    """Get or create singleton HITLStateCache instance"""
+    global _hitl_state_cache
+    if _hitl_state_cache is None:
+        _hitl_state_cache = HITLStateCache()
+    return _hitl_state_cache
+
+
+async def publish_control_change(state: Dict[str, Any]) -> None:
+    """
+    Record a control mode change: refresh the cache and notify dashboards.
+
+    Never raises; a failed push only means dashboards fall back to polling.
+
+    Args:
+        state: Control state as built by control_state_from_row()
+    """
+    try:
+        await get_hitl_state_cache().set_session_state(state)
+    except Exception as e:
+        logger.warning(f"Failed to cache HITL control state: {e}")
+
+    clinic_id = state.get('clinic_id')
+    if not clinic_id:
+        return
+
+    try:
+        from app.services.websocket_manager import websocket_manager
+        await websocket_manager.broadcast_hitl_control_change(clinic_id, state)
+    except Exception as e:
+        logger.warning(f"Failed to push HITL control change for session {state['session_id'][:8]}...: {e}")
+
+
+async def invalidate_session_state(session_id: str) -> None:
+    """
+    Drop a session's cached control state after its unread count changed.
+
+    Never raises; a stale entry expires within SESSION_STATE_TTL anyway.
+    """
+    try:
+        await get_hitl_state_cache().invalidate_session_state(session_id)
+    except Exception as e:
+        logger.warning(f"Failed to invalidate HITL control state for {session_id[:8]}...: {e}")
+
+
+def locked_state(
+    session_id: str,
+    clinic_id: Optional[str],
+    lock_reason: str,
+    lock_source: str,
+    locked_by: Optional[str] = None,
+    locked_at: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Control state of a session that was just switched to human control."""
+    return control_state_from_row({
+        'id': session_id,
+        'control_mode': 'human',
+        'locked_by': locked_by,
+        'locked_at': locked_at or datetime.now(timezone.utc).isoformat(),
+        'lock_reason': lock_reason,
+        'lock_source': lock_source,
+        'clinic_id': clinic_id,
+    })
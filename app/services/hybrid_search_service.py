@@ -18,7 +18,7 @@ from enum import Enum
 
 from app.services.clinic_data_cache import ClinicDataCache
 from app.services.language_service import LanguageService
-from app.utils.text_normalization import normalize_query
+from app.services.message_analysis import analyze
 from app.database import create_supabase_client
 
 logger = logging.getLogger(__name__)
@@ -91,15 +91,10 @@ class HybridSearchService:
         if not language and phone_hash:
             language = await self.language_service.detect_and_cache(query, phone_hash)
         elif not language:
-            try:
-                import langdetect
-                langdetect.DetectorFactory.seed = 0
-                language = langdetect.detect(query)
-            except:
-                language = 'en'
+            language = analyze(query).language
 
         # Text normalization
-        normalized_query = normalize_query(query)
+        normalized_query = analyze(query).normalized
 
         logger.info(
             f"🔍 Hybrid search: query='{query}' → normalized='{normalized_query}' "
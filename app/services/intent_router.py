@@ -5,7 +5,8 @@ import logging
 from typing import Optional, Dict, Any
 from enum import Enum
 from app.utils.feature_flags import is_fast_path_enabled
-from app.services.language_service import LanguageService
+from app.services.language_service import get_language_service
+from app.services.message_analysis import analyze
 
 logger = logging.getLogger(__name__)
 
@@ -106,8 +107,8 @@ class IntentRouter:
     """Fast-path intent detection with 300-500ms budget"""
 
     def __init__(self):
-        """Initialize with LanguageService for unified language detection."""
-        self.language_service = LanguageService()
+        """Initialize with the shared LanguageService for unified language detection."""
+        self.language_service = get_language_service()
 
     def detect_intent(self, text: str, language: str = "en") -> Intent:
         """
@@ -172,7 +173,7 @@ class IntentRouter:
         return None
 
     # NOTE: _detect_language was removed in Phase 1B.
-    # Use self.language_service.detect_sync() instead (single source of truth).
+    # Use analyze(text).language instead (LanguageService, computed once per message).
 
     async def _handle_greeting(
         self,
@@ -185,7 +186,7 @@ class IntentRouter:
         Budget: <300ms
         """
         user_text = message.get('body', '')
-        lang = self.language_service.detect_sync(user_text)
+        lang = analyze(user_text).language
         session_id = context.get('session_id')
         user_phone = message.get('from_phone', 'unknown')
         clinic_id = context.get('clinic_id', '')
@@ -316,37 +317,7 @@ class IntentRouter:
         Returns:
             (hour, minute) tuple or None if no time found
         """
-        text_lower = text.lower()
-
-        # Russian word-to-number mapping
-        russian_numbers = {
-            'девят': 9, 'десят': 10, 'одиннадцат': 11, 'двенадцат': 12,
-            'один': 1, 'два': 2, 'три': 3, 'четыр': 4, 'пят': 5,
-            'шест': 6, 'сем': 7, 'восем': 8
-        }
-
-        # Try to find numeric time
-        time_match = re.search(r'(\d{1,2})(?::(\d{2}))?\s*(am|pm|часов|утра|вечера)?', text_lower)
-        if time_match:
-            hour = int(time_match.group(1))
-            minute = int(time_match.group(2)) if time_match.group(2) else 0
-            period = time_match.group(3)
-
-            # Adjust for PM/evening
-            if period in ['pm', 'вечера'] and hour < 12:
-                hour += 12
-            # Adjust for AM (but 12 AM = 0:00)
-            elif period in ['am', 'утра'] and hour == 12:
-                hour = 0
-
-            return (hour, minute)
-
-        # Try Russian word-based time
-        for word, num in russian_numbers.items():
-            if word in text_lower:
-                return (num, 0)
-
-        return None
+        return analyze(text).time_of_day
 
     def _parse_date_from_text(self, text: str) -> Optional[str]:
         """
@@ -355,60 +326,7 @@ class IntentRouter:
         Returns:
             Date string (e.g., "tomorrow", "Monday") or None
         """
-        text_lower = text.lower()
-
-        # English date keywords
-        if 'tomorrow' in text_lower:
-            return 'tomorrow'
-        if 'today' in text_lower:
-            return 'today'
-        if 'monday' in text_lower:
-            return 'Monday'
-        if 'tuesday' in text_lower:
-            return 'Tuesday'
-        if 'wednesday' in text_lower:
-            return 'Wednesday'
-        if 'thursday' in text_lower:
-            return 'Thursday'
-        if 'friday' in text_lower:
-            return 'Friday'
-        if 'saturday' in text_lower:
-            return 'Saturday'
-        if 'sunday' in text_lower:
-            return 'Sunday'
-
-        # Spanish
-        if 'mañana' in text_lower:
-            return 'mañana'
-        if 'hoy' in text_lower:
-            return 'hoy'
-        if 'lunes' in text_lower:
-            return 'lunes'
-        if 'martes' in text_lower:
-            return 'martes'
-        if 'miércoles' in text_lower or 'miercoles' in text_lower:
-            return 'miércoles'
-        if 'jueves' in text_lower:
-            return 'jueves'
-        if 'viernes' in text_lower:
-            return 'viernes'
-        if 'sábado' in text_lower or 'sabado' in text_lower:
-            return 'sábado'
-        if 'domingo' in text_lower:
-            return 'domingo'
-
-        # Russian
-        if 'завтра' in text_lower:
-            return 'завтра'
-        if 'сегодня' in text_lower:
-            return 'сегодня'
-
-        # Specific date pattern (DD/MM, MM/DD, YYYY-MM-DD)
-        date_match = re.search(r'\d{1,2}[/-]\d{1,2}(?:[/-]\d{2,4})?', text_lower)
-        if date_match:
-            return date_match.group(0)
-
-        return None
+        return analyze(text).date_reference
 
     async def _handle_time_confirmation(
         self,
@@ -430,7 +348,7 @@ class IntentRouter:
         from app.memory.conversation_memory import get_memory_manager
 
         user_text = message.get('body', '')
-        lang = self.language_service.detect_sync(user_text)
+        lang = analyze(user_text).language
         session_id = context.get('session_id')
         user_phone = message.get('from_phone', 'unknown')
         clinic_id = context.get('clinic_id')
@@ -537,7 +455,7 @@ class IntentRouter:
         from app.config import get_redis_client
 
         user_text = message.get('body', '')
-        lang = self.language_service.detect_sync(user_text)
+        lang = analyze(user_text).language
         session_id = context.get('session_id')
         user_phone = message.get('from_phone', 'unknown')
         clinic_id = context.get('clinic_id', '')
@@ -551,12 +469,9 @@ class IntentRouter:
             redis_client = get_redis_client()
             price_tool = PriceQueryTool(clinic_id=clinic_id, redis_client=redis_client)
 
-            # Use enhanced text normalization (fixes veneers/implants issue)
-            from app.services.text_normalization import normalize_query
-
             # Normalize the query with language-specific processing
             # This handles typos, stopwords, and extracts service names correctly
-            query = normalize_query(user_text, language=lang)
+            query = analyze(user_text).search_terms(lang)
 
             # Fallback to original if normalization returns empty
             if not query or len(query.strip()) < 2:
@@ -0,0 +1,13 @@
+"""Embedded language identifier (character n-gram naive Bayes)"""
+
+from app.services.lang_id.identifier import (
+    LANG_ID_UNKNOWN_THRESHOLD,
+    LanguageIdentifier,
+    get_language_identifier,
+)
+
+__all__ = [
+    'LANG_ID_UNKNOWN_THRESHOLD',
+    'LanguageIdentifier',
+    'get_language_identifier',
+]
@@ -0,0 +1,256 @@
+"""
+Embedded Language Identifier
+
+Character n-gram naive Bayes over the clinic languages, replacing
+langdetect on the hot path. langdetect scores full n-gram profiles for
+~55 languages in pure Python with randomized trials; this model only
+knows the configured languages, hashes 1-3 character n-grams of each
+word into a fixed table and sums log-probabilities, so a typical message
+costs a few hundred dict/array lookups and is deterministic.
+
+Model file (model.bin, written by scripts/train_lang_id.py):
+    b"LID1" | uint32 header length | JSON header | int16 log-probs
+    The log-prob table is bucket-major: weights[bucket * L + lang], in
+    thousandths of a nat.
+
+Output is calibrated with the temperature fitted at training time, so
+confidence ~ probability of being right. Guesses below the unknown
+threshold come back as (None, confidence).
+
+Short messages ("hola", "ok", "да") carry too few n-grams for the model;
+greetings and one-word replies are resolved from SHORT_REPLIES first.
+"""
+
+import json
+import logging
+import math
+import os
+import re
+import struct
+import sys
+import unicodedata
+import zlib
+from array import array
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MODEL_PATH = Path(__file__).with_name("model.bin")
+MODEL_MAGIC = b"LID1"
+
+LANG_ID_UNKNOWN_THRESHOLD = float(os.getenv("LANG_ID_UNKNOWN_THRESHOLD", "0.5"))
+
+# Confidence for replies resolved from SHORT_REPLIES
+SHORT_REPLY_CONFIDENCE = 0.9
+# Messages with at most this many words are checked against SHORT_REPLIES
+SHORT_REPLY_MAX_WORDS = 3
+
+# Greetings and one-word replies that are unambiguous on their own.
+# Words shared across languages ("no", "ok", "si") are left out so they
+# fall through to the model / unknown threshold.
+SHORT_REPLIES: Dict[str, str] = {
+    # English
+    'hi': 'en', 'hello': 'en', 'hey': 'en', 'thanks': 'en', 'thank': 'en', 'you': 'en',
+    'yes': 'en', 'yeah': 'en', 'yep': 'en', 'nope': 'en', 'sure': 'en', 'please': 'en',
+    'bye': 'en', 'great': 'en', 'good': 'en', 'morning': 'en', 'afternoon': 'en', 'evening': 'en',
+    # Spanish
+    'hola': 'es', 'gracias': 'es', 'sí': 'es', 'vale': 'es', 'claro': 'es', 'bueno': 'es',
+    'buenos': 'es', 'buenas': 'es', 'días': 'es', 'tardes': 'es', 'noches': 'es', 'adiós': 'es',
+    'perfecto': 'es', 'muchas': 'es', 'listo': 'es', 'dale': 'es',
+    # Portuguese
+    'olá': 'pt', 'oi': 'pt', 'obrigado': 'pt', 'obrigada': 'pt', 'sim': 'pt', 'não': 'pt',
+    'bom': 'pt', 'dia': 'pt', 'boa': 'pt', 'noite': 'pt', 'tchau': 'pt',
+    'beleza': 'pt', 'valeu': 'pt',
+    # French
+    'bonjour': 'fr', 'bonsoir': 'fr', 'merci': 'fr', 'oui': 'fr', 'salut': 'fr',
+    # Italian
+    'ciao': 'it', 'grazie': 'it', 'buongiorno': 'it', 'buonasera': 'it',
+    # German
+    'hallo': 'de', 'danke': 'de', 'ja': 'de', 'nein': 'de', 'tschüss': 'de',
+    # Russian
+    'привет': 'ru', 'здравствуйте': 'ru', 'спасибо': 'ru', 'да': 'ru', 'нет': 'ru',
+    'хорошо': 'ru', 'пожалуйста': 'ru', 'ладно': 'ru', 'добрый': 'ru', 'день': 'ru',
+    # Hebrew
+    'שלום': 'he', 'תודה': 'he', 'כן': 'he', 'לא': 'he', 'בסדר': 'he', 'היי': 'he',
+}
+
+# Letter runs (no digits/underscore); apostrophes split words
+_WORD = re.compile(r"[^\W\d_]+")
+
+
+def iter_ngrams(text: str, max_n: int = 3) -> Iterator[str]:
+    """1..max_n character n-grams of each word, padded with spaces."""
+    text = unicodedata.normalize("NFC", text).lower()
+    for word in _WORD.findall(text):
+        padded = f" {word} "
+        length = len(padded)
+        for n in range(1, max_n + 1):
+            for i in range(length - n + 1):
+                gram = padded[i:i + n]
+                if gram != " ":
+                    yield gram
+
+
+def bucket_of(gram: str, buckets: int) -> int:
+    """Stable hash bucket of an n-gram (buckets is a power of two)."""
+    return zlib.crc32(gram.encode("utf-8")) & (buckets - 1)
+
+
+def write_model(path: Path, header: Dict, weights: array) -> None:
+    """Serialize a model (used by the offline trainer)."""
+    if weights.typecode != "h":
+        raise ValueError("weights must be an int16 array")
+    data = array("h", weights)
+    if sys.byteorder != "little":
+        data.byteswap()
+    blob = json.dumps(header, sort_keys=True).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(MODEL_MAGIC)
+        f.write(struct.pack("<I", len(blob)))
+        f.write(blob)
+        f.write(data.tobytes())
+
+
+def read_model(path: Path) -> Tuple[Dict, array]:
+    with open(path, "rb") as f:
+        raw = f.read()
+    if raw[:4] != MODEL_MAGIC:
+        raise ValueError(f"{path} is not a language-id model")
+    (header_len,) = struct.unpack_from("<I", raw, 4)
+    header = json.loads(raw[8:8 + header_len])
+    weights = array("h")
+    weights.frombytes(raw[8 + header_len:])
+    if sys.byteorder != "little":
+        weights.byteswap()
+    expected = header["buckets"] * len(header["languages"])
+    if len(weights) != expected:
+        raise ValueError(f"{path}: expected {expected} weights, found {len(weights)}")
+    return header, weights
+
+
+class LanguageIdentifier:
+    """Naive Bayes language identifier over hashed character n-grams."""
+
+    def __init__(
+        self,
+        model_path: Path = MODEL_PATH,
+        unknown_threshold: float = LANG_ID_UNKNOWN_THRESHOLD,
+    ):
+        header, weights = read_model(model_path)
+        self.languages: Tuple[str, ...] = tuple(header["languages"])
+        self.buckets: int = header["buckets"]
+        self.max_n: int = header["max_n"]
+        self.temperature: float = header["temperature"]
+        self.unknown_threshold = unknown_threshold
+        self._scale = 1.0 / header["scale"]
+
+        width = len(self.languages)
+        # One tuple per bucket so scoring is a zip per distinct n-gram
+        self._rows: List[Tuple[int, ...]] = [
+            tuple(weights[b * width:(b + 1) * width]) for b in range(self.buckets)
+        ]
+        self._bucket = lru_cache(maxsize=65536)(self._bucket_uncached)
+
+    def _bucket_uncached(self, gram: str) -> int:
+        return bucket_of(gram, self.buckets)
+
+    def _scores(self, text: str) -> Tuple[List[float], int]:
+        """Summed log-likelihood per language and the number of n-grams."""
+        counts = Counter(self._bucket(gram) for gram in iter_ngrams(text, self.max_n))
+        totals = [0] * len(self.languages)
+        rows = self._rows
+        for bucket, count in counts.items():
+            row = rows[bucket]
+            if count == 1:
+                totals = [t + w for t, w in zip(totals, row)]
+            else:
+                totals = [t + w * count for t, w in zip(totals, row)]
+        return [t * self._scale for t in totals], sum(counts.values())
+
+    def probabilities(self, text: str, languages: Optional[Iterable[str]] = None) -> Dict[str, float]:
+        """
+        Calibrated posterior over the model's languages (uniform prior).
+
+        Args:
+            text: Text to classify
+            languages: Optional subset to restrict the decision to
+
+        Returns:
+            {language: probability}, empty when the text has no letters
+        """
+        scores, features = self._scores(text)
+        if not features:
+            return {}
+        allowed = set(languages) if languages is not None else None
+        candidates = [
+            (lang, score / self.temperature)
+            for lang, score in zip(self.languages, scores)
+            if allowed is None or lang in allowed
+        ]
+        if not candidates:
+            return {}
+        top = max(score for _, score in candidates)
+        exp = [(lang, math.exp(score - top)) for lang, score in candidates]
+        norm = sum(value for _, value in exp)
+        return {lang: value / norm for lang, value in exp}
+
+    def _short_reply(self, text: str, allowed: Optional[set]) -> Optional[str]:
+        words = _WORD.findall(unicodedata.normalize("NFC", text).lower())
+        if not words or len(words) > SHORT_REPLY_MAX_WORDS:
+            return None
+        found = {SHORT_REPLIES.get(word) for word in words}
+        if len(found) != 1 or None in found:
+            return None
+        lang = found.pop()
+        if allowed is not None and lang not in allowed:
+            return None
+        return lang
+
+    def identify(
+        self,
+        text: str,
+        languages: Optional[Iterable[str]] = None,
+    ) -> Tuple[Optional[str], float]:
+        """
+        Identify the language of text.
+
+        Args:
+            text: Text to classify
+            languages: Optional subset to restrict the decision to
+
+        Returns:
+            (language, confidence); language is None when the best guess is
+            below the unknown threshold or the text has no letters
+        """
+        allowed = set(languages) if languages is not None else None
+
+        short = self._short_reply(text, allowed)
+        if short:
+            return short, SHORT_REPLY_CONFIDENCE
+
+        probabilities = self.probabilities(text, allowed)
+        if not probabilities:
+            return None, 0.0
+        lang, confidence = max(probabilities.items(), key=lambda item: item[1])
+        if confidence < self.unknown_threshold:
+            return None, confidence
+        return lang, confidence
+
+
+# Singleton instance
+_identifier: Optional[LanguageIdentifier] = None
+
+
+def get_language_identifier() -> LanguageIdentifier:
+    """Get or create singleton LanguageIdentifier instance"""
+    global _identifier
+    if _identifier is None:
+        _identifier = LanguageIdentifier()
+        logger.info(
+            f"✅ Language identifier loaded ({len(_identifier.languages)} languages, "
+            f"{_identifier.buckets} buckets)"
+        )
+    return _identifier
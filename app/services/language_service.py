@@ -8,7 +8,7 @@ Features:
 - Fast language detection (<10ms) with caching
 - Synchronous detection for non-async contexts
 - Character-based detection (Cyrillic, Hebrew, Spanish markers)
-- ML-based detection via langdetect library
+- Embedded n-gram model for ambiguous Latin text (app.services.lang_id)
 - Fuzzy service alias matching (rapidfuzz, threshold 0.88)
 - I18N template rendering (Jinja2, ru/es/en/he/pt)
 - Currency formatting (Babel)
@@ -20,17 +20,20 @@ Use LanguageService.detect_sync() for synchronous contexts.
 """
 
 import logging
+import os
 import time
 from typing import Dict, Any, Optional, Tuple
 from rapidfuzz import fuzz, process
-import langdetect
 from jinja2 import Environment, FileSystemLoader, select_autoescape
 from babel.numbers import format_currency
 
+from app.services.lang_id import get_language_identifier
+
 logger = logging.getLogger(__name__)
 
-# Disable langdetect's non-deterministic behavior for consistent results
-langdetect.DetectorFactory.seed = 0
+# Fallback model for ambiguous Latin-script text: "embedded" (app.services.lang_id)
+# or "langdetect" (previous behaviour, kept for rollback)
+LANGUAGE_ID_BACKEND = os.getenv("LANGUAGE_ID_BACKEND", "embedded").lower()
 
 
 class LanguageService:
@@ -45,7 +48,7 @@ class LanguageService:
     - Synchronous detection for non-async contexts
     - Character-based fast detection (Cyrillic, Hebrew)
     - Keyword-based detection (Spanish, Portuguese markers)
-    - ML-based fallback via langdetect library
+    - Embedded n-gram model fallback (langdetect via LANGUAGE_ID_BACKEND)
     - Fuzzy alias matching for service names
     - I18N template rendering
     - Currency formatting per locale
@@ -55,6 +58,9 @@ class LanguageService:
     SUPPORTED_LANGUAGES = {'en', 'es', 'ru', 'he', 'pt'}
     DEFAULT_LANGUAGE = 'es'
 
+    # Confidence reported for Spanish/Portuguese keyword-marker matches
+    MARKER_CONFIDENCE = 0.8
+
     def __init__(self, redis_client=None, templates_dir: str = "templates"):
         """
         Initialize language service
@@ -107,24 +113,46 @@ class LanguageService:
         Returns:
             ISO language code (en, es, ru, he, pt)
         """
+        return self.detect_with_confidence(text)[0]
+
+    def detect_with_confidence(self, text: str) -> Tuple[str, float]:
+        """
+        Synchronous language detection that also reports confidence.
+
+        Same decision as detect_sync(). Confidence is the script ratio for
+        Cyrillic/Hebrew, MARKER_CONFIDENCE for keyword markers, the
+        model probability otherwise, and 0.0 when falling back to the
+        default language.
+
+        Args:
+            text: Text to detect language from
+
+        Returns:
+            (ISO language code, confidence in [0, 1])
+        """
         if not text or not text.strip():
-            return self.default_language
+            return self.default_language, 0.0
 
         # Fast character-based detection first
         char_result = self._detect_by_characters(text)
         if char_result and char_result != 'en':
             # Non-English detected with confidence (Cyrillic, Hebrew, etc.)
-            return char_result
+            if char_result in ('ru', 'he'):
+                low, high = ('\u0400', '\u04FF') if char_result == 'ru' else ('\u0590', '\u05FF')
+                return char_result, sum(1 for c in text if low <= c <= high) / len(text)
+            return char_result, self.MARKER_CONFIDENCE
 
-        # Fall back to langdetect for English/Spanish/Portuguese disambiguation
-        return self._detect_by_langdetect(text)
+        # Fall back to the n-gram model for English/Spanish/Portuguese disambiguation
+        if LANGUAGE_ID_BACKEND == "langdetect":
+            return self._detect_by_langdetect(text)
+        return self._detect_by_model(text)
 
     def _detect_by_characters(self, text: str) -> Optional[str]:
         """
         Fast Unicode character-based detection.
 
         This is the first pass - detects languages with distinctive scripts.
-        Returns None for ambiguous cases (let langdetect handle).
+        Returns None for ambiguous cases (let the n-gram model handle).
         """
         if not text:
             return None
@@ -160,17 +188,37 @@ class LanguageService:
         # Default to English for Latin script without markers
         return 'en'
 
-    def _detect_by_langdetect(self, text: str) -> str:
+    def _detect_by_model(self, text: str) -> Tuple[str, float]:
         """
-        ML-based detection via langdetect library.
+        Detection via the embedded n-gram identifier.
 
         Used as fallback when character-based detection is ambiguous.
+        Unknown (below the model's threshold) or unsupported languages fall
+        back to the default language.
+        """
+        try:
+            lang, confidence = get_language_identifier().identify(text)
+        except Exception as e:
+            logger.warning(f"Language identifier failed: {e}")
+            return self.default_language, 0.0
+        if lang in self.supported_languages:
+            return lang, confidence
+        return self.default_language, 0.0
+
+    def _detect_by_langdetect(self, text: str) -> Tuple[str, float]:
+        """
+        ML-based detection via langdetect library (LANGUAGE_ID_BACKEND=langdetect).
         """
         try:
-            detected = langdetect.detect(text)
-            return detected if detected in self.supported_languages else self.default_language
+            import langdetect
+            # Disable langdetect's non-deterministic behavior for consistent results
+            langdetect.DetectorFactory.seed = 0
+            best = langdetect.detect_langs(text)[0]
         except Exception:
-            return self.default_language
+            return self.default_language, 0.0
+        if best.lang in self.supported_languages:
+            return best.lang, best.prob
+        return self.default_language, 0.0
 
     async def detect_and_cache(self, message: str, phone_hash: str) -> str:
         """
@@ -442,3 +490,15 @@ class LanguageService:
         """Check if message is negative"""
         normalized = self.normalize_text(message)
         return normalized in self.get_negative_patterns(language)
+
+
+# Singleton instance
+_language_service: Optional[LanguageService] = None
+
+
+def get_language_service() -> LanguageService:
+    """Get or create singleton LanguageService instance"""
+    global _language_service
+    if _language_service is None:
+        _language_service = LanguageService()
+    return _language_service
@@ -11,6 +11,13 @@ from app.services.llm.capability_matrix import CapabilityMatrix
 from app.services.llm.llm_factory import LLMFactory, get_llm_factory
 from app.services.llm.tiers import ModelTier, DEFAULT_TIER_MODELS, DEFAULT_TIER_PROVIDERS
 from app.services.llm.tier_registry import TierRegistry, TierResolution, get_tier_registry, warmup_tier_registry
+from app.services.llm.concurrency import (
+    AdaptiveConcurrencyLimiter,
+    LLMOverloadedError,
+    LLMPriority,
+    get_concurrency_limiter,
+    get_concurrency_stats,
+)
 
 __all__ = [
     'LLMProvider',
@@ -30,4 +37,10 @@ __all__ = [
     'TierResolution',
     'get_tier_registry',
     'warmup_tier_registry',
+    # Provider concurrency limiting
+    'AdaptiveConcurrencyLimiter',
+    'LLMOverloadedError',
+    'LLMPriority',
+    'get_concurrency_limiter',
+    'get_concurrency_stats',
 ]
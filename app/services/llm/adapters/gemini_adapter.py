@@ -1,6 +1,8 @@
 import os
 import json
 import time
+import hashlib
+from collections import OrderedDict
 from typing import Dict, List, Any, Optional, AsyncIterator, Tuple
 from google import genai
 from google.genai import types
@@ -10,6 +12,41 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Converted tool sets kept, by schema hash (shared by all Gemini adapters)
+GEMINI_TOOL_CACHE_SIZE = int(os.getenv("GEMINI_TOOL_CACHE_SIZE", "64"))
+
+# Conversations whose converted message prefix is kept, per adapter
+GEMINI_MESSAGE_CACHE_SIZE = int(os.getenv("GEMINI_MESSAGE_CACHE_SIZE", "256"))
+
+_tool_cache: 'OrderedDict[str, List[types.Tool]]' = OrderedDict()
+
+
+class _ConvertedPrefix:
+    """
+    Gemini contents of the messages converted so far for one conversation.
+
+    The tool loop appends to the same message list between calls, so a later
+    call only converts the messages past this prefix. Messages are matched by
+    identity (and the identity of their content), which is why the entry
+    keeps references to them.
+    """
+
+    __slots__ = ('messages', 'content_refs', 'system_instruction', 'contents')
+
+    def __init__(self):
+        self.messages: List[Dict[str, Any]] = []
+        self.content_refs: List[Any] = []
+        self.system_instruction: Optional[str] = None
+        self.contents: List[Content] = []
+
+    def is_prefix_of(self, messages: List[Dict[str, Any]]) -> bool:
+        if len(self.messages) > len(messages):
+            return False
+        for cached, msg, content in zip(self.messages, messages, self.content_refs):
+            if cached is not msg or msg.get('content') is not content:
+                return False
+        return True
+
 
 class GeminiAdapter(LLMAdapter):
     """Adapter for Google Gemini models"""
@@ -24,6 +61,8 @@ class GeminiAdapter(LLMAdapter):
         # Use GEMINI_API_KEY or GOOGLE_API_KEY
         os.environ['GEMINI_API_KEY'] = api_key
         self.client = genai.Client(api_key=api_key)
+        # id(first message) -> converted prefix of that conversation
+        self._message_cache: 'OrderedDict[int, _ConvertedPrefix]' = OrderedDict()
 
     async def generate(
         self,
@@ -270,110 +309,142 @@ class GeminiAdapter(LLMAdapter):
         """
         Convert OpenAI message format to Gemini format.
 
+        Only messages appended since the last call for the same conversation
+        are converted; the rest comes from the cached prefix.
+
         Returns:
             Tuple of (system_instruction, contents_list)
         """
-        system_instruction = None
-        gemini_contents = []
+        if not messages:
+            return None, []
+
+        key = id(messages[0])
+        entry = self._message_cache.get(key)
+        if entry is None or not entry.is_prefix_of(messages):
+            entry = _ConvertedPrefix()
+        self._message_cache[key] = entry
+        self._message_cache.move_to_end(key)
+        while len(self._message_cache) > GEMINI_MESSAGE_CACHE_SIZE:
+            self._message_cache.popitem(last=False)
+
+        for msg in messages[len(entry.messages):]:
+            if msg.get('role') == 'system':
+                # Extract system instruction (Gemini handles separately)
+                entry.system_instruction = msg.get('content', '')
+            else:
+                converted = self._convert_message(msg)
+                if converted is not None:
+                    entry.contents.append(converted)
+            entry.messages.append(msg)
+            entry.content_refs.append(msg.get('content'))
+
+        return entry.system_instruction, list(entry.contents)
+
+    def _convert_message(self, msg: Dict[str, Any]) -> Optional[Content]:
+        """Convert one non-system OpenAI message to Gemini Content (None if empty)"""
+        role = msg.get('role', '')
+        content = msg.get('content', '')
+
+        # Check for raw Gemini content (preserves thought_signature)
+        raw_content = msg.get('_raw_gemini_content')
+        if raw_content and isinstance(raw_content, Content):
+            return raw_content
+
+        # Convert user messages
+        if role == 'user':
+            return Content(
+                role='user',
+                parts=[Part(text=content if content else '')]
+            )
 
-        for msg in messages:
-            role = msg.get('role', '')
-            content = msg.get('content', '')
+        # Convert assistant messages (may include tool calls)
+        elif role == 'assistant':
+            parts = []
 
-            # Extract system instruction (Gemini handles separately)
-            if role == 'system':
-                system_instruction = content
-                continue
+            # Add text content if present
+            if content:
+                parts.append(Part(text=content))
 
-            # Check for raw Gemini content (preserves thought_signature)
-            raw_content = msg.get('_raw_gemini_content')
-            if raw_content and isinstance(raw_content, Content):
-                gemini_contents.append(raw_content)
-                continue
+            # Add tool/function calls if present
+            tool_calls = msg.get('tool_calls', [])
+            for tc in tool_calls:
+                func = tc.get('function', {})
+                func_args = func.get('arguments', '{}')
 
-            # Convert user messages
-            if role == 'user':
-                gemini_contents.append(Content(
-                    role='user',
-                    parts=[Part(text=content if content else '')]
-                ))
+                # Parse arguments if string
+                if isinstance(func_args, str):
+                    try:
+                        func_args = json.loads(func_args)
+                    except json.JSONDecodeError:
+                        func_args = {}
+
+                # Check for thought_signature in metadata
+                metadata = tc.get('metadata', {}) or {}
+                thought_sig = metadata.get('thought_signature')
 
-            # Convert assistant messages (may include tool calls)
-            elif role == 'assistant':
-                parts = []
-
-                # Add text content if present
-                if content:
-                    parts.append(Part(text=content))
-
-                # Add tool/function calls if present
-                tool_calls = msg.get('tool_calls', [])
-                for tc in tool_calls:
-                    func = tc.get('function', {})
-                    func_args = func.get('arguments', '{}')
-
-                    # Parse arguments if string
-                    if isinstance(func_args, str):
-                        try:
-                            func_args = json.loads(func_args)
-                        except json.JSONDecodeError:
-                            func_args = {}
-
-                    # Check for thought_signature in metadata
-                    metadata = tc.get('metadata', {}) or {}
-                    thought_sig = metadata.get('thought_signature')
-
-                    fc_part = Part(
-                        function_call=FunctionCall(
-                            name=func.get('name', ''),
-                            args=func_args
-                        )
+                fc_part = Part(
+                    function_call=FunctionCall(
+                        name=func.get('name', ''),
+                        args=func_args
                     )
+                )
 
-                    # Re-attach thought_signature if present
-                    if thought_sig:
-                        import base64
-                        try:
-                            # Decode from base64 if it was encoded
-                            if isinstance(thought_sig, str):
-                                fc_part.thought_signature = base64.b64decode(thought_sig)
-                            else:
-                                fc_part.thought_signature = thought_sig
-                            logger.debug(f"Re-attached thought_signature to function call")
-                        except Exception as e:
-                            logger.warning(f"Failed to decode thought_signature: {e}")
-
-                    parts.append(fc_part)
-
-                if parts:
-                    gemini_contents.append(Content(role='model', parts=parts))
-
-            # Convert tool results
-            elif role == 'tool':
-                tool_name = msg.get('name', msg.get('tool_call_id', 'unknown'))
-                tool_content = content
-
-                # Parse content if JSON string
-                if isinstance(tool_content, str):
+                # Re-attach thought_signature if present
+                if thought_sig:
+                    import base64
                     try:
-                        tool_content = json.loads(tool_content)
-                    except json.JSONDecodeError:
-                        tool_content = {'result': tool_content}
-
-                gemini_contents.append(Content(
-                    role='user',  # Tool responses are from user perspective in Gemini
-                    parts=[Part(
-                        function_response=FunctionResponse(
-                            name=tool_name,
-                            response=tool_content if isinstance(tool_content, dict) else {'result': tool_content}
-                        )
-                    )]
-                ))
+                        # Decode from base64 if it was encoded
+                        if isinstance(thought_sig, str):
+                            fc_part.thought_signature = base64.b64decode(thought_sig)
+                        else:
+                            fc_part.thought_signature = thought_sig
+                        logger.debug(f"Re-attached thought_signature to function call")
+                    except Exception as e:
+                        logger.warning(f"Failed to decode thought_signature: {e}")
+
+                parts.append(fc_part)
+
+            return Content(role='model', parts=parts) if parts else None
+
+        # Convert tool results
+        elif role == 'tool':
+            tool_name = msg.get('name', msg.get('tool_call_id', 'unknown'))
+            tool_content = content
+
+            # Parse content if JSON string
+            if isinstance(tool_content, str):
+                try:
+                    tool_content = json.loads(tool_content)
+                except json.JSONDecodeError:
+                    tool_content = {'result': tool_content}
+
+            return Content(
+                role='user',  # Tool responses are from user perspective in Gemini
+                parts=[Part(
+                    function_response=FunctionResponse(
+                        name=tool_name,
+                        response=tool_content if isinstance(tool_content, dict) else {'result': tool_content}
+                    )
+                )]
+            )
 
-        return system_instruction, gemini_contents
+        return None
 
     def _convert_tools(self, tools: List[Dict[str, Any]]) -> List[types.Tool]:
-        """Convert OpenAI tool format to Gemini Tool format"""
+        """Convert OpenAI tool format to Gemini Tool format (cached by schema hash)"""
+        key = hashlib.sha1(json.dumps(tools, sort_keys=True, default=str).encode()).hexdigest()
+        cached = _tool_cache.get(key)
+        if cached is not None:
+            _tool_cache.move_to_end(key)
+            return list(cached)
+
+        converted = self._build_tools(tools)
+        _tool_cache[key] = converted
+        while len(_tool_cache) > GEMINI_TOOL_CACHE_SIZE:
+            _tool_cache.popitem(last=False)
+        return list(converted)
+
+    def _build_tools(self, tools: List[Dict[str, Any]]) -> List[types.Tool]:
         from google.genai.types import FunctionDeclaration, Tool
 
         function_declarations = []
@@ -0,0 +1,358 @@
+"""
+Adaptive per-provider/model concurrency limiting for LLM calls.
+
+Every adapter call made by LLMFactory takes a slot from the limiter of its
+(provider, model). The limit adapts AIMD-style:
+- additive increase: +1 per `limit` successful calls, only while the limit
+  is actually in use (no growth during quiet periods)
+- multiplicative decrease: x LLM_CONCURRENCY_BACKOFF on an overload signal
+  (429/503/529, "rate limit"/"overloaded"/RESOURCE_EXHAUSTED errors,
+  timeouts), at most once per cooldown so one burst of failures counts once
+- Retry-After (or retry-after-ms, or Gemini's retryDelay) holds every queued
+  call until it has passed
+
+Calls beyond the limit wait in a priority queue: patient-facing turns
+(INTERACTIVE) are granted before NORMAL calls, which go before BACKGROUND
+work (session summaries, follow-up analysis). A call is shed with
+LLMOverloadedError, without reaching the provider, when its expected queue
+wait already exceeds its budget or the budget runs out while it waits.
+Callers on the patient path answer with a template instead.
+"""
+import asyncio
+import heapq
+import logging
+import os
+import re
+import time
+from email.utils import parsedate_to_datetime
+from enum import IntEnum
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+LLM_CONCURRENCY_LIMIT_ENABLED = os.getenv("LLM_CONCURRENCY_LIMIT_ENABLED", "true").lower() == "true"
+
+# Concurrent calls per (provider, model)
+LLM_CONCURRENCY_INITIAL = int(os.getenv("LLM_CONCURRENCY_INITIAL", "16"))
+LLM_CONCURRENCY_MIN = int(os.getenv("LLM_CONCURRENCY_MIN", "2"))
+LLM_CONCURRENCY_MAX = int(os.getenv("LLM_CONCURRENCY_MAX", "128"))
+
+# Limit multiplier on an overload signal, and minimum time between two decreases
+LLM_CONCURRENCY_BACKOFF = float(os.getenv("LLM_CONCURRENCY_BACKOFF", "0.7"))
+LLM_CONCURRENCY_COOLDOWN_SECONDS = float(os.getenv("LLM_CONCURRENCY_COOLDOWN_SECONDS", "1.0"))
+
+# Longest Retry-After honoured; a provider asking for more is treated as this
+LLM_RETRY_AFTER_MAX_SECONDS = float(os.getenv("LLM_RETRY_AFTER_MAX_SECONDS", "30"))
+
+OVERLOAD_STATUS_CODES = {429, 503, 529}
+OVERLOAD_MARKERS = (
+    "rate limit", "rate_limit", "ratelimit", "too many requests", "overloaded",
+    "resource_exhausted", "resource exhausted", "capacity",
+)
+RETRY_DELAY_PATTERN = re.compile(r"retry[_ ]?delay['\"]?\s*[:=]\s*['\"]?(\d+(?:\.\d+)?)s", re.I)
+
+# Smoothing of the call latency used to estimate queue wait
+LATENCY_EWMA_ALPHA = 0.2
+
+
+class LLMPriority(IntEnum):
+    """Queue priority of an LLM call (lower is served first)."""
+    INTERACTIVE = 0  # Patient-facing turn: a person is waiting for the reply
+    NORMAL = 1
+    BACKGROUND = 2  # Summaries, follow-up analysis, anything nobody waits on
+
+
+# Longest a call may wait for a slot before it is shed
+DEFAULT_QUEUE_TIMEOUTS: Dict[LLMPriority, float] = {
+    LLMPriority.INTERACTIVE: float(os.getenv("LLM_QUEUE_TIMEOUT_INTERACTIVE_SECONDS", "3")),
+    LLMPriority.NORMAL: float(os.getenv("LLM_QUEUE_TIMEOUT_NORMAL_SECONDS", "10")),
+    LLMPriority.BACKGROUND: float(os.getenv("LLM_QUEUE_TIMEOUT_BACKGROUND_SECONDS", "120")),
+}
+
+
+class LLMOverloadedError(Exception):
+    """An LLM call was shed before reaching the provider."""
+
+    def __init__(self, limiter: str, priority: LLMPriority, reason: str, waited: float = 0.0):
+        self.limiter = limiter
+        self.priority = priority
+        self.reason = reason  # estimated_wait, queue_timeout
+        self.waited = waited
+        super().__init__(
+            f"LLM call shed for {limiter} ({priority.name.lower()}, {reason}, waited {waited:.2f}s)"
+        )
+
+
+def _observe(limiter: 'AdaptiveConcurrencyLimiter', priority: LLMPriority, waited: float,
+             shed_reason: Optional[str] = None, overload: bool = False) -> None:
+    """Best-effort Prometheus export (prometheus_client is optional here)."""
+    try:
+        from app.observability.metrics import observe_llm_concurrency
+        observe_llm_concurrency(
+            limiter.provider, limiter.model, priority.name.lower(), waited,
+            limit=limiter.current_limit, shed_reason=shed_reason, overload=overload,
+        )
+    except Exception as e:
+        logger.debug(f"Failed to record LLM concurrency metric: {e}")
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    for attr in ("status_code", "code", "status"):
+        value = getattr(exc, attr, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(exc, "response", None)
+    value = getattr(response, "status_code", None)
+    return value if isinstance(value, int) else None
+
+
+def is_overload_error(exc: BaseException) -> bool:
+    """Whether a provider error means "too much load" rather than a bad request."""
+    if isinstance(exc, TimeoutError) or "Timeout" in type(exc).__name__:
+        return True
+    code = _status_code(exc)
+    if code is not None:
+        return code in OVERLOAD_STATUS_CODES
+    text = str(exc).lower()
+    return any(marker in text for marker in OVERLOAD_MARKERS)
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """Retry-After of a provider error, capped at LLM_RETRY_AFTER_MAX_SECONDS."""
+    seconds = None
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or getattr(exc, "headers", None)
+    if headers:
+        try:
+            if headers.get("retry-after-ms"):
+                seconds = float(headers["retry-after-ms"]) / 1000.0
+            elif headers.get("retry-after"):
+                value = headers["retry-after"]
+                try:
+                    seconds = float(value)
+                except ValueError:
+                    seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except Exception:
+            seconds = None
+    if seconds is None:
+        match = RETRY_DELAY_PATTERN.search(str(exc))
+        if match:
+            seconds = float(match.group(1))
+    if seconds is None or seconds <= 0:
+        return None
+    return min(seconds, LLM_RETRY_AFTER_MAX_SECONDS)
+
+
+class _Slot:
+    """Async context manager holding one limiter slot around a provider call."""
+
+    def __init__(self, limiter: 'AdaptiveConcurrencyLimiter', priority: LLMPriority, queue_timeout: Optional[float]):
+        self.limiter = limiter
+        self.priority = priority
+        self.queue_timeout = queue_timeout
+        self.waited = 0.0
+        self._started = 0.0
+
+    async def __aenter__(self) -> '_Slot':
+        self.waited = await self.limiter.acquire(self.priority, self.queue_timeout)
+        self._started = time.monotonic()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> bool:
+        latency = time.monotonic() - self._started
+        if exc is None:
+            self.limiter.release('success', latency)
+        elif isinstance(exc, asyncio.CancelledError):
+            self.limiter.release('cancelled', latency)
+        elif is_overload_error(exc):
+            self.limiter.release('overload', latency, retry_after_seconds(exc))
+        else:
+            self.limiter.release('error', latency)
+        return False
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD concurrency limit with a priority wait queue for one provider/model."""
+
+    def __init__(
+        self,
+        provider: str,
+        model: str,
+        initial_limit: int = LLM_CONCURRENCY_INITIAL,
+        min_limit: int = LLM_CONCURRENCY_MIN,
+        max_limit: int = LLM_CONCURRENCY_MAX,
+        backoff: float = LLM_CONCURRENCY_BACKOFF,
+        cooldown: float = LLM_CONCURRENCY_COOLDOWN_SECONDS,
+    ):
+        self.provider = provider
+        self.model = model
+        self.min_limit = max(min_limit, 1)
+        self.max_limit = max(max_limit, self.min_limit)
+        self.limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self.backoff = backoff
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.avg_latency: Optional[float] = None
+        self._last_decrease = 0.0
+        # [priority, seq, future] entries; a cancelled future is a dead entry
+        self._waiters: List[list] = []
+        self._queued: Dict[LLMPriority, int] = {priority: 0 for priority in LLMPriority}
+        self._seq = 0
+        self._unblock_handle: Optional[asyncio.TimerHandle] = None
+        self.stats = {'granted': 0, 'enqueued': 0, 'shed': 0, 'overloads': 0, 'retry_after': 0}
+
+    @property
+    def name(self) -> str:
+        return f"{self.provider}/{self.model}"
+
+    @property
+    def current_limit(self) -> int:
+        return max(self.min_limit, int(self.limit))
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(self._queued.values())
+
+    def slot(self, priority: LLMPriority = LLMPriority.NORMAL, queue_timeout: Optional[float] = None) -> _Slot:
+        """`async with limiter.slot(priority):` around one provider call."""
+        return _Slot(self, priority, queue_timeout)
+
+    def estimated_wait(self, priority: LLMPriority) -> float:
+        """Expected seconds until a new call of this priority gets a slot."""
+        now = time.monotonic()
+        blocked = max(self.blocked_until - now, 0.0)
+        ahead = sum(count for p, count in self._queued.items() if p <= priority)
+        if not ahead and self.in_flight < self.current_limit:
+            return blocked
+        if self.avg_latency is None:
+            return blocked
+        # Slots free up at about limit / avg_latency per second
+        return blocked + (ahead + 1) * self.avg_latency / self.current_limit
+
+    async def acquire(self, priority: LLMPriority = LLMPriority.NORMAL, queue_timeout: Optional[float] = None) -> float:
+        """Wait for a slot; returns the time waited. Raises LLMOverloadedError when shed."""
+        if queue_timeout is None:
+            queue_timeout = DEFAULT_QUEUE_TIMEOUTS[priority]
+        now = time.monotonic()
+        if not self.queue_depth and self.in_flight < self.current_limit and now >= self.blocked_until:
+            self.in_flight += 1
+            self.stats['granted'] += 1
+            _observe(self, priority, 0.0)
+            return 0.0
+
+        if self.estimated_wait(priority) > queue_timeout:
+            self._shed(priority, 'estimated_wait', 0.0)
+
+        future = asyncio.get_running_loop().create_future()
+        self._seq += 1
+        heapq.heappush(self._waiters, [priority, self._seq, future])
+        self._queued[priority] += 1
+        self.stats['enqueued'] += 1
+        self._grant()
+
+        started = time.monotonic()
+        try:
+            await asyncio.wait({future}, timeout=queue_timeout)
+        except asyncio.CancelledError:
+            self._abandon(future, priority)
+            raise
+        waited = time.monotonic() - started
+        if not future.done():
+            self._abandon(future, priority)
+            self._shed(priority, 'queue_timeout', waited)
+        _observe(self, priority, waited)
+        return waited
+
+    def release(self, outcome: str, latency: float = 0.0, retry_after: Optional[float] = None):
+        """Give a slot back and adapt the limit to how the call went.
+
+        outcome: success, overload, error (not load related) or cancelled.
+        """
+        was_saturated = self.in_flight >= self.current_limit
+        self.in_flight = max(self.in_flight - 1, 0)
+        now = time.monotonic()
+
+        if outcome == 'success':
+            if self.avg_latency is None:
+                self.avg_latency = latency
+            else:
+                self.avg_latency += LATENCY_EWMA_ALPHA * (latency - self.avg_latency)
+            if was_saturated:
+                self.limit = min(self.limit + 1.0 / self.limit, float(self.max_limit))
+        elif outcome == 'overload':
+            self.stats['overloads'] += 1
+            if now - self._last_decrease >= self.cooldown:
+                self.limit = max(self.limit * self.backoff, float(self.min_limit))
+                self._last_decrease = now
+                logger.warning(f"LLM overload on {self.name}: concurrency limit -> {self.current_limit}")
+            if retry_after:
+                self.stats['retry_after'] += 1
+                self.blocked_until = max(self.blocked_until, now + retry_after)
+            _observe(self, LLMPriority.NORMAL, 0.0, overload=True)
+
+        self._grant()
+
+    def _grant(self):
+        """Hand free slots to the highest-priority live waiters."""
+        now = time.monotonic()
+        if now < self.blocked_until:
+            self._schedule_unblock()
+            return
+        while self._waiters and self.in_flight < self.current_limit:
+            priority, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue  # Abandoned (timed out or cancelled)
+            self._queued[priority] -= 1
+            self.in_flight += 1
+            self.stats['granted'] += 1
+            future.set_result(None)
+
+    def _schedule_unblock(self):
+        if self._unblock_handle is not None and not self._unblock_handle.cancelled():
+            self._unblock_handle.cancel()
+        loop = asyncio.get_running_loop()
+        delay = max(self.blocked_until - time.monotonic(), 0.0)
+        self._unblock_handle = loop.call_later(delay, self._grant)
+
+    def _abandon(self, future: asyncio.Future, priority: LLMPriority):
+        """Leave the queue; a slot granted meanwhile is handed back."""
+        if future.done() and not future.cancelled():
+            self.release('cancelled')
+            return
+        future.cancel()
+        self._queued[priority] -= 1
+
+    def _shed(self, priority: LLMPriority, reason: str, waited: float):
+        self.stats['shed'] += 1
+        _observe(self, priority, waited, shed_reason=reason)
+        raise LLMOverloadedError(self.name, priority, reason, waited)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'limit': self.current_limit,
+            'in_flight': self.in_flight,
+            'queued': self.queue_depth,
+            'avg_latency': self.avg_latency,
+            'blocked_for': max(self.blocked_until - time.monotonic(), 0.0),
+            **self.stats,
+        }
+
+
+# Limiters by (provider, model)
+_limiters: Dict[Tuple[str, str], AdaptiveConcurrencyLimiter] = {}
+
+
+def get_concurrency_limiter(provider: Any, model: str) -> AdaptiveConcurrencyLimiter:
+    """Get or create the shared limiter of a provider/model"""
+    provider = str(getattr(provider, "value", provider))
+    key = (provider, model)
+    limiter = _limiters.get(key)
+    if limiter is None:
+        limiter = _limiters[key] = AdaptiveConcurrencyLimiter(provider, model)
+    return limiter
+
+
+def get_concurrency_stats() -> Dict[str, Dict[str, Any]]:
+    """Current limit, queue and counters of every limiter"""
+    return {limiter.name: limiter.get_stats() for limiter in _limiters.values()}
@@ -1,11 +1,17 @@
 from typing import Dict, List, Any, Optional
-from langfuse import observe
 from app.services.llm.base_adapter import LLMAdapter, LLMResponse, LLMProvider, ModelCapability
 from app.services.llm.capability_matrix import CapabilityMatrix
 from app.services.llm.adapters.glm_adapter import GLMAdapter
 from app.services.llm.adapters.gemini_adapter import GeminiAdapter
 from app.services.llm.adapters.openai_adapter import OpenAIAdapter
 from app.services.llm.tiers import ModelTier
+from app.services.llm.concurrency import (
+    LLM_CONCURRENCY_LIMIT_ENABLED,
+    LLMOverloadedError,
+    LLMPriority,
+    get_concurrency_limiter,
+)
+from app.observability.span_export import traced
 # from app.services.llm.adapters.cerebras_adapter import CerebrasAdapter  # Disabled due to httpx compatibility
 import logging
 import os
@@ -14,6 +20,19 @@ import time
 logger = logging.getLogger(__name__)
 
 
+def _response_span_attributes(response: LLMResponse) -> Dict[str, Any]:
+    """Cheap span attributes for an LLM response (no prompt/completion payloads)."""
+    return {
+        "provider": response.provider,
+        "model": response.model,
+        "latency_ms": response.latency_ms,
+        "input_tokens": response.usage.get("input_tokens"),
+        "output_tokens": response.usage.get("output_tokens"),
+        "tool_calls": len(response.tool_calls),
+        "tier": response.tier,
+    }
+
+
 class LLMFactory:
     """Unified LLM factory with multi-provider support"""
 
@@ -186,7 +205,7 @@ class LLMFactory:
         self._adapter_cache[model_name] = adapter
         return adapter
 
-    @observe()
+    @traced("llm.generate", kind="generation", result_attributes=_response_span_attributes)
     async def generate(
         self,
         messages: List[Dict[str, str]],
@@ -196,7 +215,14 @@ class LLMFactory:
         requires_tools: bool = False,
         **kwargs
     ) -> LLMResponse:
-        """Generate response with automatic model selection"""
+        """Generate response with automatic model selection
+
+        `priority` (LLMPriority) and `queue_timeout` (seconds) are taken from
+        kwargs for the provider concurrency limiter; a call it sheds raises
+        LLMOverloadedError without trying a fallback model.
+        """
+        priority = kwargs.pop('priority', LLMPriority.NORMAL)
+        queue_timeout = kwargs.pop('queue_timeout', None)
 
         # Observability guardrail: detect prompt-tool mismatch
         system_msg = next((m for m in messages if m.get('role') == 'system'), {})
@@ -224,7 +250,8 @@ class LLMFactory:
 
         # Generate
         try:
-            response = await adapter.generate(
+            response = await self._call_adapter(
+                adapter, 'generate', priority, queue_timeout,
                 messages=messages,
                 temperature=temperature,
                 max_tokens=max_tokens,
@@ -236,12 +263,17 @@ class LLMFactory:
 
             return response
 
+        except LLMOverloadedError:
+            raise
         except Exception as e:
             logger.error(f"Generation failed for {model}: {e}")
             # Try fallback
-            return await self._fallback_generate(messages, model, temperature, max_tokens, **kwargs)
+            return await self._fallback_generate(
+                messages, model, temperature, max_tokens,
+                priority=priority, queue_timeout=queue_timeout, **kwargs
+            )
 
-    @observe()
+    @traced("llm.generate_with_tools", kind="generation", result_attributes=_response_span_attributes)
     async def generate_with_tools(
         self,
         messages: List[Dict[str, str]],
@@ -251,7 +283,9 @@ class LLMFactory:
         max_tokens: Optional[int] = None,
         **kwargs
     ) -> LLMResponse:
-        """Generate response with tool calling"""
+        """Generate response with tool calling (see generate() for priority/queue_timeout)"""
+        priority = kwargs.pop('priority', LLMPriority.NORMAL)
+        queue_timeout = kwargs.pop('queue_timeout', None)
 
         # Route to model with tool support
         if not model:
@@ -270,7 +304,8 @@ class LLMFactory:
 
         # Generate with tools
         try:
-            response = await adapter.generate_with_tools(
+            response = await self._call_adapter(
+                adapter, 'generate_with_tools', priority, queue_timeout,
                 messages=messages,
                 tools=tools,
                 temperature=temperature,
@@ -283,14 +318,17 @@ class LLMFactory:
 
             return response
 
+        except LLMOverloadedError:
+            raise
         except Exception as e:
             logger.error(f"Tool calling failed for {model}: {e}")
             # Try fallback with tools
             return await self._fallback_generate_with_tools(
-                messages, tools, model, temperature, max_tokens, **kwargs
+                messages, tools, model, temperature, max_tokens,
+                priority=priority, queue_timeout=queue_timeout, **kwargs
             )
 
-    @observe()
+    @traced("llm.generate_for_tier", kind="generation", result_attributes=_response_span_attributes)
     async def generate_for_tier(
         self,
         tier: ModelTier,
@@ -314,7 +352,8 @@ class LLMFactory:
             max_tokens: Max output tokens
             clinic_id: For clinic-specific model routing
             session_id: For sticky A/B experiment assignment
-            **kwargs: Additional args passed to adapter
+            **kwargs: Additional args passed to adapter (priority defaults
+                to BACKGROUND for the SUMMARIZATION tier)
 
         Returns:
             LLMResponse with content and metadata
@@ -330,6 +369,9 @@ class LLMFactory:
             f"(source={resolution.source}, experiment={resolution.experiment_id})"
         )
 
+        if tier == ModelTier.SUMMARIZATION:
+            kwargs.setdefault('priority', LLMPriority.BACKGROUND)
+
         # Delegate to existing generate method
         response = await self.generate(
             messages=messages,
@@ -347,7 +389,7 @@ class LLMFactory:
 
         return response
 
-    @observe()
+    @traced("llm.generate_with_tools_for_tier", kind="generation", result_attributes=_response_span_attributes)
     async def generate_with_tools_for_tier(
         self,
         tier: ModelTier,
@@ -409,6 +451,8 @@ class LLMFactory:
         failed_model: str,
         temperature: float,
         max_tokens: Optional[int],
+        priority: LLMPriority = LLMPriority.NORMAL,
+        queue_timeout: Optional[float] = None,
         **kwargs
     ) -> LLMResponse:
         """Fallback to default model"""
@@ -417,7 +461,8 @@ class LLMFactory:
         except Exception as e:
             logger.warning(f"Failed to get default model: {e}, using builtin gemini-3-flash-preview")
             adapter = await self.create_adapter("gemini-3-flash-preview")
-            response = await adapter.generate(
+            response = await self._call_adapter(
+                adapter, 'generate', priority, queue_timeout,
                 messages=messages,
                 temperature=temperature,
                 max_tokens=max_tokens,
@@ -434,7 +479,8 @@ class LLMFactory:
             logger.warning(f"Falling back to default model: {default_model.model_name}")
             adapter = await self.create_adapter(default_model.model_name)
 
-        response = await adapter.generate(
+        response = await self._call_adapter(
+            adapter, 'generate', priority, queue_timeout,
             messages=messages,
             temperature=temperature,
             max_tokens=max_tokens,
@@ -451,6 +497,8 @@ class LLMFactory:
         failed_model: str,
         temperature: float,
         max_tokens: Optional[int],
+        priority: LLMPriority = LLMPriority.NORMAL,
+        queue_timeout: Optional[float] = None,
         **kwargs
     ) -> LLMResponse:
         """Fallback to alternate model for tool calling"""
@@ -462,7 +510,8 @@ class LLMFactory:
         logger.warning(f"Tool calling failed, falling back to {fallback_model}")
         adapter = await self.create_adapter(fallback_model)
 
-        response = await adapter.generate_with_tools(
+        response = await self._call_adapter(
+            adapter, 'generate_with_tools', priority, queue_timeout,
             messages=messages,
             tools=tools,
             temperature=temperature,
@@ -473,6 +522,21 @@ class LLMFactory:
         await self._track_metrics(response, tool_calls_count=len(response.tool_calls), is_fallback=True)
         return response
 
+    async def _call_adapter(
+        self,
+        adapter: LLMAdapter,
+        method: str,
+        priority: LLMPriority,
+        queue_timeout: Optional[float],
+        **kwargs
+    ) -> LLMResponse:
+        """Call an adapter method inside a slot of its provider/model concurrency limiter"""
+        if not LLM_CONCURRENCY_LIMIT_ENABLED:
+            return await getattr(adapter, method)(**kwargs)
+        limiter = get_concurrency_limiter(adapter.provider, adapter.model)
+        async with limiter.slot(priority, queue_timeout):
+            return await getattr(adapter, method)(**kwargs)
+
     async def _track_metrics(
         self,
         response: LLMResponse,
@@ -0,0 +1,297 @@
+"""
+Message Analysis - compute-once text features for an inbound message
+
+Routing, intent routing, direct-lane classification, price search, hybrid
+search and the webhook quick ack all used to re-run language detection
+(including langdetect) and normalization on the same string. MessageAnalysis
+computes each feature on first access and keeps it; analyze() returns the
+same instance for the same text, so a message is analyzed once however
+many stages look at it.
+
+Every field delegates to the code that owned it before, so values match
+what those modules return:
+- language, language_confidence: LanguageService.detect_with_confidence()
+- normalizer_language, search_terms(): TextNormalizer
+- normalized: app.utils.text_normalization.normalize_query()
+- tokens: fsm text_utils.normalize_tokens()
+- has_time_anchor: fsm text_utils.has_time_anchor()
+- time_of_day, date_reference: the fast-path time/date parsers (moved here
+  from IntentRouter)
+
+Usage:
+    analysis = ctx.analysis      # pipeline steps
+    analysis = analyze(text)     # everywhere else
+"""
+
+import re
+import unicodedata
+from functools import cached_property, lru_cache
+from typing import Dict, Optional, Tuple
+
+# Messages kept in the analyze() memo (a message is looked at by all stages
+# within one request, so this only needs to cover concurrent requests)
+ANALYSIS_CACHE_SIZE = 256
+
+# Accented characters PriceQueryTool treats as a Spanish signal
+LATIN_ACCENTS = frozenset('áéíóúñü')
+
+_RUSSIAN_HOUR_WORDS = {
+    'девят': 9, 'десят': 10, 'одиннадцат': 11, 'двенадцат': 12,
+    'один': 1, 'два': 2, 'три': 3, 'четыр': 4, 'пят': 5,
+    'шест': 6, 'сем': 7, 'восем': 8
+}
+
+_TIME_PATTERN = re.compile(r'(\d{1,2})(?::(\d{2}))?\s*(am|pm|часов|утра|вечера)?')
+_DATE_PATTERN = re.compile(r'\d{1,2}[/-]\d{1,2}(?:[/-]\d{2,4})?')
+
+# (substrings, reference returned) in match priority order
+_DATE_KEYWORDS = (
+    (('tomorrow',), 'tomorrow'),
+    (('today',), 'today'),
+    (('monday',), 'Monday'),
+    (('tuesday',), 'Tuesday'),
+    (('wednesday',), 'Wednesday'),
+    (('thursday',), 'Thursday'),
+    (('friday',), 'Friday'),
+    (('saturday',), 'Saturday'),
+    (('sunday',), 'Sunday'),
+    (('mañana',), 'mañana'),
+    (('hoy',), 'hoy'),
+    (('lunes',), 'lunes'),
+    (('martes',), 'martes'),
+    (('miércoles', 'miercoles'), 'miércoles'),
+    (('jueves',), 'jueves'),
+    (('viernes',), 'viernes'),
+    (('sábado', 'sabado'), 'sábado'),
+    (('domingo',), 'domingo'),
+    (('завтра',), 'завтра'),
+    (('сегодня',), 'сегодня'),
+)
+
+
+def parse_time_of_day(text_lower: str) -> Optional[Tuple[int, int]]:
+    """
+    Extract hour and minute from lowercased text
+
+    Returns:
+        (hour, minute) tuple or None if no time found
+    """
+    time_match = _TIME_PATTERN.search(text_lower)
+    if time_match:
+        hour = int(time_match.group(1))
+        minute = int(time_match.group(2)) if time_match.group(2) else 0
+        period = time_match.group(3)
+
+        # Adjust for PM/evening
+        if period in ['pm', 'вечера'] and hour < 12:
+            hour += 12
+        # Adjust for AM (but 12 AM = 0:00)
+        elif period in ['am', 'утра'] and hour == 12:
+            hour = 0
+
+        return (hour, minute)
+
+    # Try Russian word-based time
+    for word, num in _RUSSIAN_HOUR_WORDS.items():
+        if word in text_lower:
+            return (num, 0)
+
+    return None
+
+
+def parse_date_reference(text_lower: str) -> Optional[str]:
+    """
+    Extract date reference from lowercased text (tomorrow, today, weekday)
+
+    Returns:
+        Date string (e.g., "tomorrow", "Monday", "12/05") or None
+    """
+    for keywords, reference in _DATE_KEYWORDS:
+        if any(keyword in text_lower for keyword in keywords):
+            return reference
+
+    # Specific date pattern (DD/MM, MM/DD, YYYY-MM-DD)
+    date_match = _DATE_PATTERN.search(text_lower)
+    if date_match:
+        return date_match.group(0)
+
+    return None
+
+
+def fold_accents(text: str) -> str:
+    """
+    Strip diacritics from Latin letters ("miércoles" → "miercoles").
+
+    Marks on Cyrillic and Hebrew letters are kept, so "й" and niqqud
+    survive.
+    """
+    decomposed = unicodedata.normalize('NFD', text)
+    kept = []
+    for ch in decomposed:
+        if unicodedata.combining(ch) and kept and kept[-1] < '\u0250':
+            continue
+        kept.append(ch)
+    return unicodedata.normalize('NFC', ''.join(kept))
+
+
+class MessageAnalysis:
+    """
+    Lazily computed, memoized text features of one message.
+
+    Each property is computed on first access only; parameterized features
+    (ngrams, search_terms) are memoized per argument.
+    """
+
+    def __init__(self, text: str):
+        self.text = text or ""
+        self._ngrams: Dict[int, Tuple[str, ...]] = {}
+        self._search_terms: Dict[Optional[str], str] = {}
+
+    def __repr__(self) -> str:
+        return f"MessageAnalysis({self.text[:30]!r})"
+
+    # ----- surface forms -----
+
+    @cached_property
+    def stripped(self) -> str:
+        return self.text.strip()
+
+    @cached_property
+    def lower(self) -> str:
+        """Stripped, lowercased text."""
+        return self.stripped.lower()
+
+    @cached_property
+    def words(self) -> Tuple[str, ...]:
+        """Whitespace-split words of the lowercased text (punctuation kept)."""
+        return tuple(self.lower.split())
+
+    @cached_property
+    def word_set(self) -> frozenset:
+        return frozenset(self.words)
+
+    @property
+    def word_count(self) -> int:
+        return len(self.words)
+
+    @property
+    def char_count(self) -> int:
+        return len(self.stripped)
+
+    # ----- language and script -----
+
+    @cached_property
+    def _language_result(self) -> Tuple[str, float]:
+        from app.services.language_service import get_language_service
+        return get_language_service().detect_with_confidence(self.stripped)
+
+    @property
+    def language(self) -> str:
+        """ISO language code, as LanguageService.detect_sync() returns for the stripped text."""
+        return self._language_result[0]
+
+    @property
+    def language_confidence(self) -> float:
+        return self._language_result[1]
+
+    @cached_property
+    def _script_counts(self) -> Dict[str, int]:
+        counts = {'cyrillic': 0, 'hebrew': 0, 'latin': 0, 'latin_accented': 0}
+        for c in self.lower:
+            if '\u0400' <= c <= '\u04FF':
+                counts['cyrillic'] += 1
+            elif '\u0590' <= c <= '\u05FF':
+                counts['hebrew'] += 1
+            elif c.isalpha() and c < '\u0250':
+                counts['latin'] += 1
+                if c in LATIN_ACCENTS:
+                    counts['latin_accented'] += 1
+        return counts
+
+    @cached_property
+    def script(self) -> str:
+        """Dominant script of the letters: cyrillic, hebrew, latin or none."""
+        counts = self._script_counts
+        best = max(('cyrillic', 'hebrew', 'latin'), key=lambda name: counts[name])
+        return best if counts[best] else 'none'
+
+    @property
+    def has_cyrillic(self) -> bool:
+        return self._script_counts['cyrillic'] > 0
+
+    @property
+    def has_latin_accents(self) -> bool:
+        return self._script_counts['latin_accented'] > 0
+
+    @cached_property
+    def normalizer_language(self) -> str:
+        """TextNormalizer's language name (russian/hebrew/spanish/english)."""
+        from app.services.text_normalization import get_normalizer
+        return get_normalizer().detect_language(self.text)
+
+    # ----- normalized forms -----
+
+    @cached_property
+    def normalized(self) -> str:
+        """NFC, lowercased, punctuation-free form used for search matching."""
+        from app.utils.text_normalization import normalize_query
+        return normalize_query(self.text)
+
+    @cached_property
+    def folded(self) -> str:
+        """normalized with Latin diacritics removed."""
+        return fold_accents(self.normalized)
+
+    def search_terms(self, language: Optional[str] = None) -> str:
+        """
+        Stopword-stripped service query (TextNormalizer.normalize).
+
+        Args:
+            language: Normalizer language name, or None to auto-detect
+        """
+        if language not in self._search_terms:
+            from app.services.text_normalization import get_normalizer
+            self._search_terms[language] = get_normalizer().normalize(self.text, language)
+        return self._search_terms[language]
+
+    # ----- tokens -----
+
+    @cached_property
+    def tokens(self) -> Tuple[str, ...]:
+        """NFKC word/number tokens with punctuation and symbols removed."""
+        from app.services.orchestrator.fsm.text_utils import normalize_tokens
+        return tuple(normalize_tokens(self.text))
+
+    def ngrams(self, n: int = 2) -> Tuple[str, ...]:
+        """Space-joined token n-grams."""
+        if n not in self._ngrams:
+            tokens = self.tokens
+            self._ngrams[n] = tuple(
+                ' '.join(tokens[i:i + n]) for i in range(len(tokens) - n + 1)
+            )
+        return self._ngrams[n]
+
+    # ----- time anchors -----
+
+    @cached_property
+    def time_of_day(self) -> Optional[Tuple[int, int]]:
+        return parse_time_of_day(self.text.lower())
+
+    @cached_property
+    def date_reference(self) -> Optional[str]:
+        return parse_date_reference(self.text.lower())
+
+    @cached_property
+    def has_time_anchor(self) -> bool:
+        from app.services.orchestrator.fsm.text_utils import has_time_anchor
+        return has_time_anchor(self.text)
+
+
+@lru_cache(maxsize=ANALYSIS_CACHE_SIZE)
+def _cached_analysis(text: str) -> MessageAnalysis:
+    return MessageAnalysis(text)
+
+
+def analyze(text: Optional[str]) -> MessageAnalysis:
+    """Shared MessageAnalysis for text (the same instance for the same string)."""
+    return _cached_analysis(text or "")
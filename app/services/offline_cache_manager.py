@@ -6,7 +6,7 @@ Maintains local caches for essential data to enable offline operations
 import json
 import redis.asyncio as redis
 from datetime import datetime, timezone, timedelta
-from typing import Dict, Any, Optional, List, Set
+from typing import Dict, Any, Optional, List, Set, Tuple
 import asyncio
 import logging
 from dataclasses import dataclass, asdict
@@ -27,10 +27,20 @@ class CacheEntry:
     checksum: Optional[str] = None
     tenant_id: Optional[str] = None
 
-    def is_expired(self) -> bool:
-        """Check if cache entry has expired"""
+    def is_expired(self, remaining_ttl: Optional[int] = None) -> bool:
+        """
+        Check if cache entry has expired
+
+        Args:
+            remaining_ttl: The key's Redis TTL in seconds. When the key has one
+                it is authoritative: unchanged reloads extend it with EXPIRE
+                without rewriting the entry, so ``timestamp`` can be older
+                than the last refresh.
+        """
         if self.ttl is None:
             return False
+        if remaining_ttl is not None and remaining_ttl >= 0:
+            return remaining_ttl <= 0
         expiry_time = self.timestamp + timedelta(seconds=self.ttl)
         return datetime.now(timezone.utc) > expiry_time
 
@@ -69,6 +79,20 @@ class OfflineCacheManager:
             "calendar_sync": 60,  # 1 minute
             "config": 86400  # 24 hours
         }
+        # Checksums of stored payloads, so unchanged reloads skip the rewrite;
+        # one key per entry with the entry's TTL, so they expire together
+        self.checksum_prefix = f"{self.cache_prefix}_checksum"
+        # Refresh entries once less than this share of their TTL remains
+        self.refresh_ahead_ratio = 0.2
+        self.refresh_concurrency = 4
+        self.refresh_batch_size = 500
+        self.category_loaders = {
+            "appointments": self.cache_appointments,
+            "doctor_availability": self.cache_doctor_availability,
+            "patients": self.cache_patient_records,
+            "calendar": self.cache_calendar_status,
+            "config": self.cache_configuration
+        }
 
     async def initialize(self, tenant_id: Optional[str] = None):
         """
@@ -137,7 +161,7 @@ class OfflineCacheManager:
             query = query.lte("appointment_date", end_date.isoformat())
             query = query.gte("appointment_date", datetime.now(timezone.utc).isoformat())
 
-            response = query.execute()
+            response = await asyncio.to_thread(query.execute)
             appointments = response.data if response.data else []
 
             # Group by date for efficient caching
@@ -149,6 +173,7 @@ class OfflineCacheManager:
                 appointments_by_date[date_key].append(apt)
 
             # Cache each day's appointments
+            entries = []
             for date_key, day_appointments in appointments_by_date.items():
                 cache_key = self._build_cache_key("appointments", date_key, tenant_id)
 
@@ -162,7 +187,7 @@ class OfflineCacheManager:
                     checksum=self._calculate_checksum(day_appointments)
                 )
 
-                await self._store_cache_entry(entry)
+                entries.append(entry)
                 stats["cached"] += len(day_appointments)
 
             # Cache summary for quick access
@@ -179,7 +204,8 @@ class OfflineCacheManager:
                 source="computed",
                 tenant_id=tenant_id
             )
-            await self._store_cache_entry(summary_entry)
+            entries.append(summary_entry)
+            stats["unchanged"] = await self._store_cache_entries(entries)
 
             stats["duration_ms"] = int((datetime.now(timezone.utc) - start_time).total_seconds() * 1000)
             logger.info(f"Cached {stats['cached']} appointments in {stats['duration_ms']}ms")
@@ -208,10 +234,11 @@ class OfflineCacheManager:
             if tenant_id:
                 query = query.eq("tenant_id", tenant_id)
 
-            response = query.execute()
+            response = await asyncio.to_thread(query.execute)
             doctors = response.data if response.data else []
 
             # Cache each doctor's availability
+            entries = []
             for doctor in doctors:
                 doctor_id = doctor["id"]
                 cache_key = self._build_cache_key("doctor_availability", doctor_id, tenant_id)
@@ -229,12 +256,16 @@ class OfflineCacheManager:
                     timestamp=datetime.now(timezone.utc),
                     ttl=self.refresh_intervals["doctors"],
                     source="computed",
-                    tenant_id=tenant_id
+                    tenant_id=tenant_id,
+                    # cached_at changes every run, so leave it out of the checksum
+                    checksum=self._calculate_checksum({"doctor": doctor, "availability": availability})
                 )
 
-                await self._store_cache_entry(entry)
+                entries.append(entry)
                 stats["cached"] += 1
 
+            stats["unchanged"] = await self._store_cache_entries(entries)
+
             logger.info(f"Cached availability for {stats['cached']} doctors")
             return stats
 
@@ -264,11 +295,12 @@ class OfflineCacheManager:
             # Limit to active patients
             query = query.eq("active", True).limit(1000)
 
-            response = query.execute()
+            response = await asyncio.to_thread(query.execute)
             patients = response.data if response.data else []
 
             # Batch cache patient records
             batch_size = 100
+            entries = []
             for i in range(0, len(patients), batch_size):
                 batch = patients[i:i + batch_size]
                 cache_key = self._build_cache_key("patients", f"batch_{i // batch_size}", tenant_id)
@@ -283,9 +315,11 @@ class OfflineCacheManager:
                     checksum=self._calculate_checksum(batch)
                 )
 
-                await self._store_cache_entry(entry)
+                entries.append(entry)
                 stats["cached"] += len(batch)
 
+            stats["unchanged"] = await self._store_cache_entries(entries)
+
             logger.info(f"Cached {stats['cached']} patient records")
             return stats
 
@@ -312,7 +346,7 @@ class OfflineCacheManager:
             if tenant_id:
                 query = query.eq("tenant_id", tenant_id)
 
-            response = query.execute()
+            response = await asyncio.to_thread(query.execute)
             sync_statuses = response.data if response.data else []
 
             # Cache sync status
@@ -327,7 +361,7 @@ class OfflineCacheManager:
                 tenant_id=tenant_id
             )
 
-            await self._store_cache_entry(entry)
+            entries = [entry]
             stats["cached"] = len(sync_statuses)
 
             # Also cache individual provider status for quick lookup
@@ -347,7 +381,9 @@ class OfflineCacheManager:
                     tenant_id=tenant_id
                 )
 
-                await self._store_cache_entry(provider_entry)
+                entries.append(provider_entry)
+
+            stats["unchanged"] = await self._store_cache_entries(entries)
 
             logger.info(f"Cached calendar status for {stats['cached']} providers")
             return stats
@@ -377,13 +413,14 @@ class OfflineCacheManager:
                 "notification_templates"
             ]
 
+            entries = []
             for table in config_tables:
                 query = self.supabase.table(table).select("*")
 
                 if tenant_id and table != "appointment_types":  # Some tables are global
                     query = query.eq("tenant_id", tenant_id)
 
-                response = query.execute()
+                response = await asyncio.to_thread(query.execute)
                 data = response.data if response.data else []
 
                 cache_key = self._build_cache_key("config", table, tenant_id)
@@ -397,9 +434,11 @@ class OfflineCacheManager:
                     tenant_id=tenant_id
                 )
 
-                await self._store_cache_entry(entry)
+                entries.append(entry)
                 stats["cached"] += len(data)
 
+            stats["unchanged"] = await self._store_cache_entries(entries)
+
             logger.info(f"Cached {stats['cached']} configuration items")
             return stats
 
@@ -430,13 +469,16 @@ class OfflineCacheManager:
             cache_key = self._build_cache_key(category, key, tenant_id)
 
             # Try to get from Redis
-            cached_json = await self.redis_client.get(cache_key)
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.get(cache_key)
+            pipe.ttl(cache_key)
+            cached_json, remaining_ttl = await pipe.execute()
 
             if cached_json:
                 entry = CacheEntry.from_dict(json.loads(cached_json))
 
                 # Check if expired
-                if not entry.is_expired():
+                if not entry.is_expired(remaining_ttl):
                     return entry.value
                 elif fallback_to_stale:
                     logger.warning(f"Using stale cache for {cache_key}")
@@ -452,6 +494,11 @@ class OfflineCacheManager:
         """
         Refresh all or expired cache entries
 
+        Expired keys are collected with pipelined TTL/GET reads and grouped by
+        (category, tenant), so each group's loader runs once no matter how many
+        of its per-date or per-provider keys expired. Groups reload concurrently,
+        bounded by ``refresh_concurrency``.
+
         Args:
             force: Force refresh even if not expired
 
@@ -459,48 +506,41 @@ class OfflineCacheManager:
             Refresh statistics
         """
         try:
-            stats = {"refreshed": 0, "failed": 0, "skipped": 0}
+            stats = {"refreshed": 0, "failed": 0, "skipped": 0, "groups": 0}
+
+            # (category, tenant_id) -> number of expired keys it covers
+            plan: Dict[Tuple[str, Optional[str]], int] = {}
 
-            # Get all cache keys
             pattern = f"{self.cache_prefix}:*"
-            keys = []
-            async for key in self.redis_client.scan_iter(match=pattern):
-                keys.append(key)
-
-            # Check each key for expiration
-            for key in keys:
-                try:
-                    cached_json = await self.redis_client.get(key)
-                    if cached_json:
-                        entry = CacheEntry.from_dict(json.loads(cached_json))
-
-                        if force or entry.is_expired():
-                            # Determine category and refresh
-                            parts = key.decode() if isinstance(key, bytes) else key
-                            parts = parts.split(":")
-
-                            if len(parts) >= 3:
-                                category = parts[1]
-
-                                # Refresh based on category
-                                if category == "appointments":
-                                    await self.cache_appointments(entry.tenant_id)
-                                elif category == "doctor_availability":
-                                    await self.cache_doctor_availability(entry.tenant_id)
-                                elif category == "patients":
-                                    await self.cache_patient_records(entry.tenant_id)
-                                elif category == "calendar":
-                                    await self.cache_calendar_status(entry.tenant_id)
-                                elif category == "config":
-                                    await self.cache_configuration(entry.tenant_id)
-
-                                stats["refreshed"] += 1
-                        else:
-                            stats["skipped"] += 1
-
-                except Exception as e:
-                    logger.error(f"Failed to refresh {key}: {e}")
-                    stats["failed"] += 1
+            batch = []
+            async for key in self.redis_client.scan_iter(match=pattern, count=self.refresh_batch_size):
+                batch.append(key)
+                if len(batch) >= self.refresh_batch_size:
+                    await self._plan_refresh_batch(batch, force, plan, stats)
+                    batch = []
+            if batch:
+                await self._plan_refresh_batch(batch, force, plan, stats)
+
+            semaphore = asyncio.Semaphore(self.refresh_concurrency)
+
+            async def reload(category: str, tenant_id: Optional[str]) -> Dict[str, Any]:
+                async with semaphore:
+                    return await self.category_loaders[category](tenant_id)
+
+            groups = list(plan.items())
+            results = await asyncio.gather(
+                *(reload(category, tenant_id) for (category, tenant_id), _ in groups),
+                return_exceptions=True
+            )
+
+            for ((category, tenant_id), key_count), result in zip(groups, results):
+                # Loaders report their own failures as {"failed": 1, "error": ...}
+                if isinstance(result, Exception) or result.get("error"):
+                    logger.error(f"Failed to refresh {category} for tenant {tenant_id}: {result}")
+                    stats["failed"] += key_count
+                else:
+                    stats["refreshed"] += key_count
+            stats["groups"] = len(groups)
 
             logger.info(f"Cache refresh complete: {stats}")
             return stats
@@ -509,6 +549,74 @@ class OfflineCacheManager:
             logger.error(f"Failed to refresh cache: {e}")
             return {"refreshed": 0, "failed": 1, "error": str(e)}
 
+    async def _plan_refresh_batch(
+        self,
+        keys: List[Any],
+        force: bool,
+        plan: Dict[Tuple[str, Optional[str]], int],
+        stats: Dict[str, Any]
+    ):
+        """Adds the expired keys of one SCAN batch to the refresh plan"""
+        # Cheap TTL pass first; only keys that may need a refresh are fetched
+        pipe = self.redis_client.pipeline(transaction=False)
+        for key in keys:
+            pipe.ttl(key)
+        ttls = await pipe.execute()
+
+        candidates = []
+        for key, ttl in zip(keys, ttls):
+            if ttl == -2:
+                continue  # Expired between SCAN and TTL
+            if force or ttl == -1 or ttl <= self._refresh_ahead_seconds(key):
+                candidates.append((key, ttl))
+            else:
+                stats["skipped"] += 1
+
+        if not candidates:
+            return
+
+        pipe = self.redis_client.pipeline(transaction=False)
+        for key, _ in candidates:
+            pipe.get(key)
+        payloads = await pipe.execute()
+
+        for (key, ttl), cached_json in zip(candidates, payloads):
+            if not cached_json:
+                continue
+            try:
+                entry = CacheEntry.from_dict(json.loads(cached_json))
+                category = self._parse_category(key)
+
+                # Keys without a Redis TTL rely on the entry's own timestamp
+                if not (force or ttl >= 0 or entry.is_expired(ttl)):
+                    stats["skipped"] += 1
+                    continue
+
+                if category not in self.category_loaders:
+                    stats["skipped"] += 1
+                    continue
+
+                group = (category, entry.tenant_id)
+                plan[group] = plan.get(group, 0) + 1
+
+            except Exception as e:
+                logger.error(f"Failed to plan refresh for {key}: {e}")
+                stats["failed"] += 1
+
+    def _refresh_ahead_seconds(self, key: Any) -> float:
+        """Remaining TTL below which a key of this category is due for refresh"""
+        category = self._parse_category(key)
+        interval = self.refresh_intervals.get(
+            "doctors" if category == "doctor_availability" else
+            "calendar_sync" if category == "calendar" else category
+        )
+        return interval * self.refresh_ahead_ratio if interval else 0
+
+    def _parse_category(self, key: Any) -> Optional[str]:
+        """Extract the category segment from a cache key"""
+        parts = (key.decode() if isinstance(key, bytes) else key).split(":")
+        return parts[1] if len(parts) >= 3 else None
+
     async def invalidate_cache(
         self,
         category: Optional[str] = None,
@@ -531,6 +639,7 @@ class OfflineCacheManager:
                 # Invalidate specific key
                 cache_key = self._build_cache_key(category, key, tenant_id)
                 result = await self.redis_client.delete(cache_key)
+                await self.redis_client.delete(self._checksum_key(cache_key))
                 return result
             else:
                 # Invalidate by pattern
@@ -538,7 +647,7 @@ class OfflineCacheManager:
                 count = 0
 
                 async for key in self.redis_client.scan_iter(match=pattern):
-                    await self.redis_client.delete(key)
+                    await self.redis_client.delete(key, self._checksum_key(key))
                     count += 1
 
                 logger.info(f"Invalidated {count} cache entries")
@@ -569,12 +678,15 @@ class OfflineCacheManager:
                 stats["total_keys"] += 1
 
                 # Get entry details
-                cached_json = await self.redis_client.get(key)
+                pipe = self.redis_client.pipeline(transaction=False)
+                pipe.get(key)
+                pipe.ttl(key)
+                cached_json, remaining_ttl = await pipe.execute()
                 if cached_json:
                     stats["total_size_bytes"] += len(cached_json)
 
                     entry = CacheEntry.from_dict(json.loads(cached_json))
-                    if entry.is_expired():
+                    if entry.is_expired(remaining_ttl):
                         stats["expired_keys"] += 1
 
                     # Parse category
@@ -600,6 +712,11 @@ class OfflineCacheManager:
             return f"{self.cache_prefix}:{category}:{tenant_id}:{key}"
         return f"{self.cache_prefix}:{category}:{key}"
 
+    def _checksum_key(self, cache_key: Any) -> str:
+        """Key holding the payload checksum of one cache entry"""
+        cache_key = cache_key.decode() if isinstance(cache_key, bytes) else cache_key
+        return f"{self.checksum_prefix}:{cache_key}"
+
     def _calculate_checksum(self, data: Any) -> str:
         """Calculate checksum for data integrity verification"""
         json_str = json.dumps(data, sort_keys=True)
@@ -620,15 +737,49 @@ class OfflineCacheManager:
 
         return availability
 
-    async def _store_cache_entry(self, entry: CacheEntry) -> bool:
-        """Store cache entry in Redis"""
-        try:
+    async def _store_cache_entries(self, entries: List[CacheEntry]) -> int:
+        """
+        Store cache entries with pipelined SETEX
+
+        Entries whose checksum matches the stored payload are not rewritten;
+        only their TTL (and their checksum's) is extended, which is what
+        ``CacheEntry.is_expired`` goes by.
+
+        Returns:
+            Number of entries skipped because their data was unchanged
+        """
+        if not entries:
+            return 0
+
+        for entry in entries:
+            if entry.checksum is None:
+                entry.checksum = self._calculate_checksum(entry.value)
+
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.mget([self._checksum_key(entry.key) for entry in entries])
+        for entry in entries:
+            pipe.exists(entry.key)
+        results = await pipe.execute()
+        stored_checksums, exists = results[0], results[1:]
+
+        unchanged = 0
+        pipe = self.redis_client.pipeline(transaction=False)
+        for entry, stored, present in zip(entries, stored_checksums, exists):
+            stored = stored.decode() if isinstance(stored, bytes) else stored
+            if present and stored == entry.checksum:
+                if entry.ttl:
+                    pipe.expire(entry.key, entry.ttl)
+                    pipe.expire(self._checksum_key(entry.key), entry.ttl)
+                unchanged += 1
+                continue
+
             json_data = json.dumps(entry.to_dict())
             if entry.ttl:
-                await self.redis_client.setex(entry.key, entry.ttl, json_data)
+                pipe.setex(entry.key, entry.ttl, json_data)
+                pipe.setex(self._checksum_key(entry.key), entry.ttl, entry.checksum)
             else:
-                await self.redis_client.set(entry.key, json_data)
-            return True
-        except Exception as e:
-            logger.error(f"Failed to store cache entry: {e}")
-            return False
\ No newline at end of file
+                pipe.set(entry.key, json_data)
+                pipe.set(self._checksum_key(entry.key), entry.checksum)
+
+        await pipe.execute()
+        return unchanged
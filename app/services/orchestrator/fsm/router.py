@@ -296,6 +296,7 @@ async def route_message(
     """
     try:
         # Import here to avoid circular imports
+        from app.services.llm.concurrency import LLMPriority
         from app.services.llm.tiers import ModelTier
 
         # Proper role separation: system prompt + user message
@@ -308,6 +309,7 @@ async def route_message(
             temperature=0.0,  # Deterministic for consistent routing
             max_tokens=200,
             response_format={"type": "json_object"},
+            priority=LLMPriority.INTERACTIVE,
         )
 
         # Handle response.content which may be string or need extraction
@@ -531,3 +531,52 @@ def has_explicit_booking_intent(text: str, lang: str = "en") -> bool:
             return True
 
     return False
+
+
+# ==========================================
+# Sentence chunking for TTS
+# ==========================================
+
+# Sentence end: terminal punctuation (incl. CJK/ellipsis) followed by whitespace, or a newline
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?…。！？])\s+|\n+')
+
+
+def split_sentences(text: str, min_chars: int = 20) -> List[str]:
+    """
+    Split text into sentence-sized chunks for incremental TTS.
+
+    Short fragments (e.g. "Dr." or "Ok.") are merged into the following
+    sentence so TTS never receives a chunk too small to synthesize naturally.
+
+    Args:
+        text: Response text
+        min_chars: Minimum chunk length before a boundary is honoured
+
+    Returns:
+        Chunks in order; joining them with spaces reproduces the text
+        modulo whitespace
+
+    Examples:
+        >>> split_sentences("Hello there, welcome! How can I help you today?")
+        ['Hello there, welcome!', 'How can I help you today?']
+    """
+    if not text:
+        return []
+
+    chunks: List[str] = []
+    pending = ""
+    for part in SENTENCE_BOUNDARY.split(text):
+        part = part.strip()
+        if not part:
+            continue
+        pending = f"{pending} {part}" if pending else part
+        if len(pending) >= min_chars:
+            chunks.append(pending)
+            pending = ""
+
+    if pending:
+        if chunks:
+            chunks[-1] = f"{chunks[-1]} {pending}"
+        else:
+            chunks.append(pending)
+    return chunks
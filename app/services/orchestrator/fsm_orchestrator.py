@@ -12,9 +12,10 @@ This orchestrator uses a simple architecture:
 Key principle: LLMs understand; Code decides.
 """
 
+import asyncio
 import logging
 import re
-from typing import Dict, Any, Optional, Callable, Awaitable, Union, Set
+from typing import Dict, Any, Optional, Callable, Awaitable, Union, Set, AsyncIterator
 from dataclasses import asdict
 
 try:
@@ -33,7 +34,7 @@ from app.services.orchestrator.fsm.state import (
 )
 from app.services.orchestrator.fsm import booking_fsm, pricing_fsm
 from app.services.orchestrator.fsm.router import route_message, fallback_router
-from app.services.orchestrator.fsm.text_utils import is_affirmative, is_rejection
+from app.services.orchestrator.fsm.text_utils import is_affirmative, is_rejection, split_sentences
 from app.tools.clinic_info_tool import ClinicInfoTool
 from app.config import get_redis_client
 # Preserve existing guardrails
@@ -497,6 +498,62 @@ class FSMOrchestrator:
             message, router_output, fsm_state, language, tools_called
         )
 
+    async def process_stream(
+        self,
+        message: str,
+        session_id: str,
+        state: Optional[Dict[str, Any]] = None,
+        language: str = "en",
+        user_phone: Optional[str] = None,
+        user_name: Optional[str] = None,
+        holding_after_ms: Optional[float] = None,
+        on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Process a user message, yielding the response as sentence chunks.
+
+        FSM responses come from templates once routing and tools finish, so
+        there are no LLM tokens to relay. When holding_after_ms is set and
+        the turn is still running after that long, a short holding phrase is
+        yielded first so TTS can speak while routing and tools complete.
+        The response follows sentence by sentence.
+
+        The turn runs as its own task. If the consumer stops early (e.g.
+        barge-in), the task is not cancelled, because tools may be mid-write.
+        on_result is called with the result whenever the turn completes, so
+        callers can commit result["state"] either way.
+
+        Yields:
+            {"type": "chunk", "content": str, "holding": True} at most once,
+            then {"type": "result", "result": dict} exactly once, then
+            {"type": "chunk", "content": str} for each sentence
+        """
+        turn = asyncio.ensure_future(self.process(
+            message=message,
+            session_id=session_id,
+            state=state,
+            language=language,
+            user_phone=user_phone,
+            user_name=user_name,
+        ))
+        if on_result is not None:
+            def _report(task: "asyncio.Task") -> None:
+                if not task.cancelled() and task.exception() is None:
+                    on_result(task.result())
+
+            turn.add_done_callback(_report)
+
+        if holding_after_ms is not None:
+            done, _ = await asyncio.wait({turn}, timeout=holding_after_ms / 1000)
+            if not done:
+                yield {"type": "chunk", "content": self._get_holding_phrase(language), "holding": True}
+
+        result = await asyncio.shield(turn)
+        yield {"type": "result", "result": result}
+
+        for sentence in split_sentences(result.get("response", "")):
+            yield {"type": "chunk", "content": sentence}
+
     async def _handle_scheduling(
         self,
         message: str,
@@ -1199,6 +1256,15 @@ class FSMOrchestrator:
         }
         return goodbyes.get(language, goodbyes['en'])
 
+    def _get_holding_phrase(self, language: str) -> str:
+        """Get localized holding phrase spoken while a voice turn is still running."""
+        phrases = {
+            'en': "One moment, please.",
+            'ru': "Одну минуту, пожалуйста.",
+            'es': "Un momento, por favor.",
+        }
+        return phrases.get(language, phrases['en'])
+
     def _redact_phi_in_response(self, text: str) -> str:
         """Apply PHI redaction to response text."""
         if not text:
@@ -0,0 +1,143 @@
+"""
+PDF Page Extractor
+Splits PDFs into per-page embedded text or rendered images using PyMuPDF
+in a process pool, so large documents never block the event loop
+"""
+
+import asyncio
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+try:  # Optional dependency used only for PDF parsing
+    import fitz  # type: ignore  # PyMuPDF for PDF handling
+except ImportError:  # pragma: no cover
+    fitz = None
+
+logger = logging.getLogger(__name__)
+
+# Pages with less embedded text than this are treated as scanned/image-only
+MIN_TEXT_CHARS = 40
+DEFAULT_ZOOM = 2.0
+MAX_WORKERS = min(4, os.cpu_count() or 1)
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+@dataclass
+class ExtractedPage:
+    """One PDF page: embedded text, plus a PNG render when the page has no usable text"""
+    page_number: int
+    text: str
+    image_png: Optional[bytes]
+    content_hash: str
+
+    @property
+    def is_image_only(self) -> bool:
+        return self.image_png is not None
+
+
+def _ensure_pymupdf_available():
+    if fitz is None:  # pragma: no cover - exercised only when dependency missing
+        raise RuntimeError(
+            "PyMuPDF (fitz) is required for PDF processing. Install 'pymupdf' to enable this feature."
+        )
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    """Lazily create the shared process pool (spawned, so it is safe under threaded servers)"""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=MAX_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+
+def _count_pages(pdf_bytes: bytes) -> int:
+    doc = fitz.open(stream=io.BytesIO(pdf_bytes), filetype="pdf")
+    try:
+        return len(doc)
+    finally:
+        doc.close()
+
+
+def _extract_page_range(
+    pdf_bytes: bytes,
+    page_numbers: Sequence[int],
+    min_text_chars: int,
+    zoom: float
+) -> List[ExtractedPage]:
+    """Worker-process entry point: extract a contiguous range of pages"""
+    doc = fitz.open(stream=io.BytesIO(pdf_bytes), filetype="pdf")
+    pages = []
+    try:
+        for page_number in page_numbers:
+            page = doc[page_number]
+            text = page.get_text().strip()
+
+            image_png = None
+            if len(text) < min_text_chars:
+                pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+                image_png = pix.tobytes("png")
+
+            # Hash what will actually be sent to the model
+            content_hash = hashlib.sha256(image_png if image_png is not None else text.encode()).hexdigest()
+            pages.append(ExtractedPage(page_number, text, image_png, content_hash))
+    finally:
+        doc.close()
+    return pages
+
+
+async def extract_pdf_pages(
+    pdf_bytes: bytes,
+    min_text_chars: int = MIN_TEXT_CHARS,
+    zoom: float = DEFAULT_ZOOM,
+    max_pages: Optional[int] = None
+) -> List[ExtractedPage]:
+    """
+    Extract every page of a PDF in parallel worker processes
+
+    Args:
+        pdf_bytes: Raw PDF content
+        min_text_chars: Pages with less embedded text are rendered as images
+        zoom: Render scale for image pages
+        max_pages: Optional cap on the number of pages extracted
+
+    Returns:
+        Pages in document order
+    """
+    _ensure_pymupdf_available()
+
+    page_count = await asyncio.to_thread(_count_pages, pdf_bytes)
+    if max_pages is not None:
+        page_count = min(page_count, max_pages)
+    if page_count == 0:
+        return []
+
+    # One contiguous range per worker keeps the PDF bytes copied once per worker
+    workers = min(MAX_WORKERS, page_count)
+    step = -(-page_count // workers)
+    ranges = [range(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+
+    loop = asyncio.get_running_loop()
+    executor = _get_executor()
+    results = await asyncio.gather(*(
+        loop.run_in_executor(
+            executor, _extract_page_range, pdf_bytes, list(page_range), min_text_chars, zoom
+        )
+        for page_range in ranges
+    ))
+
+    pages = [page for chunk in results for page in chunk]
+    logger.info(
+        f"Extracted {len(pages)} PDF pages "
+        f"({sum(1 for p in pages if p.is_image_only)} rendered as images)"
+    )
+    return pages
@@ -176,6 +176,30 @@ class PredictiveConflictPrevention:
             logger.error(f"Failed to analyze booking request: {e}")
             return {"error": str(e)}
 
+    async def assess_slot_risk(self, slot: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Score the conflict risk of a single candidate slot
+
+        Lighter than analyze_booking_request: no recommendations or
+        alternatives, just the risk factors and their weighted total.
+
+        Args:
+            slot: {"doctor_id", "start_time" (ISO), "duration_minutes"}
+        """
+        start_time = datetime.fromisoformat(slot["start_time"])
+        end_time = start_time + timedelta(minutes=slot.get("duration_minutes", 30))
+
+        risk_factors = await self._calculate_booking_risk_factors(
+            slot["doctor_id"], start_time, end_time, slot.get("patient_history")
+        )
+        overall_risk = self._calculate_overall_risk(risk_factors)
+
+        return {
+            "overall_risk": overall_risk,
+            "risk_level": self._determine_risk_level(overall_risk).value,
+            "risk_factors": risk_factors
+        }
+
     async def prevent_predicted_conflict(
         self,
         risk_id: str,
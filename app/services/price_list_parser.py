@@ -20,6 +20,12 @@ import io
 from datetime import datetime, timedelta
 import redis
 from functools import lru_cache
+try:  # Optional dependency used only for Excel parsing
+    import openpyxl  # type: ignore
+except ImportError:  # pragma: no cover
+    openpyxl = None
+
+from .pdf_page_extractor import ExtractedPage, extract_pdf_pages
 
 logger = logging.getLogger(__name__)
 
@@ -78,7 +84,9 @@ class PriceListParser:
         
         # Rate limiting
         self._last_api_call = {}
+        self._rate_limit_locks: Dict[str, asyncio.Lock] = {}
         self._min_interval = 0.5  # Minimum seconds between API calls
+        self._max_concurrent_pages = 4  # PDF pages parsed in parallel
         
     def _get_cache_key(self, content_hash: str, file_type: str) -> str:
         """Generate cache key for parsed results"""
@@ -96,7 +104,7 @@ class PriceListParser:
         try:
             cache_key = self._get_cache_key(content_hash, file_type)
             cached = self.cache_client.get(cache_key)
-            if cached:
+            if cached is not None:
                 logger.info(f"Cache hit for {file_type} file")
                 data = json.loads(cached)
                 return [ParsedService(**item) for item in data]
@@ -156,7 +164,7 @@ class PriceListParser:
             if file_type == FileType.CSV:
                 services = await self._parse_csv(file_content)
             elif file_type == FileType.PDF:
-                services = await self._parse_pdf_with_ai(file_content)
+                services = await self._parse_pdf_with_ai(file_content, use_cache=use_cache)
             elif file_type == FileType.IMAGE:
                 services = await self._parse_image_with_ai(file_content, file_name)
             elif file_type == FileType.EXCEL:
@@ -164,7 +172,7 @@ class PriceListParser:
             else:
                 raise ValueError(f"Unsupported file type: {file_type}")
             
-            # Cache successful result
+            # Cache successful result (PDF pages are also cached individually)
             if use_cache and services:
                 await self._cache_result(content_hash, file_type.value, services)
                 
@@ -211,35 +219,105 @@ class PriceListParser:
         services = []
         
         for row in reader:
-            # Intelligent column mapping
-            name = self._find_column(row, ['Service', 'Name', 'Procedure', 'Description', 'service_name', 'treatment'])
-            if not name:
-                continue
-                
-            price = self._parse_price(self._find_column(row, ['Price', 'Cost', 'Fee', 'Amount', 'price', 'rate']))
-            category = self._find_column(row, ['Category', 'Type', 'Department', 'Specialty', 'category']) or 'General'
-            code = self._find_column(row, ['Code', 'ID', 'CPT', 'code', 'service_code'])
-            duration = self._parse_duration(self._find_column(row, ['Duration', 'Time', 'Minutes', 'duration']))
-            
-            if not code:
-                # Generate code from name
-                code = self._generate_code(name)
-            
-            service = ParsedService(
-                code=code,
-                name=name,
-                category=category,
-                price=price,
-                duration_minutes=duration,
-                confidence_score=1.0  # High confidence for CSV
-            )
-            services.append(service)
+            service = self._row_to_service(row)
+            if service:
+                services.append(service)
         
         logger.info(f"Parsed {len(services)} services from CSV")
         return services
     
-    async def _parse_pdf_with_ai(self, content: bytes) -> List[ParsedService]:
-        """Parse PDF using Grok-4 vision API"""
+    def _row_to_service(self, row: Dict) -> Optional[ParsedService]:
+        """Map one tabular row (CSV or Excel) to a service"""
+        # Intelligent column mapping
+        name = self._find_column(row, ['Service', 'Name', 'Procedure', 'Description', 'service_name', 'treatment'])
+        if not name:
+            return None
+            
+        price = self._parse_price(self._find_column(row, ['Price', 'Cost', 'Fee', 'Amount', 'price', 'rate']))
+        category = self._find_column(row, ['Category', 'Type', 'Department', 'Specialty', 'category']) or 'General'
+        code = self._find_column(row, ['Code', 'ID', 'CPT', 'code', 'service_code'])
+        duration = self._parse_duration(self._find_column(row, ['Duration', 'Time', 'Minutes', 'duration']))
+        
+        if not code:
+            # Generate code from name
+            code = self._generate_code(name)
+        
+        return ParsedService(
+            code=code,
+            name=name,
+            category=category,
+            price=price,
+            duration_minutes=duration,
+            confidence_score=1.0  # High confidence for tabular data
+        )
+    
+    async def _parse_pdf_with_ai(self, content: bytes, use_cache: bool = True) -> List[ParsedService]:
+        """
+        Parse PDF page by page
+        
+        Embedded text is extracted with PyMuPDF in a process pool; only pages
+        without usable text are rendered and sent to vision. Pages are parsed
+        concurrently under _rate_limit and cached by page content hash, so a
+        re-upload with one changed page only re-parses that page.
+        """
+        try:
+            pages = await extract_pdf_pages(content)
+        except RuntimeError as e:
+            logger.warning(f"Per-page PDF extraction unavailable, sending whole document: {e}")
+            return await self._parse_whole_pdf_with_ai(content)
+        
+        semaphore = asyncio.Semaphore(self._max_concurrent_pages)
+        
+        async def parse_page(page: ExtractedPage) -> List[ParsedService]:
+            async with semaphore:
+                return await self._parse_pdf_page(page, use_cache)
+        
+        page_results = await asyncio.gather(*(parse_page(page) for page in pages))
+        services = self._merge_services(page_results)
+        logger.info(f"Parsed {len(services)} services from {len(pages)} PDF pages")
+        return services
+    
+    async def _parse_pdf_page(self, page: ExtractedPage, use_cache: bool) -> List[ParsedService]:
+        """Parse a single PDF page, via text model or vision depending on its content"""
+        cache_type = "pdf_page_image" if page.is_image_only else "pdf_page_text"
+        if use_cache:
+            cached = await self._get_cached_result(page.content_hash, cache_type)
+            if cached is not None:
+                return cached
+        
+        prompt = """
+        Extract ALL medical services from this page of a price list. For each service:
+        
+        Required fields:
+        - name: The service or procedure name
+        - price: Numerical price (if multiple prices, use the standard/cash price)
+        - category: Type of service (Surgery, Consultation, Diagnostics, etc.)
+        
+        Optional fields (if available):
+        - code: Service or CPT code
+        - duration_minutes: Duration in minutes
+        - specialization: Required medical specialty
+        - insurance_codes: List of insurance codes
+        - is_multi_stage: true if mentions multiple visits/stages
+        - stage_config: Details about stages if multi-stage
+        
+        Return ONLY a JSON array, no explanations (empty array if the page has no services):
+        [{"name": "...", "price": 0, "category": "...", ...}]
+        """
+        
+        if page.is_image_only:
+            base64_content = base64.b64encode(page.image_png).decode('utf-8')
+            services = await self._call_grok_vision(base64_content, 'image/png', prompt)
+        else:
+            services = await self._call_grok_text(page.text, prompt)
+        
+        # Empty results are not cached, so a failed call is retried on re-upload
+        if use_cache and services:
+            await self._cache_result(page.content_hash, cache_type, services)
+        return services
+    
+    async def _parse_whole_pdf_with_ai(self, content: bytes) -> List[ParsedService]:
+        """Parse PDF using Grok-4 vision API in a single request"""
         base64_content = base64.b64encode(content).decode('utf-8')
         
         prompt = """
@@ -348,6 +426,43 @@ class PriceListParser:
             # Fallback to OpenAI
             return await self._call_openai_vision(base64_content, mime_type, prompt)
     
+    async def _call_grok_text(self, text_content: str, prompt: str) -> List[ParsedService]:
+        """Call Grok with embedded page text (no vision needed) with rate limiting"""
+        
+        # Rate limiting
+        await self._rate_limit('grok')
+        
+        headers = {
+            "Authorization": f"Bearer {self.grok_api_key}",
+            "Content-Type": "application/json"
+        }
+        
+        payload = {
+            "model": "grok-4",
+            "messages": [{
+                "role": "user",
+                "content": f"{prompt}\n\nPrice list page text:\n{text_content}"
+            }],
+            "temperature": 0.1,
+            "max_tokens": 4000
+        }
+        
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.post(self.grok_url, headers=headers, json=payload) as response:
+                    if response.status != 200:
+                        error = await response.text()
+                        logger.error(f"Grok API error: {error}")
+                        return []
+                    
+                    result = await response.json()
+                    content = result['choices'][0]['message']['content']
+                    return self._extract_services_from_response(content)
+                    
+        except Exception as e:
+            logger.error(f"Grok API exception: {e}")
+            return []
+    
     async def _call_openai_vision(self, base64_content: str, mime_type: str, prompt: str) -> List[ParsedService]:
         """Fallback to OpenAI Vision API"""
         
@@ -407,10 +522,52 @@ class PriceListParser:
             return []
     
     async def _parse_excel(self, content: bytes) -> List[ParsedService]:
-        """Parse Excel file using pandas"""
-        # Implementation for Excel parsing
-        # Would use pandas/openpyxl
-        return []
+        """Parse Excel file with openpyxl in read-only (streaming) mode"""
+        if openpyxl is None:  # pragma: no cover - exercised only when dependency missing
+            raise RuntimeError("openpyxl is required for Excel parsing. Install 'openpyxl' to enable this feature.")
+        
+        services = await asyncio.to_thread(self._parse_excel_sync, content)
+        logger.info(f"Parsed {len(services)} services from Excel")
+        return services
+    
+    def _parse_excel_sync(self, content: bytes) -> List[ParsedService]:
+        """Stream rows of every worksheet; the first non-empty row of a sheet is its header"""
+        workbook = openpyxl.load_workbook(io.BytesIO(content), read_only=True, data_only=True)
+        services = []
+        try:
+            for worksheet in workbook.worksheets:
+                header = None
+                for values in worksheet.iter_rows(values_only=True):
+                    if not any(value is not None and str(value).strip() for value in values):
+                        continue
+                    if header is None:
+                        header = [str(value).strip() if value is not None else "" for value in values]
+                        continue
+                    
+                    service = self._row_to_service(dict(zip(header, values)))
+                    if service:
+                        services.append(service)
+        finally:
+            workbook.close()
+        return services
+    
+    def _merge_services(self, page_results: List[List[ParsedService]]) -> List[ParsedService]:
+        """
+        Merge per-page results in page order, dropping duplicates
+        
+        A service is a duplicate when its normalized name and price match one
+        already seen; the first occurrence wins, so the output is deterministic.
+        """
+        merged = []
+        seen = set()
+        for services in page_results:
+            for service in services:
+                key = (" ".join(service.name.casefold().split()), round(service.price, 2))
+                if key in seen:
+                    continue
+                seen.add(key)
+                merged.append(service)
+        return merged
     
     def _find_column(self, row: Dict, possible_names: List[str]) -> Optional[str]:
         """Find column value from possible names"""
@@ -445,21 +602,23 @@ class PriceListParser:
         return None
     
     def _generate_code(self, name: str) -> str:
-        """Generate service code from name"""
+        """Generate service code from name (stable for the same name)"""
         words = name.upper().split()[:3]
         code = ''.join(w[0] for w in words if w)
-        import random
-        code += str(random.randint(100, 999))
+        digest = int(hashlib.sha256(name.strip().casefold().encode()).hexdigest(), 16)
+        code += str(100 + digest % 900)
         return code
     
     async def _rate_limit(self, api: str):
-        """Implement rate limiting for API calls"""
-        now = asyncio.get_event_loop().time()
-        if api in self._last_api_call:
-            elapsed = now - self._last_api_call[api]
-            if elapsed < self._min_interval:
-                await asyncio.sleep(self._min_interval - elapsed)
-        self._last_api_call[api] = asyncio.get_event_loop().time()
+        """Implement rate limiting for API calls (safe under concurrent page parsing)"""
+        lock = self._rate_limit_locks.setdefault(api, asyncio.Lock())
+        async with lock:
+            now = asyncio.get_event_loop().time()
+            if api in self._last_api_call:
+                elapsed = now - self._last_api_call[api]
+                if elapsed < self._min_interval:
+                    await asyncio.sleep(self._min_interval - elapsed)
+            self._last_api_call[api] = asyncio.get_event_loop().time()
     
     def _get_sample_services(self) -> List[ParsedService]:
         """Return sample services for testing"""
@@ -272,8 +272,36 @@ class RuleEngine:
         Returns:
             List of results from executed rules
         """
-        results = []
+        return await self._evaluate_rules(
+            context,
+            self._select_rules(rule_type, tags),
+            stop_on_first_match
+        )
+    
+    async def evaluate_batch(
+        self,
+        contexts: List[Dict[str, Any]],
+        rule_type: Optional[RuleType] = None,
+        tags: Optional[List[str]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Evaluate the same rule selection against many contexts
         
+        Rules are selected once for the whole batch; results are returned in
+        the order of the input contexts.
+        """
+        rules_to_evaluate = self._select_rules(rule_type, tags)
+        return [
+            await self._evaluate_rules(context, rules_to_evaluate)
+            for context in contexts
+        ]
+    
+    def _select_rules(
+        self,
+        rule_type: Optional[RuleType] = None,
+        tags: Optional[List[str]] = None
+    ) -> List[BusinessRule]:
+        """Select rules by type and tags"""
         # Get rules to evaluate
         if rule_type and rule_type.value in self.rule_sets:
             rules_to_evaluate = self.rule_sets[rule_type.value]
@@ -287,6 +315,17 @@ class RuleEngine:
                 if any(tag in r.tags for tag in tags)
             ]
         
+        return rules_to_evaluate
+    
+    async def _evaluate_rules(
+        self,
+        context: Dict[str, Any],
+        rules_to_evaluate: List[BusinessRule],
+        stop_on_first_match: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Evaluate a pre-selected list of rules against one context"""
+        results = []
+        
         # Evaluate rules
         for rule in rules_to_evaluate:
             try:
@@ -327,6 +366,20 @@ class RuleEngine:
             rule_type=RuleType.VALIDATION
         )
         
+        return self._summarize_validation(validation_results)
+    
+    async def validate_batch(self, contexts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Validate many contexts against all validation rules
+        
+        Returns:
+            One validation summary per context, in input order
+        """
+        batch_results = await self.evaluate_batch(contexts, rule_type=RuleType.VALIDATION)
+        return [self._summarize_validation(results) for results in batch_results]
+    
+    def _summarize_validation(self, validation_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Collect errors and warnings from validation rule results"""
         errors = []
         warnings = []
         
@@ -1,7 +1,7 @@
 """Scheduling services for rule-based appointment scheduling."""
 
-from .constraint_engine import ConstraintEngine
+from .constraint_engine import ConstraintEngine, ConstraintWindow
 from .preference_scorer import PreferenceScorer
 from .escalation_manager import EscalationManager
 
-__all__ = ["ConstraintEngine", "PreferenceScorer", "EscalationManager"]
+__all__ = ["ConstraintEngine", "ConstraintWindow", "PreferenceScorer", "EscalationManager"]
@@ -4,13 +4,18 @@ Constraint Engine for Scheduling.
 Checks hard constraints for appointment slot validity.
 """
 
+import asyncio
 import logging
-from datetime import datetime, time
-from typing import Optional, List, Dict, Any
+from collections import defaultdict
+from datetime import date, datetime, time, timezone
+from typing import Optional, List, Dict, Any, Iterable, Tuple
 from uuid import UUID
 
 logger = logging.getLogger(__name__)
 
+# Rows requested per page by load_window; PostgREST caps rows per response
+WINDOW_PAGE_SIZE = 1000
+
 
 class ConstraintEngine:
     """
@@ -269,6 +274,109 @@ class ConstraintEngine:
 
         return checks
 
+    async def load_window(
+        self,
+        doctor_ids: Iterable[str],
+        room_ids: Iterable[str],
+        start_date: datetime,
+        end_date: datetime
+    ) -> "ConstraintWindow":
+        """
+        Bulk-load every constraint input for a date window.
+
+        Replaces per-slot check_doctor_schedule / check_doctor_time_off /
+        check_room_availability calls with four queries whose results are
+        answered in memory by the returned ConstraintWindow. Each query is
+        paged past the PostgREST row cap, and a load that comes back short
+        of its exact count is treated as failed. Failure handling mirrors
+        the per-slot checks: missing schedules mean not working, a failed
+        time-off load means available, a failed room load means every room
+        is unavailable.
+
+        Args:
+            doctor_ids: Doctors to load schedules and time-off for
+            room_ids: Rooms to load bookings and holds for
+            start_date: First day of the window
+            end_date: Last day of the window (inclusive)
+
+        Returns:
+            ConstraintWindow answering constraint checks for the window
+        """
+        doctor_ids = [str(d) for d in doctor_ids]
+        room_ids = [str(r) for r in room_ids]
+        window_start = datetime.combine(start_date.date(), time.min)
+        window_end = datetime.combine(end_date.date() + timedelta(days=1), time.min)
+
+        def load_schedules():
+            if not doctor_ids:
+                return []
+            return _fetch_all(lambda: self.db.table("doctor_schedules")
+                              .select("doctor_id,day_of_week,start_time,end_time", count="exact")
+                              .in_("doctor_id", doctor_ids))
+
+        def load_time_off():
+            if not doctor_ids:
+                return []
+            return _fetch_all(lambda: self.db.table("doctor_time_off")
+                              .select("doctor_id,start_date,end_date", count="exact")
+                              .in_("doctor_id", doctor_ids)
+                              .lte("start_date", end_date.date().isoformat())
+                              .gte("end_date", start_date.date().isoformat()))
+
+        def load_room_bookings():
+            if not room_ids:
+                return []
+            return _fetch_all(lambda: self.db.table("appointments")
+                              .select("room_id,start_time,end_time", count="exact")
+                              .in_("room_id", room_ids)
+                              .neq("status", "cancelled")
+                              .lt("start_time", window_end.isoformat())
+                              .gt("end_time", window_start.isoformat()))
+
+        def load_room_holds():
+            if not room_ids:
+                return []
+            return _fetch_all(lambda: self.db.table("appointment_holds")
+                              .select("room_id,start_time,end_time", count="exact")
+                              .in_("room_id", room_ids)
+                              .gte("expires_at", datetime.utcnow().isoformat())
+                              .lt("start_time", window_end.isoformat())
+                              .gt("end_time", window_start.isoformat()))
+
+        schedules, time_off, bookings, holds = await asyncio.gather(
+            asyncio.to_thread(load_schedules),
+            asyncio.to_thread(load_time_off),
+            asyncio.to_thread(load_room_bookings),
+            asyncio.to_thread(load_room_holds),
+            return_exceptions=True
+        )
+
+        if isinstance(schedules, Exception):
+            logger.error(f"Error loading doctor schedules: {schedules}")
+            schedules = []
+        if isinstance(time_off, Exception):
+            logger.error(f"Error loading doctor time-off: {time_off}")
+            time_off = []
+
+        rooms_loaded = True
+        for rows in (bookings, holds):
+            if isinstance(rows, Exception):
+                logger.error(f"Error loading room occupancy: {rows}")
+                rooms_loaded = False
+
+        window = ConstraintWindow(
+            schedules=schedules,
+            time_off=time_off,
+            room_intervals=(bookings + holds) if rooms_loaded else [],
+            rooms_loaded=rooms_loaded
+        )
+        logger.debug(
+            f"Loaded constraint window {start_date.date()}..{end_date.date()}: "
+            f"{len(schedules)} schedules, {len(time_off)} time-off, "
+            f"{len(window.occupancy)} room-days occupied"
+        )
+        return window
+
     def is_valid_slot(self, checks: Dict[str, bool]) -> bool:
         """
         Determine if all constraint checks passed.
@@ -282,5 +390,145 @@ class ConstraintEngine:
         return all(checks.values())
 
 
+
+def _fetch_all(build_query) -> List[Dict[str, Any]]:
+    """
+    Every row of a query, paged with range() in id order.
+
+    PostgREST caps rows per response, possibly below WINDOW_PAGE_SIZE, so
+    paging continues from the rows received until the exact count is
+    reached. Raises RuntimeError when the rows stop short of the count, so
+    callers treat a truncated load as a failed one.
+    """
+    rows: List[Dict[str, Any]] = []
+    while True:
+        result = build_query()\
+            .order("id")\
+            .range(len(rows), len(rows) + WINDOW_PAGE_SIZE - 1)\
+            .execute()
+        page = result.data or []
+        rows.extend(page)
+        total = getattr(result, "count", None)
+        if total is None:
+            if len(page) < WINDOW_PAGE_SIZE:
+                return rows
+        elif len(rows) >= total:
+            return rows
+        elif not page:
+            raise RuntimeError(f"Load truncated at {len(rows)} of {total} rows")
+
+
+DAY_NAMES = [
+    "monday", "tuesday", "wednesday", "thursday",
+    "friday", "saturday", "sunday"
+]
+
+
+def _to_naive_utc(value: str) -> datetime:
+    """Parse an ISO timestamp, normalising aware values to naive UTC"""
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _minute_mask(start_minute: int, end_minute: int) -> int:
+    """Bitmask with one bit set per minute in [start_minute, end_minute)"""
+    if end_minute <= start_minute:
+        return 0
+    return ((1 << (end_minute - start_minute)) - 1) << start_minute
+
+
+class ConstraintWindow:
+    """
+    In-memory constraint data for a date window, built by ConstraintEngine.load_window.
+
+    Room occupancy is kept as one minute-resolution bitmap (a Python int)
+    per (room, day), so a room check is a single AND against the slot mask.
+    """
+
+    def __init__(
+        self,
+        schedules: List[Dict[str, Any]],
+        time_off: List[Dict[str, Any]],
+        room_intervals: List[Dict[str, Any]],
+        rooms_loaded: bool = True
+    ):
+        self.rooms_loaded = rooms_loaded
+        self.schedules: Dict[Tuple[str, str], List[Tuple[time, time]]] = defaultdict(list)
+        self.time_off: Dict[str, List[Tuple[date, date]]] = defaultdict(list)
+        self.occupancy: Dict[Tuple[str, date], int] = defaultdict(int)
+
+        for row in schedules:
+            try:
+                work_start = datetime.strptime(row["start_time"], "%H:%M").time()
+                work_end = datetime.strptime(row["end_time"], "%H:%M").time()
+            except (KeyError, TypeError, ValueError):
+                continue
+            self.schedules[(str(row["doctor_id"]), row["day_of_week"])].append((work_start, work_end))
+
+        for row in time_off:
+            try:
+                self.time_off[str(row["doctor_id"])].append((
+                    date.fromisoformat(str(row["start_date"])[:10]),
+                    date.fromisoformat(str(row["end_date"])[:10])
+                ))
+            except (KeyError, TypeError, ValueError):
+                continue
+
+        for row in room_intervals:
+            try:
+                self._occupy(str(row["room_id"]), _to_naive_utc(row["start_time"]), _to_naive_utc(row["end_time"]))
+            except (KeyError, TypeError, ValueError, AttributeError):
+                continue
+
+    def _occupy(self, room_id: str, start: datetime, end: datetime):
+        """Mark [start, end) busy, splitting across days and rounding outward to whole minutes"""
+        day = start.date()
+        while datetime.combine(day, time.min) < end:
+            day_start = datetime.combine(day, time.min)
+            first = max(start, day_start) - day_start
+            last = min(end, day_start + timedelta(days=1)) - day_start
+            start_minute = int(first.total_seconds() // 60)
+            end_minute = -int(-last.total_seconds() // 60)
+            self.occupancy[(room_id, day)] |= _minute_mask(start_minute, end_minute)
+            day += timedelta(days=1)
+
+    def working_periods(self, doctor_id: str, day: date) -> List[Tuple[time, time]]:
+        """Schedule periods for a doctor on a given day, in load order"""
+        return self.schedules.get((str(doctor_id), DAY_NAMES[day.weekday()]), [])
+
+    def doctor_scheduled(self, doctor_id: str, slot_time: datetime, duration_minutes: int) -> bool:
+        """In-memory equivalent of ConstraintEngine.check_doctor_schedule"""
+        slot_start = slot_time.time()
+        slot_end = (slot_time + timedelta(minutes=duration_minutes)).time()
+        return any(
+            slot_start >= work_start and slot_end <= work_end
+            for work_start, work_end in self.working_periods(doctor_id, slot_time.date())
+        )
+
+    def doctor_not_off(self, doctor_id: str, slot_time: datetime) -> bool:
+        """In-memory equivalent of ConstraintEngine.check_doctor_time_off"""
+        day = slot_time.date()
+        return not any(start <= day <= end for start, end in self.time_off.get(str(doctor_id), []))
+
+    def room_free(self, room_id: str, start_time: datetime, end_time: datetime) -> bool:
+        """In-memory equivalent of ConstraintEngine.check_room_availability"""
+        if not self.rooms_loaded:
+            return False
+        day = start_time.date()
+        day_start = datetime.combine(day, time.min)
+        start_minute = int((start_time - day_start).total_seconds() // 60)
+        end_minute = -int(-(end_time - day_start).total_seconds() // 60)
+        if end_minute > 24 * 60:
+            # Slot runs past midnight: check the next day separately
+            next_day = datetime.combine(day + timedelta(days=1), time.min)
+            return (
+                self.room_free(room_id, start_time, next_day)
+                and self.room_free(room_id, next_day, end_time)
+            )
+        return not (self.occupancy.get((str(room_id), day), 0) & _minute_mask(start_minute, end_minute))
+
+
 # Import timedelta at top
 from datetime import timedelta
@@ -160,7 +160,7 @@ class SessionManager:
             )
 
             # Archive old session
-            await self._archive_session(session_id, current_time)
+            await self._archive_session(session_id, current_time, clinic_id=clinic_id)
 
             # Create new session
             new_session_id, _ = await self._create_new_session(
@@ -178,7 +178,7 @@ class SessionManager:
             # But with summary context injection from previous session
 
             # Archive old session (with summary generation)
-            await self._archive_session(session_id, current_time)
+            await self._archive_session(session_id, current_time, clinic_id=clinic_id)
 
             # Create new session with previous session link
             new_session_id, _ = await self._create_new_session(
@@ -236,7 +236,8 @@ class SessionManager:
         self,
         session_id: str,
         current_time: datetime,
-        generate_summary: bool = True  # NEW parameter
+        generate_summary: bool = True,  # NEW parameter
+        clinic_id: Optional[str] = None
     ):
         """
         Archive session and optionally generate AI summary.
@@ -270,11 +271,16 @@ class SessionManager:
 
         logger.info(f"🗄️ Archived session {session_id[:8]}")
 
-        # Generate summary ASYNCHRONOUSLY (fire-and-forget, non-blocking)
+        # Generate summary ASYNCHRONOUSLY (batched by the summary worker, non-blocking)
         if generate_summary:
-            asyncio.create_task(
-                self.summarizer.generate_and_store_summary(session_id, current_time)
-            )
+            from app.workers.session_summary_worker import get_session_summary_worker
+            summary_worker = get_session_summary_worker()
+            if summary_worker.is_running:
+                summary_worker.enqueue(session_id, clinic_id)
+            else:
+                asyncio.create_task(
+                    self.summarizer.generate_and_store_summary(session_id, current_time)
+                )
             logger.debug(f"🔄 Queued summary generation for session {session_id[:8]} (async)")
 
     async def get_carryover_data(self, session_id: str) -> Dict:
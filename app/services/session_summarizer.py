@@ -1,12 +1,128 @@
 """Generate AI summaries of conversation sessions."""
 
+import asyncio
+import json
 import logging
+import os
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from app.database import get_healthcare_client
+from app.services.summary_search_service import (
+    SUMMARY_EMBEDDINGS_ENABLED,
+    generate_summary_embedding,
+    generate_summary_embeddings,
+)
 
 logger = logging.getLogger(__name__)
 
+# Sessions below either threshold get a templated summary instead of an LLM call
+SUMMARY_MIN_MESSAGES = int(os.getenv("SUMMARY_MIN_MESSAGES", "4"))
+SUMMARY_MIN_TOKENS = int(os.getenv("SUMMARY_MIN_TOKENS", "40"))
+
+# Output budget per session (batched requests get one per session)
+SUMMARY_MAX_TOKENS_PER_SESSION = 300
+
+# conversation_logs rows per page when loading a batch
+MESSAGE_PAGE_SIZE = 1000
+
+EMPTY_SESSION_SUMMARY = "Empty session - no messages exchanged"
+
+SUMMARY_SYSTEM_PROMPT = """You are a medical conversation analyst. Generate a concise summary of this patient-clinic conversation.
+
+Include:
+1. PRIMARY INTENT: What did the patient want? (1 sentence)
+2. KEY INFORMATION: Important details collected (2-3 bullet points)
+3. OUTCOME: What happened? (booked/cancelled/pending/incomplete)
+4. UNRESOLVED: What wasn't addressed? (if any)
+
+Format as markdown. Be concise - max 150 words total."""
+
+BATCH_SUMMARY_SYSTEM_PROMPT = SUMMARY_SYSTEM_PROMPT + """
+
+You will receive several conversations, each under a header with its id.
+Summarize each one separately and respond with JSON only:
+{"summaries": [{"id": "<id>", "summary": "<markdown summary>"}]}
+Return exactly one entry per conversation, in the order given."""
+
+
+@dataclass
+class SummaryBatchResult:
+    """Summaries of one batch plus what they cost."""
+    summaries: Dict[str, str] = field(default_factory=dict)
+    # session_id -> llm | templated
+    sources: Dict[str, str] = field(default_factory=dict)
+    llm_calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cost_usd: float = 0.0
+
+    def add_usage(self, response) -> None:
+        self.llm_calls += 1
+        usage = response.usage or {}
+        self.input_tokens += usage.get('input_tokens', 0)
+        self.output_tokens += usage.get('output_tokens', 0)
+        self.cost_usd += _estimate_cost(response)
+
+
+def _estimate_cost(response) -> float:
+    """USD cost of a response from the builtin model prices (0 if unknown)."""
+    try:
+        from app.services.llm.llm_factory import LLMFactory
+        capability = LLMFactory._get_builtin_capabilities().get(response.model)
+        if capability is None:
+            return 0.0
+        return (
+            response.usage.get('input_tokens', 0) / 1_000_000 * capability.input_price_per_1m
+            + response.usage.get('output_tokens', 0) / 1_000_000 * capability.output_price_per_1m
+        )
+    except Exception:
+        return 0.0
+
+
+def _message_text(msg: Dict) -> str:
+    return msg.get('content', '') or msg.get('message_content', '') or ''
+
+
+def is_trivial_session(messages: List[Dict]) -> bool:
+    """Too short to be worth an LLM summary (message count or ~token count)."""
+    if len(messages) < SUMMARY_MIN_MESSAGES:
+        return True
+    # ~4 characters per token
+    return sum(len(_message_text(m)) for m in messages) // 4 < SUMMARY_MIN_TOKENS
+
+
+def template_summary(messages: List[Dict]) -> str:
+    """Summary for trivial sessions, in the same sections as the LLM summaries."""
+    if not messages:
+        return EMPTY_SESSION_SUMMARY
+    first_user = next((_message_text(m) for m in messages if m.get('role') == 'user'), '')
+    intent = ' '.join(first_user.split())[:200] or 'No patient message'
+    return (
+        f"**PRIMARY INTENT:** {intent}\n"
+        f"**OUTCOME:** incomplete - short session ({len(messages)} messages)"
+    )
+
+
+def _parse_batch_summaries(content: Optional[str]) -> Dict[str, str]:
+    """{id: summary} from a batched response; entries that do not parse are left out."""
+    text = (content or '').strip()
+    if text.startswith('```'):
+        text = text.strip('`')
+        text = text[text.find('\n') + 1:] if '\n' in text else ''
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return {}
+    items = data.get('summaries', []) if isinstance(data, dict) else data
+    parsed = {}
+    for item in items if isinstance(items, list) else []:
+        if isinstance(item, dict) and item.get('id') is not None and isinstance(item.get('summary'), str):
+            summary = item['summary'].strip()
+            if summary:
+                parsed[str(item['id'])] = summary
+    return parsed
+
 
 class SessionSummarizer:
     """Generates concise summaries of conversation sessions."""
@@ -41,57 +157,17 @@ class SessionSummarizer:
         Returns:
             Concise summary string
         """
-        from app.services.llm.tiers import ModelTier
-
         if not messages:
-            return "Empty session - no messages exchanged"
-
-        # Build summary prompt
-        conversation_text = self._format_messages(messages)
-
-        system_prompt = """You are a medical conversation analyst. Generate a concise summary of this patient-clinic conversation.
-
-Include:
-1. PRIMARY INTENT: What did the patient want? (1 sentence)
-2. KEY INFORMATION: Important details collected (2-3 bullet points)
-3. OUTCOME: What happened? (booked/cancelled/pending/incomplete)
-4. UNRESOLVED: What wasn't addressed? (if any)
-
-Format as markdown. Be concise - max 150 words total."""
-
-        user_prompt = f"""Session Metadata:
-- Patient: {session_metadata.get('patient_name', 'Unknown')}
-- Clinic: {session_metadata.get('clinic_id', 'Unknown')}
-- Duration: {session_metadata.get('duration_minutes', 0)} minutes
-- Messages: {len(messages)}
-
-Conversation:
-{conversation_text}
-
-Generate summary:"""
-
-        # Call LLM using tier-based routing
-        messages_array = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt}
-        ]
+            return EMPTY_SESSION_SUMMARY
 
         # Use clinic_id from metadata if not provided
         resolved_clinic_id = clinic_id or session_metadata.get('clinic_id')
 
         try:
-            llm_factory = await self._get_llm_factory()
-            response = await llm_factory.generate_for_tier(
-                tier=ModelTier.SUMMARIZATION,
-                messages=messages_array,
-                max_tokens=300,
-                temperature=0.3,
-                clinic_id=resolved_clinic_id,
-                session_id=session_id
+            summary, response = await self._summarize_one(
+                messages, session_metadata, resolved_clinic_id, session_id
             )
 
-            summary = response.content.strip() if response.content else ''
-
             logger.info(
                 f"Generated summary: {len(summary)} chars, {len(messages)} messages "
                 f"(tier={response.tier}, source={response.tier_source})"
@@ -103,12 +179,59 @@ Generate summary:"""
             logger.error(f"Error generating session summary: {e}", exc_info=True)
             return f"Summary generation failed: {str(e)}"
 
+    async def _summarize_one(
+        self,
+        messages: List[Dict[str, Any]],
+        session_metadata: Dict[str, Any],
+        clinic_id: Optional[str],
+        session_id: Optional[str]
+    ) -> Tuple[str, Any]:
+        """One LLM call for one session. Returns (summary, LLMResponse); raises on failure."""
+        from app.services.llm.tiers import ModelTier
+
+        # Build summary prompt
+        conversation_text = self._format_messages(messages)
+        user_prompt = self._build_user_prompt(conversation_text, session_metadata, len(messages))
+
+        # Call LLM using tier-based routing
+        messages_array = [
+            {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+            {"role": "user", "content": user_prompt}
+        ]
+
+        llm_factory = await self._get_llm_factory()
+        response = await llm_factory.generate_for_tier(
+            tier=ModelTier.SUMMARIZATION,
+            messages=messages_array,
+            max_tokens=SUMMARY_MAX_TOKENS_PER_SESSION,
+            temperature=0.3,
+            clinic_id=clinic_id,
+            session_id=session_id
+        )
+
+        summary = response.content.strip() if response.content else ''
+        return summary, response
+
+    @staticmethod
+    def _build_session_block(conversation_text: str, session_metadata: Dict[str, Any], message_count: int) -> str:
+        return f"""Session Metadata:
+- Patient: {session_metadata.get('patient_name', 'Unknown')}
+- Clinic: {session_metadata.get('clinic_id', 'Unknown')}
+- Duration: {session_metadata.get('duration_minutes', 0)} minutes
+- Messages: {message_count}
+
+Conversation:
+{conversation_text}"""
+
+    def _build_user_prompt(self, conversation_text: str, session_metadata: Dict[str, Any], message_count: int) -> str:
+        return self._build_session_block(conversation_text, session_metadata, message_count) + "\n\nGenerate summary:"
+
     def _format_messages(self, messages: List[Dict]) -> str:
         """Format messages for LLM prompt."""
         formatted = []
         for msg in messages[-20:]:  # Last 20 messages only
             role = msg.get('role', 'user')
-            content = msg.get('content', '') or msg.get('message_content', '')
+            content = _message_text(msg)
             formatted.append(f"{role.upper()}: {content}")
 
         return "\n".join(formatted)
@@ -151,6 +274,9 @@ Generate summary:"""
 
             logger.info(f"✅ Stored summary for session {session_id[:8]}: {summary[:100]}...")
 
+            if SUMMARY_EMBEDDINGS_ENABLED:
+                await self._store_summary_embedding(session_id, summary)
+
         except Exception as e:
             logger.error(f"Failed to generate/store summary for {session_id}: {e}", exc_info=True)
 
@@ -162,6 +288,214 @@ Generate summary:"""
             except Exception as update_error:
                 logger.error(f"Failed to mark summary as failed: {update_error}")
 
+    async def _store_summary_embedding(self, session_id: str, summary: str):
+        """Embed the summary for hybrid summary search (best-effort)."""
+        try:
+            embedding = await asyncio.to_thread(generate_summary_embedding, summary)
+            if embedding is None:
+                return
+            await asyncio.to_thread(
+                self.supabase.table('conversation_sessions').update({
+                    'summary_embedding': embedding
+                }).eq('id', session_id).execute
+            )
+        except Exception as e:
+            # Summary search still ranks this session on text
+            logger.warning(f"Failed to store summary embedding for {session_id}: {e}")
+
+    # ----- Batched summarization (SessionSummaryWorker) -----
+
+    def fetch_batch(self, session_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Load sessions and their messages for a batch in two IN queries (blocking).
+
+        Returns:
+            {session_id: {'status', 'metadata', 'messages'}} for sessions that exist
+        """
+        sessions = self.supabase.table('conversation_sessions').select(
+            'id, metadata, user_identifier, started_at, ended_at, summary_status'
+        ).in_('id', session_ids).execute()
+
+        batch = {
+            row['id']: {
+                'status': row.get('summary_status'),
+                'metadata': self._metadata_from_row(row),
+                'messages': [],
+            }
+            for row in sessions.data or []
+        }
+        if not batch:
+            return batch
+
+        # Paged: PostgREST caps rows per response
+        offset = 0
+        while True:
+            logs = self.supabase.schema('healthcare').table('conversation_logs').select(
+                'session_id, role, message_content, created_at'
+            ).in_(
+                'session_id', list(batch)
+            ).order('created_at', desc=False).range(offset, offset + MESSAGE_PAGE_SIZE - 1).execute()
+            rows = logs.data or []
+            for msg in rows:
+                entry = batch.get(msg.get('session_id'))
+                if entry is not None:
+                    entry['messages'].append(msg)
+            if len(rows) < MESSAGE_PAGE_SIZE:
+                return batch
+            offset += MESSAGE_PAGE_SIZE
+
+    def get_pending_session_ids(self, ended_before: datetime, limit: int) -> List[str]:
+        """Sessions still waiting for a summary, oldest first (blocking)."""
+        result = self.supabase.table('conversation_sessions').select('id').eq(
+            'summary_status', 'pending'
+        ).lt(
+            'ended_at', ended_before.isoformat()
+        ).order('ended_at', desc=False).limit(limit).execute()
+        return [row['id'] for row in result.data or []]
+
+    async def summarize_batch(self, batch: Dict[str, Dict[str, Any]]) -> SummaryBatchResult:
+        """
+        Summarize a batch: trivial sessions are templated, the rest go to one
+        LLM request per clinic. Sessions missing from the result failed.
+        """
+        result = SummaryBatchResult()
+        by_clinic: Dict[str, List[str]] = {}
+        for session_id, entry in batch.items():
+            if is_trivial_session(entry['messages']):
+                result.summaries[session_id] = template_summary(entry['messages'])
+                result.sources[session_id] = 'templated'
+            else:
+                by_clinic.setdefault(entry['metadata'].get('clinic_id'), []).append(session_id)
+
+        # Tier routing is per clinic, so a request never mixes clinics
+        await asyncio.gather(*(
+            self._summarize_group(clinic_id, session_ids, batch, result)
+            for clinic_id, session_ids in by_clinic.items()
+        ))
+        return result
+
+    async def _summarize_group(
+        self,
+        clinic_id: Optional[str],
+        session_ids: List[str],
+        batch: Dict[str, Dict[str, Any]],
+        result: SummaryBatchResult
+    ):
+        """One JSON request for a clinic's sessions; single calls for what it misses."""
+        from app.services.llm.tiers import ModelTier
+
+        retry_singly = list(session_ids)
+        if len(session_ids) > 1:
+            sections = []
+            for i, session_id in enumerate(session_ids, 1):
+                entry = batch[session_id]
+                block = self._build_session_block(
+                    self._format_messages(entry['messages']), entry['metadata'], len(entry['messages'])
+                )
+                sections.append(f"## Conversation id: {i}\n{block}")
+
+            try:
+                llm_factory = await self._get_llm_factory()
+                response = await llm_factory.generate_for_tier(
+                    tier=ModelTier.SUMMARIZATION,
+                    messages=[
+                        {"role": "system", "content": BATCH_SUMMARY_SYSTEM_PROMPT},
+                        {"role": "user", "content": "\n\n".join(sections) + "\n\nGenerate summaries:"}
+                    ],
+                    max_tokens=SUMMARY_MAX_TOKENS_PER_SESSION * len(session_ids),
+                    temperature=0.3,
+                    clinic_id=clinic_id,
+                    response_format={"type": "json_object"}
+                )
+            except Exception as e:
+                # Provider failure: single calls would fail the same way
+                logger.error(f"Batched summary request failed for {len(session_ids)} sessions: {e}")
+                return
+
+            result.add_usage(response)
+            parsed = _parse_batch_summaries(response.content)
+            for i, session_id in enumerate(session_ids, 1):
+                summary = parsed.get(str(i))
+                if summary:
+                    result.summaries[session_id] = summary
+                    result.sources[session_id] = 'llm'
+            retry_singly = [sid for sid in session_ids if sid not in result.summaries]
+            if retry_singly:
+                logger.warning(
+                    f"Batched summary response covered {len(session_ids) - len(retry_singly)}/"
+                    f"{len(session_ids)} sessions, summarizing the rest individually"
+                )
+
+        async def summarize_single(session_id: str):
+            entry = batch[session_id]
+            try:
+                summary, response = await self._summarize_one(
+                    entry['messages'], entry['metadata'], clinic_id, session_id
+                )
+                result.add_usage(response)
+                if summary:
+                    result.summaries[session_id] = summary
+                    result.sources[session_id] = 'llm'
+            except Exception as e:
+                logger.error(f"Error generating session summary for {session_id}: {e}")
+
+        await asyncio.gather(*(summarize_single(session_id) for session_id in retry_singly))
+
+    def embed_summaries(self, summaries: Dict[str, str]) -> Dict[str, List[float]]:
+        """Embeddings for a batch's summaries in one API call (blocking)."""
+        session_ids = list(summaries)
+        embeddings = generate_summary_embeddings([summaries[sid] for sid in session_ids])
+        return {sid: emb for sid, emb in zip(session_ids, embeddings) if emb is not None}
+
+    def store_batch(
+        self,
+        summaries: Dict[str, str],
+        failed: List[str],
+        generated_at: datetime,
+        embeddings: Optional[Dict[str, List[float]]] = None
+    ) -> None:
+        """
+        Write a batch back in one call (blocking).
+
+        Uses the store_session_summaries RPC (docs/session_summary_batching.md);
+        without it, falls back to one update per session.
+        """
+        embeddings = embeddings or {}
+        rows = [
+            {
+                'id': session_id,
+                'session_summary': summary,
+                'summary_generated_at': generated_at.isoformat(),
+                'summary_status': 'ready',
+                'summary_embedding': embeddings.get(session_id),
+            }
+            for session_id, summary in summaries.items()
+        ]
+        rows.extend({'id': session_id, 'summary_status': 'failed'} for session_id in failed)
+        if not rows:
+            return
+
+        try:
+            self.supabase.rpc('store_session_summaries', {'p_rows': rows}).execute()
+            return
+        except Exception as e:
+            logger.warning(f"store_session_summaries RPC unavailable, updating sessions one by one: {e}")
+
+        for row in rows:
+            updates = {k: v for k, v in row.items() if k not in ('id', 'summary_embedding')}
+            try:
+                self.supabase.table('conversation_sessions').update(updates).eq('id', row['id']).execute()
+            except Exception as e:
+                logger.error(f"Failed to store summary for {row['id']}: {e}")
+                continue
+            if row.get('summary_embedding'):
+                try:
+                    self.supabase.table('conversation_sessions').update({
+                        'summary_embedding': row['summary_embedding']
+                    }).eq('id', row['id']).execute()
+                except Exception as e:
+                    logger.warning(f"Failed to store summary embedding for {row['id']}: {e}")
+
     async def _get_session_messages(self, session_id: str) -> List[Dict]:
         """Fetch all messages for a session."""
         try:
@@ -182,20 +516,24 @@ Generate summary:"""
             ).eq('id', session_id).maybe_single().execute()
 
             if result.data:
-                session = result.data
-                started = datetime.fromisoformat(session['started_at'].replace('Z', '+00:00'))
-                ended_str = session.get('ended_at')
-                ended = datetime.fromisoformat(ended_str.replace('Z', '+00:00')) if ended_str else datetime.utcnow()
-                duration_minutes = (ended - started).total_seconds() / 60
-
-                metadata = session.get('metadata', {}) or {}
-                return {
-                    'patient_name': metadata.get('patient_name', 'Unknown'),
-                    'clinic_id': metadata.get('clinic_id', 'Unknown'),
-                    'duration_minutes': int(duration_minutes)
-                }
+                return self._metadata_from_row(result.data)
 
             return {}
         except Exception as e:
             logger.error(f"Error fetching metadata for session {session_id}: {e}")
             return {}
+
+    @staticmethod
+    def _metadata_from_row(session: Dict[str, Any]) -> Dict[str, Any]:
+        """Prompt metadata from a conversation_sessions row."""
+        started = datetime.fromisoformat(session['started_at'].replace('Z', '+00:00'))
+        ended_str = session.get('ended_at')
+        ended = datetime.fromisoformat(ended_str.replace('Z', '+00:00')) if ended_str else datetime.utcnow()
+        duration_minutes = (ended - started).total_seconds() / 60
+
+        metadata = session.get('metadata', {}) or {}
+        return {
+            'patient_name': metadata.get('patient_name', 'Unknown'),
+            'clinic_id': metadata.get('clinic_id', 'Unknown'),
+            'duration_minutes': int(duration_minutes)
+        }
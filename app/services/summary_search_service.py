@@ -1,12 +1,55 @@
 """Search previous conversation summaries."""
 
+import asyncio
 import logging
+import os
 from datetime import datetime, timezone, timedelta
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional
 from app.database import get_healthcare_client
 
 logger = logging.getLogger(__name__)
 
+# Embed summaries (SessionSummarizer) and queries for hybrid ranking
+SUMMARY_EMBEDDINGS_ENABLED = os.getenv("SUMMARY_EMBEDDINGS_ENABLED", "false").lower() == "true"
+
+# Weight of the text rank in the hybrid score (the rest goes to similarity)
+SUMMARY_SEARCH_TEXT_WEIGHT = float(os.getenv("SUMMARY_SEARCH_TEXT_WEIGHT", "0.5"))
+
+# Sessions without the query terms still match at this cosine similarity
+SUMMARY_SEARCH_MIN_SIMILARITY = float(os.getenv("SUMMARY_SEARCH_MIN_SIMILARITY", "0.35"))
+
+
+def generate_summary_embedding(text: str) -> Optional[List[float]]:
+    """
+    Embed a summary or search query (blocking; call via asyncio.to_thread).
+
+    Returns:
+        1536 floats, or None if embeddings are unavailable
+    """
+    if not text or not text.strip():
+        return None
+    try:
+        from app.utils.embedding_utils import get_embedding_generator
+        embedding = get_embedding_generator().generate(text)
+    except Exception as e:
+        logger.warning(f"Summary embedding unavailable: {e}")
+        return None
+    # The generator returns zeros on failure
+    if not embedding.any():
+        return None
+    return embedding.tolist()
+
+
+def generate_summary_embeddings(texts: List[str]) -> List[Optional[List[float]]]:
+    """Embed several summaries in one request (blocking); None where unavailable."""
+    try:
+        from app.utils.embedding_utils import get_embedding_generator
+        embeddings = get_embedding_generator().generate_batch(texts)
+    except Exception as e:
+        logger.warning(f"Summary embeddings unavailable: {e}")
+        return [None] * len(texts)
+    return [embedding.tolist() if embedding.any() else None for embedding in embeddings]
+
 
 class SummarySearchService:
     """Searches previous session summaries for user queries."""
@@ -14,7 +57,6 @@ class SummarySearchService:
     def __init__(self):
         # conversation_sessions is now in healthcare schema
         self.supabase = get_healthcare_client()
-        print(f"DEBUG: SummarySearchService initialized. self.supabase type: {type(self.supabase)}")
 
     async def search_summaries(
         self,
@@ -27,6 +69,9 @@ class SummarySearchService:
         """
         Search previous session summaries.
 
+        Ranks matches by text rank blended with embedding similarity in the
+        search_session_summaries RPC (see docs/summary_search_rpc.md).
+
         Args:
             phone_number: User's phone number
             clinic_id: Clinic context
@@ -35,51 +80,28 @@ class SummarySearchService:
             limit: Max results
 
         Returns:
-            List of session summaries with metadata
+            List of session summaries with metadata, best match first
         """
 
         clean_phone = phone_number.replace("@s.whatsapp.net", "")
         cutoff_date = datetime.now(timezone.utc) - timedelta(days=days_back)
 
         try:
-            # Build query with correct Supabase API syntax
-            query_builder = self.supabase.table('conversation_sessions').select(
-                'id, session_summary, started_at, ended_at, metadata'
-            ).eq(
-                'user_identifier', clean_phone
-            ).filter(
-                'metadata->>clinic_id', 'eq', clinic_id
-            ).eq(
-                'status', 'closed'  # Only archived sessions
-            ).not_.is_(
-                'session_summary', 'null'
-            ).gte(
-                'started_at', cutoff_date.isoformat()
-            ).order(
-                'started_at', desc=True  # Most recent first
-            )
-
-            # Add text search if query provided (multilingual config)
-            if query:
-                # Use text_search without config parameter (deprecated in newer Supabase client)
-                try:
-                    query_builder = query_builder.text_search(
-                        'session_summary', query
-                    )
-                except TypeError:
-                    # Fallback: use ilike for basic text matching if text_search fails
-                    query_builder = query_builder.ilike('session_summary', f'%{query}%')
-
-            print(f"DEBUG: query_builder type: {type(query_builder)}")
-            result = query_builder.limit(limit).execute()
-
-            if not result.data:
+            try:
+                rows = await self._search_ranked(clean_phone, clinic_id, query, cutoff_date, limit)
+            except Exception as e:
+                logger.warning(f"search_session_summaries RPC unavailable, querying table directly: {e}")
+                rows = await asyncio.to_thread(
+                    self._search_summaries_fallback, clean_phone, clinic_id, query, cutoff_date, limit
+                )
+
+            if not rows:
                 logger.info(f"No summaries found for {clean_phone[:3]}*** (query: {query})")
                 return []
 
             # Format results
             summaries = []
-            for session in result.data:
+            for session in rows:
                 metadata = session.get('metadata', {}) or {}
                 summaries.append({
                     'session_id': session['id'],
@@ -96,3 +118,69 @@ class SummarySearchService:
         except Exception as e:
             logger.error(f"Error searching summaries: {e}", exc_info=True)
             return []
+
+    async def _search_ranked(
+        self,
+        clean_phone: str,
+        clinic_id: str,
+        query: Optional[str],
+        cutoff_date: datetime,
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """Candidates from the (clinic_id, user_identifier) index, ranked in one RPC."""
+        query_embedding = None
+        if query and SUMMARY_EMBEDDINGS_ENABLED:
+            query_embedding = await asyncio.to_thread(generate_summary_embedding, query)
+
+        result = await asyncio.to_thread(
+            self.supabase.rpc('search_session_summaries', {
+                'p_user_identifier': clean_phone,
+                'p_clinic_id': clinic_id,
+                'p_query': query,
+                'p_query_embedding': query_embedding,
+                'p_since': cutoff_date.isoformat(),
+                'p_limit': limit,
+                'p_text_weight': SUMMARY_SEARCH_TEXT_WEIGHT,
+                'p_min_similarity': SUMMARY_SEARCH_MIN_SIMILARITY,
+            }).execute
+        )
+        return result.data or []
+
+    def _search_summaries_fallback(
+        self,
+        clean_phone: str,
+        clinic_id: str,
+        query: Optional[str],
+        cutoff_date: datetime,
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """Table-level search for databases without the summary search migration."""
+        query_builder = self.supabase.table('conversation_sessions').select(
+            'id, session_summary, started_at, ended_at, metadata'
+        ).eq(
+            'user_identifier', clean_phone
+        ).filter(
+            'metadata->>clinic_id', 'eq', clinic_id
+        ).eq(
+            'status', 'closed'  # Only archived sessions
+        ).not_.is_(
+            'session_summary', 'null'
+        ).gte(
+            'started_at', cutoff_date.isoformat()
+        ).order(
+            'started_at', desc=True  # Most recent first
+        )
+
+        # Add text search if query provided (multilingual config)
+        if query:
+            # Use text_search without config parameter (deprecated in newer Supabase client)
+            try:
+                query_builder = query_builder.text_search(
+                    'session_summary', query
+                )
+            except TypeError:
+                # Fallback: use ilike for basic text matching if text_search fails
+                query_builder = query_builder.ilike('session_summary', f'%{query}%')
+
+        result = query_builder.limit(limit).execute()
+        return result.data or []
@@ -3,7 +3,7 @@ Data Synchronization Service for Supabase-NocoDB Integration
 Handles bi-directional sync with conflict resolution and real-time updates
 """
 
-from typing import Dict, Any, List, Optional, Set
+from typing import Dict, Any, List, Optional, Set, Tuple
 import asyncio
 from datetime import datetime, timezone
 import aiohttp
@@ -16,6 +16,9 @@ from app.services.rule_engine import RuleEngine, RuleType, create_healthcare_rul
 
 logger = logging.getLogger(__name__)
 
+# Redis hash of sync watermarks, shared by every instance and kept across restarts
+WATERMARKS_KEY = "sync:watermarks"
+
 
 class SyncDirection(Enum):
     """Sync direction options"""
@@ -43,7 +46,10 @@ class DataSyncService:
         nocodb_url: str, 
         nocodb_token: str,
         conflict_strategy: ConflictResolution = ConflictResolution.MOST_RECENT,
-        rule_engine: Optional[RuleEngine] = None
+        rule_engine: Optional[RuleEngine] = None,
+        page_size: int = 500,
+        bulk_size: int = 100,
+        redis_client=None
     ):
         self.supabase = supabase_client
         self.nocodb_url = nocodb_url
@@ -59,6 +65,15 @@ class DataSyncService:
         # Track synced records to prevent infinite loops
         self.recently_synced: Set[str] = set()
         self.sync_lock = asyncio.Lock()
+
+        # Keyset page size for reads and chunk size for bulk writes
+        self.page_size = page_size
+        self.bulk_size = bulk_size
+
+        # (direction, table, clinic_id) -> (updated_at, id) of the last synced record,
+        # persisted in Redis (WATERMARKS_KEY) so restarts and new instances resume from it
+        self.watermarks: Dict[Tuple[str, str, str], Tuple[str, str]] = {}
+        self._redis = redis_client
         
         # Table mappings between Supabase and NocoDB
         self.table_mappings = {
@@ -107,18 +122,59 @@ class DataSyncService:
         self.processing = False
         
     async def _process_queue(self):
-        """Process items from sync queue"""
+        """Process items from sync queue, batching upserts that arrive together"""
         while self.processing:
             try:
                 if not self.sync_queue.empty():
-                    sync_item = await self.sync_queue.get()
-                    await self._sync_single_item(sync_item)
+                    batch = [await self.sync_queue.get()]
+                    while not self.sync_queue.empty() and len(batch) < self.bulk_size:
+                        batch.append(self.sync_queue.get_nowait())
+                    await self._sync_batch(batch)
                 else:
                     await asyncio.sleep(0.1)
             except Exception as e:
                 logger.error(f"Error processing sync queue: {e}")
                 await asyncio.sleep(1)
                 
+    @property
+    def redis(self):
+        if self._redis is None:
+            from app.config import get_redis_client
+            self._redis = get_redis_client()
+        return self._redis
+
+    def _watermark_field(self, key: Tuple[str, str, str]) -> str:
+        return "|".join(key)
+
+    async def _get_watermark(self, key: Tuple[str, str, str]) -> Optional[Tuple[str, str]]:
+        """Last synced position, from memory or the shared Redis hash"""
+        if key not in self.watermarks:
+            try:
+                stored = await asyncio.to_thread(self.redis.hget, WATERMARKS_KEY, self._watermark_field(key))
+            except Exception as e:
+                logger.warning(f"Could not read sync watermark {key}: {e}")
+                return None
+            if stored:
+                self.watermarks[key] = tuple(json.loads(stored))
+        return self.watermarks.get(key)
+
+    async def _set_watermark(self, key: Tuple[str, str, str], watermark: Tuple[str, str]):
+        self.watermarks[key] = watermark
+        try:
+            await asyncio.to_thread(
+                self.redis.hset, WATERMARKS_KEY, self._watermark_field(key), json.dumps(list(watermark))
+            )
+        except Exception as e:
+            # The in-memory watermark still holds for this process
+            logger.warning(f"Could not store sync watermark {key}: {e}")
+
+    async def _clear_watermark(self, key: Tuple[str, str, str]):
+        self.watermarks.pop(key, None)
+        try:
+            await asyncio.to_thread(self.redis.hdel, WATERMARKS_KEY, self._watermark_field(key))
+        except Exception as e:
+            logger.warning(f"Could not clear sync watermark {key}: {e}")
+
     def _generate_sync_key(self, table: str, record_id: str) -> str:
         """Generate unique key for sync tracking"""
         return f"{table}:{record_id}"
@@ -133,27 +189,35 @@ class DataSyncService:
         sync_key = self._generate_sync_key(table, record_id)
         self.recently_synced.add(sync_key)
         
-        # Clear after 5 seconds to allow future syncs
-        await asyncio.sleep(5)
-        self.recently_synced.discard(sync_key)
+        # Clear after 5 seconds to allow future syncs, without blocking the caller
+        asyncio.get_running_loop().call_later(5, self.recently_synced.discard, sync_key)
         
     async def sync_table_data(
         self, 
         table_name: str, 
         clinic_id: str,
-        direction: SyncDirection = SyncDirection.BIDIRECTIONAL
+        direction: SyncDirection = SyncDirection.BIDIRECTIONAL,
+        full: bool = False
     ):
         """
         Synchronize table data between Supabase and NocoDB
         
+        Only records updated since the last sync (per direction, table and
+        clinic) are read, in keyset pages ordered by (updated_at, id).
+        
         Args:
             table_name: Name of the table to sync
             clinic_id: Clinic ID for filtering
             direction: Sync direction (to_nocodb, to_supabase, bidirectional)
+            full: Ignore the stored watermark and resync every record
         """
         logger.info(f"Starting sync for table {table_name}, clinic {clinic_id}, direction {direction.value}")
         
         async with self.sync_lock:
+            if full:
+                for sync_direction in (SyncDirection.TO_NOCODB, SyncDirection.TO_SUPABASE):
+                    await self._clear_watermark((sync_direction.value, table_name, clinic_id))
+
             if direction in [SyncDirection.TO_NOCODB, SyncDirection.BIDIRECTIONAL]:
                 await self._sync_to_nocodb(table_name, clinic_id)
                 
@@ -163,23 +227,33 @@ class DataSyncService:
     async def _sync_to_nocodb(self, table_name: str, clinic_id: str):
         """Sync data from Supabase to NocoDB"""
         try:
-            # Fetch data from Supabase
-            response = self.supabase.table(f"healthcare.{table_name}").select("*").eq(
-                "clinic_id", clinic_id
-            ).execute()
-            
-            if not response.data:
-                logger.info(f"No data to sync for {table_name}")
-                return
-                
             # Get corresponding NocoDB table name
             nocodb_table = self.table_mappings.get(table_name, table_name)
+            watermark_key = (SyncDirection.TO_NOCODB.value, table_name, clinic_id)
+            synced = 0
             
-            # Sync each record
-            for record in response.data:
-                if not self._is_recently_synced(table_name, record.get("id")):
-                    await self._upsert_to_nocodb(nocodb_table, record, clinic_id)
-                    await self._mark_as_synced(table_name, record.get("id"))
+            while True:
+                records = await self._fetch_supabase_page(
+                    table_name, clinic_id, await self._get_watermark(watermark_key)
+                )
+                if not records:
+                    break
+                
+                pending = [
+                    record for record in records
+                    if not self._is_recently_synced(table_name, record.get("id"))
+                ]
+                if pending:
+                    await self._bulk_upsert_to_nocodb(nocodb_table, pending)
+                    for record in pending:
+                        await self._mark_as_synced(table_name, record.get("id"))
+                    synced += len(pending)
+                
+                await self._set_watermark(watermark_key, self._record_watermark(records[-1]))
+                if len(records) < self.page_size:
+                    break
+            
+            logger.info(f"Synced {synced} {table_name} records to NocoDB for clinic {clinic_id}")
                     
         except Exception as e:
             logger.error(f"Error syncing to NocoDB: {e}")
@@ -190,79 +264,129 @@ class DataSyncService:
         try:
             # Get corresponding NocoDB table name
             nocodb_table = self.table_mappings.get(table_name, table_name)
+            watermark_key = (SyncDirection.TO_SUPABASE.value, table_name, clinic_id)
+            synced = 0
             
-            # Fetch data from NocoDB
-            async with self.session.get(
-                f"{self.nocodb_url}/api/v1/db/data/noco/healthcare/{nocodb_table}",
-                params={"where": f"(clinic_id,eq,{clinic_id})"}
-            ) as response:
-                response.raise_for_status()
-                data = await response.json()
+            while True:
+                records = await self._fetch_nocodb_page(
+                    nocodb_table, clinic_id, await self._get_watermark(watermark_key)
+                )
+                if not records:
+                    break
                 
-            records = data.get("list", [])
-            
-            if not records:
-                logger.info(f"No data to sync from NocoDB for {table_name}")
-                return
+                pending = [
+                    record for record in records
+                    if not self._is_recently_synced(table_name, record.get("id"))
+                ]
+                if pending:
+                    await self._bulk_upsert_to_supabase(table_name, pending, clinic_id)
+                    for record in pending:
+                        await self._mark_as_synced(table_name, record.get("id"))
+                    synced += len(pending)
                 
-            # Sync each record
-            for record in records:
-                if not self._is_recently_synced(table_name, record.get("id")):
-                    await self._upsert_to_supabase(table_name, record, clinic_id)
-                    await self._mark_as_synced(table_name, record.get("id"))
+                await self._set_watermark(watermark_key, self._record_watermark(records[-1]))
+                if len(records) < self.page_size:
+                    break
+            
+            logger.info(f"Synced {synced} {table_name} records to Supabase for clinic {clinic_id}")
                     
         except Exception as e:
             logger.error(f"Error syncing to Supabase: {e}")
             raise
             
-    async def _upsert_to_nocodb(self, table: str, record: Dict, clinic_id: str):
-        """Insert or update record in NocoDB"""
-        try:
-            record_id = record.get("id")
+    def _record_watermark(self, record: Dict) -> Tuple[str, str]:
+        """Keyset position of a record: (updated_at, id)"""
+        return (record.get("updated_at") or "1970-01-01T00:00:00+00:00", str(record.get("id")))
+        
+    async def _fetch_supabase_page(
+        self,
+        table: str,
+        clinic_id: str,
+        after: Optional[Tuple[str, str]]
+    ) -> List[Dict]:
+        """Fetch the next keyset page of Supabase records after a watermark"""
+        query = self.supabase.table(f"healthcare.{table}").select("*").eq("clinic_id", clinic_id)
+        
+        if after:
+            updated_at, record_id = after
+            query = query.or_(
+                f'updated_at.gt."{updated_at}",'
+                f'and(updated_at.eq."{updated_at}",id.gt.{record_id})'
+            )
             
-            # Check if record exists
-            async with self.session.get(
-                f"{self.nocodb_url}/api/v1/db/data/noco/healthcare/{table}/{record_id}"
-            ) as response:
-                exists = response.status == 200
-                
-            if exists:
-                # Update existing record
-                async with self.session.patch(
-                    f"{self.nocodb_url}/api/v1/db/data/noco/healthcare/{table}/{record_id}",
-                    json=record
-                ) as response:
-                    response.raise_for_status()
-                    logger.debug(f"Updated record {record_id} in NocoDB {table}")
-            else:
-                # Insert new record
-                async with self.session.post(
+        query = query.order("updated_at").order("id").limit(self.page_size)
+        response = await asyncio.to_thread(query.execute)
+        return response.data or []
+        
+    async def _fetch_nocodb_page(
+        self,
+        table: str,
+        clinic_id: str,
+        after: Optional[Tuple[str, str]]
+    ) -> List[Dict]:
+        """Fetch the next keyset page of NocoDB records after a watermark"""
+        where = f"(clinic_id,eq,{clinic_id})"
+        if after:
+            updated_at, record_id = after
+            where += (
+                f"~and((updated_at,gt,{updated_at})"
+                f"~or((updated_at,eq,{updated_at})~and(id,gt,{record_id})))"
+            )
+            
+        async with self.session.get(
+            f"{self.nocodb_url}/api/v1/db/data/noco/healthcare/{table}",
+            params={"where": where, "sort": "updated_at,id", "limit": self.page_size}
+        ) as response:
+            response.raise_for_status()
+            data = await response.json()
+            
+        return data.get("list", [])
+        
+    async def _bulk_upsert_to_nocodb(self, table: str, records: List[Dict]):
+        """Insert or update records in NocoDB using the bulk endpoints"""
+        bulk_url = f"{self.nocodb_url}/api/v1/db/data/bulk/noco/healthcare/{table}"
+        
+        for i in range(0, len(records), self.bulk_size):
+            chunk = records[i:i + self.bulk_size]
+            ids = [str(record.get("id")) for record in chunk if record.get("id") is not None]
+            
+            # One lookup per chunk to split inserts from updates
+            existing: Set[str] = set()
+            if ids:
+                async with self.session.get(
                     f"{self.nocodb_url}/api/v1/db/data/noco/healthcare/{table}",
-                    json=record
+                    params={
+                        "where": f"(id,in,{','.join(ids)})",
+                        "fields": "id",
+                        "limit": len(ids)
+                    }
                 ) as response:
                     response.raise_for_status()
-                    logger.debug(f"Inserted record {record_id} in NocoDB {table}")
+                    data = await response.json()
+                existing = {str(row.get("id")) for row in data.get("list", [])}
+                
+            updates = [record for record in chunk if str(record.get("id")) in existing]
+            inserts = [record for record in chunk if str(record.get("id")) not in existing]
+            
+            if updates:
+                async with self.session.patch(bulk_url, json=updates) as response:
+                    response.raise_for_status()
+            if inserts:
+                async with self.session.post(bulk_url, json=inserts) as response:
+                    response.raise_for_status()
                     
-        except Exception as e:
-            logger.error(f"Error upserting to NocoDB: {e}")
-            raise
+            logger.debug(f"NocoDB {table}: {len(inserts)} inserted, {len(updates)} updated")
             
-    async def _upsert_to_supabase(self, table: str, record: Dict, clinic_id: str):
-        """Insert or update record in Supabase"""
-        try:
+    async def _bulk_upsert_to_supabase(self, table: str, records: List[Dict], clinic_id: str):
+        """Insert or update records in Supabase with multi-row upserts"""
+        for record in records:
             record["clinic_id"] = clinic_id
             
-            # Upsert to Supabase (will handle insert/update automatically)
-            response = self.supabase.table(f"healthcare.{table}").upsert(
-                record,
-                on_conflict="id"
-            ).execute()
-            
-            logger.debug(f"Upserted record {record.get('id')} to Supabase {table}")
-            
-        except Exception as e:
-            logger.error(f"Error upserting to Supabase: {e}")
-            raise
+        for i in range(0, len(records), self.page_size):
+            chunk = records[i:i + self.page_size]
+            query = self.supabase.table(f"healthcare.{table}").upsert(chunk, on_conflict="id")
+            await asyncio.to_thread(query.execute)
+            logger.debug(f"Upserted {len(chunk)} records to Supabase {table}")
             
     async def handle_conflict(
         self,
@@ -338,26 +462,50 @@ class DataSyncService:
         await self.sync_queue.put(sync_item)
         logger.debug(f"Queued sync item: {sync_item}")
         
-    async def _sync_single_item(self, sync_item: Dict):
-        """Process a single sync item"""
-        try:
-            table = sync_item.get("table")
-            record_id = sync_item.get("record_id")
-            operation = sync_item.get("operation")
-            clinic_id = sync_item.get("clinic_id")
-            data = sync_item.get("data")
-            source = sync_item.get("source", "supabase")
-            
-            logger.info(f"Processing sync: {operation} on {table}:{record_id} from {source}")
-            
-            if operation == "DELETE":
-                await self._handle_delete(table, record_id, source, clinic_id)
-            else:
-                await self._handle_upsert(table, record_id, data, source, clinic_id)
+    async def _sync_batch(self, sync_items: List[Dict]):
+        """
+        Process queued sync items, grouping upserts by table, source and clinic
+
+        Queue order is kept: pending upserts are flushed before each delete,
+        so an update followed by a delete of the same record leaves it
+        deleted. Within a group only the last upsert of each record is sent.
+        """
+        # (table, source, clinic_id) -> record_id -> latest sync item
+        upsert_groups: Dict[Tuple[str, str, str], Dict[Any, Dict]] = {}
+        
+        async def flush_upserts():
+            for (table, source, clinic_id), items in upsert_groups.items():
+                try:
+                    await self._handle_upsert_batch(table, list(items.values()), source, clinic_id)
+                except Exception as e:
+                    logger.error(f"Error syncing {len(items)} {table} items from {source}: {e}")
+            upsert_groups.clear()
+        
+        for index, sync_item in enumerate(sync_items):
+            try:
+                table = sync_item.get("table")
+                record_id = sync_item.get("record_id")
+                operation = sync_item.get("operation")
+                clinic_id = sync_item.get("clinic_id")
+                source = sync_item.get("source", "supabase")
                 
-        except Exception as e:
-            logger.error(f"Error syncing item {sync_item}: {e}")
-            # Could implement retry logic here
+                logger.info(f"Processing sync: {operation} on {table}:{record_id} from {source}")
+                
+                if operation == "DELETE":
+                    await flush_upserts()
+                    await self._handle_delete(table, record_id, source, clinic_id)
+                else:
+                    group = upsert_groups.setdefault((table, source, clinic_id), {})
+                    # Items without a record_id are inserts; never collapse them
+                    item_key = record_id if record_id is not None else ("new", index)
+                    group.pop(item_key, None)
+                    group[item_key] = sync_item
+                    
+            except Exception as e:
+                logger.error(f"Error syncing item {sync_item}: {e}")
+                # Could implement retry logic here
+                
+        await flush_upserts()
             
     async def _handle_delete(self, table: str, record_id: str, source: str, clinic_id: str):
         """Handle delete synchronization"""
@@ -380,10 +528,46 @@ class DataSyncService:
         except Exception as e:
             logger.error(f"Error handling delete: {e}")
             
-    async def _handle_upsert(self, table: str, record_id: str, data: Dict, source: str, clinic_id: str):
-        """Handle insert/update synchronization with rule validation"""
+    async def _handle_upsert_batch(self, table: str, items: List[Dict], source: str, clinic_id: str):
+        """Validate a batch of upserts against business rules and sync them in bulk"""
         try:
-            # Validate data against business rules
+            records = await self._apply_rules_batch(
+                table,
+                [item.get("data") or {} for item in items],
+                source,
+                clinic_id,
+                record_ids=[item.get("record_id") for item in items]
+            )
+            
+            # Proceed with sync
+            if source == "supabase":
+                # Sync to NocoDB
+                nocodb_table = self.table_mappings.get(table, table)
+                await self._bulk_upsert_to_nocodb(nocodb_table, records)
+            else:
+                # Sync to Supabase
+                await self._bulk_upsert_to_supabase(table, records, clinic_id)
+                
+        except Exception as e:
+            logger.error(f"Error handling upsert: {e}")
+            
+    async def _apply_rules_batch(
+        self,
+        table: str,
+        records: List[Dict],
+        source: str,
+        clinic_id: str,
+        record_ids: Optional[List[Optional[str]]] = None
+    ) -> List[Dict]:
+        """
+        Run validation and calculation rules over a batch of records
+        
+        Validation failures are logged and the records still sync; calculated
+        fields (e.g. price) are applied in place.
+        """
+        contexts = []
+        for index, data in enumerate(records):
+            record_id = record_ids[index] if record_ids else data.get("id")
             validation_context = {
                 "table": table,
                 "record_id": record_id,
@@ -399,41 +583,27 @@ class DataSyncService:
                 validation_context["action"] = "create_appointment" if not record_id else "update_appointment"
             elif table == "services":
                 validation_context["service"] = data
+            contexts.append(validation_context)
             
-            # Run validation rules
-            validation_result = await self.rule_engine.validate(validation_context)
-            
+        validation_results = await self.rule_engine.validate_batch(contexts)
+        calc_results = await self.rule_engine.evaluate_batch(contexts, rule_type=RuleType.CALCULATION)
+        
+        for context, validation_result, record_calc_results in zip(contexts, validation_results, calc_results):
             if not validation_result["valid"]:
-                logger.warning(f"Validation failed for {table}:{record_id}: {validation_result['errors']}")
-                # You might want to handle this differently based on your requirements
-                # For now, we'll log and continue with sync
+                logger.warning(
+                    f"Validation failed for {table}:{context['record_id']}: {validation_result['errors']}"
+                )
                 
-            # Apply any calculation rules (e.g., price calculation)
-            calc_results = await self.rule_engine.evaluate(
-                validation_context,
-                rule_type=RuleType.CALCULATION
-            )
-            
             # Update data with calculated values if any
-            for result in calc_results:
+            for result in record_calc_results:
                 if result.get("matched") and "results" in result:
                     for action_result in result["results"]:
                         if isinstance(action_result, dict):
                             # Apply calculated fields to data
                             if "calculated_price" in action_result:
-                                data["calculated_price"] = action_result["calculated_price"]
-            
-            # Proceed with sync
-            if source == "supabase":
-                # Sync to NocoDB
-                nocodb_table = self.table_mappings.get(table, table)
-                await self._upsert_to_nocodb(nocodb_table, data, clinic_id)
-            else:
-                # Sync to Supabase
-                await self._upsert_to_supabase(table, data, clinic_id)
-                
-        except Exception as e:
-            logger.error(f"Error handling upsert: {e}")
+                                context["data"]["calculated_price"] = action_result["calculated_price"]
+                                
+        return records
             
     async def get_sync_status(self) -> Dict:
         """Get current sync status and metrics"""
@@ -5,7 +5,9 @@ Implements direct replacement strategy with ask-hold-reserve pattern
 """
 
 import os
+import json
 import uuid
+import base64
 import logging
 from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional, Any, Tuple
@@ -42,6 +44,32 @@ class AppointmentType(Enum):
     FOLLOW_UP = "follow_up"
     EMERGENCY = "emergency"
 
+# Columns needed by appointment list views; avoids shipping wide rows over the wire
+APPOINTMENT_LIST_COLUMNS = (
+    'id,clinic_id,patient_id,doctor_id,appointment_date,start_time,end_time,'
+    'status,appointment_type,reason,notes,created_at,updated_at'
+)
+
+
+def encode_appointment_cursor(row: Dict[str, Any]) -> str:
+    """Encode the (appointment_date, id) keyset of a row as an opaque cursor"""
+    payload = json.dumps([str(row['appointment_date']), str(row['id'])])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_appointment_cursor(cursor: str) -> Tuple[str, str]:
+    """Decode a cursor produced by encode_appointment_cursor"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        last_date, last_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception as e:
+        raise ValueError(f"Invalid appointment cursor: {cursor}") from e
+    # Values are interpolated into a PostgREST filter, so reject filter syntax
+    for value in (last_date, last_id):
+        if not isinstance(value, str) or any(c in value for c in ',()'):
+            raise ValueError(f"Invalid appointment cursor: {cursor}")
+    return last_date, last_id
+
 @dataclass
 class TimeSlot:
     """Available time slot representation"""
@@ -796,11 +824,22 @@ class UnifiedAppointmentService:
         clinic_id: Optional[str] = None,
         date_from: Optional[str] = None,
         date_to: Optional[str] = None,
-        status: Optional[str] = None
+        status: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        cursor: Optional[Tuple[str, str]] = None,
+        columns: str = '*'
     ) -> List[Dict[str, Any]]:
-        """Get appointments with filtering options"""
+        """
+        Get appointments with filtering options
+
+        Pagination is pushed down to PostgREST: ``cursor`` is an
+        (appointment_date, id) keyset taken from the last row of the previous
+        page, ``offset`` is only honoured when no cursor is given. Results are
+        ordered by (appointment_date, id) so pages are stable.
+        """
         try:
-            query = self.supabase.table('appointments').select('*')
+            query = self.supabase.table('appointments').select(columns)
 
             if doctor_id:
                 query = query.eq('doctor_id', doctor_id)
@@ -814,14 +853,73 @@ class UnifiedAppointmentService:
                 query = query.gte('appointment_date', date_from)
             if date_to:
                 query = query.lte('appointment_date', date_to)
+            if cursor:
+                last_date, last_id = cursor
+                # The gte bound is implied by the or_, but only it can start the
+                # (clinic_id, appointment_date, id) index scan at the cursor
+                query = query.gte('appointment_date', last_date).or_(
+                    f"appointment_date.gt.{last_date},"
+                    f"and(appointment_date.eq.{last_date},id.gt.{last_id})"
+                )
+
+            query = query.order('appointment_date', desc=False).order('id', desc=False)
 
-            result = query.order('appointment_date', desc=False).execute()
+            if limit is not None:
+                start = 0 if cursor else offset
+                query = query.range(start, start + limit - 1)
+
+            result = query.execute()
             return result.data or []
 
         except Exception as e:
             logger.error(f"Failed to get appointments: {e}")
             return []
 
+    async def get_appointments_page(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        offset: int = 0,
+        columns: str = APPOINTMENT_LIST_COLUMNS,
+        **filters
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Fetch one page of appointments plus the opaque cursor for the next page
+
+        Fetches ``limit + 1`` rows to detect whether another page exists, so no
+        separate count query is needed. Raises ValueError on a malformed cursor.
+        """
+        keyset = decode_appointment_cursor(cursor) if cursor else None
+        rows = await self.get_appointments(
+            limit=limit + 1,
+            offset=offset,
+            cursor=keyset,
+            columns=columns,
+            **filters
+        )
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_appointment_cursor(rows[-1])
+        return rows, next_cursor
+
+    async def get_appointment_by_id(
+        self,
+        appointment_id: str,
+        columns: str = '*'
+    ) -> Optional[Dict[str, Any]]:
+        """Get a single appointment by primary key, or None if it does not exist"""
+        try:
+            result = self.supabase.table('appointments').select(columns).eq(
+                'id', appointment_id
+            ).limit(1).execute()
+            return result.data[0] if result.data else None
+
+        except Exception as e:
+            logger.error(f"Failed to get appointment {appointment_id}: {e}")
+            return None
+
     # Private helper methods
 
     async def _get_available_rooms(
@@ -45,13 +45,14 @@ class LangGraphVoiceAdapter:
     Adapts FSM Orchestrator for voice services.
 
     Phase 6: Now uses FSM orchestrator (legacy LangGraph removed).
-    Note: FSM doesn't support token streaming, so this adapter simulates
-    streaming by yielding the complete response as chunks.
+    Responses are streamed sentence by sentence via
+    FSMOrchestrator.process_stream so TTS can start on the first sentence,
+    optionally with a holding phrase first when a turn runs long.
 
     Usage:
         adapter = LangGraphVoiceAdapter(clinic_id="clinic123")
 
-        # Stream response (yields complete response as chunks)
+        # Stream response (sentence chunks, then an empty final chunk with metrics)
         async for chunk in adapter.stream_response(message, session_id, metadata):
             send_to_tts(chunk.content)
     """
@@ -61,6 +62,7 @@ class LangGraphVoiceAdapter:
         clinic_id: str,
         supabase_client: Optional[Any] = None,
         agent_config: Optional[Dict[str, Any]] = None,
+        holding_phrase_after_ms: Optional[float] = None,
     ):
         """
         Initialize the voice adapter.
@@ -69,10 +71,13 @@ class LangGraphVoiceAdapter:
             clinic_id: Clinic identifier for context
             supabase_client: Optional Supabase client (lazy-loaded if not provided)
             agent_config: Optional agent configuration
+            holding_phrase_after_ms: Speak a holding phrase when a turn takes
+                longer than this (opt-in; None, the default, never does)
         """
         self.clinic_id = clinic_id
         self._supabase_client = supabase_client
         self._agent_config = agent_config
+        self.holding_phrase_after_ms = holding_phrase_after_ms
         self._orchestrator = None  # Lazy-loaded
         self._fsm_states: Dict[str, Dict[str, Any]] = {}  # Session state storage
 
@@ -109,61 +114,84 @@ class LangGraphVoiceAdapter:
         message: str,
         session_id: str,
         metadata: Optional[Dict[str, Any]] = None,
-        patient_id: Optional[str] = None,
     ) -> AsyncIterator[StreamingResponse]:
         """
         Stream FSM response.
 
-        Note: FSM doesn't support token streaming like LangGraph, so this
-        yields the complete response as a single chunk. For voice applications,
-        consider using TTS streaming on the output side.
+        If holding_phrase_after_ms is set and the turn is still running after
+        that long, a holding phrase is yielded first. Then one non-final chunk per sentence as
+        soon as the orchestrator has the response, then an empty final chunk
+        carrying timing metrics. FSM state is committed when the turn
+        completes, even if the consumer stops early (barge-in), since tools
+        may already have run.
 
         Args:
             message: User message text
             session_id: Session identifier
             metadata: Additional metadata (participant info, etc.)
-            patient_id: Optional patient ID (falls back to extracting from metadata)
 
         Yields:
-            StreamingResponse chunks with token content
+            StreamingResponse chunks with sentence content
         """
         metadata = metadata or {}
         start_time = datetime.now(timezone.utc)
 
-        # Resolve patient_id
-        if patient_id is None:
-            patient_id = (
-                metadata.get("participant_id") or
-                metadata.get("patient_id") or
-                metadata.get("from_phone", "").replace("+", "") or
-                session_id
-            )
-
         logger.info(
             f"[voice-adapter] Processing message for session {session_id}"
         )
 
+        result: Optional[Dict[str, Any]] = None
+        chunks_yielded = 0
+        ttft_ms: Optional[float] = None
+        holding_phrase = False
+
+        def commit_state(turn_result: Dict[str, Any]) -> None:
+            if turn_result.get("state"):
+                self._fsm_states[session_id] = turn_result["state"]
+
         try:
-            # Get response from FSM orchestrator
-            result = await self.get_response(message, session_id, metadata, patient_id)
+            orchestrator = await self._get_orchestrator()
+            language = metadata.get("language", metadata.get("detected_language", "en"))
+
+            async for event in orchestrator.process_stream(
+                message=message,
+                session_id=session_id,
+                state=self._fsm_states.get(session_id),
+                language=language,
+                holding_after_ms=self.holding_phrase_after_ms,
+                on_result=commit_state,
+            ):
+                if event["type"] == "result":
+                    result = event["result"]
+                    continue
+
+                holding_phrase = holding_phrase or event.get("holding", False)
+                if ttft_ms is None:
+                    ttft_ms = (datetime.now(timezone.utc) - start_time).total_seconds() * 1000
+                chunks_yielded += 1
+                yield StreamingResponse(
+                    content=event["content"],
+                    is_final=False,
+                    node_name="fsm",
+                )
 
-            response_text = result.get("response", "")
             total_time_ms = (datetime.now(timezone.utc) - start_time).total_seconds() * 1000
-
             logger.info(
-                f"[voice-adapter] Completed in {total_time_ms:.0f}ms"
+                f"[voice-adapter] Completed in {total_time_ms:.0f}ms "
+                f"(ttft={ttft_ms or 0:.0f}ms, chunks={chunks_yielded})"
             )
 
-            # Yield the complete response
-            # For voice applications, TTS will handle streaming on the output side
             yield StreamingResponse(
-                content=response_text,
+                content="",
                 is_final=True,
                 node_name="fsm",
                 metadata={
                     "total_time_ms": total_time_ms,
-                    "route": result.get("route"),
-                    "tools_called": result.get("tools_called", []),
+                    "ttft_ms": ttft_ms,
+                    "chunks_yielded": chunks_yielded,
+                    "holding_phrase": holding_phrase,
+                    "route": (result or {}).get("route"),
+                    "tools_called": (result or {}).get("tools_called", []),
                 },
             )
 
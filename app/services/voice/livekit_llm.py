@@ -164,8 +164,8 @@ if LIVEKIT_AVAILABLE:
         """
         Stream wrapper for LangGraph response.
 
-        Uses astream_events to pipe tokens to TTS as soon as generate_response
-        node starts producing them - critical for voice latency.
+        Pipes sentence chunks to TTS as soon as the orchestrator yields them -
+        critical for voice latency.
 
         Implements LiveKit's LLMStream protocol for compatibility with
         VoicePipelineAgent.
@@ -190,24 +190,24 @@ if LIVEKIT_AVAILABLE:
 
         async def _run(self) -> None:
             """
-            Execute graph with real token streaming.
+            Execute the orchestrator with chunked streaming.
 
-            Streams tokens from the response nodes as they're generated,
-            rather than waiting for full graph execution.
+            Each chunk is forwarded as soon as it is yielded, so TTS can
+            start on the first sentence while later ones are still queued.
 
             This is critical for voice Time-to-First-Token (TTFT).
             """
             try:
                 adapter = await self._llm._get_adapter()
 
-                # Stream tokens from LangGraph
+                # Stream chunks from the FSM voice adapter
                 async for chunk in adapter.stream_response(
                     message=self._user_message,
                     session_id=self._session_id,
                     metadata=self._metadata,
                 ):
-                    if chunk.content and not chunk.is_final:
-                        # Push token to LiveKit TTS immediately
+                    if chunk.content:
+                        # Push chunk to LiveKit TTS immediately
                         self._event_ch.send_nowait(
                             ChatChunk(
                                 choices=[
@@ -221,12 +221,12 @@ if LIVEKIT_AVAILABLE:
                                 ]
                             )
                         )
-                    elif chunk.is_final:
+                    if chunk.is_final:
                         # Log completion metrics
                         if chunk.metadata:
                             logger.info(
                                 f"[livekit-llm] Complete: "
-                                f"tokens={chunk.metadata.get('tokens_yielded', 0)}, "
+                                f"chunks={chunk.metadata.get('chunks_yielded', 0)}, "
                                 f"ttft={chunk.metadata.get('ttft_ms', 'N/A')}ms, "
                                 f"total={chunk.metadata.get('total_time_ms', 'N/A')}ms"
                             )
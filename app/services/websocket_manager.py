@@ -2,20 +2,35 @@
 WebSocket Manager for Real-Time Updates
 Implements Phase 3: Real-Time Multi-Source Updates
 Handles live notifications for appointment changes, calendar conflicts, and availability updates
+
+Delivery goes through the shared fan-out hub (app/websocket/fanout.py):
+each notification is serialized once per audience, queued per socket, and
+relayed to the other nodes over Redis. A connection's topics:
+- (doctor:<id> | patient:<id> | clinic:<id>, "appointments") for its ids
+- ("*", "sub:<subscription type>") for each of its subscriptions
 """
 
-import json
-import asyncio
 import logging
 from datetime import datetime
+from functools import partial
 from typing import Dict, List, Set, Optional, Any
 from dataclasses import dataclass, asdict
 from enum import Enum
 
-from fastapi import WebSocket, WebSocketDisconnect
+from fastapi import WebSocket
 from supabase import create_client, Client
 import os
 
+from app.websocket.fanout import (
+    FanoutConnection,
+    FanoutHub,
+    GLOBAL_SCOPE,
+    clinic_scope,
+    doctor_scope,
+    get_fanout_hub,
+    patient_scope,
+)
+
 logger = logging.getLogger(__name__)
 
 class NotificationType(Enum):
@@ -35,6 +50,8 @@ class NotificationType(Enum):
     INTERVENTION_REQUIRED = "intervention_required"
     SYSTEM_ALERT = "system_alert"
     METRICS_UPDATE = "metrics_update"
+    # HITL control mode changes (see app/services/hitl_state_cache.py)
+    HITL_CONTROL_CHANGED = "hitl_control_changed"
 
 class SubscriptionType(Enum):
     DOCTOR_APPOINTMENTS = "doctor_appointments"
@@ -70,15 +87,22 @@ class ConnectionInfo:
     patient_id: Optional[str] = None
     connected_at: datetime = None
 
+# Fan-out channel of a doctor's, patient's or clinic's appointment updates
+APPOINTMENTS_CHANNEL = "appointments"
+
 class WebSocketManager:
     """
     Manages WebSocket connections for real-time updates
     Handles subscription-based notifications and multi-source calendar events
     """
 
-    def __init__(self):
+    def __init__(self, hub: Optional[FanoutHub] = None):
+        self.hub = hub or get_fanout_hub()
+
         # Active connections by connection ID
         self.connections: Dict[str, ConnectionInfo] = {}
+        # Fan-out registration per connection ID
+        self.fanout: Dict[str, FanoutConnection] = {}
 
         # Subscription mapping for efficient broadcasting
         self.doctor_subscriptions: Dict[str, Set[str]] = {}  # doctor_id -> set of connection_ids
@@ -134,6 +158,11 @@ class WebSocketManager:
 
         # Add to subscription mappings
         await self._add_to_subscriptions(connection_id, connection_info)
+        self.fanout[connection_id] = await self.hub.register(
+            websocket,
+            self._topics(connection_info),
+            on_close=partial(self.disconnect, connection_id),
+        )
 
         logger.info(f"WebSocket connected: {connection_id} ({user_type}:{user_id})")
 
@@ -154,6 +183,9 @@ class WebSocketManager:
 
             # Remove from subscription mappings
             await self._remove_from_subscriptions(connection_id, connection_info)
+            conn = self.fanout.pop(connection_id, None)
+            if conn is not None:
+                await self.hub.unregister(conn)
 
             # Close websocket
             try:
@@ -317,14 +349,12 @@ class WebSocketManager:
             elif channel == "monitoring":
                 subscription_type = SubscriptionType.MONITORING
 
-            # Broadcast to all connections with matching subscription
-            for ws, subs in self.connections.items():
-                if subscription_type in subs or SubscriptionType.ALL_UPDATES in subs:
-                    try:
-                        await ws.send_text(message)
-                    except Exception as e:
-                        logger.error(f"Failed to send to connection: {e}")
-                        await self._handle_disconnect(ws)
+            # Broadcast to all connections with matching subscription, on every node
+            await self.hub.publish(
+                GLOBAL_SCOPE,
+                {f"sub:{subscription_type.value}", f"sub:{SubscriptionType.ALL_UPDATES.value}"},
+                message,
+            )
 
         except Exception as e:
             logger.error(f"Failed to broadcast message: {e}")
@@ -389,8 +419,64 @@ class WebSocketManager:
         except Exception as e:
             logger.error(f"Failed to broadcast hold expiration: {e}")
 
+    async def broadcast_hitl_control_change(self, clinic_id: str, control_state: Dict[str, Any]):
+        """
+        Push a session control mode change to the clinic's dashboards
+        """
+        notification = WebSocketNotification(
+            type=NotificationType.HITL_CONTROL_CHANGED,
+            data=control_state,
+            timestamp=datetime.now().isoformat(),
+            target_id=clinic_id,
+            subscription_type=SubscriptionType.DASHBOARD,
+            source="internal"
+        )
+
+        await self._broadcast_to_clinic(clinic_id, notification)
+
     # Private helper methods
 
+    @staticmethod
+    def _topics(connection_info: ConnectionInfo) -> Set:
+        """Fan-out topics for a connection's ids and subscriptions"""
+        topics = {(GLOBAL_SCOPE, f"sub:{sub.value}") for sub in connection_info.subscriptions}
+        if connection_info.doctor_id:
+            topics.add((doctor_scope(connection_info.doctor_id), APPOINTMENTS_CHANNEL))
+        if connection_info.patient_id:
+            topics.add((patient_scope(connection_info.patient_id), APPOINTMENTS_CHANNEL))
+        if connection_info.clinic_id:
+            topics.add((clinic_scope(connection_info.clinic_id), APPOINTMENTS_CHANNEL))
+        return topics
+
+    @staticmethod
+    def _notification_message(notification: WebSocketNotification) -> Dict[str, Any]:
+        message = asdict(notification)
+        # Enums are not JSON serializable
+        message['type'] = notification.type.value
+        message['subscription_type'] = notification.subscription_type.value
+        return message
+
+    @staticmethod
+    def _coalesce_key(notification: WebSocketNotification) -> Optional[str]:
+        """Key of notifications where only the latest one matters to a slow client"""
+        data = notification.data
+        if notification.type == NotificationType.AVAILABILITY_UPDATED:
+            return f"availability:{data.get('doctor_id')}:{data.get('date')}"
+        if notification.type == NotificationType.METRICS_UPDATE:
+            return "metrics"
+        if notification.type == NotificationType.HITL_CONTROL_CHANGED and data.get('session_id'):
+            return f"hitl:{data['session_id']}"
+        return None
+
+    async def _publish(self, scope: str, channel: str, notification: WebSocketNotification):
+        """Deliver a notification to a topic on every node"""
+        await self.hub.publish(
+            scope,
+            channel,
+            self._notification_message(notification),
+            coalesce_key=self._coalesce_key(notification),
+        )
+
     async def _add_to_subscriptions(self, connection_id: str, connection_info: ConnectionInfo):
         """Add connection to subscription mappings"""
         if connection_info.doctor_id:
@@ -427,14 +513,12 @@ class WebSocketManager:
 
     async def _broadcast_to_doctor(self, doctor_id: str, notification: WebSocketNotification):
         """Broadcast notification to all connections subscribed to a doctor"""
-        if doctor_id and doctor_id in self.doctor_subscriptions:
-            connection_ids = self.doctor_subscriptions[doctor_id].copy()
-            await self._broadcast_to_connections(connection_ids, notification)
+        if doctor_id:
+            await self._publish(doctor_scope(doctor_id), APPOINTMENTS_CHANNEL, notification)
 
     async def _broadcast_to_patient(self, patient_id: str, notification: WebSocketNotification):
         """Broadcast notification to all connections subscribed to a patient"""
-        if patient_id and patient_id in self.patient_subscriptions:
-            connection_ids = self.patient_subscriptions[patient_id].copy()
+        if patient_id:
             # Create patient-specific notification
             patient_notification = WebSocketNotification(
                 type=notification.type,
@@ -444,12 +528,11 @@ class WebSocketManager:
                 subscription_type=SubscriptionType.PATIENT_APPOINTMENTS,
                 source=notification.source
             )
-            await self._broadcast_to_connections(connection_ids, patient_notification)
+            await self._publish(patient_scope(patient_id), APPOINTMENTS_CHANNEL, patient_notification)
 
     async def _broadcast_to_clinic(self, clinic_id: str, notification: WebSocketNotification):
         """Broadcast notification to all connections subscribed to a clinic"""
-        if clinic_id and clinic_id in self.clinic_subscriptions:
-            connection_ids = self.clinic_subscriptions[clinic_id].copy()
+        if clinic_id:
             # Create clinic-specific notification
             clinic_notification = WebSocketNotification(
                 type=notification.type,
@@ -459,17 +542,11 @@ class WebSocketManager:
                 subscription_type=SubscriptionType.CLINIC_APPOINTMENTS,
                 source=notification.source
             )
-            await self._broadcast_to_connections(connection_ids, clinic_notification)
+            await self._publish(clinic_scope(clinic_id), APPOINTMENTS_CHANNEL, clinic_notification)
 
     async def _broadcast_to_availability_subscribers(self, notification: WebSocketNotification):
         """Broadcast to all connections subscribed to availability changes"""
-        target_connections = set()
-
-        for connection_id, connection_info in self.connections.items():
-            if SubscriptionType.AVAILABILITY_CHANGES in connection_info.subscriptions:
-                target_connections.add(connection_id)
-
-        await self._broadcast_to_connections(target_connections, notification)
+        await self._publish(GLOBAL_SCOPE, f"sub:{SubscriptionType.AVAILABILITY_CHANGES.value}", notification)
 
     async def _broadcast_to_clinic_admins(self, doctor_id: str, notification: WebSocketNotification):
         """Broadcast to clinic admins for a given doctor"""
@@ -491,33 +568,20 @@ class WebSocketManager:
         connection_ids: Set[str],
         notification: WebSocketNotification
     ):
-        """Send notification to specific connection IDs"""
-        message = asdict(notification)
-
-        # Send to all connections in parallel
-        tasks = []
-        for connection_id in connection_ids:
-            if connection_id in self.connections:
-                tasks.append(self._send_to_connection(connection_id, message))
-
-        if tasks:
-            await asyncio.gather(*tasks, return_exceptions=True)
+        """Send notification to specific local connection IDs"""
+        connections = [self.fanout[cid] for cid in connection_ids if cid in self.fanout]
+        if connections:
+            self.hub.send(
+                connections,
+                self._notification_message(notification),
+                coalesce_key=self._coalesce_key(notification),
+            )
 
     async def _send_to_connection(self, connection_id: str, message: Dict[str, Any]):
         """Send message to a specific connection"""
-        if connection_id not in self.connections:
-            return
-
-        connection_info = self.connections[connection_id]
-
-        try:
-            await connection_info.websocket.send_text(json.dumps(message))
-        except WebSocketDisconnect:
-            # Connection closed, remove it
-            await self.disconnect(connection_id)
-        except Exception as e:
-            logger.error(f"Failed to send message to {connection_id}: {e}")
-            await self.disconnect(connection_id)
+        conn = self.fanout.get(connection_id)
+        if conn is not None:
+            self.hub.send([conn], message)
 
     async def get_connection_stats(self) -> Dict[str, Any]:
         """Get current WebSocket connection statistics"""
@@ -19,6 +19,9 @@ from app.database import get_healthcare_client
 
 logger = logging.getLogger(__name__)
 
+# Longest startup waits for the tokenizer (a first run downloads it)
+TOKENIZER_LOAD_TIMEOUT = 10.0
+
 
 async def warmup_services(client: httpx.AsyncClient):
     """Warm up external services on startup with timeouts to prevent blocking."""
@@ -100,6 +103,36 @@ async def init_workers(app: FastAPI):
     except Exception as e:
         logger.error(f"Failed to start message plan worker: {str(e)}")
 
+    # Follow-up dispatcher (Redis-indexed scheduled follow-ups)
+    try:
+        from app.workers.followup_dispatcher import FollowupDispatcher
+        followup_dispatcher = FollowupDispatcher()
+        asyncio.create_task(followup_dispatcher.start())
+        app.state.followup_dispatcher = followup_dispatcher
+        logger.info("✅ Follow-up dispatcher started")
+    except Exception as e:
+        logger.error(f"Failed to start follow-up dispatcher: {str(e)}")
+
+    # Session summary worker (batched summaries of closed sessions)
+    try:
+        from app.workers.session_summary_worker import get_session_summary_worker
+        session_summary_worker = get_session_summary_worker()
+        asyncio.create_task(session_summary_worker.start())
+        app.state.session_summary_worker = session_summary_worker
+        logger.info("✅ Session summary worker started")
+    except Exception as e:
+        logger.error(f"Failed to start session summary worker: {str(e)}")
+
+    # Websocket fan-out (cross-node delivery over Redis pub/sub)
+    try:
+        from app.websocket.fanout import get_fanout_hub
+        websocket_hub = get_fanout_hub()
+        asyncio.create_task(websocket_hub.start())
+        app.state.websocket_hub = websocket_hub
+        logger.info("✅ Websocket fan-out started")
+    except Exception as e:
+        logger.error(f"Failed to start websocket fan-out: {str(e)}")
+
 
 async def init_billing_services():
     """Initialize billing listener and reconciliation worker."""
@@ -139,6 +172,17 @@ async def init_http_client(app: FastAPI):
 
 async def warmup_caches():
     """Warm up Redis and other caches."""
+    # Tokenizer for context budgeting; tiktoken may download it, so off the loop
+    try:
+        from app.utils.token_counter import load_encoding
+        if await asyncio.wait_for(asyncio.to_thread(load_encoding), timeout=TOKENIZER_LOAD_TIMEOUT):
+            logger.info("✅ Tokenizer loaded for context budgeting")
+    except asyncio.TimeoutError:
+        # The load keeps going in its thread; counts are estimated until it lands
+        logger.warning(f"Tokenizer still loading after {TOKENIZER_LOAD_TIMEOUT:g}s, continuing startup")
+    except Exception as e:
+        logger.warning(f"Failed to load tokenizer: {e}")
+
     # Redis cache with clinic data
     try:
         from app.startup_warmup import warmup_clinic_data
@@ -202,6 +246,30 @@ async def stop_workers(app: FastAPI):
     except Exception as e:
         logger.error(f"Error stopping message plan worker: {str(e)}")
 
+    # Follow-up dispatcher
+    try:
+        if hasattr(app.state, 'followup_dispatcher'):
+            await app.state.followup_dispatcher.stop()
+            logger.info("✅ Follow-up dispatcher stopped")
+    except Exception as e:
+        logger.error(f"Error stopping follow-up dispatcher: {str(e)}")
+
+    # Session summary worker
+    try:
+        if hasattr(app.state, 'session_summary_worker'):
+            await app.state.session_summary_worker.stop()
+            logger.info("✅ Session summary worker stopped")
+    except Exception as e:
+        logger.error(f"Error stopping session summary worker: {str(e)}")
+
+    # Websocket fan-out
+    try:
+        if hasattr(app.state, 'websocket_hub'):
+            await app.state.websocket_hub.stop()
+            logger.info("✅ Websocket fan-out stopped")
+    except Exception as e:
+        logger.error(f"Error stopping websocket fan-out: {str(e)}")
+
     # Billing listener
     try:
         from app.services.billing_listener import stop_billing_listener
@@ -238,6 +306,15 @@ async def lifespan(app: FastAPI):
 
     logger.info(f"Connected to Supabase: {os.getenv('SUPABASE_URL')}")
 
+    # Opt-in event loop / per-request I/O instrumentation
+    try:
+        from app.observability.io_accounting import install_io_instrumentation
+        from app.observability.loop_watchdog import start_loop_watchdog
+        install_io_instrumentation()
+        start_loop_watchdog()
+    except Exception as e:
+        logger.warning(f"Failed to initialize I/O instrumentation: {e}")
+
     # Initialize HIPAA systems
     await init_hipaa_systems(app, supabase)
 
@@ -263,12 +340,24 @@ async def lifespan(app: FastAPI):
 
     await stop_workers(app)
 
+    try:
+        from app.observability.loop_watchdog import stop_loop_watchdog
+        await stop_loop_watchdog()
+    except Exception as e:
+        logger.warning(f"Error stopping loop watchdog: {e}")
+
     # Close HTTP client
     if hasattr(app.state, 'http_client') and app.state.http_client:
         await app.state.http_client.aclose()
         logger.info("✅ HTTP client closed")
 
-    # Flush Langfuse events
+    # Flush buffered spans, then Langfuse events
+    try:
+        from app.observability import shutdown_span_exporter
+        await shutdown_span_exporter()
+    except Exception as e:
+        logger.warning(f"Error flushing span exporter: {e}")
+
     try:
         from app.observability import flush_langfuse
         await flush_langfuse()
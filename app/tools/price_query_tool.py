@@ -27,8 +27,8 @@ from typing import Optional, List, Dict, Any
 from supabase import create_client, Client
 from supabase.client import ClientOptions
 from postgrest.exceptions import APIError
+from app.services.message_analysis import analyze
 from app.utils.text_normalization import (
-    normalize_query,
     format_price_reply,
     quick_reply
 )
@@ -112,10 +112,11 @@ class PriceQueryTool:
     def _detect_language(self, query: str) -> str:
         """Detect language of query based on character analysis."""
         # Simple detection: Cyrillic = Russian, else English
-        if any('\u0400' <= c <= '\u04FF' for c in query):
+        analysis = analyze(query)
+        if analysis.has_cyrillic:
             return 'ru'
         # Check for Spanish/Portuguese common characters
-        if any(c in query.lower() for c in 'áéíóúñü'):
+        if analysis.has_latin_accents:
             return 'es'
         return 'en'
 
@@ -360,7 +361,7 @@ class PriceQueryTool:
                     session_id = str(uuid.uuid4())
 
             # Normalize query - synonym expansion now handled by database alias layer
-            normalized = normalize_query(query)
+            normalized = analyze(query).normalized
 
             # Detect language for vector search
             language = self._detect_language(query)
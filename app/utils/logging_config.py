@@ -5,13 +5,30 @@ Provides consistent logging setup across the application.
 When running in containers (Docker/Kubernetes/Fly.io), timestamps are omitted
 from the Python log formatter since container runtimes add their own timestamps.
 
+Records are handed to a QueueListener thread that formats and writes them,
+so a log call on the event loop costs an enqueue, not a blocking write to
+stdout. Set LOG_QUEUE_ENABLED=false to write synchronously.
+
 Usage:
-    from app.utils.logging_config import configure_logging
+    from app.utils.logging_config import configure_logging, LazyJSON
     configure_logging()
+
+    # Serialized only if DEBUG is enabled, and then in the listener thread
+    logger.debug("payload: %s", LazyJSON(fields))
 """
+import atexit
+import json
 import os
+import queue
 import sys
 import logging
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements
+    orjson = None
 
 # Detect container environment
 IS_CONTAINERIZED = bool(
@@ -29,6 +46,67 @@ LOCAL_FORMAT = "[%(asctime)s] [%(name)s] %(levelname)s: %(message)s"
 # Date format for local development
 DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
 
+LOG_QUEUE_ENABLED = os.environ.get("LOG_QUEUE_ENABLED", "true").lower() == "true"
+
+_listener: Optional[QueueListener] = None
+
+
+class LazyJSON:
+    """
+    Defers JSON serialization of a log argument until the record is formatted.
+
+    Nothing is serialized when the logger's level is disabled. The wrapped
+    object must not be mutated after the log call.
+    """
+    __slots__ = ("value", "limit")
+
+    def __init__(self, value: Any, limit: Optional[int] = None):
+        self.value = value
+        self.limit = limit
+
+    def __str__(self) -> str:
+        if orjson is not None:
+            text = orjson.dumps(self.value, default=str).decode()
+        else:
+            text = json.dumps(self.value, default=str, ensure_ascii=False)
+        return text[:self.limit] if self.limit else text
+
+
+# Argument types that cannot change between the log call and formatting
+_IMMUTABLE_ARG_TYPES = (str, bytes, int, float, bool, type(None))
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves LazyJSON formatting to the listener thread.
+
+    Records whose arguments are all LazyJSON or immutable scalars are
+    enqueued unformatted, so LazyJSON serializes on the listener thread.
+    Every other record goes through the stock prepare(), which formats on
+    the calling thread before a mutable argument can change.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if (
+            isinstance(record.msg, str)
+            and isinstance(record.args, tuple)
+            and any(isinstance(arg, LazyJSON) for arg in record.args)
+            and all(isinstance(arg, (LazyJSON,) + _IMMUTABLE_ARG_TYPES) for arg in record.args)
+        ):
+            return record
+        return super().prepare(record)
+
+
+def stop_log_listener() -> None:
+    """Drain queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_log_listener)
+
 
 def configure_logging(level: int = logging.INFO, force: bool = False) -> None:
     """
@@ -38,6 +116,7 @@ def configure_logging(level: int = logging.INFO, force: bool = False) -> None:
         level: Logging level (default: INFO)
         force: Force reconfiguration even if already configured
     """
+    global _listener
     root_logger = logging.getLogger()
 
     # Avoid reconfiguring if already set up (unless forced)
@@ -46,6 +125,7 @@ def configure_logging(level: int = logging.INFO, force: bool = False) -> None:
 
     # Clear existing handlers if forcing reconfiguration
     if force:
+        stop_log_listener()
         for handler in root_logger.handlers[:]:
             root_logger.removeHandler(handler)
 
@@ -63,7 +143,13 @@ def configure_logging(level: int = logging.INFO, force: bool = False) -> None:
 
     # Configure root logger
     root_logger.setLevel(level)
-    root_logger.addHandler(handler)
+    if LOG_QUEUE_ENABLED:
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        _listener = QueueListener(log_queue, handler, respect_handler_level=True)
+        _listener.start()
+        root_logger.addHandler(_DeferredQueueHandler(log_queue))
+    else:
+        root_logger.addHandler(handler)
 
     # Suppress noisy third-party loggers
     logging.getLogger('httpx').setLevel(logging.WARNING)
@@ -1,13 +1,35 @@
-"""Token counting utilities for context budgeting."""
+"""
+Token counting utilities for context budgeting.
+
+Counts use tiktoken once load_encoding() has run (the app calls it at
+startup, off the event loop). Loading may download the BPE file, so it is
+never done lazily on the message path; until then, and when it fails,
+counts fall back to the length estimate. Point TIKTOKEN_CACHE_DIR at a
+directory holding the file to load it without network access.
+"""
 
 import logging
-from typing import List, Dict
+import threading
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
 # Approximation: 1 token ≈ 4 characters for English, 2-3 for others
 CHARS_PER_TOKEN = 4
 
+# Tokenizer used for budgeting; close enough to every provider we route to
+TOKENIZER_ENCODING = "o200k_base"
+
+_encoding = None
+_encoding_lock = threading.Lock()
+
 
 def estimate_tokens(text: str) -> int:
     """Estimate token count for text (conservative approximation)."""
@@ -16,14 +38,73 @@ def estimate_tokens(text: str) -> int:
     return len(text) // CHARS_PER_TOKEN
 
 
+def load_encoding() -> bool:
+    """
+    Load the tokenizer (blocking: may download it). Returns whether it is loaded.
+
+    Call from a worker thread, e.g. asyncio.to_thread(load_encoding).
+    """
+    global _encoding
+    if not TIKTOKEN_AVAILABLE:
+        return False
+    with _encoding_lock:
+        if _encoding is None:
+            try:
+                _encoding = tiktoken.get_encoding(TOKENIZER_ENCODING)
+            except Exception as e:
+                logger.warning(f"tiktoken encoding unavailable, estimating tokens from length: {e}")
+                return False
+            # Drop counts estimated before the tokenizer was available
+            count_tokens.cache_clear()
+    return True
+
+
+def _get_encoding():
+    return _encoding
+
+
+@lru_cache(maxsize=4096)
+def count_tokens(text: str) -> int:
+    """Count tokens with the tokenizer, or estimate when tiktoken is missing."""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def message_tokens(msg: Dict) -> int:
+    """Tokens of one message's content."""
+    content = msg.get('content', '') or msg.get('message_content', '')
+    return count_tokens(str(content)) if content else 0
+
+
 def count_message_tokens(messages: List[Dict]) -> int:
     """Count total tokens in message list."""
-    total = 0
-    for msg in messages:
-        content = msg.get('content', '') or msg.get('message_content', '')
-        if content:
-            total += estimate_tokens(str(content))
-    return total
+    return sum(message_tokens(msg) for msg in messages)
+
+
+def split_to_budget(
+    messages: List[Dict],
+    max_tokens: int,
+    min_recent: int = 0
+) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Split messages (oldest first) into (older, recent).
+
+    recent is the longest suffix that fits max_tokens, but never fewer than
+    min_recent messages; older is everything before it.
+    """
+    used = 0
+    start = len(messages)
+    for index in range(len(messages) - 1, -1, -1):
+        tokens = message_tokens(messages[index])
+        if used + tokens > max_tokens and len(messages) - index > min_recent:
+            break
+        used += tokens
+        start = index
+    return messages[:start], messages[start:]
 
 
 def truncate_to_budget(
@@ -63,8 +144,7 @@ def truncate_to_budget(
 
     # Iterate from most recent older messages backwards
     for msg in reversed(older_messages):
-        content = msg.get('content', '') or msg.get('message_content', '')
-        msg_tokens = estimate_tokens(str(content)) if content else 0
+        msg_tokens = message_tokens(msg)
         if msg_tokens <= remaining_budget:
             included_older.insert(0, msg)  # Prepend to maintain order
             remaining_budget -= msg_tokens
@@ -0,0 +1,534 @@
+"""
+WebSocket Fan-out Hub
+
+The one socket registry and delivery path behind both websocket managers
+(app/websocket/manager.py for data sync, app/services/websocket_manager.py
+for appointment and dashboard notifications). The managers keep their
+APIs and bookkeeping; the hub owns the sockets' send queues and delivery.
+
+- An event is serialized once, however many sockets receive it
+- Each socket has a bounded send queue drained by its own sender task, so a
+  slow client never delays the others. A frame with a coalesce key replaces
+  the queued frame with the same key (latest state wins). A socket whose
+  queue is full, or whose send takes longer than WS_SEND_TIMEOUT_SECONDS,
+  is closed as a slow consumer; clients reconnect and resync.
+- Sockets subscribe to topics (scope, channel). A scope is
+  clinic:<id>, doctor:<id>, patient:<id>, or * for events without one.
+- Events are published to Redis on ws:<scope>, so sockets on other nodes
+  receive them. Each node subscribes only to the scopes of its own sockets
+  (and to ws:*), and ignores its own events.
+
+Without Redis (WS_BACKPLANE_ENABLED=false, or Redis unreachable at
+startup) the hub delivers to local sockets only.
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+import uuid
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, Optional, Set, Tuple
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Frames queued per socket before it is closed as a slow consumer
+WS_SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "256"))
+
+# Longest a single frame may take to send
+WS_SEND_TIMEOUT_SECONDS = float(os.getenv("WS_SEND_TIMEOUT_SECONDS", "10"))
+
+# Cross-node delivery through Redis pub/sub
+WS_BACKPLANE_ENABLED = os.getenv("WS_BACKPLANE_ENABLED", "true").lower() == "true"
+
+BACKPLANE_PREFIX = "ws:"
+GLOBAL_SCOPE = "*"
+
+# 1013 (try again later): the client should reconnect and resync
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+# (scope, channel)
+Topic = Tuple[str, str]
+OnClose = Callable[[], Awaitable[Any]]
+
+
+def clinic_scope(clinic_id: str) -> str:
+    return f"clinic:{clinic_id}"
+
+
+def doctor_scope(doctor_id: str) -> str:
+    return f"doctor:{doctor_id}"
+
+
+def patient_scope(patient_id: str) -> str:
+    return f"patient:{patient_id}"
+
+
+def serialize(message: Any) -> str:
+    """Serialize a message to the text frame every recipient gets."""
+    if isinstance(message, str):
+        return message
+    if orjson is not None:
+        return orjson.dumps(message, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(message, default=str)
+
+
+def _loads(data: Any) -> Any:
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def _observe_fanout(origin: str, recipients: int, coalesced: int, duration_seconds: float) -> None:
+    """Best-effort Prometheus export (prometheus_client is optional here)."""
+    try:
+        from app.observability.metrics import observe_websocket_fanout
+        observe_websocket_fanout(origin, recipients, coalesced, duration_seconds)
+    except Exception as e:
+        logger.debug(f"Failed to record websocket fan-out metric: {e}")
+
+
+def _observe_closed(dropped_frames: int, slow_reason: Optional[str] = None) -> None:
+    try:
+        from app.observability.metrics import (
+            observe_websocket_frames,
+            observe_websocket_slow_consumer,
+        )
+        if dropped_frames:
+            observe_websocket_frames('dropped', dropped_frames)
+        if slow_reason:
+            observe_websocket_slow_consumer(slow_reason)
+    except Exception as e:
+        logger.debug(f"Failed to record websocket close metric: {e}")
+
+
+class FanoutConnection:
+    """One socket: its topics and bounded send queue."""
+
+    def __init__(self, websocket: Any, topics: Iterable[Topic], queue_size: int, on_close: Optional[OnClose]):
+        self.id = uuid.uuid4().hex
+        self.websocket = websocket
+        self.topics: Set[Topic] = set(topics)
+        self.queue_size = queue_size
+        self.on_close = on_close
+        self.closed = False
+        self.sent = 0
+        # [coalesce_key, payload] entries, oldest first
+        self._queue: Deque[list] = deque()
+        # Coalesce key -> its queued entry
+        self._keyed: Dict[str, list] = {}
+        self._ready = asyncio.Event()
+        self._sender: Optional[asyncio.Task] = None
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue)
+
+    def offer(self, payload: str, coalesce_key: Optional[str] = None) -> str:
+        """Queue a frame without waiting: 'queued', 'coalesced', 'full' or 'closed'."""
+        if self.closed:
+            return 'closed'
+        if coalesce_key is not None:
+            entry = self._keyed.get(coalesce_key)
+            if entry is not None:
+                entry[1] = payload
+                return 'coalesced'
+        if len(self._queue) >= self.queue_size:
+            return 'full'
+        entry = [coalesce_key, payload]
+        self._queue.append(entry)
+        if coalesce_key is not None:
+            self._keyed[coalesce_key] = entry
+        self._ready.set()
+        return 'queued'
+
+    def _pop(self) -> str:
+        entry = self._queue.popleft()
+        key = entry[0]
+        if key is not None and self._keyed.get(key) is entry:
+            del self._keyed[key]
+        return entry[1]
+
+    def _discard_queue(self) -> int:
+        dropped = len(self._queue)
+        self._queue.clear()
+        self._keyed.clear()
+        return dropped
+
+
+class FanoutHub:
+    """Serialize-once, per-socket-queued fan-out with a Redis backplane."""
+
+    def __init__(
+        self,
+        redis_client: Any = None,
+        node_id: Optional[str] = None,
+        queue_size: int = WS_SEND_QUEUE_SIZE,
+        send_timeout: float = WS_SEND_TIMEOUT_SECONDS,
+        backplane: bool = WS_BACKPLANE_ENABLED,
+    ):
+        self.node_id = node_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.queue_size = max(queue_size, 1)
+        self.send_timeout = send_timeout
+        self.backplane_enabled = backplane
+        self.is_running = False
+        self._redis = redis_client
+        self._pubsub = None
+        self._connections: Set[FanoutConnection] = set()
+        self._topics: Dict[Topic, Set[FanoutConnection]] = {}
+        # Scope -> number of its topics with local sockets
+        self._scopes: Dict[str, int] = {}
+        self._subscribed: Set[str] = set()
+        self._subscribe_lock = asyncio.Lock()
+        self._tasks: Set[asyncio.Task] = set()
+        self.stats = {
+            'published': 0, 'received': 0, 'queued': 0, 'coalesced': 0,
+            'slow_consumers': 0, 'publish_errors': 0,
+        }
+
+    @property
+    def backplane_connected(self) -> bool:
+        return self._pubsub is not None
+
+    # Connections
+
+    async def register(
+        self,
+        websocket: Any,
+        topics: Iterable[Topic],
+        on_close: Optional[OnClose] = None,
+    ) -> FanoutConnection:
+        """Register an accepted socket and start its sender.
+
+        on_close is awaited once when the hub drops the socket (send failed,
+        slow consumer), so the owning manager can clean up its own state.
+        """
+        conn = FanoutConnection(websocket, topics, self.queue_size, on_close)
+        self._connections.add(conn)
+        scopes = [self._add_topic(conn, topic) for topic in conn.topics]
+        conn._sender = asyncio.create_task(self._send_loop(conn))
+        for scope in scopes:
+            if scope:
+                await self._sync_scope(scope)
+        return conn
+
+    async def set_topics(self, conn: FanoutConnection, topics: Iterable[Topic]) -> None:
+        """Replace a socket's topics."""
+        if conn.closed:
+            return
+        topics = set(topics)
+        changed = [self._remove_topic(conn, topic) for topic in conn.topics - topics]
+        changed += [self._add_topic(conn, topic) for topic in topics - conn.topics]
+        conn.topics = topics
+        for scope in changed:
+            if scope:
+                await self._sync_scope(scope)
+
+    async def unregister(self, conn: FanoutConnection) -> None:
+        """Forget a socket and stop its sender; queued frames are dropped."""
+        if conn not in self._connections:
+            return
+        self._connections.discard(conn)
+        conn.closed = True
+        conn._ready.set()
+        _observe_closed(conn._discard_queue())
+        scopes = [self._remove_topic(conn, topic) for topic in conn.topics]
+        if conn._sender is not None and conn._sender is not asyncio.current_task():
+            conn._sender.cancel()
+        for scope in scopes:
+            if scope:
+                await self._sync_scope(scope)
+
+    def _add_topic(self, conn: FanoutConnection, topic: Topic) -> Optional[str]:
+        """Add a socket to a topic; returns the scope if it gained its first topic."""
+        members = self._topics.get(topic)
+        if members is None:
+            members = self._topics[topic] = set()
+            scope = topic[0]
+            self._scopes[scope] = self._scopes.get(scope, 0) + 1
+            members.add(conn)
+            return scope if self._scopes[scope] == 1 else None
+        members.add(conn)
+        return None
+
+    def _remove_topic(self, conn: FanoutConnection, topic: Topic) -> Optional[str]:
+        """Remove a socket from a topic; returns the scope if it lost its last topic."""
+        members = self._topics.get(topic)
+        if members is None:
+            return None
+        members.discard(conn)
+        if members:
+            return None
+        del self._topics[topic]
+        scope = topic[0]
+        self._scopes[scope] -= 1
+        if self._scopes[scope]:
+            return None
+        del self._scopes[scope]
+        return scope
+
+    # Delivery
+
+    async def publish(
+        self,
+        scope: str,
+        channels: Iterable[str],
+        message: Any,
+        coalesce_key: Optional[str] = None,
+        exclude: Optional[FanoutConnection] = None,
+    ) -> int:
+        """Deliver an event to every socket on (scope, channel), on every node.
+
+        Returns the number of local sockets it was queued for.
+        """
+        channels = (channels,) if isinstance(channels, str) else tuple(channels)
+        payload = serialize(message)
+        delivered = self.deliver(scope, channels, payload, coalesce_key, exclude)
+        self.stats['published'] += 1
+
+        if self._pubsub is not None:
+            envelope = serialize({
+                'node': self.node_id,
+                'scope': scope,
+                'channels': channels,
+                'key': coalesce_key,
+                'payload': payload,
+            })
+            try:
+                await self._redis.publish(BACKPLANE_PREFIX + scope, envelope)
+            except Exception as e:
+                self.stats['publish_errors'] += 1
+                logger.warning(f"Failed to publish websocket event to {BACKPLANE_PREFIX}{scope}: {e}")
+        return delivered
+
+    def deliver(
+        self,
+        scope: str,
+        channels: Tuple[str, ...],
+        payload: str,
+        coalesce_key: Optional[str] = None,
+        exclude: Optional[FanoutConnection] = None,
+        origin: str = 'local',
+    ) -> int:
+        """Queue a serialized event for the local sockets on (scope, channel)."""
+        started = time.perf_counter()
+        if len(channels) == 1:
+            recipients = self._topics.get((scope, channels[0]), ())
+        else:
+            recipients = set()
+            for channel in channels:
+                recipients.update(self._topics.get((scope, channel), ()))
+
+        queued = coalesced = 0
+        slow = []
+        for conn in recipients:
+            if conn is exclude:
+                continue
+            outcome = conn.offer(payload, coalesce_key)
+            if outcome == 'queued':
+                queued += 1
+            elif outcome == 'coalesced':
+                coalesced += 1
+            elif outcome == 'full':
+                slow.append(conn)
+        for conn in slow:
+            self._slow_consumer(conn, 'queue_full')
+
+        self.stats['queued'] += queued
+        self.stats['coalesced'] += coalesced
+        if queued or coalesced:
+            _observe_fanout(origin, queued + coalesced, coalesced, time.perf_counter() - started)
+        return queued + coalesced
+
+    def send(
+        self,
+        connections: Iterable[FanoutConnection],
+        message: Any,
+        coalesce_key: Optional[str] = None,
+    ) -> int:
+        """Queue one message for specific local sockets (replies, heartbeats)."""
+        payload = serialize(message)
+        queued = 0
+        slow = []
+        for conn in connections:
+            outcome = conn.offer(payload, coalesce_key)
+            if outcome in ('queued', 'coalesced'):
+                queued += 1
+            elif outcome == 'full':
+                slow.append(conn)
+        for conn in slow:
+            self._slow_consumer(conn, 'queue_full')
+        return queued
+
+    async def _send_loop(self, conn: FanoutConnection):
+        """Drain one socket's queue, one frame at a time."""
+        websocket = conn.websocket
+        while not conn.closed:
+            if not conn._queue:
+                conn._ready.clear()
+                await conn._ready.wait()
+                continue
+            payload = conn._pop()
+            try:
+                await asyncio.wait_for(websocket.send_text(payload), timeout=self.send_timeout)
+                conn.sent += 1
+            except asyncio.TimeoutError:
+                self._slow_consumer(conn, 'send_timeout')
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Client went away
+                logger.debug(f"Websocket send failed for {conn.id}: {e}")
+                await self._finish(conn)
+                return
+
+    def _slow_consumer(self, conn: FanoutConnection, reason: str):
+        """Close a socket that cannot keep up, without waiting for it."""
+        if conn.closed:
+            return
+        conn.closed = True
+        conn._ready.set()
+        self.stats['slow_consumers'] += 1
+        logger.warning(f"Closing slow websocket consumer {conn.id} ({reason}, {conn.depth} frames queued)")
+        _observe_closed(0, reason)
+        task = asyncio.create_task(self._close(conn, SLOW_CONSUMER_CLOSE_CODE))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _close(self, conn: FanoutConnection, code: int):
+        try:
+            await asyncio.wait_for(conn.websocket.close(code=code), timeout=1.0)
+        except Exception:
+            pass  # Connection might already be gone
+        await self._finish(conn)
+
+    async def _finish(self, conn: FanoutConnection):
+        """Unregister a socket the hub gave up on and tell its manager."""
+        if conn not in self._connections:
+            return
+        await self.unregister(conn)
+        if conn.on_close is not None:
+            try:
+                await conn.on_close()
+            except Exception as e:
+                logger.error(f"Websocket close callback failed for {conn.id}: {e}")
+
+    # Backplane
+
+    async def start(self):
+        """Connect to Redis and relay other nodes' events until stopped."""
+        self.is_running = True
+        if not self.backplane_enabled:
+            logger.info("Websocket fan-out running without backplane (local sockets only)")
+            return
+
+        try:
+            if self._redis is None:
+                import redis.asyncio as aioredis
+
+                from app.config import REDIS_URL
+                self._redis = aioredis.from_url(REDIS_URL, decode_responses=True)
+            pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+            await pubsub.subscribe(BACKPLANE_PREFIX + GLOBAL_SCOPE)
+        except Exception as e:
+            logger.warning(f"Websocket backplane unavailable, delivering to local sockets only: {e}")
+            return
+
+        self._pubsub = pubsub
+        self._subscribed = {GLOBAL_SCOPE}
+        for scope in list(self._scopes):
+            await self._sync_scope(scope)
+        logger.info(f"Websocket fan-out backplane started (node {self.node_id})")
+
+        while self.is_running:
+            try:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message and message.get('type') == 'message':
+                    self._on_backplane_message(message['data'])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if not self.is_running:
+                    break
+                logger.error(f"Websocket backplane error: {e}")
+                await asyncio.sleep(1)
+
+    async def stop(self):
+        """Stop relaying and close every registered socket's sender."""
+        self.is_running = False
+        pubsub, self._pubsub = self._pubsub, None
+        if pubsub is not None:
+            try:
+                await pubsub.aclose()
+            except Exception as e:
+                logger.debug(f"Error closing websocket backplane: {e}")
+        self._subscribed = set()
+        for conn in list(self._connections):
+            await self.unregister(conn)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        logger.info("Websocket fan-out stopped")
+
+    async def _sync_scope(self, scope: str):
+        """Subscribe to a scope's channel while it has local sockets, and only then."""
+        if scope == GLOBAL_SCOPE:
+            return
+        async with self._subscribe_lock:
+            pubsub = self._pubsub
+            if pubsub is None:
+                return
+            wanted = scope in self._scopes
+            try:
+                if wanted and scope not in self._subscribed:
+                    await pubsub.subscribe(BACKPLANE_PREFIX + scope)
+                    self._subscribed.add(scope)
+                elif not wanted and scope in self._subscribed:
+                    await pubsub.unsubscribe(BACKPLANE_PREFIX + scope)
+                    self._subscribed.discard(scope)
+            except Exception as e:
+                logger.warning(f"Failed to update websocket backplane subscription for {scope}: {e}")
+
+    def _on_backplane_message(self, data: Any):
+        try:
+            envelope = _loads(data)
+        except ValueError as e:
+            logger.warning(f"Invalid websocket backplane message: {e}")
+            return
+        if envelope.get('node') == self.node_id:
+            return  # Already delivered locally
+        self.stats['received'] += 1
+        self.deliver(
+            envelope['scope'],
+            tuple(envelope['channels']),
+            envelope['payload'],
+            envelope.get('key'),
+            origin='backplane',
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'node_id': self.node_id,
+            'backplane_connected': self.backplane_connected,
+            'connections': len(self._connections),
+            'topics': len(self._topics),
+            'subscribed_scopes': len(self._subscribed),
+            'queued_frames': sum(conn.depth for conn in self._connections),
+            **self.stats,
+        }
+
+
+# Singleton instance
+_fanout_hub: Optional[FanoutHub] = None
+
+
+def get_fanout_hub() -> FanoutHub:
+    """Get or create singleton FanoutHub instance"""
+    global _fanout_hub
+    if _fanout_hub is None:
+        _fanout_hub = FanoutHub()
+    return _fanout_hub
@@ -1,16 +1,26 @@
 """
 WebSocket Connection Manager for Real-time Updates
 Manages WebSocket connections and broadcasts updates to connected clients
+
+Delivery goes through the shared fan-out hub (app/websocket/fanout.py):
+each broadcast is serialized once, queued per socket, and relayed to the
+other nodes over Redis. A connection's topics, all in its clinic's scope:
+- sync: every clinic broadcast
+- sync:unfiltered: table updates, while it has no table subscriptions
+- sync:table:<table>: updates of a subscribed table (also in the * scope,
+  for broadcasts to all clinics)
 """
 
+from functools import partial
 from typing import Dict, Set, List, Optional
 from fastapi import WebSocket, WebSocketDisconnect
-import json
 import logging
 import asyncio
 from datetime import datetime
 from enum import Enum
 
+from app.websocket.fanout import FanoutConnection, FanoutHub, GLOBAL_SCOPE, clinic_scope, get_fanout_hub
+
 logger = logging.getLogger(__name__)
 
 
@@ -33,13 +43,16 @@ class ConnectionManager:
     Groups connections by clinic for efficient broadcasting
     """
     
-    def __init__(self):
+    def __init__(self, hub: Optional[FanoutHub] = None):
+        self.hub = hub or get_fanout_hub()
         # Store active connections grouped by clinic_id
         self.active_connections: Dict[str, Set[WebSocket]] = {}
         # Store connection metadata
         self.connection_metadata: Dict[WebSocket, Dict] = {}
         # Store subscriptions per connection
         self.subscriptions: Dict[WebSocket, Set[str]] = {}
+        # Fan-out registration per connection
+        self.fanout: Dict[WebSocket, FanoutConnection] = {}
         # Lock for thread-safe operations
         self.lock = asyncio.Lock()
         # Heartbeat task
@@ -79,6 +92,12 @@ class ConnectionManager:
             
             # Initialize subscriptions
             self.subscriptions[websocket] = set()
+
+        self.fanout[websocket] = await self.hub.register(
+            websocket,
+            self._topics(clinic_id, set()),
+            on_close=partial(self.disconnect, websocket),
+        )
             
         logger.info(f"WebSocket connected: clinic={clinic_id}, user={user_id}")
         
@@ -118,7 +137,11 @@ class ConnectionManager:
             # Clean up metadata and subscriptions
             self.connection_metadata.pop(websocket, None)
             self.subscriptions.pop(websocket, None)
-            
+            conn = self.fanout.pop(websocket, None)
+
+        if conn is None:
+            return
+        await self.hub.unregister(conn)
         logger.info(f"WebSocket disconnected: clinic={clinic_id}")
     
     async def send_personal_message(self, websocket: WebSocket, message: Dict):
@@ -129,6 +152,10 @@ class ConnectionManager:
             websocket: Target WebSocket connection
             message: Message dictionary to send
         """
+        conn = self.fanout.get(websocket)
+        if conn is not None:
+            self.hub.send([conn], message)
+            return
         try:
             await websocket.send_json(message)
         except Exception as e:
@@ -142,38 +169,32 @@ class ConnectionManager:
         exclude: Optional[WebSocket] = None
     ):
         """
-        Broadcast a message to all connections in a clinic
+        Broadcast a message to all connections in a clinic, on every node
+
+        A message with a "table" only reaches connections subscribed to that
+        table, or with no table subscriptions at all.
         
         Args:
             clinic_id: Clinic ID to broadcast to
             message: Message dictionary to broadcast
             exclude: Optional WebSocket to exclude from broadcast
         """
-        if clinic_id not in self.active_connections:
-            return
-        
         # Add timestamp to message
         message["timestamp"] = datetime.utcnow().isoformat()
-        
-        # Get connections to send to
-        connections = self.active_connections[clinic_id].copy()
-        if exclude:
-            connections.discard(exclude)
-        
-        # Send to all connections
-        disconnected = []
-        for connection in connections:
-            try:
-                # Check if connection is subscribed to this type of update
-                if self._should_receive_message(connection, message):
-                    await connection.send_json(message)
-            except Exception as e:
-                logger.error(f"Error broadcasting to connection: {e}")
-                disconnected.append(connection)
-        
-        # Clean up disconnected connections
-        for connection in disconnected:
-            await self.disconnect(connection)
+
+        if "table" in message:
+            channels = ("sync:unfiltered", f"sync:table:{message['table']}")
+        else:
+            channels = ("sync",)
+        coalesce_key = "sync_status" if message.get("type") == MessageType.SYNC_STATUS.value else None
+
+        await self.hub.publish(
+            clinic_scope(clinic_id),
+            channels,
+            message,
+            coalesce_key=coalesce_key,
+            exclude=self.fanout.get(exclude) if exclude else None,
+        )
     
     async def broadcast_to_subscribed(
         self,
@@ -191,28 +212,9 @@ class ConnectionManager:
         """
         message["table"] = table
         message["timestamp"] = datetime.utcnow().isoformat()
-        
-        # Get relevant connections
-        if clinic_id:
-            connections = self.active_connections.get(clinic_id, set()).copy()
-        else:
-            connections = set()
-            for clinic_connections in self.active_connections.values():
-                connections.update(clinic_connections)
-        
-        # Send to subscribed connections
-        disconnected = []
-        for connection in connections:
-            if table in self.subscriptions.get(connection, set()):
-                try:
-                    await connection.send_json(message)
-                except Exception as e:
-                    logger.error(f"Error broadcasting to subscribed connection: {e}")
-                    disconnected.append(connection)
-        
-        # Clean up disconnected connections
-        for connection in disconnected:
-            await self.disconnect(connection)
+
+        scope = clinic_scope(clinic_id) if clinic_id else GLOBAL_SCOPE
+        await self.hub.publish(scope, f"sync:table:{table}", message)
     
     async def handle_message(self, websocket: WebSocket, message: Dict):
         """
@@ -237,6 +239,7 @@ class ConnectionManager:
             async with self.lock:
                 if websocket in self.subscriptions:
                     self.subscriptions[websocket].update(tables)
+            await self._update_topics(websocket)
             logger.debug(f"WebSocket subscribed to tables: {tables}")
             
         elif msg_type == MessageType.UNSUBSCRIBE.value:
@@ -246,29 +249,30 @@ class ConnectionManager:
                 if websocket in self.subscriptions:
                     for table in tables:
                         self.subscriptions[websocket].discard(table)
+            await self._update_topics(websocket)
             logger.debug(f"WebSocket unsubscribed from tables: {tables}")
     
-    def _should_receive_message(self, connection: WebSocket, message: Dict) -> bool:
-        """
-        Check if a connection should receive a specific message
-        
-        Args:
-            connection: The WebSocket connection
-            message: The message to check
-            
-        Returns:
-            True if the connection should receive the message
-        """
-        # If message has a table, check subscriptions
-        if "table" in message:
-            table = message["table"]
-            subscriptions = self.subscriptions.get(connection, set())
-            # If connection has subscriptions, only send if subscribed to this table
-            if subscriptions:
-                return table in subscriptions
-        
-        # Default to sending all messages if no subscriptions
-        return True
+    @staticmethod
+    def _topics(clinic_id: str, tables: Set[str]) -> Set:
+        """Fan-out topics for a connection with the given table subscriptions"""
+        scope = clinic_scope(clinic_id)
+        topics = {(scope, "sync")}
+        if not tables:
+            # No subscriptions: receives every table's updates in clinic broadcasts
+            topics.add((scope, "sync:unfiltered"))
+        for table in tables:
+            topics.add((scope, f"sync:table:{table}"))
+            topics.add((GLOBAL_SCOPE, f"sync:table:{table}"))
+        return topics
+
+    async def _update_topics(self, websocket: WebSocket):
+        """Re-subscribe a connection's fan-out topics after a (un)subscribe"""
+        conn = self.fanout.get(websocket)
+        metadata = self.connection_metadata.get(websocket)
+        if conn is None or metadata is None:
+            return
+        tables = self.subscriptions.get(websocket, set())
+        await self.hub.set_topics(conn, self._topics(metadata["clinic_id"], tables))
     
     async def _heartbeat_loop(self):
         """
@@ -277,23 +281,14 @@ class ConnectionManager:
         while True:
             try:
                 await asyncio.sleep(30)  # Send heartbeat every 30 seconds
-                
-                # Get all connections
-                all_connections = set()
-                for connections in self.active_connections.values():
-                    all_connections.update(connections)
-                
-                # Send ping to all connections
-                disconnected = []
-                for connection in all_connections:
-                    try:
-                        await connection.send_json({"type": MessageType.PING.value})
-                    except:
-                        disconnected.append(connection)
-                
-                # Clean up disconnected connections
-                for connection in disconnected:
-                    await self.disconnect(connection)
+
+                # One frame for all local connections; a ping still queued is
+                # not queued again. Dead connections are dropped by the hub.
+                self.hub.send(
+                    list(self.fanout.values()),
+                    {"type": MessageType.PING.value},
+                    coalesce_key=MessageType.PING.value,
+                )
                     
             except Exception as e:
                 logger.error(f"Error in heartbeat loop: {e}")
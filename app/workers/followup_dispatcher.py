@@ -0,0 +1,220 @@
+"""
+Follow-up Dispatcher
+
+Long-running worker that sends scheduled follow-ups as they fall due.
+FollowupScheduler indexes each follow-up in a Redis sorted set (see
+app.services.followup_queue); this worker claims due entries atomically,
+re-reads the session rows (the table is the source of truth: a session that
+was answered, ended or rescheduled since is skipped or re-indexed) and
+processes them concurrently.
+
+Features:
+- Atomic claiming with leases, so several instances never double-send
+- Per-clinic rate limit: follow-ups of one clinic are spaced at least
+  60 / FOLLOWUP_CLINIC_RATE_PER_MINUTE seconds apart; a follow-up whose
+  slot is further out is deferred in the index instead of holding a worker
+- Index rebuilt from conversation_sessions on startup
+- Sleeps until the next due follow-up (capped by the poll interval)
+"""
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional, Set
+
+from app.jobs.followup_processor import FollowupProcessor
+from app.services.followup_queue import FollowupQueue, get_followup_queue
+
+logger = logging.getLogger(__name__)
+
+# Follow-ups processed concurrently (across clinics)
+FOLLOWUP_DISPATCH_CONCURRENCY = int(os.getenv("FOLLOWUP_DISPATCH_CONCURRENCY", "20"))
+
+# Follow-ups started per clinic per minute
+FOLLOWUP_CLINIC_RATE_PER_MINUTE = float(os.getenv("FOLLOWUP_CLINIC_RATE_PER_MINUTE", "30"))
+
+# A follow-up waits in-process for its clinic slot up to this long; later
+# slots are deferred in the index
+MAX_SLOT_WAIT_SECONDS = 2.0
+
+
+def _parse_ts(value: Any) -> Optional[float]:
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value.timestamp()
+    try:
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+
+def session_clinic_id(session: Dict[str, Any]) -> str:
+    return str(session.get('clinic_id') or (session.get('metadata') or {}).get('clinic_id') or 'global')
+
+
+class ClinicRateLimiter:
+    """Per-clinic start spacing (one follow-up every `interval` seconds)."""
+
+    def __init__(self, rate_per_minute: float = FOLLOWUP_CLINIC_RATE_PER_MINUTE):
+        self.interval = 60.0 / rate_per_minute if rate_per_minute > 0 else 0.0
+        self._next_slot: Dict[str, float] = {}
+
+    def reserve(self, clinic_id: str, now: float) -> float:
+        """Reserve the clinic's next start slot and return it."""
+        slot = max(now, self._next_slot.get(clinic_id, 0.0))
+        self._next_slot[clinic_id] = slot + self.interval
+        return slot
+
+
+class FollowupDispatcher:
+    """Claims due follow-ups from the Redis index and processes them concurrently."""
+
+    def __init__(
+        self,
+        processor: Optional[FollowupProcessor] = None,
+        queue: Optional[FollowupQueue] = None,
+        concurrency: int = FOLLOWUP_DISPATCH_CONCURRENCY,
+        rate_per_minute: float = FOLLOWUP_CLINIC_RATE_PER_MINUTE,
+    ):
+        self.poll_interval = float(os.getenv('FOLLOWUP_POLL_INTERVAL', '5'))
+        self.processor = processor or FollowupProcessor()
+        self.queue = queue or get_followup_queue()
+        self.concurrency = max(concurrency, 1)
+        self.limiter = ClinicRateLimiter(rate_per_minute)
+        self.is_running = False
+        self._tasks: Set[asyncio.Task] = set()
+        # Deferred follow-ups whose clinic slot is already reserved
+        self._reserved: Dict[str, float] = {}
+        self.stats = {'processed': 0, 'skipped': 0, 'deferred': 0, 'failed': 0}
+
+    async def start(self):
+        """Start the dispatcher loop."""
+        self.is_running = True
+        logger.info("FollowupDispatcher started")
+
+        try:
+            await self.rebuild()
+        except Exception as e:
+            logger.error(f"Follow-up index rebuild failed: {e}")
+
+        while self.is_running:
+            claimed = 0
+            try:
+                await asyncio.to_thread(self.queue.requeue_expired)
+                claimed = await self.dispatch_due()
+            except Exception as e:
+                logger.error(f"FollowupDispatcher error: {e}")
+
+            if claimed and len(self._tasks) < self.concurrency:
+                # More may be due right away
+                continue
+            await self._wait(await self._next_delay())
+
+    async def stop(self):
+        """Stop the dispatcher and let in-flight follow-ups finish."""
+        self.is_running = False
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        logger.info("FollowupDispatcher stopped")
+
+    async def rebuild(self) -> int:
+        """Re-index every pending follow-up from conversation_sessions."""
+        sessions = await asyncio.to_thread(self.processor.get_pending_followups)
+        entries = [
+            (session['id'], due_ts)
+            for session in sessions
+            if (due_ts := _parse_ts(session.get('scheduled_followup_at'))) is not None
+        ]
+        added = await asyncio.to_thread(self.queue.rebuild, entries)
+        logger.info(f"Follow-up index rebuilt: {len(entries)} pending, {added} newly indexed")
+        return added
+
+    async def run_once(self) -> int:
+        """Dispatch everything due now and wait for it (cron entry point)."""
+        total = 0
+        while True:
+            await asyncio.to_thread(self.queue.requeue_expired)
+            claimed = await self.dispatch_due()
+            total += claimed
+            if not claimed and not self._tasks:
+                return total
+            if not claimed or len(self._tasks) >= self.concurrency:
+                await asyncio.wait(self._tasks, return_when=asyncio.FIRST_COMPLETED)
+
+    async def dispatch_due(self) -> int:
+        """Claim due follow-ups up to free capacity and start processing them."""
+        free = self.concurrency - len(self._tasks)
+        if free <= 0:
+            return 0
+
+        claimed = await asyncio.to_thread(self.queue.claim_due, free)
+        if not claimed:
+            return 0
+
+        session_ids = [session_id for session_id, _ in claimed]
+        sessions = await asyncio.to_thread(self.processor.get_sessions, session_ids)
+
+        for session_id in session_ids:
+            task = asyncio.create_task(self._dispatch_one(session_id, sessions.get(session_id)))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return len(session_ids)
+
+    async def _dispatch_one(self, session_id: str, session: Optional[Dict[str, Any]]):
+        try:
+            now = time.time()
+            due_ts = _parse_ts((session or {}).get('scheduled_followup_at'))
+            if not session or due_ts is None or not FollowupProcessor.is_pending(session):
+                # Answered, ended or cleared since it was scheduled
+                self._reserved.pop(session_id, None)
+                self.stats['skipped'] += 1
+                await asyncio.to_thread(self.queue.ack, session_id)
+                return
+
+            if due_ts > now + 1:
+                # Rescheduled later in the table: move the index entry
+                self._reserved.pop(session_id, None)
+                self.stats['deferred'] += 1
+                await asyncio.to_thread(self.queue.defer, session_id, due_ts)
+                return
+
+            slot = self._reserved.pop(session_id, None)
+            if slot is None:
+                slot = self.limiter.reserve(session_clinic_id(session), now)
+            if slot - now > MAX_SLOT_WAIT_SECONDS:
+                self._reserved[session_id] = slot
+                self.stats['deferred'] += 1
+                await asyncio.to_thread(self.queue.defer, session_id, slot)
+                return
+            if slot > now:
+                await asyncio.sleep(slot - now)
+
+            if not await self.processor.send_followup_message(session):
+                # Left claimed: lease expiry hands it out again
+                self.stats['failed'] += 1
+                return
+            self.stats['processed'] += 1
+            await asyncio.to_thread(self.queue.ack, session_id)
+        except Exception as e:
+            # Lease expiry hands it out again
+            self.stats['failed'] += 1
+            logger.error(f"Failed to dispatch follow-up for {session_id}: {e}")
+
+    async def _next_delay(self) -> float:
+        try:
+            next_due = await asyncio.to_thread(self.queue.next_due)
+        except Exception as e:
+            logger.warning(f"Failed to read next follow-up due time: {e}")
+            return self.poll_interval
+        if next_due is None:
+            return self.poll_interval
+        return min(self.poll_interval, max(next_due - time.time(), 0.05))
+
+    async def _wait(self, delay: float):
+        """Sleep for delay, waking early when a follow-up finishes at full capacity."""
+        if self._tasks and len(self._tasks) >= self.concurrency:
+            await asyncio.wait(self._tasks, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+        else:
+            await asyncio.sleep(delay)
@@ -0,0 +1,267 @@
+"""
+Session Summary Worker
+
+Summarizes closed sessions in batches, off the request path. SessionManager
+enqueues a session when it archives it (summary_status='pending'); the worker
+collects up to SUMMARY_BATCH_SIZE sessions of one clinic, or whatever arrived
+within SUMMARY_BATCH_WAIT_SECONDS, and for each batch:
+- loads the sessions and their messages with two IN queries
+- templates trivial sessions (SUMMARY_MIN_MESSAGES / SUMMARY_MIN_TOKENS)
+  instead of calling the LLM
+- summarizes the rest with one JSON request per clinic
+- writes every summary back in one bulk update
+
+Features:
+- Deduplicated queue: a session already queued or in flight is not queued again
+- Batches are per clinic (tier routing is per clinic); up to
+  SUMMARY_BATCH_CONCURRENCY batches run at once
+- Sessions left 'pending' (restart, lost enqueue) are picked up by a periodic sweep
+- Per-batch latency, outcome, token and cost metrics
+"""
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import Dict, List, Optional, Set
+
+from app.services.session_summarizer import SessionSummarizer, SummaryBatchResult
+from app.services.summary_search_service import SUMMARY_EMBEDDINGS_ENABLED
+
+logger = logging.getLogger(__name__)
+
+# Sessions per batch
+SUMMARY_BATCH_SIZE = int(os.getenv("SUMMARY_BATCH_SIZE", "8"))
+
+# How long a batch waits to fill once its first session arrives
+SUMMARY_BATCH_WAIT_SECONDS = float(os.getenv("SUMMARY_BATCH_WAIT_SECONDS", "2"))
+
+# Batches processed concurrently
+SUMMARY_BATCH_CONCURRENCY = int(os.getenv("SUMMARY_BATCH_CONCURRENCY", "4"))
+
+# Sweep for sessions left pending every SUMMARY_SWEEP_INTERVAL seconds,
+# once they have been pending for SUMMARY_SWEEP_MIN_AGE_SECONDS
+SUMMARY_SWEEP_INTERVAL = float(os.getenv("SUMMARY_SWEEP_INTERVAL", "300"))
+SUMMARY_SWEEP_MIN_AGE_SECONDS = 600
+
+# Sessions queued per sweep
+SUMMARY_SWEEP_LIMIT = 200
+
+
+def _observe_batch(duration_seconds: float, outcomes: Dict[str, int], result: SummaryBatchResult) -> None:
+    """Best-effort Prometheus export (prometheus_client is optional here)."""
+    try:
+        from app.observability.metrics import observe_summary_batch
+        observe_summary_batch(
+            duration_seconds,
+            outcomes,
+            input_tokens=result.input_tokens,
+            output_tokens=result.output_tokens,
+            cost_usd=result.cost_usd,
+        )
+    except Exception as e:
+        logger.debug(f"Failed to record summary batch metric: {e}")
+
+
+class SessionSummaryWorker:
+    """Batches closed sessions into few LLM requests and bulk writes."""
+
+    def __init__(
+        self,
+        summarizer: Optional[SessionSummarizer] = None,
+        batch_size: int = SUMMARY_BATCH_SIZE,
+        batch_wait: float = SUMMARY_BATCH_WAIT_SECONDS,
+        concurrency: int = SUMMARY_BATCH_CONCURRENCY,
+    ):
+        self.summarizer = summarizer or SessionSummarizer()
+        self.batch_size = max(batch_size, 1)
+        self.batch_wait = batch_wait
+        self.concurrency = max(concurrency, 1)
+        self.sweep_interval = SUMMARY_SWEEP_INTERVAL
+        self.is_running = False
+        # Queued session id -> clinic id, in arrival order
+        self._pending: Dict[str, Optional[str]] = {}
+        self._in_flight: Set[str] = set()
+        self._wakeup = asyncio.Event()
+        self._tasks: Set[asyncio.Task] = set()
+        self._last_sweep = 0.0
+        self.stats = {
+            'batches': 0, 'llm': 0, 'templated': 0, 'failed': 0,
+            'llm_calls': 0, 'input_tokens': 0, 'output_tokens': 0, 'cost_usd': 0.0,
+        }
+
+    @property
+    def depth(self) -> int:
+        return len(self._pending)
+
+    def enqueue(self, session_id: str, clinic_id: Optional[str] = None) -> bool:
+        """Queue a closed session. Returns False if it is already queued or in flight."""
+        if session_id in self._pending or session_id in self._in_flight:
+            return False
+        self._pending[session_id] = clinic_id
+        self._wakeup.set()
+        return True
+
+    async def start(self):
+        """Start the worker loop."""
+        self.is_running = True
+        logger.info("SessionSummaryWorker started")
+
+        while self.is_running:
+            try:
+                if time.monotonic() - self._last_sweep >= self.sweep_interval:
+                    await self.sweep()
+                if len(self._tasks) >= self.concurrency:
+                    await asyncio.wait(self._tasks, return_when=asyncio.FIRST_COMPLETED)
+                    continue
+                session_ids = await self._next_batch()
+                if session_ids and not self.is_running:
+                    # Stopping: leave them 'pending' for the sweep
+                    self._in_flight.difference_update(session_ids)
+                    break
+                if session_ids:
+                    task = asyncio.create_task(self._run_batch(session_ids))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+            except Exception as e:
+                logger.error(f"SessionSummaryWorker error: {e}")
+                await asyncio.sleep(1)
+
+    async def stop(self):
+        """Stop the worker and let in-flight batches finish.
+
+        Sessions still queued stay 'pending' in the table and are picked up
+        by the next sweep.
+        """
+        self.is_running = False
+        self._wakeup.set()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        logger.info("SessionSummaryWorker stopped")
+
+    def _batch_candidates(self) -> List[str]:
+        """Up to batch_size queued sessions of the oldest queued session's clinic."""
+        clinic_id = next(iter(self._pending.values()))
+        return list(islice(
+            (sid for sid, cid in self._pending.items() if cid == clinic_id),
+            self.batch_size,
+        ))
+
+    async def _next_batch(self) -> List[str]:
+        """Wait for a session, then up to batch_wait for its clinic's batch to fill."""
+        if not self._pending:
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.sweep_interval)
+            except asyncio.TimeoutError:
+                return []
+            if not self._pending:
+                return []
+
+        deadline = time.monotonic() + self.batch_wait
+        while self.is_running and len(self._batch_candidates()) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+
+        session_ids = self._batch_candidates()
+        for session_id in session_ids:
+            del self._pending[session_id]
+        self._in_flight.update(session_ids)
+        return session_ids
+
+    async def _run_batch(self, session_ids: List[str]):
+        try:
+            await self.process_batch(session_ids)
+        except Exception as e:
+            # Sessions stay 'pending' and are picked up by the sweep
+            logger.error(f"Summary batch of {len(session_ids)} sessions failed: {e}")
+
+    async def process_batch(self, session_ids: List[str]) -> SummaryBatchResult:
+        """Fetch, summarize and store one batch of sessions."""
+        started = time.perf_counter()
+        try:
+            batch = await asyncio.to_thread(self.summarizer.fetch_batch, session_ids)
+            # Summarized meanwhile (duplicate close, sweep on another instance)
+            batch = {sid: entry for sid, entry in batch.items() if entry['status'] != 'ready'}
+
+            result = await self.summarizer.summarize_batch(batch)
+            failed = [sid for sid in batch if sid not in result.summaries]
+
+            embeddings = None
+            if SUMMARY_EMBEDDINGS_ENABLED:
+                llm_summaries = {
+                    sid: summary for sid, summary in result.summaries.items()
+                    if result.sources.get(sid) == 'llm'
+                }
+                if llm_summaries:
+                    embeddings = await asyncio.to_thread(self.summarizer.embed_summaries, llm_summaries)
+
+            await asyncio.to_thread(
+                self.summarizer.store_batch,
+                result.summaries,
+                failed,
+                datetime.now(timezone.utc),
+                embeddings,
+            )
+        finally:
+            self._in_flight.difference_update(session_ids)
+
+        duration = time.perf_counter() - started
+        sources = list(result.sources.values())
+        outcomes = {
+            'llm': sources.count('llm'),
+            'templated': sources.count('templated'),
+            'failed': len(failed),
+        }
+        self.stats['batches'] += 1
+        for outcome, count in outcomes.items():
+            self.stats[outcome] += count
+        self.stats['llm_calls'] += result.llm_calls
+        self.stats['input_tokens'] += result.input_tokens
+        self.stats['output_tokens'] += result.output_tokens
+        self.stats['cost_usd'] += result.cost_usd
+        _observe_batch(duration, outcomes, result)
+
+        logger.info(
+            f"Summarized {len(batch)} sessions in {duration:.2f}s: "
+            f"{outcomes['llm']} via {result.llm_calls} LLM call(s), {outcomes['templated']} templated, "
+            f"{outcomes['failed']} failed ({result.input_tokens}+{result.output_tokens} tokens, "
+            f"${result.cost_usd:.5f})"
+        )
+        return result
+
+    async def sweep(self) -> int:
+        """Queue sessions that have been pending for longer than SUMMARY_SWEEP_MIN_AGE_SECONDS."""
+        self._last_sweep = time.monotonic()
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=SUMMARY_SWEEP_MIN_AGE_SECONDS)
+        try:
+            session_ids = await asyncio.to_thread(
+                self.summarizer.get_pending_session_ids, cutoff, SUMMARY_SWEEP_LIMIT
+            )
+        except Exception as e:
+            logger.warning(f"Pending summary sweep failed: {e}")
+            return 0
+
+        queued = sum(self.enqueue(session_id) for session_id in session_ids)
+        if queued:
+            logger.info(f"Queued {queued} sessions left with pending summaries")
+        return queued
+
+
+# Singleton instance
+_session_summary_worker: Optional[SessionSummaryWorker] = None
+
+
+def get_session_summary_worker() -> SessionSummaryWorker:
+    """Get or create singleton SessionSummaryWorker instance"""
+    global _session_summary_worker
+    if _session_summary_worker is None:
+        _session_summary_worker = SessionSummaryWorker()
+    return _session_summary_worker
@@ -0,0 +1,8 @@
+"""
+Offline benchmarks for the message processing pipeline.
+
+Everything here runs in-process against deterministic local stand-ins
+(in-memory Supabase, fakeredis, scripted LLM, fake Evolution server), so
+results are comparable between commits without touching real services.
+See benchmarks/README.md.
+"""
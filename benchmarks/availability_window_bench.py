@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Availability Window Benchmark - the room-aware availability fallback over
+7, 14 and 30 day windows.
+
+Seeds doctors, weekday schedules, time-off, rooms and room bookings into
+the in-memory database, then computes available slots two ways:
+- per-slot: the previous fallback loop (schedule query per doctor per day,
+  ConstraintEngine doctor and room checks awaited per slot and room)
+- window: get_availability_fallback, which loads the window once through
+  ConstraintEngine.load_window and answers checks in memory
+
+Reports wall time and DB queries for each window length.
+
+Checks (exit non-zero on failure):
+- both paths return the same slots (time, doctor, room, score)
+- the window path issues a constant number of queries, independent of
+  the window length (pages of load_window count once per page)
+
+Usage:
+    python -m benchmarks.availability_window_bench
+    python -m benchmarks.availability_window_bench --days 7 14 30 --db-latency-ms 5 --bookings 3000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List
+from uuid import UUID
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.fakes import FakeQueryBuilder, FakeSupabaseClient, InMemoryDatabase  # noqa: E402
+
+START = datetime(2026, 3, 2)
+CLINIC_ID = "00000000-0000-0000-0000-00000000c111"
+
+
+class CountingQuery(FakeQueryBuilder):
+    queries = 0
+
+    def _run(self):
+        type(self).queries += 1
+        return super()._run()
+
+
+def uuid_for(kind: int, i: int) -> str:
+    return str(UUID(int=(kind << 64) + i))
+
+
+def seed(db: InMemoryDatabase, args) -> None:
+    doctors = [uuid_for(1, i) for i in range(args.doctors)]
+    rooms = [uuid_for(2, i) for i in range(args.rooms)]
+    schedules, time_off, bookings = [], [], []
+    for d, doctor_id in enumerate(doctors):
+        for day in ("monday", "tuesday", "wednesday", "thursday", "friday"):
+            schedules.append({"id": uuid_for(3, len(schedules)), "doctor_id": doctor_id, "day_of_week": day,
+                              "start_time": "09:00", "end_time": "12:00"})
+            schedules.append({"id": uuid_for(3, len(schedules)), "doctor_id": doctor_id, "day_of_week": day,
+                              "start_time": "13:00", "end_time": "17:00"})
+        off = START + timedelta(days=3 + 5 * d)
+        time_off.append({"id": uuid_for(4, d), "doctor_id": doctor_id,
+                         "start_date": off.date().isoformat(), "end_date": (off + timedelta(days=1)).date().isoformat()})
+    # Bookings spread over 30 days, a few cancelled
+    for i in range(args.bookings):
+        start = START + timedelta(days=i % 30, hours=9 + (i * 7) % 8, minutes=15 * (i % 4))
+        bookings.append({"id": uuid_for(5, i), "room_id": rooms[i % len(rooms)],
+                         "status": "cancelled" if i % 11 == 0 else "scheduled",
+                         "start_time": start.isoformat(), "end_time": (start + timedelta(minutes=45)).isoformat()})
+    db.seed({
+        "public.doctors": [{"id": doctor_id, "clinic_id": CLINIC_ID} for doctor_id in doctors],
+        "public.rooms": [{"id": room_id, "clinic_id": CLINIC_ID, "is_available": True,
+                          "cleaning_duration_minutes": 15 if r % 2 else 30} for r, room_id in enumerate(rooms)],
+        "public.doctor_schedules": schedules,
+        "public.doctor_time_off": time_off,
+        "public.appointments": bookings,
+        "public.appointment_holds": [],
+    })
+
+
+async def per_slot_fallback(db, engine, start_date, end_date, duration_minutes) -> List[Dict[str, Any]]:
+    """The fallback loop before load_window: every check is its own query"""
+    slots = []
+    doctors = db.table("doctors").select("*").eq("clinic_id", CLINIC_ID).execute().data
+    rooms = db.table("rooms").select("*").eq("clinic_id", CLINIC_ID).eq("is_available", True).execute().data
+    current_date = start_date
+    while current_date <= end_date:
+        day_name = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"][current_date.weekday()]
+        for doctor in doctors:
+            schedule = db.table("doctor_schedules").select("*")\
+                .eq("doctor_id", doctor['id']).eq("day_of_week", day_name).execute().data
+            for period in schedule or []:
+                work_start = datetime.strptime(period["start_time"], "%H:%M").time()
+                work_end = datetime.strptime(period["end_time"], "%H:%M").time()
+                slot_time = datetime.combine(current_date.date(), work_start)
+                end_of_day = datetime.combine(current_date.date(), work_end)
+                while slot_time + timedelta(minutes=duration_minutes) <= end_of_day:
+                    slot_end = slot_time + timedelta(minutes=duration_minutes)
+                    if await engine.check_doctor_schedule(UUID(doctor['id']), slot_time, duration_minutes) \
+                            and await engine.check_doctor_time_off(UUID(doctor['id']), slot_time):
+                        for room in rooms:
+                            if await engine.check_room_availability(UUID(room['id']), slot_time, slot_end):
+                                score = 10.0 + (5.0 if room.get('cleaning_duration_minutes', 15) <= 15 else 0.0)
+                                slots.append({"time": slot_time.isoformat(), "doctor_id": doctor['id'],
+                                              "room_id": room['id'], "score": score})
+                                break
+                    slot_time += timedelta(minutes=15)
+                    if len(slots) >= 500:
+                        return slots
+        current_date += timedelta(days=1)
+    return slots
+
+
+async def run(args) -> int:
+    for key in ("SUPABASE_URL", "SUPABASE_SERVICE_ROLE_KEY"):
+        os.environ.setdefault(key, "http://localhost:54321" if key == "SUPABASE_URL" else "benchmark.benchmark.benchmark")
+    os.environ.setdefault("MASTER_ENCRYPTION_SECRET", "0" * 64)
+    os.environ.setdefault("ENCRYPTION_SALT", "0" * 32)
+
+    from app.api.appointments_api import get_availability_fallback, room_cache
+    from app.services.scheduling.constraint_engine import ConstraintEngine
+
+    db = InMemoryDatabase(latency_ms=args.db_latency_ms)
+    seed(db, args)
+    client = FakeSupabaseClient(db)
+    client.builder_class = CountingQuery
+    engine = ConstraintEngine(client)
+
+    failures = []
+    print(f"{args.doctors} doctors, {args.rooms} rooms, {args.bookings} bookings, "
+          f"DB latency {args.db_latency_ms:g}ms, {args.duration}-minute slots")
+    print(f"{'days':>6}{'path':>10}{'time ms':>11}{'queries':>9}{'slots':>7}")
+    window_queries = set()
+    for days in args.days:
+        end_date = START + timedelta(days=days - 1)
+        results = {}
+        for path in ("per-slot", "window"):
+            if path == "per-slot" and args.skip_per_slot:
+                continue
+            room_cache.cache.clear()
+            CountingQuery.queries = 0
+            started = time.perf_counter()
+            if path == "per-slot":
+                slots = await per_slot_fallback(client, engine, START, end_date, args.duration)
+            else:
+                slots = [
+                    {"time": s.time, "doctor_id": s.doctor_id, "room_id": s.room_id, "score": s.score}
+                    for s in await get_availability_fallback(
+                        client, engine, CLINIC_ID, None, None, START, end_date, args.duration
+                    )
+                ]
+                window_queries.add(CountingQuery.queries)
+            elapsed = (time.perf_counter() - started) * 1000
+            results[path] = slots
+            print(f"{days:>6}{path:>10}{elapsed:>11.1f}{CountingQuery.queries:>9}{len(slots):>7}")
+        if "per-slot" in results and results["per-slot"] != results["window"]:
+            failures.append(f"{days} days: window path returned different slots")
+
+    if len(window_queries) > 1:
+        failures.append(f"window path query count varies with window length: {sorted(window_queries)}")
+    for failure in failures:
+        print(f"  FAIL {failure}")
+    return len(failures)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Room-aware availability fallback over 7/14/30 day windows")
+    parser.add_argument("--days", type=int, nargs="+", default=[7, 14, 30])
+    parser.add_argument("--doctors", type=int, default=4)
+    parser.add_argument("--rooms", type=int, default=3)
+    parser.add_argument("--bookings", type=int, default=600)
+    parser.add_argument("--duration", type=int, default=30)
+    parser.add_argument("--db-latency-ms", type=float, default=2.0)
+    parser.add_argument("--skip-per-slot", action="store_true",
+                        help="Only run the window path (the per-slot baseline is slow with latency)")
+    args = parser.parse_args()
+    sys.exit(1 if asyncio.run(run(args)) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Bulk Reschedule Benchmark - a sick day that displaces many appointments.
+
+Seeds --appointments displaced appointments across --doctors doctors and
+two durations, then reschedules them:
+- per-request: AutomatedRescheduler.reschedule_appointment for each one
+  (the previous bulk path)
+- bulk: AutomatedRescheduler.bulk_reschedule
+
+Reports wall time, availability RPCs and table queries for each.
+
+Checks for the bulk run (exit non-zero on failure):
+- one get_doctor_availability RPC per (doctor, duration) pair
+- no slot (or overlapping interval of the same doctor) offered twice
+- every appointment gets at least one option
+
+Usage:
+    python -m benchmarks.bulk_reschedule_bench
+    python -m benchmarks.bulk_reschedule_bench --appointments 50 200 --db-latency-ms 20
+"""
+import argparse
+import asyncio
+import sys
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.automated_rescheduler import (  # noqa: E402
+    AutomatedRescheduler,
+    RescheduleReason,
+    RescheduleRequest,
+    RescheduleStrategy,
+)
+from benchmarks.fakes import FakeSupabaseClient, InMemoryDatabase  # noqa: E402
+
+DURATIONS = [30, 60]
+
+
+class FixedRiskPredictor:
+    """Stands in for PredictiveConflictPrevention (its own queries are not under test)"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def assess_slot_risk(self, slot: Dict[str, Any]) -> Dict[str, Any]:
+        self.calls += 1
+        return {"overall_risk": 0.2}
+
+
+def availability(params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Every 30 minutes from 09:00 to 17:00 on weekdays, for the requested duration"""
+    duration = timedelta(minutes=params["p_duration_minutes"])
+    day = date.fromisoformat(params["p_start_date"])
+    end = date.fromisoformat(params["p_end_date"])
+    slots = []
+    while day <= end:
+        if day.weekday() < 5:
+            start = datetime.combine(day, datetime.min.time()).replace(hour=9)
+            while start + duration <= start.replace(hour=17):
+                slots.append({"start_time": start.isoformat(), "availability_score": 0.8})
+                start += timedelta(minutes=30)
+        day += timedelta(days=1)
+    return slots
+
+
+def build_database(count: int, doctors: int, latency_ms: float):
+    db = InMemoryDatabase(latency_ms=latency_ms)
+    rows = [
+        {
+            "id": f"apt-{i:04d}",
+            "patient_id": f"patient-{i:04d}",
+            "doctor_id": f"doctor-{i % doctors}",
+            "duration_minutes": DURATIONS[(i // doctors) % len(DURATIONS)],
+            "appointment_date": f"2026-03-02T{9 + i % 8:02d}:00:00",
+        }
+        for i in range(count)
+    ]
+    db.seed({"public.appointments": rows})
+    rpc_calls: List[Dict[str, Any]] = []
+
+    def get_doctor_availability(params):
+        rpc_calls.append(params)
+        return availability(params)
+
+    db.register_rpc("get_doctor_availability", get_doctor_availability)
+    return db, rows, rpc_calls
+
+
+def requests_for(rows: List[Dict[str, Any]]) -> List[RescheduleRequest]:
+    return [
+        RescheduleRequest(
+            appointment_id=row["id"],
+            reason=RescheduleReason.DOCTOR_UNAVAILABLE,
+            strategy=RescheduleStrategy.BALANCED,
+            priority=i % 3,
+        )
+        for i, row in enumerate(rows)
+    ]
+
+
+class CountingClient(FakeSupabaseClient):
+    """Counts table queries by name"""
+
+    def __init__(self, db: InMemoryDatabase, schema: str = "public"):
+        super().__init__(db, schema)
+        self.queries: Counter = Counter()
+
+    def table(self, name: str):
+        self.queries[name] += 1
+        return super().table(name)
+
+
+async def run_mode(mode: str, count: int, args) -> Dict[str, Any]:
+    db, rows, rpc_calls = build_database(count, args.doctors, args.db_latency_ms)
+    client = CountingClient(db)
+    rescheduler = AutomatedRescheduler(client)
+    rescheduler._conflict_predictor = FixedRiskPredictor()
+    requests = requests_for(rows)
+
+    started = time.perf_counter()
+    if mode == "bulk":
+        results = await rescheduler.bulk_reschedule(requests)
+    else:
+        results = [await rescheduler.reschedule_appointment(request) for request in requests]
+    elapsed = time.perf_counter() - started
+
+    return {
+        "rows": rows,
+        "results": results,
+        "elapsed": elapsed,
+        "rpc_calls": rpc_calls,
+        "queries": sum(client.queries.values()),
+        "risk_calls": rescheduler._conflict_predictor.calls,
+    }
+
+
+def check_bulk(run: Dict[str, Any]) -> List[str]:
+    failures = []
+    rows = run["rows"]
+    pairs = Counter((c["p_doctor_id"], c["p_duration_minutes"]) for c in run["rpc_calls"])
+    expected = {(row["doctor_id"], row["duration_minutes"]) for row in rows}
+    if set(pairs) != expected or any(n != 1 for n in pairs.values()):
+        failures.append(f"{len(run['rpc_calls'])} availability RPCs for {len(expected)} (doctor, duration) pairs")
+
+    durations = {row["id"]: timedelta(minutes=row["duration_minutes"]) for row in rows}
+    offered: Dict[str, list] = {}
+    empty = 0
+    for result in run["results"]:
+        if not result.get("options"):
+            empty += 1
+        for option in result.get("options", []):
+            start = datetime.fromisoformat(option["datetime"])
+            offered.setdefault(option["doctor_id"], []).append((start, start + durations[result["appointment_id"]]))
+    if empty:
+        failures.append(f"{empty} appointments got no options")
+    overlaps = 0
+    for intervals in offered.values():
+        intervals.sort()
+        overlaps += sum(1 for (_, end), (next_start, _) in zip(intervals, intervals[1:]) if next_start < end)
+    if overlaps:
+        failures.append(f"{overlaps} slots offered to more than one patient")
+    return failures
+
+
+async def run(args) -> int:
+    failures = []
+    print(f"{args.doctors} doctors, durations {DURATIONS}, DB latency {args.db_latency_ms:g}ms")
+    print(f"{'appointments':>14}{'mode':>14}{'time s':>10}{'RPCs':>8}{'queries':>9}{'risk calls':>12}")
+    for count in args.appointments:
+        for mode in ("per-request", "bulk"):
+            if mode == "per-request" and args.skip_per_request:
+                continue
+            result = await run_mode(mode, count, args)
+            print(f"{count:>14}{mode:>14}{result['elapsed']:>10.2f}{len(result['rpc_calls']):>8}"
+                  f"{result['queries']:>9}{result['risk_calls']:>12}")
+            if mode == "bulk":
+                failures.extend(f"{count} appointments: {f}" for f in check_bulk(result))
+    for failure in failures:
+        print(f"  FAIL {failure}")
+    return len(failures)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk reschedule of displaced appointments")
+    parser.add_argument("--appointments", type=int, nargs="+", default=[50, 200])
+    parser.add_argument("--doctors", type=int, default=4)
+    parser.add_argument("--db-latency-ms", type=float, default=10.0)
+    parser.add_argument("--skip-per-request", action="store_true",
+                        help="Only run the bulk path (the per-request baseline is slow with latency)")
+    args = parser.parse_args()
+    sys.exit(1 if asyncio.run(run(args)) else 0)
+
+
+if __name__ == "__main__":
+    main()
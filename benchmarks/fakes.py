@@ -0,0 +1,635 @@
+"""
+Deterministic local stand-ins for the pipeline's external dependencies.
+
+- FakeSupabaseClient / FakeAsyncSupabaseClient: in-memory PostgREST
+  query-builder double with configurable per-call latency
+- counting fakeredis clients (sync and asyncio)
+- ScriptedLLMFactory: LLMFactory whose adapters replay scripted responses
+- FakeEvolutionServer: local aiohttp server answering Evolution API calls
+
+The sync Supabase double sleeps with time.sleep() on execute(), exactly
+like the real sync client blocks on HTTP, so blocking calls made from the
+event loop show up in the loop-block metric.
+"""
+import asyncio
+import copy
+import re
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from benchmarks import probes
+
+# =============================================================================
+# Supabase / PostgREST
+# =============================================================================
+
+
+class FakeAPIResponse:
+    """Mirrors postgrest APIResponse (data + count)."""
+
+    def __init__(self, data: Any, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+class InMemoryDatabase:
+    """Rows keyed by (schema, table), plus registered RPC handlers."""
+
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        table_latency_ms: Optional[Dict[str, float]] = None,
+    ):
+        self.tables: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        self.rpcs: Dict[str, Callable[[Dict[str, Any]], Any]] = {}
+        self.latency_ms = latency_ms
+        self.table_latency_ms = table_latency_ms or {}
+        self.unknown_rpcs: set = set()
+
+    def seed(self, seed: Dict[str, List[Dict[str, Any]]], default_schema: str = "healthcare") -> None:
+        """Load rows from {"schema.table": [rows]} (schema optional)."""
+        for name, rows in seed.items():
+            schema, _, table = name.rpartition(".")
+            self.rows(schema or default_schema, table).extend(copy.deepcopy(rows))
+
+    def rows(self, schema: str, table: str) -> List[Dict[str, Any]]:
+        return self.tables.setdefault((schema, table), [])
+
+    def register_rpc(self, name: str, handler: Callable[[Dict[str, Any]], Any]) -> None:
+        self.rpcs[name] = handler
+
+    def call_rpc(self, name: str, params: Dict[str, Any]) -> Any:
+        handler = self.rpcs.get(name)
+        if handler is None:
+            self.unknown_rpcs.add(name)
+            return None
+        return handler(params or {})
+
+    def latency_for(self, table: str) -> float:
+        return self.table_latency_ms.get(table, self.latency_ms) / 1000
+
+
+def _coerce(value: Any) -> Any:
+    """Compare filter operands the way PostgREST would for common types."""
+    if isinstance(value, str):
+        lowered = value.lower()
+        if lowered == "true":
+            return True
+        if lowered == "false":
+            return False
+        if lowered == "null":
+            return None
+    return value
+
+
+_ORDERING = {
+    "gt": lambda a, b: a > b,
+    "gte": lambda a, b: a >= b,
+    "lt": lambda a, b: a < b,
+    "lte": lambda a, b: a <= b,
+}
+
+
+def _equal(actual: Any, expected: Any) -> bool:
+    return actual == expected or (actual is not None and str(actual) == str(expected))
+
+
+def _compare(op: str, actual: Any, expected: Any) -> bool:
+    if op == "in":
+        return any(_equal(actual, e) for e in expected)
+    if op in ("like", "ilike"):
+        if actual is None:
+            return False
+        pattern = "^" + re.escape(str(expected)).replace("%", ".*").replace(r"\*", ".*") + "$"
+        return re.match(pattern, str(actual), re.IGNORECASE if op == "ilike" else 0) is not None
+    if op == "cs":
+        return isinstance(actual, (list, dict)) and all(item in actual for item in expected)
+
+    expected = _coerce(expected)
+    if op == "is":
+        return actual is expected
+    if op == "eq":
+        return _equal(actual, expected)
+    if op == "neq":
+        return not _equal(actual, expected)
+    if op in _ORDERING:
+        if actual is None or expected is None:
+            return False
+        if isinstance(actual, (int, float)) and isinstance(expected, str):
+            expected = float(expected)
+        try:
+            return _ORDERING[op](actual, expected)
+        except TypeError:
+            return _ORDERING[op](str(actual), str(expected))
+    return True
+
+
+def _split_top_level(text: str) -> List[str]:
+    parts, depth, current = [], 0, []
+    for char in text:
+        if char == "," and depth == 0:
+            parts.append("".join(current))
+            current = []
+            continue
+        depth += char == "("
+        depth -= char == ")"
+        current.append(char)
+    if current:
+        parts.append("".join(current))
+    return [p.strip() for p in parts if p.strip()]
+
+
+def _parse_or(expression: str) -> Callable[[Dict[str, Any]], bool]:
+    """Parse a PostgREST logic tree such as ``a.eq.1,and(b.gt.2,c.is.null)``."""
+    predicates = []
+    for term in _split_top_level(expression):
+        if term.startswith(("and(", "or(")) and term.endswith(")"):
+            combinator, inner = term.split("(", 1)
+            children = [_parse_or(child) for child in _split_top_level(inner[:-1])]
+            if combinator == "and":
+                predicates.append(lambda row, c=children: all(p(row) for p in c))
+            else:
+                predicates.append(lambda row, c=children: any(p(row) for p in c))
+            continue
+
+        column, op, value = term.split(".", 2)
+        negate = False
+        if op == "not":
+            negate = True
+            op, value = value.split(".", 1)
+        if op == "in":
+            value = [v.strip().strip('"') for v in value.strip("()").split(",")]
+        predicates.append(
+            lambda row, c=column, o=op, v=value, n=negate: _compare(o, row.get(c), v) != n
+        )
+    return lambda row: any(p(row) for p in predicates)
+
+
+class FakeQueryBuilder:
+    """Chainable stand-in for postgrest's sync request builders."""
+
+    def __init__(self, db: InMemoryDatabase, schema: str, table: str):
+        self._db = db
+        self._schema = schema
+        self._table = table
+        self._action = "select"
+        self._payload: Any = None
+        self._on_conflict: Optional[str] = None
+        self._filters: List[Callable[[Dict[str, Any]], bool]] = []
+        self._order: List[Tuple[str, bool]] = []
+        self._limit: Optional[int] = None
+        self._offset = 0
+        self._single = False
+        self._maybe_single = False
+        self._count: Optional[str] = None
+        self._negate_next = False
+        self._rpc: Optional[Tuple[str, Dict[str, Any]]] = None
+
+    # ----- actions -----
+
+    def select(self, *columns, count: Optional[str] = None, **kwargs) -> "FakeQueryBuilder":
+        if self._action == "select":
+            self._count = count
+        return self
+
+    def insert(self, payload, **kwargs) -> "FakeQueryBuilder":
+        self._action, self._payload = "insert", payload
+        return self
+
+    def upsert(self, payload, on_conflict: Optional[str] = None, **kwargs) -> "FakeQueryBuilder":
+        self._action, self._payload, self._on_conflict = "upsert", payload, on_conflict
+        return self
+
+    def update(self, payload, **kwargs) -> "FakeQueryBuilder":
+        self._action, self._payload = "update", payload
+        return self
+
+    def delete(self, **kwargs) -> "FakeQueryBuilder":
+        self._action = "delete"
+        return self
+
+    # ----- filters -----
+
+    def _add(self, op: str, column: str, value: Any) -> "FakeQueryBuilder":
+        negate, self._negate_next = self._negate_next, False
+        self._filters.append(lambda row: _compare(op, row.get(column), value) != negate)
+        return self
+
+    @property
+    def not_(self) -> "FakeQueryBuilder":
+        self._negate_next = True
+        return self
+
+    def eq(self, column, value):
+        return self._add("eq", column, value)
+
+    def neq(self, column, value):
+        return self._add("neq", column, value)
+
+    def gt(self, column, value):
+        return self._add("gt", column, value)
+
+    def gte(self, column, value):
+        return self._add("gte", column, value)
+
+    def lt(self, column, value):
+        return self._add("lt", column, value)
+
+    def lte(self, column, value):
+        return self._add("lte", column, value)
+
+    def is_(self, column, value):
+        return self._add("is", column, value)
+
+    def in_(self, column, values):
+        return self._add("in", column, list(values))
+
+    def like(self, column, pattern):
+        return self._add("like", column, pattern)
+
+    def ilike(self, column, pattern):
+        return self._add("ilike", column, pattern)
+
+    def contains(self, column, value):
+        return self._add("cs", column, value)
+
+    def match(self, query: Dict[str, Any]):
+        for column, value in query.items():
+            self._add("eq", column, value)
+        return self
+
+    def filter(self, column, operator, value):
+        if operator.startswith("not."):
+            self._negate_next = True
+            operator = operator[4:]
+        return self._add(operator, column, value)
+
+    def or_(self, filters: str, **kwargs):
+        self._filters.append(_parse_or(filters))
+        return self
+
+    # ----- modifiers -----
+
+    def order(self, column: str, desc: bool = False, **kwargs):
+        self._order.append((column, desc))
+        return self
+
+    def limit(self, size: int, **kwargs):
+        self._limit = size
+        return self
+
+    def range(self, start: int, end: int, **kwargs):
+        self._offset, self._limit = start, end - start + 1
+        return self
+
+    def single(self):
+        self._single = True
+        return self
+
+    def maybe_single(self):
+        self._maybe_single = True
+        return self
+
+    def __getattr__(self, name: str):
+        # Unmodelled modifiers (text_search, csv, returning options...) are no-ops
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: self
+
+    # ----- execution -----
+
+    def _matches(self, row: Dict[str, Any]) -> bool:
+        return all(f(row) for f in self._filters)
+
+    @staticmethod
+    def _stamp(row: Dict[str, Any]) -> Dict[str, Any]:
+        row = dict(row)
+        row.setdefault("id", str(uuid.uuid4()))
+        now = datetime.now(timezone.utc).isoformat()
+        row.setdefault("created_at", now)
+        row.setdefault("updated_at", now)
+        return row
+
+    def _run(self) -> FakeAPIResponse:
+        if self._rpc is not None:
+            name, params = self._rpc
+            probes.record_rpc(name)
+            return FakeAPIResponse(copy.deepcopy(self._db.call_rpc(name, params)))
+
+        probes.record_db(self._table)
+        rows = self._db.rows(self._schema, self._table)
+
+        if self._action in ("insert", "upsert"):
+            payload = self._payload if isinstance(self._payload, list) else [self._payload]
+            written = []
+            keys = [k.strip() for k in (self._on_conflict or "id").split(",")]
+            for item in payload:
+                existing = None
+                if self._action == "upsert" and all(k in item for k in keys):
+                    existing = next((r for r in rows if all(r.get(k) == item[k] for k in keys)), None)
+                if existing is not None:
+                    existing.update(item)
+                    written.append(dict(existing))
+                else:
+                    stamped = self._stamp(item)
+                    rows.append(stamped)
+                    written.append(dict(stamped))
+            return FakeAPIResponse(written)
+
+        matched = [r for r in rows if self._matches(r)]
+
+        if self._action == "update":
+            for row in matched:
+                row.update(self._payload)
+            return FakeAPIResponse([dict(r) for r in matched])
+
+        if self._action == "delete":
+            remaining = [r for r in rows if not self._matches(r)]
+            rows[:] = remaining
+            return FakeAPIResponse([dict(r) for r in matched])
+
+        for column, desc in reversed(self._order):
+            matched.sort(key=lambda r: (r.get(column) is None, r.get(column) if r.get(column) is not None else ""), reverse=desc)
+        total = len(matched)
+        if self._limit is not None:
+            matched = matched[self._offset:self._offset + self._limit]
+        elif self._offset:
+            matched = matched[self._offset:]
+        data = [copy.deepcopy(r) for r in matched]
+
+        if self._single:
+            if len(data) != 1:
+                raise Exception(f"JSON object requested, multiple (or no) rows returned ({self._table})")
+            return FakeAPIResponse(data[0], total if self._count else None)
+        if self._maybe_single:
+            return FakeAPIResponse(data[0] if data else None, total if self._count else None)
+        return FakeAPIResponse(data, total if self._count else None)
+
+    def execute(self) -> FakeAPIResponse:
+        latency = self._db.latency_for(self._rpc[0] if self._rpc else self._table)
+        if latency:
+            time.sleep(latency)
+        return self._run()
+
+
+class FakeAsyncQueryBuilder(FakeQueryBuilder):
+    """Async variant: execute() is awaitable and yields to the loop."""
+
+    async def execute(self) -> FakeAPIResponse:  # type: ignore[override]
+        latency = self._db.latency_for(self._rpc[0] if self._rpc else self._table)
+        await asyncio.sleep(latency)
+        return self._run()
+
+
+class FakeSupabaseClient:
+    """Schema-bound client over a shared InMemoryDatabase."""
+
+    builder_class = FakeQueryBuilder
+
+    def __init__(self, db: InMemoryDatabase, schema: str = "public"):
+        self.db = db
+        self._schema = schema
+
+    def schema(self, name: str) -> "FakeSupabaseClient":
+        return type(self)(self.db, name)
+
+    def table(self, name: str) -> FakeQueryBuilder:
+        return self.builder_class(self.db, self._schema, name)
+
+    from_ = table
+
+    def rpc(self, name: str, params: Optional[Dict[str, Any]] = None, **kwargs) -> FakeQueryBuilder:
+        builder = self.builder_class(self.db, self._schema, name)
+        builder._rpc = (name, params or {})
+        return builder
+
+
+class FakeAsyncSupabaseClient(FakeSupabaseClient):
+    builder_class = FakeAsyncQueryBuilder
+
+
+# =============================================================================
+# Redis
+# =============================================================================
+
+
+class _CountingProxy:
+    """Wraps a (fake)redis client and records every command issued."""
+
+    def __init__(self, client: Any):
+        self._client = client
+
+    def pipeline(self, *args, **kwargs):
+        return _CountingPipeline(self._client.pipeline(*args, **kwargs))
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._client, name)
+        if not callable(attr) or name.startswith("_"):
+            return attr
+
+        if asyncio.iscoroutinefunction(attr):
+            async def counted_async(*args, **kwargs):
+                probes.record_redis(name)
+                return await attr(*args, **kwargs)
+            return counted_async
+
+        def counted(*args, **kwargs):
+            probes.record_redis(name)
+            return attr(*args, **kwargs)
+        return counted
+
+
+class _CountingPipeline:
+    """A pipeline is one round trip: only execute() is counted."""
+
+    def __init__(self, pipeline: Any):
+        self._pipeline = pipeline
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._pipeline, name)
+        if name != "execute":
+            if callable(attr):
+                def queued(*args, **kwargs):
+                    attr(*args, **kwargs)
+                    return self
+                return queued
+            return attr
+
+        if asyncio.iscoroutinefunction(attr):
+            async def execute_async(*args, **kwargs):
+                probes.record_redis("pipeline")
+                return await attr(*args, **kwargs)
+            return execute_async
+
+        def execute(*args, **kwargs):
+            probes.record_redis("pipeline")
+            return attr(*args, **kwargs)
+        return execute
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeRedisFactory:
+    """Hands out counting fakeredis clients that share one in-memory server."""
+
+    def __init__(self):
+        import fakeredis
+        import fakeredis.aioredis
+
+        self._fakeredis = fakeredis
+        self.server = fakeredis.FakeServer()
+
+    def sync_client(self, *args, decode_responses: bool = False, **kwargs):
+        return _CountingProxy(
+            self._fakeredis.FakeRedis(server=self.server, decode_responses=decode_responses)
+        )
+
+    def async_client(self, *args, decode_responses: bool = False, **kwargs):
+        return _CountingProxy(
+            self._fakeredis.aioredis.FakeRedis(server=self.server, decode_responses=decode_responses)
+        )
+
+
+# =============================================================================
+# LLM
+# =============================================================================
+
+
+class LLMScript:
+    """
+    Responses the scripted adapter returns for the current turn.
+
+    Each entry is {"content": str} and/or {"tool_calls": [{"name", "arguments"}]},
+    optionally with "latency_ms". Once the turn's entries are used up the
+    default response is returned.
+    """
+
+    DEFAULT_CONTENT = "Claro, con gusto le ayudo."
+
+    def __init__(self, default_content: Optional[str] = None, latency_ms: float = 0.0):
+        self.default_content = default_content or self.DEFAULT_CONTENT
+        self.latency_ms = latency_ms
+        self._queue: List[Dict[str, Any]] = []
+        self.calls = 0
+
+    def load_turn(self, responses: List[Dict[str, Any]]) -> None:
+        self._queue = list(responses or [])
+
+    def next(self) -> Dict[str, Any]:
+        self.calls += 1
+        if self._queue:
+            return self._queue.pop(0)
+        return {"content": self.default_content}
+
+
+def build_scripted_factory(supabase_client: Any, script: LLMScript):
+    """Create an LLMFactory whose adapters replay ``script`` (imported lazily)."""
+    from app.services.llm.base_adapter import LLMAdapter, LLMResponse, ToolCall
+    from app.services.llm.llm_factory import LLMFactory
+
+    class ScriptedLLMAdapter(LLMAdapter):
+        async def _respond(self, tools_allowed: bool) -> LLMResponse:
+            entry = script.next()
+            await asyncio.sleep(entry.get("latency_ms", script.latency_ms) / 1000)
+            tool_calls = [
+                ToolCall(id=f"call_{i}", name=call["name"], arguments=call.get("arguments", {}))
+                for i, call in enumerate(entry.get("tool_calls", []) if tools_allowed else [])
+            ]
+            content = entry.get("content")
+            output_tokens = len((content or "").split())
+            return LLMResponse(
+                content=content,
+                tool_calls=tool_calls,
+                provider=self.provider,
+                model=self.model,
+                usage={"input_tokens": 0, "output_tokens": output_tokens, "total_tokens": output_tokens},
+                latency_ms=int(entry.get("latency_ms", script.latency_ms)),
+            )
+
+        async def generate(self, messages, temperature=0.7, max_tokens=None, **kwargs):
+            return await self._respond(tools_allowed=False)
+
+        async def generate_with_tools(self, messages, tools, temperature=0.7, max_tokens=None, **kwargs):
+            return await self._respond(tools_allowed=True)
+
+        async def stream(self, messages, temperature=0.7, max_tokens=None, **kwargs):
+            response = await self._respond(tools_allowed=False)
+            for word in (response.content or "").split(" "):
+                yield word + " "
+
+        def sanitize_parameters(self, params):
+            return params
+
+        def normalize_tool_calls(self, response):
+            return []
+
+    class ScriptedLLMFactory(LLMFactory):
+        async def create_adapter(self, model_name: str) -> LLMAdapter:
+            if model_name not in self._adapter_cache:
+                builtin = self._get_builtin_capabilities()
+                capability = builtin.get(model_name) or next(iter(builtin.values()))
+                self._adapter_cache[model_name] = ScriptedLLMAdapter(capability)
+            return self._adapter_cache[model_name]
+
+    return ScriptedLLMFactory(supabase_client)
+
+
+# =============================================================================
+# Evolution API
+# =============================================================================
+
+
+class FakeEvolutionServer:
+    """Local HTTP server that accepts Evolution API calls and records sends."""
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.sent: List[Dict[str, Any]] = []
+        self.url: Optional[str] = None
+        self._runner = None
+
+    async def _handle(self, request):
+        from aiohttp import web
+
+        probes.record_evolution()
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+
+        path = request.path
+        body = await request.json() if request.can_read_body else {}
+        if path.startswith("/message/send"):
+            self.sent.append({"path": path, "body": body})
+            return web.json_response({"key": {"id": f"BENCH{len(self.sent):06d}"}, "status": "PENDING"})
+        if path.startswith("/instance/connectionState"):
+            return web.json_response({"instance": {"state": "open"}})
+        return web.json_response({})
+
+    async def start(self) -> str:
+        from aiohttp import web
+
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+        return self.url
+
+    async def stop(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
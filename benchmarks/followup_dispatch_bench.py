@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Follow-up Dispatch Benchmark - time to send a backlog of due follow-ups.
+
+Seeds conversation_sessions with due follow-ups across several clinics,
+rebuilds the Redis index from the table and runs FollowupDispatcher
+instances against it until the backlog is drained:
+- legacy: FollowupProcessor.run before the index (serial, 1s sleep per
+  follow-up) - reported as the computed time, not run
+- dispatcher: --instances dispatchers sharing one Redis
+
+Checks (exit non-zero on failure):
+- every pending follow-up sent exactly once, across all instances
+- sessions answered after indexing are skipped, not sent
+- per-clinic start spacing respects --rate-per-minute
+
+Needs fakeredis with Lua support (pip install "fakeredis[lua]").
+
+Usage:
+    python -m benchmarks.followup_dispatch_bench
+    python -m benchmarks.followup_dispatch_bench --followups 600 --clinics 6 --instances 2
+"""
+import argparse
+import asyncio
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import fakeredis  # noqa: E402
+
+from app.jobs.followup_processor import FollowupProcessor  # noqa: E402
+from app.services.followup_queue import FollowupQueue  # noqa: E402
+from app.workers.followup_dispatcher import FollowupDispatcher  # noqa: E402
+from benchmarks.fakes import FakeSupabaseClient, InMemoryDatabase  # noqa: E402
+
+SPACING_WINDOW = 5
+
+
+def seed_sessions(db: InMemoryDatabase, followups: int, clinics: int, answered: int) -> List[str]:
+    due = (datetime.now(timezone.utc) - timedelta(minutes=5)).isoformat()
+    rows = []
+    for i in range(followups + answered):
+        rows.append({
+            'id': f"session-{i:05d}",
+            'user_identifier': f"+5550{i:05d}",
+            'scheduled_followup_at': due,
+            'turn_status': 'agent_action_pending',
+            'ended_at': None,
+            'last_agent_action': 'Check with the team',
+            'followup_context': {'context_summary': 'pending price confirmation'},
+            'metadata': {'clinic_id': f"clinic-{i % clinics}"},
+        })
+    db.seed({'public.conversation_sessions': rows})
+    return [row['id'] for row in rows[followups:]]
+
+
+async def run(args) -> int:
+    db = InMemoryDatabase(latency_ms=args.db_latency_ms)
+    answered = seed_sessions(db, args.followups, args.clinics, args.answered)
+    server = fakeredis.FakeServer()
+    manager = SimpleNamespace(supabase=FakeSupabaseClient(db))
+
+    sends: List[Dict[str, Any]] = []
+
+    def make_dispatcher(instance: int) -> FollowupDispatcher:
+        processor = FollowupProcessor(manager=manager)
+        original = processor.send_followup_message
+
+        async def recording_send(session):
+            sends.append({
+                'id': session['id'],
+                'clinic': session['metadata']['clinic_id'],
+                'instance': instance,
+                'at': time.perf_counter(),
+            })
+            return await original(session)
+
+        processor.send_followup_message = recording_send
+        queue = FollowupQueue(fakeredis.FakeRedis(server=server, decode_responses=True))
+        dispatcher = FollowupDispatcher(
+            processor=processor,
+            queue=queue,
+            concurrency=args.concurrency,
+            rate_per_minute=args.rate_per_minute,
+        )
+        dispatcher.poll_interval = 0.2
+        return dispatcher
+
+    dispatchers = [make_dispatcher(i) for i in range(args.instances)]
+
+    # Index everything, then answer some sessions so their entries go stale
+    started = time.perf_counter()
+    await dispatchers[0].rebuild()
+    for row in db.rows('public', 'conversation_sessions'):
+        if row['id'] in answered:
+            row['turn_status'] = 'user_turn'
+
+    tasks = [asyncio.create_task(d.start()) for d in dispatchers]
+    total = args.followups + args.answered
+    while sum(d.stats['processed'] + d.stats['skipped'] for d in dispatchers) < total:
+        await asyncio.sleep(0.05)
+        if time.perf_counter() - started > args.timeout:
+            print(f"FAIL timed out after {args.timeout}s")
+            break
+    elapsed = time.perf_counter() - started
+    for dispatcher in dispatchers:
+        await dispatcher.stop()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    stats = Counter()
+    for dispatcher in dispatchers:
+        stats.update(dispatcher.stats)
+
+    failures = []
+    per_session = Counter(send['id'] for send in sends)
+    doubled = [sid for sid, count in per_session.items() if count > 1]
+    if doubled:
+        failures.append(f"{len(doubled)} follow-ups sent more than once")
+    if len(per_session) != args.followups:
+        failures.append(f"{len(per_session)} of {args.followups} follow-ups sent")
+    if any(sid in per_session for sid in answered):
+        failures.append("answered sessions were sent a follow-up")
+
+    interval = 60.0 / args.rate_per_minute
+    # Limits are per dispatcher instance
+    by_clinic: Dict[tuple, List[float]] = defaultdict(list)
+    for send in sends:
+        by_clinic[(send['instance'], send['clinic'])].append(send['at'])
+    # Mean gap over SPACING_WINDOW consecutive starts (single gaps carry loop wake-up jitter)
+    gaps = []
+    for times in by_clinic.values():
+        times.sort()
+        gaps.extend(
+            (times[i + SPACING_WINDOW] - times[i]) / SPACING_WINDOW
+            for i in range(len(times) - SPACING_WINDOW)
+        )
+    min_gap = min(gaps, default=interval)
+    if min_gap < interval * 0.9:
+        failures.append(f"per-clinic spacing {min_gap * 1000:.1f}ms below {interval * 1000:.1f}ms")
+
+    legacy = args.followups * (1.0 + args.db_latency_ms / 1000.0)
+    print(f"{args.followups} due follow-ups (+{args.answered} answered) across {args.clinics} clinics, "
+          f"DB latency {args.db_latency_ms:g}ms, {args.rate_per_minute:g}/min per clinic")
+    print(f"  legacy serial (computed)  {legacy:8.1f}s")
+    print(f"  dispatcher x{args.instances}             {elapsed:8.1f}s "
+          f"(rate-limit floor {args.followups / args.clinics * interval / args.instances:.1f}s)")
+    print(f"  processed {stats['processed']}, skipped {stats['skipped']}, "
+          f"deferred {stats['deferred']}, failed {stats['failed']}")
+    print(f"  min per-clinic gap        {min_gap * 1000:8.1f}ms per instance, mean of {SPACING_WINDOW} "
+          f"(limit {interval * 1000:.1f}ms)")
+    for failure in failures:
+        print(f"  FAIL {failure}")
+    return len(failures)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Follow-up dispatcher against a due backlog")
+    parser.add_argument("--followups", type=int, default=600)
+    parser.add_argument("--answered", type=int, default=30, help="Indexed sessions answered before dispatch")
+    parser.add_argument("--clinics", type=int, default=6)
+    parser.add_argument("--instances", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--rate-per-minute", type=float, default=1200.0)
+    parser.add_argument("--db-latency-ms", type=float, default=20.0)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+    sys.exit(1 if asyncio.run(run(args)) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Language-ID Benchmark - embedded identifier vs langdetect.
+
+Runs both detectors over the labeled eval messages (lang_id_eval.tsv: the
+user turns of the eval conversations plus supplemental pt/he messages) and
+reports:
+- accuracy overall, per language and for short (<=3 words) messages
+- coverage: share of messages the embedded model answers rather than
+  returning unknown (langdetect always answers)
+- calibration: expected calibration error of the embedded confidences
+- throughput in messages per second
+
+langdetect is optional; without it only the embedded model is measured.
+
+Usage:
+    python -m benchmarks.lang_id_bench
+    python -m benchmarks.lang_id_bench --rounds 20
+"""
+import argparse
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.lang_id import LanguageIdentifier  # noqa: E402
+
+try:
+    import langdetect
+    langdetect.DetectorFactory.seed = 0
+except ImportError:
+    langdetect = None
+
+EVAL_PATH = Path(__file__).with_name("lang_id_eval.tsv")
+SHORT_WORDS = 3
+
+
+def load_eval(path: Path) -> List[Tuple[str, str]]:
+    samples = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if not line.strip() or line.startswith("#"):
+            continue
+        label, text = line.split("\t", 1)
+        samples.append((label, text))
+    return samples
+
+
+def langdetect_predict(text: str) -> Tuple[Optional[str], float]:
+    try:
+        best = langdetect.detect_langs(text)[0]
+        return best.lang, best.prob
+    except Exception:
+        return None, 0.0
+
+
+def evaluate(predict: Callable[[str], Tuple[Optional[str], float]], samples: List[Tuple[str, str]]) -> Dict:
+    by_lang: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
+    short = [0, 0]
+    answered = correct = 0
+    bins: Dict[int, List[float]] = defaultdict(lambda: [0, 0.0, 0])  # count, confidence sum, correct
+    for label, text in samples:
+        lang, confidence = predict(text)
+        hit = lang == label
+        correct += hit
+        answered += lang is not None
+        by_lang[label][0] += hit
+        by_lang[label][1] += 1
+        if len(text.split()) <= SHORT_WORDS:
+            short[0] += hit
+            short[1] += 1
+        if lang is not None:
+            bucket = bins[min(int(confidence * 10), 9)]
+            bucket[0] += 1
+            bucket[1] += confidence
+            bucket[2] += hit
+    ece = sum(abs(b[1] - b[2]) for b in bins.values()) / max(answered, 1)
+    return {
+        "accuracy": correct / len(samples),
+        "coverage": answered / len(samples),
+        "precision": correct / max(answered, 1),
+        "short_accuracy": short[0] / max(short[1], 1),
+        "short_count": short[1],
+        "by_lang": {lang: hits / total for lang, (hits, total) in sorted(by_lang.items())},
+        "ece": ece,
+    }
+
+
+def throughput(predict: Callable[[str], object], texts: List[str], rounds: int) -> float:
+    """Messages per second."""
+    for text in texts:
+        predict(text)
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for text in texts:
+            predict(text)
+    return rounds * len(texts) / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Embedded language identifier vs langdetect")
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+
+    samples = load_eval(EVAL_PATH)
+    texts = [text for _, text in samples]
+    identifier = LanguageIdentifier()
+
+    detectors = [("embedded", identifier.identify)]
+    if langdetect is not None:
+        detectors.append(("langdetect", langdetect_predict))
+    else:
+        print("langdetect not installed; measuring the embedded model only")
+
+    print(f"{len(samples)} eval messages, {sum(len(t.split()) <= SHORT_WORDS for t in texts)} short")
+    for name, predict in detectors:
+        result = evaluate(predict, samples)
+        rate = throughput(predict, texts, args.rounds)
+        print(f"\n{name}")
+        print(f"  accuracy        {result['accuracy']:.3f}  (short: {result['short_accuracy']:.3f})")
+        print(f"  coverage        {result['coverage']:.3f}  precision when answered {result['precision']:.3f}")
+        print(f"  calibration ECE {result['ece']:.3f}")
+        print("  per language    " + "  ".join(f"{lang}={acc:.2f}" for lang, acc in result["by_lang"].items()))
+        print(f"  throughput      {rate:,.0f} msg/s ({1e6 / rate:.1f} us/msg)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+LLM Adapter Overhead Benchmark - time GeminiAdapter spends converting tools
+and messages per call, before any network I/O.
+
+Replays the LLMGenerationStep tool loop: a conversation of --sizes messages
+(system prompt, history, tool calls and results), then --tool-rounds calls
+that each append an assistant tool call and its result to the same list,
+with the same --tools tool set every call. Each call is measured twice:
+- cold: tool and message caches cleared first (the cost of converting
+  everything, as before the caches)
+- cached: caches kept across the calls of the turn
+
+Checks (exit non-zero on failure): cached conversion returns the same
+system instruction, contents and tools as cold conversion.
+
+Needs google-genai (the adapter's own dependency); no API call is made.
+
+Usage:
+    python -m benchmarks.llm_adapter_overhead_bench
+    python -m benchmarks.llm_adapter_overhead_bench --sizes 10 30 60 --tools 12 --iterations 200
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.llm.adapters import gemini_adapter  # noqa: E402
+from app.services.llm.adapters.gemini_adapter import GeminiAdapter  # noqa: E402
+from app.services.llm.base_adapter import ModelCapability  # noqa: E402
+
+
+def make_adapter() -> GeminiAdapter:
+    os.environ.setdefault("BENCH_GEMINI_API_KEY", "bench")
+    return GeminiAdapter(ModelCapability(
+        provider="google",
+        model_name="gemini-bench",
+        display_name="Gemini bench",
+        input_price_per_1m=0.1,
+        output_price_per_1m=0.4,
+        max_input_tokens=1_000_000,
+        max_output_tokens=8192,
+        supports_streaming=True,
+        supports_tool_calling=True,
+        tool_calling_success_rate=None,
+        supports_parallel_tools=True,
+        supports_json_mode=True,
+        supports_structured_output=True,
+        supports_thinking_mode=False,
+        api_endpoint=None,
+        requires_api_key_env_var="BENCH_GEMINI_API_KEY",
+        base_url_override=None,
+    ))
+
+
+def make_tools(count: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "type": "function",
+            "function": {
+                "name": f"tool_{i}",
+                "description": f"Look up clinic data set {i} for the patient's request",
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "service_name": {"type": "string", "description": "Service the patient asked about"},
+                        "doctor_id": {"type": "string", "description": "Doctor UUID"},
+                        "date": {"type": "string", "description": "ISO date"},
+                        "time_of_day": {"type": "string", "enum": ["morning", "afternoon", "evening"]},
+                        "limit": {"type": "integer", "description": "Max results"},
+                    },
+                    "required": ["service_name"],
+                },
+            },
+        }
+        for i in range(count)
+    ]
+
+
+def tool_exchange(turn: int) -> List[Dict[str, Any]]:
+    """An assistant tool call and its result, as LLMGenerationStep appends them."""
+    return [
+        {
+            "role": "assistant",
+            "content": "",
+            "tool_calls": [{
+                "id": f"call_{turn}",
+                "type": "function",
+                "function": {"name": "tool_1", "arguments": json.dumps({"service_name": "implant", "limit": 5})},
+                "metadata": None,
+            }],
+        },
+        {
+            "role": "tool",
+            "tool_call_id": f"call_{turn}",
+            "name": "tool_1",
+            "content": json.dumps({"slots": [f"2026-01-0{d}T10:00" for d in range(1, 6)], "price": 1200}),
+        },
+    ]
+
+
+def make_conversation(size: int) -> List[Dict[str, Any]]:
+    messages = [{"role": "system", "content": "You are the clinic assistant. " * 40}]
+    turn = 0
+    while len(messages) < size:
+        if turn % 4 == 3:
+            messages.extend(tool_exchange(turn))
+        else:
+            role = "user" if turn % 2 == 0 else "assistant"
+            messages.append({"role": role, "content": f"message {turn} about implant prices and times next week"})
+        turn += 1
+    return messages[:size]
+
+
+def convert(adapter: GeminiAdapter, messages, tools):
+    system, contents = adapter._convert_messages(messages)
+    return system, contents, adapter._convert_tools(tools)
+
+
+def clear_caches(adapter: GeminiAdapter) -> None:
+    gemini_adapter._tool_cache.clear()
+    adapter._message_cache.clear()
+
+
+def dump(result) -> str:
+    system, contents, tools = result
+    return json.dumps([
+        system,
+        [c.model_dump(exclude_none=True) for c in contents],
+        [t.model_dump(exclude_none=True) for t in tools],
+    ], sort_keys=True, default=str)
+
+
+def run_turn(adapter: GeminiAdapter, size: int, tools, rounds: int, cold: bool) -> List[float]:
+    """One turn of the tool loop; returns the conversion time of each call."""
+    messages = make_conversation(size)
+    timings = []
+    for turn in range(rounds + 1):
+        if cold:
+            clear_caches(adapter)
+        started = time.perf_counter()
+        convert(adapter, messages, tools)
+        timings.append(time.perf_counter() - started)
+        messages.extend(tool_exchange(1000 + turn))
+    return timings
+
+
+def check(adapter: GeminiAdapter, size: int, tools, rounds: int) -> List[str]:
+    failures = []
+    messages = make_conversation(size)
+    clear_caches(adapter)
+    for turn in range(rounds + 1):
+        cached = dump(convert(adapter, messages, tools))
+        saved_tools, saved_messages = dict(gemini_adapter._tool_cache), dict(adapter._message_cache)
+        clear_caches(adapter)
+        cold = dump(convert(adapter, messages, tools))
+        gemini_adapter._tool_cache.update(saved_tools)
+        adapter._message_cache.update(saved_messages)
+        if cached != cold:
+            failures.append(f"{size} messages, call {turn + 1}: cached conversion differs from cold")
+        messages.extend(tool_exchange(1000 + turn))
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Gemini adapter tool/message conversion overhead per call")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 30, 60])
+    parser.add_argument("--tools", type=int, default=12)
+    parser.add_argument("--tool-rounds", type=int, default=3, help="Tool calls per turn after the first call")
+    parser.add_argument("--iterations", type=int, default=100, help="Turns per size")
+    args = parser.parse_args()
+
+    adapter = make_adapter()
+    tools = make_tools(args.tools)
+    failures = []
+    print(f"{args.tools} tools, {args.tool_rounds + 1} calls per turn, {args.iterations} turns per size")
+    print(f"\n{'messages':>8}  {'cold us/call':>13}  {'cached us/call':>15}  {'first call':>11}  {'later calls':>12}  speedup")
+    for size in args.sizes:
+        failures.extend(check(adapter, size, tools, args.tool_rounds))
+        cold, cached, first, later = [], [], [], []
+        for _ in range(args.iterations):
+            cold.extend(run_turn(adapter, size, tools, args.tool_rounds, cold=True))
+            turn = run_turn(adapter, size, tools, args.tool_rounds, cold=False)
+            cached.extend(turn)
+            first.append(turn[0])
+            later.extend(turn[1:])
+        cold_us = statistics.mean(cold) * 1e6
+        cached_us = statistics.mean(cached) * 1e6
+        print(f"{size:>8}  {cold_us:>13.0f}  {cached_us:>15.0f}  "
+              f"{statistics.mean(first) * 1e6:>11.0f}  {statistics.mean(later) * 1e6 if later else 0:>12.0f}  "
+              f"{cold_us / cached_us:.1f}x")
+
+    for failure in failures:
+        print(f"  FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
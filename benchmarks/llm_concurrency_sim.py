@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+LLM Concurrency Simulation - patient-facing turns and background work
+against a provider with limited capacity, with and without the adaptive
+concurrency limiter (app/services/llm/concurrency.py).
+
+FakeProvider has a capacity curve: latency is flat up to --knee concurrent
+calls, then grows linearly with concurrency. Above --capacity concurrent
+calls it answers 429 with a Retry-After header, the way a provider's rate
+limiter does.
+
+Load: patient turns arrive as a Poisson stream (--interactive-rps) for
+--duration seconds, and --background summaries/follow-up analyses are
+queued in one burst at the start, like a sweep after a restart.
+- unlimited: every call goes straight to the provider. A 429 on a patient
+  turn means a template answer; a 429 on background work fails it.
+- limited: every call takes a slot of one AdaptiveConcurrencyLimiter.
+  Patient turns are INTERACTIVE with a --turn-budget queue timeout and get
+  a template answer when shed; background work is BACKGROUND.
+
+Checks (exit non-zero on failure), limited against unlimited: fewer 429s,
+more background work completed, patient p95 (LLM or template) within
+--turn-budget plus a few provider latencies, and no more template answers.
+
+Usage:
+    python -m benchmarks.llm_concurrency_sim
+    python -m benchmarks.llm_concurrency_sim --interactive-rps 40 --background 600 --capacity 24
+"""
+import argparse
+import asyncio
+import logging
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.llm.concurrency import (  # noqa: E402
+    AdaptiveConcurrencyLimiter,
+    LLMOverloadedError,
+    LLMPriority,
+)
+
+
+class FakeRateLimitError(Exception):
+    """Shape of an SDK 429: status_code plus response headers."""
+
+    def __init__(self, retry_after: float):
+        super().__init__("Error code: 429 - rate limit exceeded")
+        self.status_code = 429
+        self.headers = {"retry-after": f"{retry_after:g}"}
+
+
+class FakeProvider:
+    """Provider double with a knee in its latency curve and a hard capacity."""
+
+    def __init__(self, base_ms: float, knee: int, capacity: int, slope: float, retry_after: float):
+        self.base_s = base_ms / 1000.0
+        self.knee = knee
+        self.capacity = capacity
+        self.slope = slope
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.peak = 0
+        self.calls = 0
+        self.rejected = 0
+
+    async def generate(self, rng: random.Random) -> str:
+        self.calls += 1
+        if self.in_flight >= self.capacity:
+            self.rejected += 1
+            await asyncio.sleep(0.02)
+            raise FakeRateLimitError(self.retry_after)
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            overload = max(self.in_flight - self.knee, 0) / self.knee
+            await asyncio.sleep(self.base_s * (1 + self.slope * overload) * rng.uniform(0.8, 1.2))
+            return "ok"
+        finally:
+            self.in_flight -= 1
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * p), len(values) - 1)]
+
+
+async def run_mode(args, limited: bool) -> Dict[str, Any]:
+    rng = random.Random(args.seed)  # Arrivals
+    latency_rng = random.Random(args.seed + 1)
+    provider = FakeProvider(args.base_ms, args.knee, args.capacity, args.slope, args.retry_after)
+    limiter = AdaptiveConcurrencyLimiter(
+        "fake", "fake-model",
+        initial_limit=args.initial_limit, min_limit=2, max_limit=256,
+    ) if limited else None
+    result = {
+        "turns": [], "templates": 0, "shed": 0,
+        "background_done": 0, "background_failed": 0,
+        "provider": provider, "limiter": limiter, "limits": [],
+    }
+
+    async def call(priority: LLMPriority, queue_timeout: float) -> str:
+        if limiter is None:
+            return await provider.generate(latency_rng)
+        async with limiter.slot(priority, queue_timeout):
+            return await provider.generate(latency_rng)
+
+    async def patient_turn():
+        started = time.perf_counter()
+        try:
+            await call(LLMPriority.INTERACTIVE, args.turn_budget)
+        except LLMOverloadedError:
+            result["shed"] += 1
+            result["templates"] += 1
+        except FakeRateLimitError:
+            result["templates"] += 1
+        result["turns"].append(time.perf_counter() - started)
+
+    async def background_job():
+        try:
+            await call(LLMPriority.BACKGROUND, args.background_timeout)
+            result["background_done"] += 1
+        except (LLMOverloadedError, FakeRateLimitError):
+            result["background_failed"] += 1
+
+    async def sample_limit():
+        while True:
+            result["limits"].append(limiter.current_limit)
+            await asyncio.sleep(0.1)
+
+    sampler = asyncio.create_task(sample_limit()) if limiter else None
+    started = time.perf_counter()
+    tasks = [asyncio.create_task(background_job()) for _ in range(args.background)]
+    deadline = started + args.duration
+    while time.perf_counter() < deadline:
+        tasks.append(asyncio.create_task(patient_turn()))
+        await asyncio.sleep(rng.expovariate(args.interactive_rps))
+    await asyncio.gather(*tasks)
+    result["elapsed"] = time.perf_counter() - started
+    if sampler:
+        sampler.cancel()
+    return result
+
+
+def report(name: str, result: Dict[str, Any], args) -> None:
+    provider, turns = result["provider"], result["turns"]
+    print(f"\n{name}")
+    print(f"  wall time            {result['elapsed']:8.2f}s")
+    print(f"  provider calls       {provider.calls:8d} (429: {provider.rejected}, peak concurrency {provider.peak})")
+    print(f"  patient turns        {len(turns):8d} (template answers {result['templates']}, shed {result['shed']})")
+    print(f"  patient p50 / p95    {percentile(turns, 0.5) * 1000:8.0f} / {percentile(turns, 0.95) * 1000:.0f}ms")
+    print(f"  background done      {result['background_done']:8d} / {args.background} "
+          f"(failed {result['background_failed']})")
+    if result["limiter"] is not None:
+        limits = result["limits"] or [0]
+        stats = result["limiter"].get_stats()
+        print(f"  limit min/avg/max    {min(limits):8d} / {sum(limits) / len(limits):.1f} / {max(limits)} "
+              f"(final {stats['limit']}, overloads {stats['overloads']}, retry-after {stats['retry_after']})")
+
+
+def check(unlimited: Dict[str, Any], limited: Dict[str, Any], args) -> List[str]:
+    failures = []
+    if limited["provider"].rejected >= unlimited["provider"].rejected:
+        failures.append("limiter did not reduce 429s")
+    if limited["background_done"] < unlimited["background_done"]:
+        failures.append("limiter completed less background work")
+    if limited["templates"] > unlimited["templates"]:
+        failures.append("limiter answered more patient turns with a template")
+    budget = args.turn_budget + 3 * args.base_ms / 1000.0 * (1 + args.slope)
+    p95 = percentile(limited["turns"], 0.95)
+    if p95 > budget:
+        failures.append(f"patient p95 {p95:.2f}s over {budget:.2f}s")
+    return failures
+
+
+async def run(args) -> int:
+    print(f"{args.interactive_rps:g} patient turns/s for {args.duration:g}s plus {args.background} background calls; "
+          f"provider {args.base_ms:g}ms, knee {args.knee}, capacity {args.capacity}, "
+          f"Retry-After {args.retry_after:g}s")
+    unlimited = await run_mode(args, limited=False)
+    report("unlimited", unlimited, args)
+    limited = await run_mode(args, limited=True)
+    report("adaptive limiter", limited, args)
+    failures = check(unlimited, limited, args)
+    for failure in failures:
+        print(f"  FAIL {failure}")
+    return len(failures)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Adaptive LLM concurrency limiter against a fake provider")
+    parser.add_argument("--interactive-rps", type=float, default=30.0)
+    parser.add_argument("--duration", type=float, default=8.0)
+    parser.add_argument("--background", type=int, default=400, help="Background calls queued at the start")
+    parser.add_argument("--base-ms", type=float, default=300.0, help="Provider latency below the knee")
+    parser.add_argument("--knee", type=int, default=16, help="Concurrency where latency starts to grow")
+    parser.add_argument("--capacity", type=int, default=32, help="Concurrency above which the provider answers 429")
+    parser.add_argument("--slope", type=float, default=1.0, help="Latency growth per knee of extra concurrency")
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--initial-limit", type=int, default=16)
+    parser.add_argument("--turn-budget", type=float, default=3.0, help="Queue timeout of patient turns")
+    parser.add_argument("--background-timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    # Overloads log warnings by design
+    logging.disable(logging.WARNING)
+    sys.exit(1 if asyncio.run(run(args)) else 0)
+
+
+if __name__ == "__main__":
+    main()
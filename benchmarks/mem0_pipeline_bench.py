@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+mem0 Write Pipeline Benchmark - throughput, lag and isolation against a
+fake slow mem0 backend.
+
+Drives ConversationMemoryManager.store_conversation_turn() for many users
+at a fixed arrival rate. FakeMem0.add() blocks its thread like the real
+client does (scaled down from the ~4.5s cloud add, see --add-ms) and
+records every call. Two pipeline configurations run on the same load:
+- serial: one shard, no coalescing (the old single writer loop)
+- sharded: MEM0_WRITE_SHARDS workers with per-user coalescing
+
+Reports add calls, drain time after the last turn, peak queue depth, lag,
+coalesced and dropped jobs, and checks that every turn was either written
+exactly once in per-user order or counted as dropped (exits non-zero if
+not).
+
+--hang makes add() block for 3x the timeout and reports how long
+asyncio.to_thread() calls wait meanwhile: mem0 calls stay on their own
+bounded pool, so the default executor stays free.
+
+Usage:
+    python -m benchmarks.mem0_pipeline_bench
+    python -m benchmarks.mem0_pipeline_bench --users 50 --rate 20 --add-ms 1000
+    python -m benchmarks.mem0_pipeline_bench --hang
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+class FakeMem0:
+    """Blocking mem0 client double that records add() calls."""
+
+    def __init__(self, add_ms: float):
+        self.add_s = add_ms / 1000.0
+        self.calls: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self.max_concurrent = 0
+        self._running = 0
+
+    def add(self, messages, user_id: str, metadata: Optional[Dict[str, Any]] = None):
+        with self._lock:
+            self._running += 1
+            self.max_concurrent = max(self.max_concurrent, self._running)
+        try:
+            time.sleep(self.add_s)
+            with self._lock:
+                self.calls.append({"user_id": user_id, "messages": list(messages), "metadata": metadata or {}})
+            return {"id": f"mem-{len(self.calls)}", "memory": f"{len(messages)} messages"}
+        finally:
+            with self._lock:
+                self._running -= 1
+
+    def get_all(self, user_id: str, limit: int = 100):
+        time.sleep(self.add_s / 10)
+        return []
+
+    def search(self, query: str, user_id: str, limit: int = 5):
+        time.sleep(self.add_s / 10)
+        return []
+
+
+def build_manager(cm, fake: FakeMem0, *, shards: int, max_batch: int, max_pending: int, overflow: str):
+    from app.memory.mem0_metrics import Mem0MetricsRecorder
+    from app.memory.mem0_write_pipeline import Mem0WritePipeline
+    from benchmarks.fakes import FakeSupabaseClient, InMemoryDatabase
+
+    with mock.patch.object(cm, "create_client", lambda *_args, **_kwargs: FakeSupabaseClient(InMemoryDatabase())):
+        manager = cm.ConversationMemoryManager()
+    manager.memory = fake
+    manager.mem0_available = True
+    manager._mem0_init_attempted = True
+    manager.mem0_metrics = Mem0MetricsRecorder()
+    manager._mem0_pipeline = Mem0WritePipeline(
+        manager._process_mem0_batch,
+        shards=shards,
+        max_pending=max_pending,
+        max_batch=max_batch,
+        overflow_policy=overflow,
+        metrics=manager.mem0_metrics,
+    )
+    return manager
+
+
+async def run_load(manager, users: int, turns: int, rate: float) -> Dict[str, Any]:
+    """Submit users*turns turns round-robin at `rate` turns/s; wait for the drain."""
+    submitted: Dict[str, List[str]] = defaultdict(list)
+    pipeline = manager._get_mem0_pipeline()
+    peak_depth = 0
+    interval = 1.0 / rate
+    started = time.perf_counter()
+
+    for i in range(turns):
+        for u in range(users):
+            phone = f"5550{u:04d}"
+            text = f"{phone} turn {i}"
+            await manager.store_conversation_turn(
+                session_id=f"session-{phone}",
+                user_message=text,
+                assistant_response=f"ack {i}",
+                phone_number=phone,
+                metadata={"clinic_id": "bench"},
+            )
+            submitted[f"bench:{phone}"].append(text)
+            peak_depth = max(peak_depth, pipeline.depth)
+            target = started + (i * users + u + 1) * interval
+            await asyncio.sleep(max(0.0, target - time.perf_counter()))
+
+    last_submit = time.perf_counter()
+    await pipeline.drain()
+    finished = time.perf_counter()
+    await pipeline.stop()
+
+    return {
+        "submitted": submitted,
+        "submit_s": last_submit - started,
+        "drain_s": finished - last_submit,
+        "peak_depth": peak_depth,
+        "metrics": await manager.mem0_metrics.snapshot(),
+    }
+
+
+def check_writes(fake: FakeMem0, submitted: Dict[str, List[str]], dropped: int) -> List[str]:
+    """Every turn written once, in order per user, or accounted for as dropped."""
+    written: Dict[str, List[str]] = defaultdict(list)
+    for call in fake.calls:
+        written[call["user_id"]].extend(m["content"] for m in call["messages"] if m["role"] == "user")
+
+    problems = []
+    missing = 0
+    for user_id, texts in submitted.items():
+        got = written.get(user_id, [])
+        positions = {text: i for i, text in enumerate(texts)}
+        order = [positions.get(text, -1) for text in got]
+        if -1 in order or len(set(got)) != len(got):
+            problems.append(f"{user_id}: unexpected or duplicate writes")
+        elif order != sorted(order):
+            problems.append(f"{user_id}: writes out of order")
+        missing += len(texts) - len(got)
+    if missing != dropped:
+        problems.append(f"{missing} turns not written but {dropped} counted as dropped")
+    return problems
+
+
+async def probe_default_executor(stop: asyncio.Event, samples: List[float]) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.to_thread(lambda: None)
+        samples.append((time.perf_counter() - started) * 1000.0)
+        await asyncio.sleep(0.02)
+
+
+async def run_hang(cm, args) -> None:
+    fake = FakeMem0(add_ms=3 * cm.MEM0_TIMEOUT_MS)
+    manager = build_manager(cm, fake, shards=args.shards, max_batch=args.max_batch,
+                            max_pending=args.max_pending, overflow=args.overflow)
+    # Keep the circuit breaker closed so every write reaches the hung backend
+    manager._mem0_circuit_breaker_threshold = 10 ** 9
+
+    stop = asyncio.Event()
+    samples: List[float] = []
+    probe = asyncio.create_task(probe_default_executor(stop, samples))
+    result = await run_load(manager, args.users, 2, args.rate)
+    stop.set()
+    await probe
+
+    mem0_threads = sum(1 for t in threading.enumerate() if t.name.startswith("mem0"))
+    print(f"hung backend: add blocks {3 * cm.MEM0_TIMEOUT_MS}ms, timeout {cm.MEM0_TIMEOUT_MS}ms")
+    print(f"  turns submitted            {sum(len(v) for v in result['submitted'].values())}")
+    print(f"  mem0 threads alive         {mem0_threads} (pool size {cm.MEM0_EXECUTOR_WORKERS})")
+    print(f"  backend calls started      {len(fake.calls) + fake._running}")
+    print(f"  to_thread latency p50/max  {statistics.median(samples):.2f} / {max(samples):.2f} ms "
+          f"({len(samples)} probes)")
+
+
+async def run_compare(cm, args) -> int:
+    configs = [
+        ("serial", dict(shards=1, max_batch=1)),
+        ("sharded", dict(shards=args.shards, max_batch=args.max_batch)),
+    ]
+    total = args.users * args.turns
+    print(f"{args.users} users x {args.turns} turns at {args.rate:g} turns/s, add() = {args.add_ms:g}ms, "
+          f"max_pending={args.max_pending}/shard, overflow={args.overflow}")
+
+    failures = 0
+    for name, config in configs:
+        fake = FakeMem0(args.add_ms)
+        manager = build_manager(cm, fake, max_pending=args.max_pending, overflow=args.overflow, **config)
+        result = await run_load(manager, args.users, args.turns, args.rate)
+        metrics = result["metrics"]
+        problems = check_writes(fake, result["submitted"], metrics["dropped_jobs_total"])
+        failures += len(problems)
+
+        print(f"\n{name} (shards={config['shards']}, max_batch={config['max_batch']})")
+        print(f"  add calls         {len(fake.calls)} for {total} turns "
+              f"(coalesced {metrics['coalesced_jobs_total']}, dropped {metrics['dropped_jobs_total']})")
+        print(f"  peak concurrency  {fake.max_concurrent}")
+        print(f"  peak queue depth  {result['peak_depth']}")
+        print(f"  lag avg / max     {metrics['average_lag_ms']:.0f} / {metrics['max_lag_ms']:.0f} ms")
+        print(f"  drain after load  {result['drain_s']:.2f}s (load took {result['submit_s']:.2f}s)")
+        for problem in problems:
+            print(f"  FAIL {problem}")
+
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="mem0 write pipeline against a fake slow backend")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=5, help="Turns per user")
+    parser.add_argument("--rate", type=float, default=40.0, help="Arrival rate in turns/s")
+    parser.add_argument("--add-ms", type=float, default=250.0, help="Fake add() latency")
+    parser.add_argument("--shards", type=int, default=4)
+    parser.add_argument("--max-batch", type=int, default=8)
+    parser.add_argument("--max-pending", type=int, default=128)
+    parser.add_argument("--overflow", default="drop_oldest", choices=("drop_oldest", "reject"))
+    parser.add_argument("--hang", action="store_true", help="Hung backend: check executor isolation")
+    args = parser.parse_args()
+
+    # Drop/timeout warnings are expected here and reported in the summary
+    logging.disable(logging.WARNING)
+    os.environ.setdefault("MEM0_TIMEOUT_MS", "800" if args.hang else "6000")
+    os.environ.setdefault("MEM0_WRITE_SHARDS", str(args.shards))
+    from app.memory import conversation_memory as cm
+
+    if args.hang:
+        asyncio.run(run_hang(cm, args))
+        return
+    sys.exit(1 if asyncio.run(run_compare(cm, args)) else 0)
+
+
+if __name__ == "__main__":
+    main()
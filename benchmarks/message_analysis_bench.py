@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Message Analysis Benchmark - text-analysis CPU per inbound message.
+
+Compares the language detection and normalization work one message used
+to cost across the pipeline with a single MessageAnalysis:
+- legacy: each stage running its own detection/normalization on the same
+  text (quick ack, routing, direct-lane classifier, intent router, price
+  tool, hybrid search)
+- analysis: one MessageAnalysis per message, every stage reading from it
+
+tests/services/test_message_analysis.py checks that MessageAnalysis fields
+equal the per-module outputs they replace, using the reference
+implementations and corpus below.
+
+Usage:
+    python -m benchmarks.message_analysis_bench
+    python -m benchmarks.message_analysis_bench --rounds 20
+"""
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import langdetect  # noqa: E402
+
+from app.services.language_service import LanguageService, get_language_service  # noqa: E402
+from app.services.message_analysis import MessageAnalysis  # noqa: E402
+from app.services.text_normalization import get_normalizer  # noqa: E402
+from app.utils.text_normalization import normalize_query  # noqa: E402
+
+MESSAGES = [
+    "Hola, quiero agendar una limpieza para mañana a las 10:30",
+    "¿Cuánto cuesta el blanqueamiento dental?",
+    "Necesito una cita con el dentista el miércoles por la tarde",
+    "Здравствуйте, сколько стоит установка виниров?",
+    "Нет, я зоч узнать стоимость виниров",
+    "Хочу записаться на завтра в девять утра",
+    "да",
+    "Hi, I'd like to book a cleaning next week, Tuesday at 2pm if possible",
+    "How much for veneers?",
+    "what is the price of dental implants",
+    "ok",
+    "Olá, você tem horário na sexta? Quanto custa uma limpeza?",
+    "Obrigado!",
+    "שלום, אני רוצה לקבוע תור למחר בבוקר",
+    "כמה עולה הלבנת שיניים?",
+    "Is Dr. Mark available tomorrow?",
+    "Does Dr. Mark work here?",
+    "Can I come on 12/05 at 9am?",
+    "  Hello there, I have a toothache since yesterday  ",
+    "Impalnts pricing please",
+    "",
+    "👍",
+]
+
+NORMALIZER_LANGUAGES = (None, 'russian', 'english', 'spanish', 'hebrew')
+
+
+# ----- reference implementations of the per-module code MessageAnalysis replaced -----
+
+def legacy_price_tool_language(query: str) -> str:
+    """PriceQueryTool._detect_language before MessageAnalysis."""
+    if any('\u0400' <= c <= '\u04FF' for c in query):
+        return 'ru'
+    if any(c in query.lower() for c in 'áéíóúñü'):
+        return 'es'
+    return 'en'
+
+
+def legacy_hybrid_language(query: str) -> str:
+    """HybridSearchService language detection without phone_hash."""
+    try:
+        langdetect.DetectorFactory.seed = 0
+        return langdetect.detect(query)
+    except Exception:
+        return 'en'
+
+
+def legacy_parse_time(text: str) -> Optional[Tuple[int, int]]:
+    """IntentRouter._parse_time_from_text before MessageAnalysis."""
+    text_lower = text.lower()
+    russian_numbers = {
+        'девят': 9, 'десят': 10, 'одиннадцат': 11, 'двенадцат': 12,
+        'один': 1, 'два': 2, 'три': 3, 'четыр': 4, 'пят': 5,
+        'шест': 6, 'сем': 7, 'восем': 8
+    }
+    time_match = re.search(r'(\d{1,2})(?::(\d{2}))?\s*(am|pm|часов|утра|вечера)?', text_lower)
+    if time_match:
+        hour = int(time_match.group(1))
+        minute = int(time_match.group(2)) if time_match.group(2) else 0
+        period = time_match.group(3)
+        if period in ['pm', 'вечера'] and hour < 12:
+            hour += 12
+        elif period in ['am', 'утра'] and hour == 12:
+            hour = 0
+        return (hour, minute)
+    for word, num in russian_numbers.items():
+        if word in text_lower:
+            return (num, 0)
+    return None
+
+
+def legacy_parse_date(text: str) -> Optional[str]:
+    """IntentRouter._parse_date_from_text before MessageAnalysis."""
+    text_lower = text.lower()
+    for keyword, reference in (
+        ('tomorrow', 'tomorrow'), ('today', 'today'), ('monday', 'Monday'),
+        ('tuesday', 'Tuesday'), ('wednesday', 'Wednesday'), ('thursday', 'Thursday'),
+        ('friday', 'Friday'), ('saturday', 'Saturday'), ('sunday', 'Sunday'),
+        ('mañana', 'mañana'), ('hoy', 'hoy'), ('lunes', 'lunes'), ('martes', 'martes'),
+    ):
+        if keyword in text_lower:
+            return reference
+    if 'miércoles' in text_lower or 'miercoles' in text_lower:
+        return 'miércoles'
+    for keyword in ('jueves', 'viernes'):
+        if keyword in text_lower:
+            return keyword
+    if 'sábado' in text_lower or 'sabado' in text_lower:
+        return 'sábado'
+    for keyword in ('domingo', 'завтра', 'сегодня'):
+        if keyword in text_lower:
+            return keyword
+    date_match = re.search(r'\d{1,2}[/-]\d{1,2}(?:[/-]\d{2,4})?', text_lower)
+    return date_match.group(0) if date_match else None
+
+
+# ----- per-message workloads -----
+
+def legacy_message(text: str, service: LanguageService) -> None:
+    """Detection/normalization each stage ran on its own."""
+    LanguageService().detect_sync(text)                     # webhook quick ack
+    service.detect_sync(text.strip())                       # RoutingStep
+    service.detect_sync(text.lower())                       # ToolIntentClassifier
+    lang = service.detect_sync(text)                        # IntentRouter
+    get_normalizer().normalize(text, lang)
+    legacy_parse_time(text)
+    legacy_parse_date(text)
+    normalize_query(text)                                   # PriceQueryTool
+    legacy_price_tool_language(text)
+    legacy_hybrid_language(text)                            # HybridSearchService
+    normalize_query(text)
+
+
+def analysis_message(text: str) -> None:
+    """The same stages reading one MessageAnalysis."""
+    analysis = MessageAnalysis(text)
+    analysis.language                                       # webhook quick ack
+    analysis.word_set, analysis.language                    # RoutingStep
+    analysis.language                                       # ToolIntentClassifier
+    analysis.search_terms(analysis.language)                # IntentRouter
+    analysis.time_of_day, analysis.date_reference
+    analysis.normalized, analysis.has_cyrillic, analysis.has_latin_accents  # PriceQueryTool
+    analysis.language, analysis.normalized                  # HybridSearchService
+
+
+def measure(fn: Callable[[str], None], messages: List[str], rounds: int) -> float:
+    """CPU seconds per message."""
+    for text in messages:
+        fn(text)
+    started = time.process_time()
+    for _ in range(rounds):
+        for text in messages:
+            fn(text)
+    return (time.process_time() - started) / (rounds * len(messages))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Text-analysis CPU per message")
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+
+    service = get_language_service()
+    legacy = measure(lambda text: legacy_message(text, service), MESSAGES, args.rounds)
+    analyzed = measure(analysis_message, MESSAGES, args.rounds)
+
+    print(f"Text-analysis CPU per message ({len(MESSAGES)} messages x {args.rounds} rounds)")
+    print(f"  legacy    {legacy * 1000:8.3f} ms")
+    print(f"  analysis  {analyzed * 1000:8.3f} ms")
+    if analyzed > 0:
+        print(f"  speedup   {legacy / analyzed:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
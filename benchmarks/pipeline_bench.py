@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+Pipeline Benchmark - replay recorded conversations through the real pipeline.
+
+Runs PipelineMessageProcessor.process_message in-process with every
+external dependency replaced by a local stand-in (see benchmarks/fakes.py)
+and reports, per message:
+- per-step latency p50/p95/p99 (from ctx.step_timings)
+- event-loop blocking time
+- DB / RPC / Redis / Evolution call counts
+
+Usage:
+    # Run the bundled traces and print a report
+    python -m benchmarks.pipeline_bench
+
+    # Simulate 15ms per DB round trip, save the result as the baseline
+    python -m benchmarks.pipeline_bench --db-latency-ms 15 --output benchmarks/baseline.json
+
+    # Compare against the baseline; exit 1 if a tracked metric regresses >10%
+    python -m benchmarks.pipeline_bench --db-latency-ms 15 --compare benchmarks/baseline.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import uuid
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks import probes  # noqa: E402
+from benchmarks.fakes import (  # noqa: E402
+    FakeAsyncSupabaseClient,
+    FakeEvolutionServer,
+    FakeRedisFactory,
+    FakeSupabaseClient,
+    InMemoryDatabase,
+    LLMScript,
+    build_scripted_factory,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TRACES = Path(__file__).parent / "traces" / "clinic_conversations.json"
+SCHEMAS = ("healthcare", "public", "core")
+
+# Absolute noise floors below which a relative regression is ignored
+MIN_DELTA_MS = 1.0
+MIN_DELTA_CALLS = 0.5
+
+# Receives ctx.step_timings from the pipeline for the message being measured
+_step_timings_sink: ContextVar[Optional[Dict[str, float]]] = ContextVar("bench_step_timings", default=None)
+
+
+# =============================================================================
+# Environment
+# =============================================================================
+
+
+def _register_rpcs(db: InMemoryDatabase) -> None:
+    """Minimal implementations of the RPCs the message path depends on."""
+
+    def create_or_get_session(params: Dict[str, Any]) -> str:
+        sessions = db.rows("public", "conversation_sessions")
+        for session in sessions:
+            if session.get("user_identifier") == params.get("p_user") and session.get("status") == "active":
+                return session["id"]
+        now = datetime.now(timezone.utc).isoformat()
+        session = {
+            "id": str(uuid.uuid4()),
+            "user_identifier": params.get("p_user"),
+            "channel_type": params.get("p_channel"),
+            "clinic_id": params.get("p_clinic"),
+            "status": "active",
+            "metadata": params.get("p_metadata") or {},
+            "started_at": now,
+            "created_at": now,
+            "updated_at": now,
+        }
+        sessions.append(session)
+        return session["id"]
+
+    def log_message_with_metrics(params: Dict[str, Any]) -> Dict[str, Any]:
+        message_id = str(uuid.uuid4())
+        db.rows("healthcare", "conversation_logs").append({
+            "id": message_id,
+            "session_id": params.get("p_session_id"),
+            "role": params.get("p_role"),
+            "content": params.get("p_content"),
+            "metadata": params.get("p_metadata") or {},
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        })
+        return {"success": True, "message_id": message_id}
+
+    def get_conversation_messages(params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        rows = [
+            r for r in db.rows("healthcare", "conversation_logs")
+            if r.get("session_id") == params.get("p_session_id")
+        ]
+        offset = params.get("p_offset") or 0
+        return rows[offset:offset + (params.get("p_limit") or 50)]
+
+    db.register_rpc("create_or_get_session", create_or_get_session)
+    db.register_rpc("log_message_with_metrics", log_message_with_metrics)
+    db.register_rpc("get_conversation_messages", get_conversation_messages)
+
+
+def install_fakes(db: InMemoryDatabase, redis_factory: FakeRedisFactory, script: LLMScript) -> None:
+    """Point every client factory the pipeline uses at the local stand-ins."""
+    import supabase
+
+    def fake_create_client(supabase_url, supabase_key, options=None):
+        return FakeSupabaseClient(db, getattr(options, "schema", None) or "public")
+
+    # Services that build their own client import create_client when first loaded
+    supabase.create_client = fake_create_client  # noqa: TID251
+
+    import redis
+    import redis.asyncio
+
+    def sync_from_url(*args, **kwargs):
+        return redis_factory.sync_client(**kwargs)
+
+    def async_from_url(*args, **kwargs):
+        return redis_factory.async_client(**kwargs)
+
+    redis.Redis.from_url = staticmethod(sync_from_url)
+    redis.from_url = sync_from_url
+    redis.asyncio.Redis.from_url = staticmethod(async_from_url)
+    redis.asyncio.from_url = async_from_url
+
+    import app.database as database
+
+    database.create_client = fake_create_client
+    for schema in SCHEMAS:
+        database._supabase_clients[schema] = FakeSupabaseClient(db, schema)
+        database._async_supabase_clients[schema] = FakeAsyncSupabaseClient(db, schema)
+
+    import app.services.llm.llm_factory as llm_factory
+
+    scripted_factory = build_scripted_factory(FakeSupabaseClient(db, "healthcare"), script)
+    llm_factory._llm_factory_instance = scripted_factory
+    # The FSM orchestrator builds its own LLMFactory; script its adapters too
+    llm_factory.LLMFactory.create_adapter = type(scripted_factory).create_adapter
+
+    import app.api.pipeline_message_processor as processor_module
+    from app.api.pipeline import MessageProcessingPipeline
+
+    class RecordingPipeline(MessageProcessingPipeline):
+        async def execute(self, ctx):
+            ctx = await super().execute(ctx)
+            sink = _step_timings_sink.get()
+            if sink is not None:
+                sink.update(ctx.step_timings)
+            return ctx
+
+    processor_module.MessageProcessingPipeline = RecordingPipeline
+
+
+def load_traces(path: Path) -> Dict[str, Any]:
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+# =============================================================================
+# Replay
+# =============================================================================
+
+
+class BenchmarkRun:
+    """Per-message samples collected during a replay."""
+
+    def __init__(self):
+        self.step_ms: Dict[str, List[float]] = defaultdict(list)
+        self.blocked_ms: List[float] = []
+        self.io: List[probes.IOCounters] = []
+        self.failed_steps: Counter = Counter()
+
+    @property
+    def messages(self) -> int:
+        return len(self.io)
+
+
+async def _process_turn(processor, request, run: Optional[BenchmarkRun], monitor: probes.LoopBlockMonitor):
+    """Process one message in its own task so IO counters and timings are isolated."""
+    counters = probes.begin_message()
+    timings: Dict[str, float] = {}
+    _step_timings_sink.set(timings)
+    blocked_before = monitor.blocked_ms
+
+    response = await processor.process_message(request)
+    # Let the ticker observe any stall that ended with the message
+    await asyncio.sleep(monitor.interval * 2)
+
+    if run is None:
+        return
+    run.blocked_ms.append(monitor.blocked_ms - blocked_before)
+    run.io.append(counters)
+    for step, duration in timings.items():
+        run.step_ms[step].append(duration)
+    failed = (response.metadata or {}).get("failed_step")
+    if failed:
+        run.failed_steps[failed] += 1
+
+
+async def replay(
+    traces: Dict[str, Any],
+    iterations: int,
+    warmup: int,
+    db_latency_ms: float,
+    llm_latency_ms: float,
+    evolution_latency_ms: float,
+) -> Dict[str, Any]:
+    evolution = FakeEvolutionServer(latency_ms=evolution_latency_ms)
+    os.environ["EVOLUTION_SERVER_URL"] = os.environ["EVOLUTION_API_URL"] = await evolution.start()
+    for key in ("OPENAI_API_KEY", "GOOGLE_API_KEY", "GLM_API_KEY"):
+        os.environ.setdefault(key, "benchmark")
+    os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+    os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "benchmark.benchmark.benchmark")
+    os.environ.setdefault("MASTER_ENCRYPTION_SECRET", "0" * 64)
+    os.environ.setdefault("ENCRYPTION_SALT", "0" * 32)
+    os.environ.setdefault("DISABLE_MEM0", "true")
+
+    db = InMemoryDatabase(latency_ms=db_latency_ms, table_latency_ms=traces.get("table_latency_ms"))
+    db.seed(traces.get("seed", {}))
+    _register_rpcs(db)
+    script = LLMScript(default_content=traces.get("default_response"), latency_ms=llm_latency_ms)
+    install_fakes(db, FakeRedisFactory(), script)
+
+    from app.api.pipeline_message_processor import PipelineMessageProcessor
+    from app.schemas.messages import MessageRequest
+
+    processor = PipelineMessageProcessor()
+    monitor = probes.LoopBlockMonitor()
+    monitor.start()
+    run = BenchmarkRun()
+
+    try:
+        for iteration in range(warmup + iterations):
+            measured = iteration >= warmup
+            for conversation in traces["conversations"]:
+                # Fresh phone per iteration so every pass starts a new session
+                phone = f"{conversation['from_phone']}{iteration:02d}"
+                for turn in conversation["turns"]:
+                    script.load_turn(turn.get("llm", []))
+                    request = MessageRequest(
+                        from_phone=phone,
+                        to_phone=conversation.get("to_phone", traces.get("to_phone", "+10000000000")),
+                        body=turn["message"],
+                        message_sid=f"bench-{uuid.uuid4().hex[:12]}",
+                        clinic_id=conversation.get("clinic_id", traces.get("clinic_id")),
+                        clinic_name=conversation.get("clinic_name", traces.get("clinic_name", "Benchmark Clinic")),
+                        channel=conversation.get("channel", "whatsapp"),
+                        profile_name=conversation.get("profile_name", "Usuario"),
+                    )
+                    await asyncio.create_task(
+                        _process_turn(processor, request, run if measured else None, monitor)
+                    )
+    finally:
+        await monitor.stop()
+        pending = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        if pending:
+            await asyncio.wait(pending, timeout=5)
+        await evolution.stop()
+
+    report = build_report(run)
+    report["config"] = {
+        "traces": traces.get("name", "unnamed"),
+        "iterations": iterations,
+        "warmup": warmup,
+        "db_latency_ms": db_latency_ms,
+        "llm_latency_ms": llm_latency_ms,
+        "evolution_latency_ms": evolution_latency_ms,
+    }
+    report["llm_calls"] = script.calls
+    report["evolution_sends"] = len(evolution.sent)
+    report["unknown_rpcs"] = sorted(db.unknown_rpcs)
+    return report
+
+
+# =============================================================================
+# Reporting
+# =============================================================================
+
+
+def build_report(run: BenchmarkRun) -> Dict[str, Any]:
+    per_message = max(run.messages, 1)
+    tables: Counter = Counter()
+    for counters in run.io:
+        tables.update(counters.db_by_table)
+
+    return {
+        "messages": run.messages,
+        "steps_ms": {
+            step: probes.percentile_summary(samples)
+            for step, samples in sorted(run.step_ms.items())
+        },
+        "loop_blocked_ms": probes.percentile_summary(run.blocked_ms),
+        "db_calls": probes.percentile_summary([c.db_calls for c in run.io]),
+        "rpc_calls": probes.percentile_summary([c.rpc_calls for c in run.io]),
+        "redis_calls": probes.percentile_summary([c.redis_calls for c in run.io]),
+        "evolution_calls": probes.percentile_summary([c.evolution_calls for c in run.io]),
+        "db_calls_by_table_per_message": {
+            table: round(count / per_message, 2) for table, count in tables.most_common()
+        },
+        "failed_steps": dict(run.failed_steps),
+    }
+
+
+def tracked_metrics(report: Dict[str, Any]) -> Dict[str, float]:
+    """Flatten the metrics a comparison gates on."""
+    metrics: Dict[str, float] = {}
+    for step, summary in report.get("steps_ms", {}).items():
+        if summary.get("count"):
+            metrics[f"steps_ms.{step}.p95"] = summary["p95"]
+    for key in ("p50", "p99"):
+        total = report.get("steps_ms", {}).get("_total", {})
+        if total.get("count"):
+            metrics[f"steps_ms._total.{key}"] = total[key]
+    for key in ("loop_blocked_ms", "db_calls", "rpc_calls", "redis_calls"):
+        summary = report.get(key, {})
+        if summary.get("count"):
+            metrics[f"{key}.mean"] = summary["mean"]
+    metrics["failed_messages"] = sum(report.get("failed_steps", {}).values())
+    return metrics
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    """Return a description of every tracked metric that regressed beyond the threshold."""
+    regressions = []
+    now = tracked_metrics(current)
+    before = tracked_metrics(baseline)
+
+    for name, value in sorted(now.items()):
+        if name not in before:
+            continue
+        reference = before[name]
+        floor = MIN_DELTA_MS if "_ms" in name else MIN_DELTA_CALLS
+        delta = value - reference
+        if delta <= floor:
+            continue
+        if reference == 0 or delta / reference > max_regression:
+            change = f"+{delta / reference:.0%}" if reference else "new"
+            regressions.append(f"{name}: {reference} -> {value} ({change})")
+    return regressions
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print("\n" + "=" * 72)
+    print(f"PIPELINE BENCHMARK - {report['messages']} messages")
+    print("=" * 72)
+    print(f"{'step':<28}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    for step, summary in report["steps_ms"].items():
+        print(f"{step:<28}{summary['p50']:>10.1f}{summary['p95']:>10.1f}{summary['p99']:>10.1f}{summary['max']:>10.1f}")
+    print("-" * 72)
+    print(f"{'per message':<28}{'mean':>10}{'p95':>10}{'max':>10}")
+    for key in ("loop_blocked_ms", "db_calls", "rpc_calls", "redis_calls", "evolution_calls"):
+        summary = report[key]
+        if summary.get("count"):
+            print(f"{key:<28}{summary['mean']:>10.1f}{summary['p95']:>10.1f}{summary['max']:>10.1f}")
+    if report["db_calls_by_table_per_message"]:
+        print("-" * 72)
+        print("DB calls by table (per message):")
+        for table, count in report["db_calls_by_table_per_message"].items():
+            print(f"  {table:<40}{count:>8.2f}")
+    if report["failed_steps"]:
+        print(f"\n⚠️  Failed steps: {report['failed_steps']}")
+    if report["unknown_rpcs"]:
+        print(f"⚠️  RPCs without a fake implementation: {', '.join(report['unknown_rpcs'])}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Offline message pipeline benchmark")
+    parser.add_argument("--traces", type=Path, default=DEFAULT_TRACES, help="Conversation trace file")
+    parser.add_argument("--iterations", type=int, default=5, help="Measured passes over the traces")
+    parser.add_argument("--warmup", type=int, default=1, help="Unmeasured passes before measuring")
+    parser.add_argument("--db-latency-ms", type=float, default=0.0, help="Simulated latency per DB call")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="Simulated latency per LLM call")
+    parser.add_argument("--evolution-latency-ms", type=float, default=0.0, help="Simulated Evolution API latency")
+    parser.add_argument("--output", type=Path, help="Write the JSON report here")
+    parser.add_argument("--compare", type=Path, help="Baseline report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.10,
+                        help="Allowed relative regression of a tracked metric (default 0.10)")
+    parser.add_argument("--verbose", action="store_true", help="Show application logs")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.ERROR)
+
+    report = asyncio.run(replay(
+        load_traces(args.traces),
+        iterations=args.iterations,
+        warmup=args.warmup,
+        db_latency_ms=args.db_latency_ms,
+        llm_latency_ms=args.llm_latency_ms,
+        evolution_latency_ms=args.evolution_latency_ms,
+    ))
+    print_report(report)
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n📁 Report saved to: {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.max_regression)
+        if regressions:
+            print(f"\n❌ {len(regressions)} tracked metric(s) regressed beyond {args.max_regression:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\n✅ No tracked metric regressed beyond {args.max_regression:.0%}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
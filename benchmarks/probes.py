@@ -0,0 +1,136 @@
+"""
+Measurement probes for pipeline benchmarks.
+
+- IOCounters: DB / RPC / Redis / Evolution calls, attributed to the message
+  being processed through a ContextVar (background tasks spawned while a
+  message is processed inherit the context and are charged to it)
+- LoopBlockMonitor: measures how long the event loop was unable to run
+  a ticker task, i.e. time spent in blocking code on the loop thread
+- percentile_summary: nearest-rank latency percentiles
+"""
+import asyncio
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+
+@dataclass
+class IOCounters:
+    """Outbound calls made while processing one message."""
+    db_calls: int = 0
+    rpc_calls: int = 0
+    redis_calls: int = 0
+    evolution_calls: int = 0
+    db_by_table: Counter = field(default_factory=Counter)
+    redis_by_command: Counter = field(default_factory=Counter)
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "db_calls": self.db_calls,
+            "rpc_calls": self.rpc_calls,
+            "redis_calls": self.redis_calls,
+            "evolution_calls": self.evolution_calls,
+            "db_by_table": dict(self.db_by_table),
+            "redis_by_command": dict(self.redis_by_command),
+        }
+
+
+_current_counters: ContextVar[Optional[IOCounters]] = ContextVar("bench_io_counters", default=None)
+
+# Calls made outside any measured message (startup, warm-up)
+unattributed = IOCounters()
+
+
+def begin_message() -> IOCounters:
+    """Start attributing calls in the current context to a fresh counter set."""
+    counters = IOCounters()
+    _current_counters.set(counters)
+    return counters
+
+
+def _counters() -> IOCounters:
+    return _current_counters.get() or unattributed
+
+
+def record_db(table: str) -> None:
+    counters = _counters()
+    counters.db_calls += 1
+    counters.db_by_table[table] += 1
+
+
+def record_rpc(name: str) -> None:
+    counters = _counters()
+    counters.rpc_calls += 1
+    counters.db_by_table[f"rpc:{name}"] += 1
+
+
+def record_redis(command: str) -> None:
+    counters = _counters()
+    counters.redis_calls += 1
+    counters.redis_by_command[command] += 1
+
+
+def record_evolution() -> None:
+    _counters().evolution_calls += 1
+
+
+class LoopBlockMonitor:
+    """
+    Ticker task that accumulates event-loop lag.
+
+    The ticker sleeps for ``interval_ms``; whenever it wakes up more than
+    ``threshold_ms`` late, the excess is counted as blocked time.
+    """
+
+    def __init__(self, interval_ms: float = 5.0, threshold_ms: float = 5.0):
+        self.interval = interval_ms / 1000
+        self.threshold = threshold_ms / 1000
+        self.blocked_ms = 0.0
+        self.stalls = 0
+        self.max_stall_ms = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = time.perf_counter() - started - self.interval
+            if lag > self.threshold:
+                lag_ms = lag * 1000
+                self.blocked_ms += lag_ms
+                self.stalls += 1
+                self.max_stall_ms = max(self.max_stall_ms, lag_ms)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+def percentile_summary(
+    samples: Sequence[float],
+    percentiles: tuple = (50, 95, 99),
+) -> Dict[str, float]:
+    """Nearest-rank percentiles, so every reported value is an observed sample."""
+    if not samples:
+        return {"count": 0}
+
+    ordered: List[float] = sorted(samples)
+    summary: Dict[str, float] = {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered), 2),
+        "max": round(ordered[-1], 2),
+    }
+    for p in percentiles:
+        rank = max(1, -(-p * len(ordered) // 100))  # ceil(p/100 * n)
+        summary[f"p{p}"] = round(ordered[rank - 1], 2)
+    return summary
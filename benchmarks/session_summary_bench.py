@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Session Summary Benchmark - LLM calls, tokens, DB round trips and wall time
+to summarize a burst of closed sessions.
+
+Seeds closed sessions (summary_status='pending') with their conversation
+logs, a --trivial share of them only 1-3 messages long, and summarizes them
+twice against the same fake LLM:
+- per-session: SessionSummarizer.generate_and_store_summary per session,
+  all started at once (the fire-and-forget path SessionManager used)
+- worker: SessionSummaryWorker batching the same sessions
+
+FakeSummaryLLM answers single prompts with a summary and JSON-mode batch
+prompts with one entry per "## Conversation id:" header; --garble drops
+that share of batch entries to exercise the single-call fallback. Its
+latency grows with output tokens, like a real provider.
+
+Checks (exit non-zero on failure): every session ends 'ready' with a
+non-empty summary in both runs.
+
+Usage:
+    python -m benchmarks.session_summary_bench
+    python -m benchmarks.session_summary_bench --sessions 200 --clinics 4 --batch-size 8 --garble 0.1
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import re
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, List
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks import probes  # noqa: E402
+from benchmarks.fakes import FakeSupabaseClient, InMemoryDatabase  # noqa: E402
+
+CONVERSATION_HEADER = re.compile(r"^## Conversation id: (\d+)$", re.M)
+
+
+class FakeSummaryLLM:
+    """generate_for_tier() double: fixed base latency plus time per output token."""
+
+    def __init__(self, base_ms: float, per_token_ms: float, garble: float, rng: random.Random):
+        self.base_s = base_ms / 1000.0
+        self.per_token_s = per_token_ms / 1000.0
+        self.garble = garble
+        self.rng = rng
+        self.calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    async def generate_for_tier(self, tier, messages, max_tokens=None, temperature=0.7,
+                                clinic_id=None, session_id=None, **kwargs):
+        self.calls += 1
+        prompt = "\n".join(m["content"] for m in messages)
+        input_tokens = len(prompt) // 4
+
+        if kwargs.get("response_format"):
+            ids = CONVERSATION_HEADER.findall(prompt)
+            entries = [
+                {"id": i, "summary": f"**PRIMARY INTENT:** request {i}\n**OUTCOME:** pending"}
+                for i in ids if self.rng.random() >= self.garble
+            ]
+            content = json.dumps({"summaries": entries})
+            output_tokens = 80 * len(entries)
+        else:
+            content = "**PRIMARY INTENT:** request\n**OUTCOME:** pending"
+            output_tokens = 80
+
+        await asyncio.sleep(self.base_s + output_tokens * self.per_token_s)
+        self.input_tokens += input_tokens
+        self.output_tokens += output_tokens
+        return SimpleNamespace(
+            content=content,
+            usage={"input_tokens": input_tokens, "output_tokens": output_tokens,
+                   "total_tokens": input_tokens + output_tokens},
+            model="bench-model",
+            tier=str(getattr(tier, "value", tier)),
+            tier_source="bench",
+        )
+
+
+def seed(db: InMemoryDatabase, sessions: int, clinics: int, trivial: float, rng: random.Random) -> List[str]:
+    now = datetime.now(timezone.utc)
+    session_rows, log_rows = [], []
+    for i in range(sessions):
+        session_id = f"session-{i:05d}"
+        started = now - timedelta(minutes=30)
+        session_rows.append({
+            "id": session_id,
+            "user_identifier": f"+5550{i:05d}",
+            "status": "closed",
+            "summary_status": "pending",
+            "started_at": started.isoformat(),
+            "ended_at": now.isoformat(),
+            "metadata": {"clinic_id": f"clinic-{i % clinics}", "patient_name": f"Patient {i}"},
+        })
+        count = rng.randint(1, 3) if rng.random() < trivial else rng.randint(6, 30)
+        for m in range(count):
+            log_rows.append({
+                "session_id": session_id,
+                "role": "user" if m % 2 == 0 else "assistant",
+                "message_content": f"message {m} about an implant price and the available times next week",
+                "created_at": (started + timedelta(seconds=m)).isoformat(),
+            })
+    db.seed({
+        "healthcare.conversation_sessions": session_rows,
+        "healthcare.conversation_logs": log_rows,
+    })
+    return [row["id"] for row in session_rows]
+
+
+def register_store_rpc(db: InMemoryDatabase) -> None:
+    def store_session_summaries(params: Dict[str, Any]) -> int:
+        by_id = {row["id"]: row for row in db.rows("healthcare", "conversation_sessions")}
+        for update in params["p_rows"]:
+            row = by_id.get(update["id"])
+            if row is not None:
+                row.update({k: v for k, v in update.items() if k != "id" and v is not None})
+        return len(params["p_rows"])
+
+    db.register_rpc("store_session_summaries", store_session_summaries)
+
+
+def build(args, rng: random.Random):
+    from app.services import session_summarizer as ss
+
+    db = InMemoryDatabase(latency_ms=args.db_latency_ms)
+    session_ids = seed(db, args.sessions, args.clinics, args.trivial, rng)
+    if args.no_rpc:
+        # The fake returns nothing for unknown RPCs; PostgREST answers 404
+        def missing_rpc(params):
+            raise RuntimeError("PGRST202: function healthcare.store_session_summaries not found")
+        db.register_rpc("store_session_summaries", missing_rpc)
+    else:
+        register_store_rpc(db)
+    client = FakeSupabaseClient(db, "healthcare")
+    with mock.patch.object(ss, "get_healthcare_client", lambda: client):
+        summarizer = ss.SessionSummarizer()
+    llm = FakeSummaryLLM(args.llm_base_ms, args.llm_per_token_ms, args.garble, rng)
+    summarizer._llm_factory = llm
+    return db, summarizer, llm, session_ids
+
+
+async def run_per_session(args) -> Dict[str, Any]:
+    db, summarizer, llm, session_ids = build(args, random.Random(args.seed))
+    counters = probes.begin_message()
+    now = datetime.now(timezone.utc)
+    started = time.perf_counter()
+    await asyncio.gather(*(summarizer.generate_and_store_summary(sid, now) for sid in session_ids))
+    return {"db": db, "llm": llm, "io": counters, "elapsed": time.perf_counter() - started}
+
+
+async def run_worker(args) -> Dict[str, Any]:
+    from app.workers.session_summary_worker import SessionSummaryWorker
+
+    db, summarizer, llm, session_ids = build(args, random.Random(args.seed))
+    worker = SessionSummaryWorker(summarizer, batch_size=args.batch_size, batch_wait=args.batch_wait)
+    worker._last_sweep = time.monotonic()  # no sweep: every session is enqueued below
+    counters = probes.begin_message()
+    started = time.perf_counter()
+    task = asyncio.create_task(worker.start())
+    clinics = {row["id"]: row["metadata"]["clinic_id"] for row in db.rows("healthcare", "conversation_sessions")}
+    for session_id in session_ids:
+        worker.enqueue(session_id, clinics[session_id])
+    total = len(session_ids)
+    while worker.stats["llm"] + worker.stats["templated"] + worker.stats["failed"] < total:
+        await asyncio.sleep(0.01)
+        if time.perf_counter() - started > args.timeout:
+            print(f"  worker timed out after {args.timeout}s")
+            break
+    elapsed = time.perf_counter() - started
+    await worker.stop()
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    return {"db": db, "llm": llm, "io": counters, "elapsed": elapsed, "stats": worker.stats}
+
+
+def check(db: InMemoryDatabase) -> List[str]:
+    rows = db.rows("healthcare", "conversation_sessions")
+    not_ready = [r["id"] for r in rows if r.get("summary_status") != "ready" or not r.get("session_summary")]
+    return [f"{len(not_ready)} sessions without a ready summary"] if not_ready else []
+
+
+def report(name: str, result: Dict[str, Any], price_in: float, price_out: float) -> None:
+    llm, io = result["llm"], result["io"]
+    cost = llm.input_tokens / 1e6 * price_in + llm.output_tokens / 1e6 * price_out
+    print(f"\n{name}")
+    print(f"  wall time        {result['elapsed']:8.2f}s")
+    print(f"  LLM calls        {llm.calls:8d}")
+    print(f"  tokens in / out  {llm.input_tokens:8d} / {llm.output_tokens}")
+    print(f"  est. cost        ${cost:.5f}")
+    print(f"  DB round trips   {io.db_calls + io.rpc_calls:8d} "
+          f"({', '.join(f'{k} {v}' for k, v in sorted(io.db_by_table.items()))})")
+    if "stats" in result:
+        stats = result["stats"]
+        print(f"  batches          {stats['batches']:8d} "
+              f"(llm {stats['llm']}, templated {stats['templated']}, failed {stats['failed']})")
+
+
+async def run(args) -> int:
+    print(f"{args.sessions} closed sessions across {args.clinics} clinics, {args.trivial:.0%} trivial, "
+          f"DB latency {args.db_latency_ms:g}ms, LLM {args.llm_base_ms:g}ms + {args.llm_per_token_ms:g}ms/token, "
+          f"garble {args.garble:.0%}")
+    failures = []
+    for name, runner in (("per-session", run_per_session), ("worker", run_worker)):
+        result = await runner(args)
+        report(name, result, args.price_in, args.price_out)
+        for problem in check(result["db"]):
+            failures.append(f"{name}: {problem}")
+    for failure in failures:
+        print(f"  FAIL {failure}")
+    return len(failures)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Batched session summaries against a fake LLM")
+    parser.add_argument("--sessions", type=int, default=120)
+    parser.add_argument("--clinics", type=int, default=3)
+    parser.add_argument("--trivial", type=float, default=0.35, help="Share of 1-3 message sessions")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--batch-wait", type=float, default=0.2)
+    parser.add_argument("--garble", type=float, default=0.05, help="Share of batch entries the LLM drops")
+    parser.add_argument("--db-latency-ms", type=float, default=15.0)
+    parser.add_argument("--llm-base-ms", type=float, default=400.0)
+    parser.add_argument("--llm-per-token-ms", type=float, default=2.0)
+    parser.add_argument("--price-in", type=float, default=0.10, help="USD per 1M input tokens")
+    parser.add_argument("--price-out", type=float, default=0.40, help="USD per 1M output tokens")
+    parser.add_argument("--no-rpc", action="store_true", help="Without store_session_summaries (per-row fallback)")
+    parser.add_argument("--seed", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    # Single-call fallbacks log warnings by design
+    logging.disable(logging.WARNING)
+    sys.exit(1 if asyncio.run(run(args)) else 0)
+
+
+if __name__ == "__main__":
+    main()
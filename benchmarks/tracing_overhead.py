@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Tracing Overhead - per-call cost of the span facade on the request path.
+
+Measures an empty async call with and without spans:
+- baseline: no tracing
+- unsampled: root span dropped by the tail decision (the common case)
+- sampled: root span kept and handed to the background exporter
+- nested: a root with three child spans (a typical node -> tool -> llm trace)
+
+The exporter is a NullExporter, so the numbers are the producer-side cost
+only: what a request pays before the exporter thread takes over.
+
+Usage:
+    python -m benchmarks.tracing_overhead
+    python -m benchmarks.tracing_overhead --iterations 200000
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.observability.span_export import NullExporter, SpanTracer, set_span_tracer, span  # noqa: E402
+
+
+async def _work() -> int:
+    return 1
+
+
+async def _baseline() -> None:
+    await _work()
+
+
+async def _single_span() -> None:
+    with span("bench.call", node="bench", clinic_id="c1"):
+        await _work()
+
+
+async def _nested() -> None:
+    with span("graph.invoke", clinic_id="c1"):
+        with span("graph.node", node="supervisor"):
+            with span("tool.call", tool="check_availability"):
+                await _work()
+        with span("llm.generate", kind="generation") as current:
+            await _work()
+            current.set_attributes({"model": "bench", "input_tokens": 100, "output_tokens": 20})
+
+
+async def _measure(fn, iterations: int) -> float:
+    """Mean nanoseconds per call."""
+    for _ in range(min(iterations, 1000)):
+        await fn()
+    started = time.perf_counter_ns()
+    for _ in range(iterations):
+        await fn()
+    return (time.perf_counter_ns() - started) / iterations
+
+
+async def run(iterations: int) -> None:
+    scenarios = [
+        ("baseline", 0.0, _baseline),
+        ("unsampled", 0.0, _single_span),
+        ("sampled", 1.0, _single_span),
+        ("nested unsampled", 0.0, _nested),
+        ("nested sampled", 1.0, _nested),
+    ]
+    results = {}
+    for label, sample_rate, fn in scenarios:
+        tracer = SpanTracer(
+            exporter=NullExporter(),
+            head_sample_rate=sample_rate,
+            slow_ms=60_000,
+            capacity=iterations * 4 + 4000,
+        )
+        previous = set_span_tracer(tracer)
+        try:
+            results[label] = await _measure(fn, iterations)
+        finally:
+            tracer.shutdown()
+            set_span_tracer(previous)
+        stats = tracer.stats.as_dict()
+        print(
+            f"{label:<18} {results[label] / 1000:8.2f} us/call  "
+            f"(+{(results[label] - results['baseline']) / 1000:6.2f} us)  "
+            f"exported={stats['exported']} dropped_sampling={stats['dropped_sampling']}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure span facade overhead")
+    parser.add_argument("--iterations", type=int, default=50000)
+    args = parser.parse_args()
+    asyncio.run(run(args.iterations))
+
+
+if __name__ == "__main__":
+    main()
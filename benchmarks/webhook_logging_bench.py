@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Webhook Logging Benchmark - CPU cost of webhook logging per 1,000 payloads.
+
+Compares the logging and serialization work the Evolution webhook does
+per inbound message:
+- legacy: the print banners, json.dumps(indent=2) payload dumps and body
+  re-serialization the handlers used to do unconditionally
+- structured: the current path (raw body parsed once with orjson, PHI-safe
+  payload summary behind a level check, QueueHandler + listener thread)
+
+Reports CPU time on the calling thread (what the event loop pays) and for
+the whole process (including the log listener thread). Output goes to
+os.devnull so terminal speed does not skew the numbers.
+
+Usage:
+    python -m benchmarks.webhook_logging_bench
+    python -m benchmarks.webhook_logging_bench --payloads 5000 --level DEBUG
+"""
+import argparse
+import contextlib
+import json
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.api.evolution_utils import mask_phone, summarize_webhook_payload  # noqa: E402
+from app.utils import logging_config  # noqa: E402
+from app.utils.logging_config import LazyJSON  # noqa: E402
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+logger = logging.getLogger("app.api.evolution_webhook")
+
+
+def make_payloads(count: int) -> List[Dict[str, Any]]:
+    payloads = []
+    for i in range(count):
+        phone = f"5511{9_0000_0000 + i:09d}"
+        payloads.append({
+            "event": "messages.upsert",
+            "instance": "clinic-bench",
+            "data": {
+                "key": {"remoteJid": f"{phone}@s.whatsapp.net", "fromMe": False, "id": f"3EB0{i:016X}"},
+                "pushName": "Maria Silva",
+                "message": {
+                    "conversation": "Olá, gostaria de agendar uma limpeza para a próxima semana, "
+                                    "de preferência na terça-feira à tarde. Vocês aceitam convênio?",
+                    "messageContextInfo": {"deviceListMetadata": {"senderKeyHash": "x" * 20, "senderTimestamp": "1700000000"}},
+                },
+                "messageType": "conversation",
+                "messageTimestamp": 1700000000 + i,
+                "source": "android",
+            },
+            "destination": "https://example.invalid/webhooks/evolution/whatsapp/token",
+            "date_time": "2024-01-01T12:00:00.000Z",
+            "server_url": "https://evolution.example.invalid",
+            "apikey": "redacted",
+        })
+    return payloads
+
+
+def legacy_message(body: Dict[str, Any]) -> None:
+    """The print/dump sequence the handlers ran for every message."""
+    print(f"\n{'='*80}")
+    print(f"[{time.time()}] TOKEN-BASED WEBHOOK RECEIVED")
+    print(f"[WhatsApp Webhook V2] Body type: {type(body)}")
+    print(f"[WhatsApp Webhook V2] Body keys: {list(body.keys()) if body else 'None'}")
+    body_bytes = json.dumps(body, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    print("[WhatsApp Webhook V2] 🏁 Returning response immediately")
+
+    print(f"\n{'='*80}")
+    print(f"[Background] Processing {len(body_bytes)} bytes")
+    data = json.loads(body_bytes.decode('utf-8'))
+    print(f"[Background] JSON keys: {list(data.keys())}")
+    print(f"[Background] Full JSON data:\n{json.dumps(data, indent=2)[:1000]}")
+    message_data = data.get("data", {})
+    key = message_data.get("key", {})
+    print("[Background] ✅ Idempotency check passed")
+    print(f"[Background] Message ID: {key.get('id')} (first time processing)")
+    print(f"[Background] Message data keys: {list(message_data.keys())}")
+    print(f"[Background] Message data content:\n{json.dumps(message_data, indent=2)[:500]}")
+    print(f"[Background] Key data: {key}")
+    print(f"[Background] From number: {key.get('remoteJid')}")
+    text = message_data.get("message", {}).get("conversation", "")
+    print(f"[Background] Message text: '{text}'")
+    print(f"[Background] AI response: {'ok' * 50}...")
+    print(f"[SendMessage] Text preview: {'ok' * 50}...")
+    print("\n[Background] 🏁 Total processing time: 0.00 seconds")
+
+
+def structured_message(body: Dict[str, Any], body_bytes: bytes) -> None:
+    """The log calls the handlers make now for a handled message."""
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("[WhatsApp Webhook V2] Received bytes=%d payload=%s", len(body_bytes), LazyJSON(summarize_webhook_payload(body)))
+
+    data = _loads(body_bytes)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("[Background] Processing %d bytes: %s", len(body_bytes), LazyJSON(summarize_webhook_payload(data)))
+    message_data = data.get("data", {})
+    key = message_data.get("key", {})
+    text = message_data.get("message", {}).get("conversation", "")
+    logger.info(
+        "[Background] Message %s from %s → clinic %s (org %s, %d chars)",
+        key.get("id"), mask_phone(key.get("remoteJid")), "clinic-id", "org-id", len(text),
+    )
+    logger.debug("[SendMessage] Writing message to outbox for %s", mask_phone(key.get("remoteJid")))
+    logger.info(
+        "[Background] %s Message %s handled via %s (%s): total=%.2fs ai=%.2fs send=%.2fs response=%d chars",
+        "✅", key.get("id"), "pipeline_processor", "text", 0.0, 0.0, 0.0, 100,
+    )
+
+
+def measure(fn: Callable[[], None]) -> Dict[str, float]:
+    thread_start, process_start = time.thread_time(), time.process_time()
+    fn()
+    logging_config.stop_log_listener()  # Include the listener's drain in process time
+    return {
+        "thread_cpu_s": time.thread_time() - thread_start,
+        "process_cpu_s": time.process_time() - process_start,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Webhook logging CPU per 1,000 payloads")
+    parser.add_argument("--payloads", type=int, default=2000)
+    parser.add_argument("--level", default="INFO", choices=["DEBUG", "INFO", "WARNING"])
+    args = parser.parse_args()
+
+    payloads = make_payloads(args.payloads)
+    raw = [json.dumps(p, ensure_ascii=False).encode() for p in payloads]
+    level = getattr(logging, args.level)
+
+    results = {}
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        # Log handlers bind sys.stdout at configuration time
+        logging_config.configure_logging(level=level, force=True)
+
+        def run_legacy():
+            for body in payloads:
+                legacy_message(body)
+
+        def run_structured():
+            for body, body_bytes in zip(payloads, raw):
+                structured_message(body, body_bytes)
+
+        results["legacy"] = measure(run_legacy)
+        logging_config.configure_logging(level=level, force=True)
+        results["structured"] = measure(run_structured)
+
+    logging_config.configure_logging(force=True)
+
+    scale = 1000 / args.payloads
+    print(f"Webhook logging CPU per 1,000 payloads (level={args.level}, queue={logging_config.LOG_QUEUE_ENABLED})")
+    for name, r in results.items():
+        print(
+            f"  {name:<11} calling thread {r['thread_cpu_s'] * scale * 1000:8.1f} ms   "
+            f"process {r['process_cpu_s'] * scale * 1000:8.1f} ms"
+        )
+    legacy, structured = results["legacy"]["thread_cpu_s"], results["structured"]["thread_cpu_s"]
+    if structured > 0:
+        print(f"  calling-thread speedup: {legacy / structured:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
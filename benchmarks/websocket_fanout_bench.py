@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Websocket Fan-out Benchmark - broadcast latency and isolation with 5,000
+simulated sockets on two nodes.
+
+Connects --sockets fake sockets through ConnectionManager, split across
+--nodes nodes (one FanoutHub each, sharing one fakeredis server as the
+backplane) and --clinics clinics. Half of them subscribe to the
+appointments table. Node 0 then publishes --events events round-robin
+over the clinics: data updates (to the subscribed sockets) and, every
+--status-every events, a sync status (to the whole clinic, coalesced).
+
+Fake sockets take --send-ms (with jitter) per frame. A --slow share take
+--slow-ms per frame and a --stuck share never finish a send; both must be
+closed without holding up anyone else.
+
+Compared with the previous delivery loop (per-socket json.dumps and a
+serial await per socket, node-local), run on the same sockets for
+--legacy-events events, with stuck sockets replaced by slow ones (a hung
+send blocked the old loop for good).
+
+Checks (exit non-zero on failure):
+- every healthy subscribed socket, on every node, received every data
+  update of its clinic exactly once and in order
+- every healthy socket received its clinic's last sync status
+- every stuck socket was closed
+- one serialization per event (plus its backplane envelope), not per socket
+
+Usage:
+    python -m benchmarks.websocket_fanout_bench
+    python -m benchmarks.websocket_fanout_bench --sockets 5000 --events 1000 --slow 0.02 --stuck 0.005
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.websocket import fanout  # noqa: E402
+from app.websocket.fanout import FanoutHub  # noqa: E402
+from app.websocket.manager import ConnectionManager  # noqa: E402
+from benchmarks import probes  # noqa: E402
+from benchmarks.fakes import FakeRedisFactory  # noqa: E402
+
+TABLE = "appointments"
+
+
+class FakeSocket:
+    """Starlette WebSocket double: per-frame send latency, records frames."""
+
+    def __init__(self, index: int, node: int, clinic_id: str, send_s: float, stuck: bool = False):
+        self.index = index
+        self.node = node
+        self.clinic_id = clinic_id
+        self.send_s = send_s
+        self.stuck = stuck
+        self.subscribed = False
+        self.frames: List[tuple] = []
+        self.close_code: Optional[int] = None
+
+    @property
+    def healthy(self) -> bool:
+        return self.kind == "healthy"
+
+    @property
+    def kind(self) -> str:
+        if self.stuck:
+            return "stuck"
+        return "slow" if self.send_s >= SLOW_THRESHOLD_S else "healthy"
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data: str):
+        if self.stuck:
+            await asyncio.Event().wait()
+        await asyncio.sleep(self.send_s)
+        self.frames.append((time.perf_counter(), data))
+
+    async def send_json(self, message: Dict[str, Any]):
+        await self.send_text(json.dumps(message))
+
+    async def close(self, code: int = 1000):
+        self.close_code = code
+
+
+SLOW_THRESHOLD_S = 0.05
+
+
+def make_sockets(args, rng: random.Random) -> List[FakeSocket]:
+    sockets = []
+    for i in range(args.sockets):
+        roll = rng.random()
+        stuck = roll < args.stuck
+        if not stuck and roll < args.stuck + args.slow:
+            send_s = args.slow_ms / 1000.0
+        else:
+            send_s = rng.uniform(0.5, 1.5) * args.send_ms / 1000.0
+        sockets.append(FakeSocket(i, (i // args.clinics) % args.nodes, f"clinic-{i % args.clinics}", send_s, stuck))
+    for ws in sockets:
+        ws.subscribed = rng.random() < 0.5
+    return sockets
+
+
+def event_plan(args) -> List[Dict[str, Any]]:
+    events = []
+    for seq in range(args.events):
+        kind = "status" if args.status_every and seq % args.status_every == args.status_every - 1 else "update"
+        events.append({"seq": seq, "kind": kind, "clinic_id": f"clinic-{seq % args.clinics}"})
+    return events
+
+
+def parse(payload: str, cache: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    message = cache.get(payload)
+    if message is None:
+        message = cache[payload] = json.loads(payload)
+    return message
+
+
+def event_of(message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """(seq, sent_at) carried by a data update or sync status, else None."""
+    body = message.get("data") or message.get("details")
+    if isinstance(body, dict) and "seq" in body:
+        return body
+    return None
+
+
+def completion_latencies(sockets: List[FakeSocket], cache: Dict[str, Dict[str, Any]]) -> List[float]:
+    """Per event: publish -> last healthy socket received it (ms)."""
+    last: Dict[int, float] = {}
+    sent: Dict[int, float] = {}
+    for ws in sockets:
+        if not ws.healthy:
+            continue
+        for received_at, payload in ws.frames:
+            body = event_of(parse(payload, cache))
+            if body is None:
+                continue
+            seq = body["seq"]
+            sent[seq] = body["sent_at"]
+            last[seq] = max(last.get(seq, 0.0), received_at)
+    return sorted((last[seq] - sent[seq]) * 1000.0 for seq in last)
+
+
+def summarize(latencies: List[float]) -> str:
+    if not latencies:
+        return "n/a"
+    p99 = latencies[max(int(len(latencies) * 0.99) - 1, 0)]
+    return f"p50 {statistics.median(latencies):8.1f}  p99 {p99:8.1f}  max {latencies[-1]:8.1f} ms"
+
+
+async def run_legacy(args, sockets: List[FakeSocket]) -> Dict[str, Any]:
+    """The previous loop: node-local, json.dumps and a serial await per socket."""
+    for ws in sockets:
+        ws.frames.clear()
+        if ws.stuck:
+            ws.stuck, ws.send_s = False, args.slow_ms / 1000.0
+    local = [ws for ws in sockets if ws.node == 0]
+    by_clinic: Dict[str, List[FakeSocket]] = {}
+    for ws in local:
+        by_clinic.setdefault(ws.clinic_id, []).append(ws)
+
+    dumps = 0
+    publish_s = 0.0
+    for event in event_plan(args)[:args.legacy_events]:
+        message = {
+            "type": "data_update", "table": TABLE, "record_id": str(event["seq"]), "operation": "update",
+            "data": {"seq": event["seq"], "sent_at": time.perf_counter(), "padding": "x" * args.payload_bytes},
+        }
+        started = time.perf_counter()
+        for ws in by_clinic.get(event["clinic_id"], []):
+            if ws.subscribed:
+                dumps += 1
+                await ws.send_json(message)
+        publish_s += time.perf_counter() - started
+    return {"publish_s": publish_s, "serializations": dumps, "sockets": local}
+
+
+async def run_fanout(args, sockets: List[FakeSocket]) -> Dict[str, Any]:
+    redis = FakeRedisFactory()
+    hubs = [
+        FanoutHub(
+            redis_client=redis.async_client(decode_responses=True),
+            node_id=f"node-{n}",
+            queue_size=args.queue_size,
+            send_timeout=args.send_timeout,
+        )
+        for n in range(args.nodes)
+    ]
+    hub_tasks = [asyncio.create_task(hub.start()) for hub in hubs]
+    while not all(hub.backplane_connected for hub in hubs):
+        await asyncio.sleep(0.01)
+    managers = [ConnectionManager(hub=hub) for hub in hubs]
+
+    started = time.perf_counter()
+    for ws in sockets:
+        manager = managers[ws.node]
+        await manager.connect(ws, ws.clinic_id, user_id=f"user-{ws.index}")
+        if ws.subscribed:
+            await manager.handle_message(ws, {"type": "subscribe", "tables": [TABLE]})
+    connect_s = time.perf_counter() - started
+
+    serializations = 0
+    serialize = fanout.serialize
+
+    def counting_serialize(message):
+        nonlocal serializations
+        serializations += 1
+        return serialize(message)
+
+    fanout.serialize = counting_serialize
+    counters = probes.begin_message()
+    publisher = managers[0]
+    publish_s = 0.0
+    try:
+        for event in event_plan(args):
+            body = {"seq": event["seq"], "sent_at": time.perf_counter(), "padding": "x" * args.payload_bytes}
+            call_started = time.perf_counter()
+            if event["kind"] == "status":
+                await publisher.notify_sync_status(event["clinic_id"], "synced", body)
+            else:
+                await publisher.notify_data_update(event["clinic_id"], TABLE, str(event["seq"]), "update", body)
+            publish_s += time.perf_counter() - call_started
+            if args.rate:
+                await asyncio.sleep(1.0 / args.rate)
+    finally:
+        fanout.serialize = serialize
+
+    # Drain: every healthy socket's queue empty
+    deadline = time.perf_counter() + args.timeout
+    while time.perf_counter() < deadline:
+        pending = sum(conn.depth for hub in hubs for conn in hub._connections if conn.websocket.healthy)
+        if not pending:
+            break
+        await asyncio.sleep(0.05)
+    # Let the slow consumers' closes land
+    await asyncio.sleep(args.send_timeout + 0.2)
+
+    stats = [hub.get_stats() for hub in hubs]
+    for manager in managers:
+        if manager.heartbeat_task:
+            manager.heartbeat_task.cancel()
+    for hub in hubs:
+        await hub.stop()
+    await asyncio.gather(*hub_tasks, return_exceptions=True)
+    return {
+        "connect_s": connect_s,
+        "publish_s": publish_s,
+        "serializations": serializations,
+        "redis_publishes": counters.redis_by_command.get("publish", 0),
+        "stats": stats,
+        "sockets": sockets,
+    }
+
+
+def check(args, sockets: List[FakeSocket], serializations: int) -> List[str]:
+    cache: Dict[str, Dict[str, Any]] = {}
+    plan = event_plan(args)
+    updates: Dict[str, List[int]] = {}
+    last_status: Dict[str, int] = {}
+    for event in plan:
+        if event["kind"] == "update":
+            updates.setdefault(event["clinic_id"], []).append(event["seq"])
+        else:
+            last_status[event["clinic_id"]] = event["seq"]
+
+    failures = []
+    missing_updates = missing_status = 0
+    for ws in sockets:
+        if not ws.healthy:
+            continue
+        got_updates, got_status = [], []
+        for _, payload in ws.frames:
+            message = parse(payload, cache)
+            body = event_of(message)
+            if body is None:
+                continue
+            (got_status if message["type"] == "sync_status" else got_updates).append(body["seq"])
+        if ws.subscribed and got_updates != updates.get(ws.clinic_id, []):
+            missing_updates += 1
+        if ws.clinic_id in last_status and (not got_status or got_status[-1] != last_status[ws.clinic_id]):
+            missing_status += 1
+    if missing_updates:
+        failures.append(f"{missing_updates} healthy subscribed sockets missed, repeated or reordered updates")
+    if missing_status:
+        failures.append(f"{missing_status} healthy sockets missed their clinic's last sync status")
+    unclosed = sum(1 for ws in sockets if ws.stuck and ws.close_code is None)
+    if unclosed:
+        failures.append(f"{unclosed} stuck sockets were never closed")
+    # One payload plus one backplane envelope per event
+    if serializations > 2 * len(plan):
+        failures.append(f"{serializations} serializations for {len(plan)} events")
+    return failures
+
+
+async def run(args) -> int:
+    rng = random.Random(args.seed)
+    sockets = make_sockets(args, rng)
+    kinds = [ws.kind for ws in sockets]
+    print(f"{args.sockets} sockets on {args.nodes} nodes, {args.clinics} clinics, "
+          f"{kinds.count('slow')} slow ({args.slow_ms:g}ms/frame), {kinds.count('stuck')} stuck, "
+          f"{args.send_ms:g}ms/frame otherwise; {args.events} events, {args.payload_bytes}B payload")
+
+    result = await run_fanout(args, sockets)
+    cache: Dict[str, Dict[str, Any]] = {}
+    latencies = completion_latencies(result["sockets"], cache)
+    failures = check(args, result["sockets"], result["serializations"])
+    totals = {key: sum(s[key] for s in result["stats"]) for key in ("queued", "coalesced", "slow_consumers", "received")}
+
+    print("\nfan-out hub")
+    print(f"  connect          {result['connect_s']:8.2f}s for {args.sockets} sockets")
+    print(f"  publish calls    {result['publish_s'] * 1000.0 / args.events:8.3f}ms per event (await, incl. redis publish)")
+    print(f"  completion       {summarize(latencies)}  (publish -> last healthy socket, all nodes)")
+    print(f"  serializations   {result['serializations']:8d} for {args.events} events "
+          f"(+ envelope), {result['redis_publishes']} redis publishes")
+    print(f"  frames           {totals['queued']:8d} queued, {totals['coalesced']} coalesced, "
+          f"{totals['received']} events relayed from other nodes")
+    print(f"  slow consumers   {totals['slow_consumers']:8d} closed")
+
+    if args.legacy_events:
+        legacy = await run_legacy(args, sockets)
+        legacy_latencies = completion_latencies(legacy["sockets"], {})
+        print(f"\nprevious loop (node 0 only, first {args.legacy_events} events)")
+        print(f"  publish calls    {legacy['publish_s'] * 1000.0 / args.legacy_events:8.3f}ms per event (await)")
+        print(f"  completion       {summarize(legacy_latencies)}  (node 0 sockets only)")
+        print(f"  serializations   {legacy['serializations']:8d} for {args.legacy_events} events")
+
+    for failure in failures:
+        print(f"  FAIL {failure}")
+    return len(failures)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Websocket fan-out across nodes with simulated sockets")
+    parser.add_argument("--sockets", type=int, default=5000)
+    parser.add_argument("--nodes", type=int, default=2)
+    parser.add_argument("--clinics", type=int, default=50)
+    parser.add_argument("--events", type=int, default=500)
+    parser.add_argument("--status-every", type=int, default=5, help="Every Nth event is a sync status")
+    parser.add_argument("--rate", type=float, default=0, help="Events per second (0: as fast as possible)")
+    parser.add_argument("--payload-bytes", type=int, default=512)
+    parser.add_argument("--send-ms", type=float, default=1.0)
+    parser.add_argument("--slow", type=float, default=0.01, help="Share of sockets taking --slow-ms per frame")
+    parser.add_argument("--slow-ms", type=float, default=500.0)
+    parser.add_argument("--stuck", type=float, default=0.002, help="Share of sockets whose sends never finish")
+    parser.add_argument("--queue-size", type=int, default=64)
+    parser.add_argument("--send-timeout", type=float, default=2.0)
+    parser.add_argument("--legacy-events", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    # Slow consumer closes log warnings by design
+    logging.disable(logging.WARNING)
+    sys.exit(1 if asyncio.run(run(args)) else 0)
+
+
+if __name__ == "__main__":
+    main()
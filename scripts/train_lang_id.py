@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""Train the embedded language identifier (app/services/lang_id/model.bin).
+
+Run with: python -m scripts.train_lang_id
+
+This script:
+1. Reads one sentence per line from scripts/lang_id_corpus/<lang>.txt
+2. Holds out every 5th line and fits naive Bayes on the rest
+3. Fits the calibration temperature on the held-out lines and on short
+   fragments of them (WhatsApp messages are often a few words)
+4. Refits on the full corpus and writes the int16 model file
+
+Add a language by adding its corpus file and re-running.
+"""
+import argparse
+import logging
+import math
+import os
+import random
+import sys
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.lang_id.identifier import MODEL_PATH, bucket_of, iter_ngrams, write_model  # noqa: E402
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+CORPUS_DIR = Path(__file__).with_name("lang_id_corpus")
+HOLDOUT_EVERY = 5
+SCALE = 1000  # int16 units per nat
+SMOOTHING = 0.5
+
+
+def load_corpus(corpus_dir: Path) -> Dict[str, List[str]]:
+    corpus = {}
+    for path in sorted(corpus_dir.glob("*.txt")):
+        lines = [line.strip() for line in path.read_text(encoding="utf-8").splitlines()]
+        corpus[path.stem] = [line for line in lines if line]
+    return corpus
+
+
+def fit(corpus: Dict[str, List[str]], languages: List[str], buckets: int, max_n: int) -> List[List[float]]:
+    """Per-language smoothed log-probabilities, indexed [lang][bucket]."""
+    table = []
+    for lang in languages:
+        counts = Counter(
+            bucket_of(gram, buckets)
+            for line in corpus[lang]
+            for gram in iter_ngrams(line, max_n)
+        )
+        total = sum(counts.values()) + SMOOTHING * buckets
+        table.append([math.log((counts.get(b, 0) + SMOOTHING) / total) for b in range(buckets)])
+    return table
+
+
+def quantize(table: List[List[float]], buckets: int) -> array:
+    """Bucket-major int16 weights."""
+    weights = array("h")
+    for b in range(buckets):
+        for lang_row in table:
+            weights.append(max(-32768, round(lang_row[b] * SCALE)))
+    return weights
+
+
+def score(weights: array, languages: List[str], buckets: int, max_n: int, text: str) -> List[float]:
+    width = len(languages)
+    totals = [0] * width
+    for gram in iter_ngrams(text, max_n):
+        base = bucket_of(gram, buckets) * width
+        for j in range(width):
+            totals[j] += weights[base + j]
+    return [t / SCALE for t in totals]
+
+
+def fragments(line: str, rng: random.Random) -> List[str]:
+    """The line plus 1-3 word windows of it."""
+    words = line.split()
+    out = [line]
+    for size in (1, 2, 3):
+        if len(words) > size:
+            start = rng.randrange(len(words) - size + 1)
+            out.append(" ".join(words[start:start + size]))
+    return out
+
+
+def softmax_nll(scores: List[float], truth: int, temperature: float) -> float:
+    scaled = [s / temperature for s in scores]
+    top = max(scaled)
+    log_norm = top + math.log(sum(math.exp(s - top) for s in scaled))
+    return log_norm - scaled[truth]
+
+
+def calibrate(samples: List[Tuple[List[float], int]]) -> float:
+    """Temperature minimizing held-out negative log-likelihood."""
+    candidates = [2 ** (k / 4) for k in range(-8, 33)]
+    return min(candidates, key=lambda t: sum(softmax_nll(s, truth, t) for s, truth in samples))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the embedded language identifier")
+    parser.add_argument("--buckets", type=int, default=4096, help="Hash buckets (power of two)")
+    parser.add_argument("--max-n", type=int, default=3, help="Longest character n-gram")
+    parser.add_argument("--output", type=Path, default=MODEL_PATH)
+    args = parser.parse_args()
+
+    if args.buckets & (args.buckets - 1):
+        parser.error("--buckets must be a power of two")
+
+    corpus = load_corpus(CORPUS_DIR)
+    languages = sorted(corpus)
+    logger.info("Corpus: " + ", ".join(f"{lang}={len(lines)}" for lang, lines in corpus.items()))
+
+    train = {lang: [line for i, line in enumerate(lines) if i % HOLDOUT_EVERY] for lang, lines in corpus.items()}
+    held_out = {lang: [line for i, line in enumerate(lines) if not i % HOLDOUT_EVERY] for lang, lines in corpus.items()}
+
+    weights = quantize(fit(train, languages, args.buckets, args.max_n), args.buckets)
+    rng = random.Random(0)
+    samples = []
+    for truth, lang in enumerate(languages):
+        for line in held_out[lang]:
+            for text in fragments(line, rng):
+                samples.append((score(weights, languages, args.buckets, args.max_n, text), truth))
+
+    correct = sum(1 for s, truth in samples if s.index(max(s)) == truth)
+    logger.info(f"Held-out accuracy: {correct}/{len(samples)} = {correct / len(samples):.3f} (lines + 1-3 word fragments)")
+
+    temperature = calibrate(samples)
+    logger.info(f"Calibration temperature: {temperature:.3f}")
+
+    weights = quantize(fit(corpus, languages, args.buckets, args.max_n), args.buckets)
+    header = {
+        "languages": languages,
+        "buckets": args.buckets,
+        "max_n": args.max_n,
+        "scale": SCALE,
+        "temperature": temperature,
+    }
+    write_model(args.output, header, weights)
+    logger.info(f"Wrote {args.output} ({args.output.stat().st_size} bytes)")
+
+
+if __name__ == "__main__":
+    main()
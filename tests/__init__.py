@@ -3,7 +3,4 @@ Dental Clinic Test Suite
 Comprehensive testing for Mexican market deployment
 """
 
-from .test_base import BaseTestCase, AsyncTestCase
 from .fixtures import *
-
-__all__ = ['BaseTestCase', 'AsyncTestCase']
@@ -17,6 +17,7 @@ from .metrics import (
     check_thresholds,
     all_thresholds_passed,
     EvalThresholds,
+    latency_percentiles,
 )
 
 __all__ = [
@@ -31,4 +32,5 @@ __all__ = [
     "check_thresholds",
     "all_thresholds_passed",
     "EvalThresholds",
+    "latency_percentiles",
 ]
\ No newline at end of file
@@ -0,0 +1,176 @@
+"""
+Record/replay cassette for eval LLM traffic.
+
+Every LLM request made during an eval run (agent generations and judge
+calls) is keyed by a hash of its normalized request. In ``record`` mode the
+real call is made and the response stored; in ``replay`` mode the stored
+response is returned and no provider is contacted, so the suite runs
+offline and deterministically. ``auto`` replays hits and records misses.
+
+Identical requests can legitimately produce different responses within a
+run, so each key stores a list of responses that are replayed in order
+(the last one is reused once the list is exhausted).
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+CASSETTE_VERSION = 1
+MODES = ("off", "record", "replay", "auto")
+
+# Request fields that vary between runs without changing the semantics
+VOLATILE_KEYS = {"request_id", "message_sid", "timestamp", "trace_id", "session_id", "metadata"}
+_WHITESPACE = re.compile(r"\s+")
+
+
+class CassetteMiss(KeyError):
+    """Raised in replay mode when a request has no recorded response."""
+
+
+def _normalize(value: Any) -> Any:
+    """Canonicalize a request payload: drop volatile keys, collapse whitespace."""
+    if isinstance(value, dict):
+        return {
+            str(k): _normalize(v)
+            for k, v in sorted(value.items(), key=lambda item: str(item[0]))
+            if k not in VOLATILE_KEYS
+        }
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, str):
+        return _WHITESPACE.sub(" ", value).strip()
+    if hasattr(value, "model_dump"):
+        return _normalize(value.model_dump())
+    if isinstance(value, (int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+def request_key(kind: str, request: Dict[str, Any]) -> str:
+    """Stable hash for a normalized request."""
+    canonical = json.dumps({"kind": kind, "request": _normalize(request)}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """JSON-file backed store of LLM responses keyed by request hash."""
+
+    def __init__(self, path: Optional[str], mode: str = "off"):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode '{mode}', expected one of {MODES}")
+        if mode != "off" and not path:
+            raise ValueError("A cassette path is required when the cassette is enabled")
+
+        self.path = path
+        self.mode = mode
+        self.entries: Dict[str, List[Any]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+        self._cursors: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self._dirty = False
+
+        if mode in ("replay", "auto") and path and os.path.exists(path):
+            with open(path, "r") as f:
+                data = json.load(f)
+            self.entries = data.get("entries", {})
+        elif mode == "replay":
+            raise FileNotFoundError(f"Cassette not found: {path}")
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    def _lookup(self, key: str) -> Any:
+        with self._lock:
+            responses = self.entries.get(key)
+            if not responses:
+                return None
+            index = min(self._cursors[key], len(responses) - 1)
+            self._cursors[key] += 1
+            self.hits += 1
+            return responses[index]
+
+    def _store(self, key: str, response: Any) -> None:
+        with self._lock:
+            self.entries.setdefault(key, []).append(response)
+            self.recorded += 1
+            self._dirty = True
+
+    def _check_miss(self, kind: str, key: str) -> None:
+        with self._lock:
+            self.misses += 1
+        if self.mode == "replay":
+            raise CassetteMiss(f"No recorded {kind} response for request {key[:12]} in {self.path}")
+
+    async def call(
+        self,
+        kind: str,
+        request: Dict[str, Any],
+        fn: Callable[[], Awaitable[Any]],
+        dump: Callable[[Any], Any] = lambda r: r,
+        load: Callable[[Any], Any] = lambda r: r,
+    ) -> Any:
+        """Replay a recorded response for ``request`` or await ``fn`` and record it."""
+        if not self.enabled:
+            return await fn()
+
+        key = request_key(kind, request)
+        if self.mode != "record":
+            stored = self._lookup(key)
+            if stored is not None:
+                return load(stored)
+            self._check_miss(kind, key)
+
+        response = await fn()
+        self._store(key, dump(response))
+        return response
+
+    def call_sync(
+        self,
+        kind: str,
+        request: Dict[str, Any],
+        fn: Callable[[], Any],
+        dump: Callable[[Any], Any] = lambda r: r,
+        load: Callable[[Any], Any] = lambda r: r,
+    ) -> Any:
+        """Synchronous variant of call() for blocking clients (e.g. the judge)."""
+        if not self.enabled:
+            return fn()
+
+        key = request_key(kind, request)
+        if self.mode != "record":
+            stored = self._lookup(key)
+            if stored is not None:
+                return load(stored)
+            self._check_miss(kind, key)
+
+        response = fn()
+        self._store(key, dump(response))
+        return response
+
+    def save(self) -> None:
+        """Write recorded entries back to disk (atomic replace)."""
+        if not self.enabled or not self._dirty:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": CASSETTE_VERSION, "entries": self.entries}, f, indent=1, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "path": self.path,
+            "hits": self.hits,
+            "misses": self.misses,
+            "recorded": self.recorded,
+        }
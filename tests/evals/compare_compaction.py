@@ -0,0 +1,146 @@
+"""
+Context Compaction Comparison
+
+Runs the same eval scenarios with in-session context compaction off and on
+(run_evals.py --compaction off|on) and compares answer quality against
+prompt size:
+- pass rate and mean judge score per run
+- input tokens per turn (mean, p95) and by turn index, where the savings of
+  long conversations show up
+
+Exits non-zero when compaction drops the pass rate or the mean judge score
+by more than the allowed margin.
+
+Needs the same credentials as run_evals.py (LLM and judge calls are live
+unless a cassette is given; compacted runs make their own summary calls).
+
+Usage:
+    python -m tests.evals.compare_compaction
+    python -m tests.evals.compare_compaction tests/evals/eval_multiturn.yaml --history-budget 600 --workers 2
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Any, Dict, List, Optional
+
+
+def run_mode(args, compaction: str, output_file: str) -> Dict[str, Any]:
+    env = dict(os.environ)
+    if args.history_budget:
+        env["SESSION_HISTORY_TOKEN_BUDGET"] = str(args.history_budget)
+    command = [
+        sys.executable, "-m", "tests.evals.run_evals", args.scenario_file,
+        "--compaction", compaction,
+        "--output", output_file,
+        "--workers", str(args.workers),
+        "--no-trace",
+    ]
+    if args.model:
+        command += ["--model", args.model]
+    print(f"\n=== compaction {compaction} ===", flush=True)
+    # run_evals exits 1 on any failed scenario; the report is what matters here
+    subprocess.run(command, env=env, check=False)
+    with open(output_file) as f:
+        return json.load(f)
+
+
+def mean(values: List[float]) -> Optional[float]:
+    return statistics.mean(values) if values else None
+
+
+def p95(values: List[int]) -> Optional[int]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(1, -(-95 * len(ordered) // 100)) - 1]
+
+
+def summarize(report: Dict[str, Any]) -> Dict[str, Any]:
+    results = report.get("results", [])
+    scores = [r["result"]["score"] for r in results]
+    tokens = [t for r in results for t in r.get("turn_input_tokens", [])]
+    by_turn: Dict[int, List[int]] = {}
+    for r in results:
+        for index, value in enumerate(r.get("turn_input_tokens", [])):
+            by_turn.setdefault(index + 1, []).append(value)
+    return {
+        "scenarios": report["summary"]["total"],
+        "pass_rate": report["summary"]["success_rate"],
+        "mean_score": mean(scores),
+        "mean_tokens": mean(tokens),
+        "p95_tokens": p95(tokens),
+        "by_turn": {turn: mean(values) for turn, values in sorted(by_turn.items())},
+        "scores": {r["scenario"]: r["result"]["score"] for r in results},
+    }
+
+
+def fmt(value, digits: int = 1) -> str:
+    return "-" if value is None else f"{value:.{digits}f}"
+
+
+def report(off: Dict[str, Any], on: Dict[str, Any]) -> None:
+    print("\n--- Context Compaction: off vs on ---")
+    print(f"{'':24}{'off':>10}{'on':>10}")
+    print(f"{'pass rate %':24}{fmt(off['pass_rate']):>10}{fmt(on['pass_rate']):>10}")
+    print(f"{'mean judge score':24}{fmt(off['mean_score'], 2):>10}{fmt(on['mean_score'], 2):>10}")
+    print(f"{'input tokens/turn mean':24}{fmt(off['mean_tokens'], 0):>10}{fmt(on['mean_tokens'], 0):>10}")
+    print(f"{'input tokens/turn p95':24}{fmt(off['p95_tokens'], 0):>10}{fmt(on['p95_tokens'], 0):>10}")
+    print("\ninput tokens by turn")
+    for turn in sorted(set(off["by_turn"]) | set(on["by_turn"])):
+        print(f"  turn {turn:<17}{fmt(off['by_turn'].get(turn), 0):>10}{fmt(on['by_turn'].get(turn), 0):>10}")
+    changed = [
+        (name, score, on["scores"].get(name))
+        for name, score in off["scores"].items()
+        if on["scores"].get(name) is not None and on["scores"][name] != score
+    ]
+    if changed:
+        print("\nscore changes")
+        for name, before, after in changed:
+            print(f"  {name}: {before} -> {after}")
+
+
+def check(off: Dict[str, Any], on: Dict[str, Any], args) -> List[str]:
+    failures = []
+    if on["pass_rate"] < off["pass_rate"] - args.max_pass_rate_drop:
+        failures.append(
+            f"pass rate dropped {off['pass_rate']:.1f}% -> {on['pass_rate']:.1f}% "
+            f"(allowed {args.max_pass_rate_drop:g} points)"
+        )
+    if off["mean_score"] is not None and on["mean_score"] is not None \
+            and on["mean_score"] < off["mean_score"] - args.max_score_drop:
+        failures.append(
+            f"mean judge score dropped {off['mean_score']:.2f} -> {on['mean_score']:.2f} "
+            f"(allowed {args.max_score_drop:g})"
+        )
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare eval quality and prompt size with context compaction off/on")
+    parser.add_argument("scenario_file", nargs="?", default="tests/evals/eval_multiturn.yaml")
+    parser.add_argument("--history-budget", type=int, default=None,
+                        help="SESSION_HISTORY_TOKEN_BUDGET for both runs (lower it to exercise folding on short scenarios)")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--max-pass-rate-drop", type=float, default=5.0, help="Allowed pass rate drop, in points")
+    parser.add_argument("--max-score-drop", type=float, default=0.3, help="Allowed mean judge score drop")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        off = summarize(run_mode(args, "off", os.path.join(tmp, "off.json")))
+        on = summarize(run_mode(args, "on", os.path.join(tmp, "on.json")))
+
+    report(off, on)
+    failures = check(off, on, args)
+    for failure in failures:
+        print(f"  FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,9 +4,11 @@ from typing import List, Dict, Any, Optional
 from openai import OpenAI
 
 class LLMJudge:
-    def __init__(self, api_key: str = None, model: str = "gpt-4o"):
+    def __init__(self, api_key: str = None, model: str = "gpt-4o", cassette=None):
         self.client = OpenAI(api_key=api_key or os.environ.get("OPENAI_API_KEY"))
         self.model = model
+        # Optional tests.evals.cassette.Cassette for record/replay
+        self.cassette = cassette
 
     def evaluate_response(self,
                           user_input: str,
@@ -142,17 +144,26 @@ Return a JSON object with the following fields:
 """
 
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
+            request = {
+                "model": self.model,
+                "messages": [
                     {"role": "system", "content": "You are a strict evaluator of AI agents."},
                     {"role": "user", "content": prompt}
                 ],
-                response_format={"type": "json_object"},
-                temperature=0
-            )
-            
-            result = json.loads(response.choices[0].message.content)
+                "response_format": {"type": "json_object"},
+                "temperature": 0
+            }
+
+            def complete() -> str:
+                response = self.client.chat.completions.create(**request)
+                return response.choices[0].message.content
+
+            if self.cassette is not None:
+                content = self.cassette.call_sync("judge", request, complete)
+            else:
+                content = complete()
+
+            result = json.loads(content)
             return result
             
         except Exception as e:
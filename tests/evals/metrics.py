@@ -304,3 +304,56 @@ def all_thresholds_passed(metrics: EvalMetrics, thresholds: Optional[EvalThresho
     """Check if all thresholds are passed."""
     results = check_thresholds(metrics, thresholds)
     return all(results.values())
+
+
+def latency_percentiles(
+    samples_ms: List[float],
+    percentiles: tuple = (50, 90, 95, 99),
+) -> Dict[str, float]:
+    """
+    Summarize per-turn pipeline latencies.
+
+    Uses nearest-rank percentiles so results are actual observed samples.
+
+    Returns:
+        {"count", "mean_ms", "max_ms", "p50_ms", ...}; empty samples yield count 0
+    """
+    if not samples_ms:
+        return {"count": 0}
+
+    ordered = sorted(samples_ms)
+    summary: Dict[str, float] = {
+        "count": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered), 1),
+        "max_ms": round(ordered[-1], 1),
+    }
+    for p in percentiles:
+        rank = max(1, -(-p * len(ordered) // 100))  # ceil(p/100 * n)
+        summary[f"p{p}_ms"] = round(ordered[rank - 1], 1)
+    return summary
+
+
+def input_token_summary(
+    samples: List[int],
+    percentiles: tuple = (50, 95),
+) -> Dict[str, float]:
+    """
+    Summarize prompt (input) tokens per turn, summed over the turn's LLM calls.
+
+    Returns:
+        {"count", "mean", "max", "total", "p50", "p95"}; empty samples yield count 0
+    """
+    if not samples:
+        return {"count": 0}
+
+    ordered = sorted(samples)
+    summary: Dict[str, float] = {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered), 1),
+        "max": ordered[-1],
+        "total": sum(ordered),
+    }
+    for p in percentiles:
+        rank = max(1, -(-p * len(ordered) // 100))  # ceil(p/100 * n)
+        summary[f"p{p}"] = ordered[rank - 1]
+    return summary
@@ -1,10 +1,17 @@
 import asyncio
+import contextvars
+import copy
+import logging
 import os
+import time
+import uuid
 import yaml
 import json
 import sys
 import argparse
-from datetime import datetime
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
 from unittest.mock import MagicMock, AsyncMock, patch
 from contextlib import ExitStack
 from dotenv import load_dotenv
@@ -14,15 +21,50 @@ sys.path.append(os.getcwd())
 
 from app.api.pipeline_message_processor import PipelineMessageProcessor, MessageRequest
 from app.services.router_service import RouterService
+from tests.evals.cassette import Cassette
 from tests.evals.judge import LLMJudge
+from tests.evals.metrics import input_token_summary, latency_percentiles
 
 # Load environment variables
 load_dotenv()
 
-# Mock environment variables if not present
-if "OPENAI_API_KEY" not in os.environ:
-    print("⚠️ OPENAI_API_KEY not found in environment. Please set it to run evals.")
-    sys.exit(1)
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ScenarioState:
+    """Mutable mock state owned by one scenario.
+
+    Scenarios run as separate asyncio tasks, each with its own copy of the
+    context, so mocks read their state through _current_scenario instead of
+    sharing closures across concurrently running scenarios.
+    """
+    name: str
+    session_id: str
+    session_state: Dict[str, Any]
+    redis_storage: Dict[str, Any] = field(default_factory=dict)
+    constraints: Any = None
+    conversation_history: List[Dict[str, Any]] = field(default_factory=list)
+    captured_tool_calls: List[Dict[str, Any]] = field(default_factory=list)
+    captured_tool_outputs: List[Dict[str, Any]] = field(default_factory=list)
+    turn_latencies_ms: List[float] = field(default_factory=list)
+    # Prompt tokens of the main LLM calls, per turn (current turn accumulates)
+    turn_input_tokens: List[int] = field(default_factory=list)
+    current_turn_input_tokens: int = 0
+    started_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+    def history_entry(self, role: str, content: str) -> Dict[str, Any]:
+        """History row stamped like a stored message (one second apart), so compaction can fold it."""
+        created_at = self.started_at + timedelta(seconds=len(self.conversation_history))
+        return {"role": role, "content": content, "created_at": created_at.isoformat()}
+
+
+_current_scenario: contextvars.ContextVar[ScenarioState] = contextvars.ContextVar("eval_scenario")
+
+
+def _state() -> ScenarioState:
+    return _current_scenario.get()
+
 
 async def run_evals():
     # Parse arguments
@@ -32,8 +74,30 @@ async def run_evals():
     parser.add_argument("--clinic-id", default="test-clinic", help="Clinic ID to test against (default: test-clinic)")
     parser.add_argument("--no-trace", action="store_true", help="Disable Langfuse tracing (enabled by default)")
     parser.add_argument("--model", default=None, help="Model to use for evals (default: uses tier system default)")
+    parser.add_argument("--workers", type=int, default=4, help="Scenarios to run concurrently (default: 4; forced to 1 with --real-data)")
+    parser.add_argument("--cassette", default=None, help="Path to an LLM record/replay cassette (JSON)")
+    parser.add_argument("--cassette-mode", choices=["record", "replay", "auto"], default="auto",
+                        help="record: call providers and store; replay: offline only; auto: replay hits, record misses")
+    parser.add_argument("--max-p95-ms", type=float, default=None, help="Fail the run if p95 per-turn pipeline latency exceeds this")
+    parser.add_argument("--compaction", choices=["on", "off"], default=None,
+                        help="Force in-session context compaction on/off (default: SESSION_COMPACTION_ENABLED)")
+    parser.add_argument("--output", default=None, help="Results JSON path (default: tests/evals/results-<timestamp>.json)")
     args = parser.parse_args()
 
+    cassette = Cassette(args.cassette, args.cassette_mode if args.cassette else "off")
+    if cassette.mode == "replay":
+        # Providers are never contacted; clients only need a placeholder key to construct
+        os.environ.setdefault("OPENAI_API_KEY", "cassette-replay")
+    if "OPENAI_API_KEY" not in os.environ:
+        print("⚠️ OPENAI_API_KEY not found in environment. Please set it to run evals.")
+        sys.exit(1)
+
+    workers = max(1, args.workers)
+    if args.real_data and workers > 1:
+        # Real sessions/DB rows are shared by phone number, so scenarios cannot overlap
+        print("  - --real-data shares live session state; running scenarios sequentially")
+        workers = 1
+
     # Load scenarios
     try:
         print(f"📂 Loading scenarios from: {args.scenario_file}")
@@ -45,7 +109,7 @@ async def run_evals():
         sys.exit(1)
 
     # Initialize Judge
-    judge = LLMJudge()
+    judge = LLMJudge(cassette=cassette)
 
     # Resolve model from tier system if not specified
     if args.model is None:
@@ -56,6 +120,9 @@ async def run_evals():
     print(f"🔧 Initializing Agent (Real Data: {args.real_data}, Tracing: {trace_enabled}, Model: {args.model})...")
     
     with ExitStack() as stack:
+        if args.compaction:
+            stack.enter_context(patch('app.services.context_compaction.SESSION_COMPACTION_ENABLED', args.compaction == "on"))
+            print(f"  - Context compaction: {args.compaction}")
         # --- ALWAYS MOCK THESE ---
         # Mock Logger to avoid polluting metrics
         stack.enter_context(patch('app.api.async_message_logger.AsyncMessageLogger'))
@@ -73,11 +140,25 @@ async def run_evals():
         # Constraints Manager
         from app.services.conversation_constraints import ConversationConstraints
 
+        def new_constraints():
+            constraints = ConversationConstraints()
+            constraints.excluded_doctors = set()
+            constraints.excluded_services = set()
+            return constraints
+
         class FakeConstraintsManager:
+            """Constraints live on the current scenario's state."""
+
             def __init__(self, *args, **kwargs):
-                self.constraints = ConversationConstraints()
-                self.constraints.excluded_doctors = set()
-                self.constraints.excluded_services = set()
+                pass
+
+            @property
+            def constraints(self):
+                return _state().constraints
+
+            @constraints.setter
+            def constraints(self, value):
+                _state().constraints = value
 
             async def update_constraints(self, session_id, desired_service=None, desired_doctor=None, exclude_doctor=None, exclude_service=None, time_window=None):
                 if desired_service:
@@ -140,19 +221,21 @@ async def run_evals():
             
             # Memory Manager - with session_language persistence for multi-turn language inertia
             mock_mm = MagicMock()
-            # Track session state including session_language across turns
-            session_state = {'id': 'test-session', 'metadata': {}, 'session_language': None}
+            # Session state (including session_language) is tracked per scenario
 
             async def get_session_with_language(*args, **kwargs):
                 """Return session with persisted session_language for multi-turn language inertia."""
-                return dict(session_state)  # Return copy to avoid mutation issues
+                return dict(_state().session_state)  # Return copy to avoid mutation issues
+
+            async def get_conversation_history(*args, **kwargs):
+                return _state().conversation_history
 
             mock_mm.get_or_create_session = AsyncMock(side_effect=get_session_with_language)
             mock_mm.get_session_by_id = AsyncMock(side_effect=get_session_with_language)
             mock_mm.store_message = AsyncMock()
             mock_mm.get_user_preferences = AsyncMock(return_value={})
             mock_mm.get_memory_context = AsyncMock(return_value=[])
-            mock_mm.get_conversation_history = AsyncMock(return_value=[])
+            mock_mm.get_conversation_history = AsyncMock(side_effect=get_conversation_history)
             stack.enter_context(patch('app.memory.conversation_memory.get_memory_manager', return_value=mock_mm))
 
             # Patch datetime in LLM step to fix "Today" context
@@ -164,7 +247,10 @@ async def run_evals():
 
             # Session Manager
             mock_sm = MagicMock()
-            mock_sm.check_and_manage_boundary = AsyncMock(return_value=('test-session', False, 'none'))
+            async def check_and_manage_boundary(*args, **kwargs):
+                return (_state().session_id, False, 'none')
+
+            mock_sm.check_and_manage_boundary = AsyncMock(side_effect=check_and_manage_boundary)
             mock_lock = MagicMock()
             mock_lock.acquire = MagicMock()
             mock_lock.acquire.return_value.__aenter__ = AsyncMock(return_value=None)
@@ -180,7 +266,7 @@ async def run_evals():
             # MessageContextHydrator (Replaces CacheService mock)
             # Include WhatsApp phone for E2E booking scenarios that expect phone from context
             mock_hydrator = MagicMock()
-            mock_hydrator.hydrate = AsyncMock(return_value={
+            hydrated_context = {
                 'clinic': {
                     'id': args.clinic_id,
                     'name': 'Test Dental Clinic',
@@ -210,35 +296,42 @@ async def run_evals():
                 'preferences': {},
                 'profile': None,
                 'conversation_state': None
-            })
+            }
+
+            async def hydrate(*args, **kwargs):
+                """Fixed clinic context plus the current scenario's history."""
+                context = copy.deepcopy(hydrated_context)
+                context['history'] = list(_state().conversation_history)
+                return context
+
+            mock_hydrator.hydrate = AsyncMock(side_effect=hydrate)
             stack.enter_context(patch('app.services.message_context_hydrator.MessageContextHydrator', return_value=mock_hydrator))
 
             # Redis Client - mock with proper session state tracking for multi-turn conversations
             mock_redis = MagicMock()
 
-            # In-memory storage for Redis mock to persist across turns
-            redis_storage = {}
-
+            # In-memory storage (per scenario) for Redis mock to persist across turns
             def mock_get(key):
                 """Return stored value or None."""
-                return redis_storage.get(key)
+                return _state().redis_storage.get(key)
 
             def mock_set(key, value):
                 """Store value."""
-                redis_storage[key] = value
+                _state().redis_storage[key] = value
                 return True
 
             def mock_hgetall(key):
                 """Return hash or empty dict for new session."""
-                return redis_storage.get(key, {})
+                return _state().redis_storage.get(key, {})
 
             def mock_hget(key, field):
                 """Return hash field or None."""
-                hash_data = redis_storage.get(key, {})
+                hash_data = _state().redis_storage.get(key, {})
                 return hash_data.get(field) if isinstance(hash_data, dict) else None
 
             def mock_hset(key, field_or_mapping, value=None):
                 """Set hash field(s)."""
+                redis_storage = _state().redis_storage
                 if key not in redis_storage:
                     redis_storage[key] = {}
                 if isinstance(field_or_mapping, dict):
@@ -262,10 +355,13 @@ async def run_evals():
 
             # Intercept conversation_sessions updates to persist session_language
             def capture_session_update(update_data):
-                """Capture session_language from PostProcessingStep updates."""
+                """Capture session_language and the rolling context summary from session updates."""
                 if 'session_language' in update_data:
-                    session_state['session_language'] = update_data['session_language']
+                    _state().session_state['session_language'] = update_data['session_language']
                     # print(f"  [DEBUG] Persisted session_language: {update_data['session_language']}")
+                for key in ('context_summary', 'context_summary_through'):
+                    if key in update_data:
+                        _state().session_state[key] = update_data[key]
                 mock_update = MagicMock()
                 mock_update.eq.return_value.execute.return_value = MagicMock(data=[])
                 return mock_update
@@ -287,6 +383,7 @@ async def run_evals():
                 return default_table
 
             mock_supabase.table.side_effect = get_table
+            mock_supabase.schema.return_value = mock_supabase
 
             stack.enter_context(patch('app.database.get_healthcare_client', return_value=mock_supabase))
             stack.enter_context(patch('app.database.get_main_client', return_value=mock_supabase))
@@ -527,7 +624,7 @@ async def run_evals():
         # --- LLM FACTORY SETUP (Shared) ---
         from app.services.llm.adapters.openai_adapter import OpenAIAdapter
         from app.services.llm.adapters.gemini_adapter import GeminiAdapter
-        from app.services.llm.base_adapter import ModelCapability, LLMProvider
+        from app.services.llm.base_adapter import ModelCapability, LLMProvider, LLMResponse
         from app.services.llm.llm_factory import LLMFactory
 
         # Get model capabilities from LLMFactory builtin models if available
@@ -543,7 +640,7 @@ async def run_evals():
             capability = ModelCapability(
                 provider=LLMProvider.OPENAI,
                 model_name=args.model,
-                api_key=os.environ["OPENAI_API_KEY"],
+                api_key=os.environ.get("OPENAI_API_KEY"),
                 display_name=args.model,
                 input_price_per_1m=0.15,
                 output_price_per_1m=0.60,
@@ -567,9 +664,23 @@ async def run_evals():
         else:
             real_adapter = OpenAIAdapter(capability)
 
-        # Wrap generate_with_tools to capture tool calls
-        captured_tool_calls = []
-        captured_tool_outputs = []
+        # Wrap generate_with_tools to capture tool calls (into the current scenario's state)
+
+        # Cassette (de)serialization for LLM responses; raw provider payloads are not replayable
+        def dump_llm_response(response):
+            return response.model_dump(exclude={'raw_response'})
+
+        def load_llm_response(data):
+            return LLMResponse(**data)
+
+        async def cassette_call(kind, fn, *args, **kwargs):
+            return await cassette.call(
+                kind,
+                {"model": capability.model_name, "args": list(args), "kwargs": kwargs},
+                lambda: fn(*args, **kwargs),
+                dump=dump_llm_response,
+                load=load_llm_response,
+            )
 
         # --- LANGFUSE TRACING SETUP ---
         eval_model_name = args.model  # Store for use in nested functions
@@ -611,11 +722,13 @@ async def run_evals():
                     logger.debug(f"Langfuse generation tracking skipped: {e}")
 
             # OpenAIAdapter returns LLMResponse
-            llm_response = await original_generate_with_tools(*args, **kwargs)
+            llm_response = await cassette_call("generate_with_tools", original_generate_with_tools, *args, **kwargs)
+
+            _state().current_turn_input_tokens += (llm_response.usage or {}).get('input_tokens', 0)
 
             # Capture tools
             if llm_response.tool_calls:
-                captured_tool_calls.extend([t.model_dump() for t in llm_response.tool_calls])
+                _state().captured_tool_calls.extend([t.model_dump() for t in llm_response.tool_calls])
 
             # Update Langfuse with output (v3 API)
             if generation:
@@ -655,7 +768,7 @@ async def run_evals():
                 except Exception as e:
                     logger.debug(f"Langfuse generation tracking skipped: {e}")
 
-            response = await real_adapter.generate(*args, **kwargs)
+            response = await cassette_call("generate", real_adapter.generate, *args, **kwargs)
 
             # Update Langfuse with output (v3 API)
             if generation:
@@ -698,7 +811,7 @@ async def run_evals():
             # Remove tier-specific args that generate() doesn't understand
             generate_kwargs = {k: v for k, v in kwargs.items()
                              if k not in ('tier', 'clinic_id', 'session_id')}
-            response = await real_adapter.generate(**generate_kwargs)
+            response = await cassette_call("generate", real_adapter.generate, **generate_kwargs)
 
             # Update Langfuse with output (v3 API)
             if generation:
@@ -784,7 +897,7 @@ async def run_evals():
             except Exception as e:
                 # Capture the error as output so history remains valid
                 output_content = f"Error executing tool {tool_name}: {str(e)}"
-                captured_tool_outputs.append({
+                _state().captured_tool_outputs.append({
                     "id": tool_call_id,
                     "name": tool_name,
                     "args": tool_args,
@@ -793,7 +906,7 @@ async def run_evals():
                 raise e
 
             print(f"DEBUG: Tool {tool_name} output: {output_content} (type: {type(output_content)})")
-            captured_tool_outputs.append({
+            _state().captured_tool_outputs.append({
                 "id": tool_call_id,
                 "name": tool_name,
                 "args": tool_args,
@@ -804,45 +917,133 @@ async def run_evals():
 
         processor.tool_executor.execute = capturing_tool_execute
 
-        print("🚀 Starting Evaluations...\n")
-        
-        results = []
-        errors = []
+        print(f"🚀 Starting Evaluations ({workers} concurrent)...\n")
+
+        # Shared caches are keyed by clinic/session; clear once, then isolate
+        # scenarios by giving each its own session id and mock state.
+        from app.api.pipeline.steps.langgraph_step import LangGraphExecutionStep
+        if hasattr(processor, '_clinic_profile_cache'):
+            processor._clinic_profile_cache.clear()
+        LangGraphExecutionStep._in_memory_state_store.clear()
+        if hasattr(processor, '_known_clinic_ids'):
+            processor._known_clinic_ids.clear()
+
+        async def process_turn(state: ScenarioState, content: str, out) -> Dict[str, Any]:
+            """Run one user message through the pipeline and record it in the scenario history."""
+            req = MessageRequest(
+                from_phone='+15551112222',
+                to_phone='+15550000000',
+                body=content,
+                message_sid=f"msg-{uuid.uuid4().hex}",
+                clinic_id=args.clinic_id,
+                clinic_name='Test Dental Clinic'
+            )
 
-        for scenario in scenarios:
-            print(f"Running Scenario: {scenario['name']}")
-            
-            # Reset constraints for new scenario to prevent state leakage
+            # Process Message - agent will execute its full tool chain internally
+            state.current_turn_input_tokens = 0
+            started = time.perf_counter()
+            response = await processor.process_message(req)
+            state.turn_latencies_ms.append((time.perf_counter() - started) * 1000)
+            state.turn_input_tokens.append(state.current_turn_input_tokens)
+            # Let this session's summary fold land before the next turn, so runs are repeatable
+            await processor.context_compactor.drain(state.session_id)
+
+            agent_response_text = response.message
+
+            # Phase 6: Capture internal tool tracking from response metadata
+            response_meta = getattr(response, 'metadata', {}) or {}
+            turn = {
+                "response": agent_response_text,
+                "internal_tools_called": response_meta.get('internal_tools_called', []),
+                "internal_tools_failed": response_meta.get('internal_tools_failed', []),
+                "validation_errors": response_meta.get('executor_validation_errors', []),
+                "hallucination_blocked": response_meta.get('hallucination_blocked', False),
+            }
+
+            # Language inertia fix: Capture detected_language for next turn
             if not args.real_data:
-                mock_cm_instance.constraints = ConversationConstraints()
-                mock_cm_instance.constraints.excluded_doctors = set()
-                mock_cm_instance.constraints.excluded_services = set()
-            
-            # Clear captured tool calls for the new scenario
-            captured_tool_calls.clear()
-            captured_tool_outputs.clear()
-
-            # Clear processor cache to prevent context leakage (e.g. doctor IDs)
-            if hasattr(processor, '_clinic_profile_cache'):
-                processor._clinic_profile_cache.clear()
+                detected_lang = getattr(response, 'detected_language', 'unknown')
+                if detected_lang and detected_lang != 'unknown':
+                    state.session_state['session_language'] = detected_lang
+
+            out(f"  Agent says: {agent_response_text}")
+            if state.captured_tool_calls:
+                out(f"  LLM Tools called: {[t['name'] for t in state.captured_tool_calls]}")
+            if turn["internal_tools_called"]:
+                out(f"  Internal tools executed: {turn['internal_tools_called']}")
+            if turn["internal_tools_failed"]:
+                out(f"  ⚠️ Internal tools failed: {turn['internal_tools_failed']}")
+            if turn["hallucination_blocked"]:
+                out(f"  ✓ Hallucination blocked by validator")
+
+            # Update history
+            state.conversation_history.append(state.history_entry("user", content))
+
+            # Append tool outputs as SYSTEM messages
+            for tool_out in state.captured_tool_outputs:
+                output_text = f"Tool '{tool_out['name']}' output: {tool_out['output']}"
+                state.conversation_history.append(state.history_entry("system", output_text))
+
+            state.conversation_history.append(state.history_entry("assistant", agent_response_text))
+            return turn
+
+        def apply_assistant_override(state: ScenarioState, msg: Dict[str, Any], out) -> None:
+            """A scripted assistant message overrides the actual agent response."""
+            if state.conversation_history and state.conversation_history[-1]['role'] == 'assistant':
+                out(f"  (Overriding Agent response with: '{msg['content']}')")
+                state.conversation_history[-1] = dict(msg, created_at=state.conversation_history[-1].get('created_at'))
+            else:
+                state.conversation_history.append(state.history_entry(msg['role'], msg['content']))
+
+        async def judge_turn(state: ScenarioState, scenario, user_input, agent_response, expected_behavior, criteria, turn, out):
+            # Judge Response - Phase 6: Include internal tool tracking
+            # The judge client is blocking; keep it off the event loop so scenarios overlap
+            eval_result = await asyncio.to_thread(
+                judge.evaluate_response,
+                user_input=user_input,
+                agent_response=agent_response,
+                expected_behavior=expected_behavior,
+                criteria=criteria,
+                tool_calls=state.captured_tool_calls,
+                tool_outputs=state.captured_tool_outputs,
+                # Phase 6: Internal tool tracking
+                internal_tools_called=turn["internal_tools_called"],
+                internal_tools_failed=turn["internal_tools_failed"],
+                validation_errors=turn["validation_errors"],
+                hallucination_blocked=turn["hallucination_blocked"],
+                requires_availability_check=scenario.get('requires_availability_check', False),
+                requires_pricing_tool=scenario.get('requires_pricing_tool', False),
+            )
 
-            # CRITICAL: Clear FSM state store to prevent state leakage between scenarios
-            # The FSM uses LangGraphExecutionStep._in_memory_state_store for state persistence
-            from app.api.pipeline.steps.langgraph_step import LangGraphExecutionStep
-            LangGraphExecutionStep._in_memory_state_store.clear()
-            if hasattr(processor, '_known_clinic_ids'):
-                processor._known_clinic_ids.clear()
+            out(f"  Score: {eval_result['score']}/10")
+            out(f"  Pass: {'✅' if eval_result['pass'] else '❌'}")
+            out(f"  Reasoning: {eval_result['reasoning']}\n")
+            return eval_result
+
+        async def run_scenario(scenario) -> Dict[str, Any]:
+            """Run one scenario with isolated mock state; returns {"result"} or {"error"}."""
+            state = ScenarioState(
+                name=scenario['name'],
+                session_id=f"eval-{uuid.uuid4().hex[:12]}",
+                session_state={'id': 'test-session', 'metadata': {}, 'session_language': None},
+                constraints=new_constraints(),
+            )
+            # Each scenario runs in its own task, so this binding is task-local
+            _current_scenario.set(state)
 
-            # Clear Redis storage between scenarios to reset session state
-            redis_storage.clear()
+            def out(message: str) -> None:
+                print(f"[{state.name}] {message}" if workers > 1 else message)
 
-            # Reset session_language for new scenario (multi-turn language inertia fix)
+            out(f"Running Scenario: {scenario['name']}")
             if not args.real_data:
-                session_state['session_language'] = None
+                state.session_state['id'] = state.session_id
+            empty_turn = {
+                "internal_tools_called": [],
+                "internal_tools_failed": [],
+                "validation_errors": [],
+                "hallucination_blocked": False,
+            }
 
-            conversation_history = []
-            last_agent_response = None
-            
             try:
                 # Handle multiturn scenario format (turns) vs standard format (messages)
                 if 'turns' in scenario:
@@ -884,79 +1085,17 @@ async def run_evals():
                                 'criteria': turn.get('criteria', [])
                             })
 
-                    print(f"  Expected tool chain: {all_expected_tools}")
+                    out(f"  Expected tool chain: {all_expected_tools}")
 
                     # Process each user turn
-                    for turn_idx, turn in enumerate(user_turns):
+                    last_turn = dict(empty_turn, response=None)
+                    for turn in user_turns:
                         for msg in turn['messages']:
                             if msg['role'] == 'user':
-                                print(f"  Turn {turn['turn_id']}: User says '{msg['content']}'")
-
-                                # Update mock memory with current history (only if mocked)
-                                if not args.real_data:
-                                    mock_mm.get_conversation_history = AsyncMock(return_value=conversation_history)
-                                    current_context = mock_hydrator.hydrate.return_value
-                                    current_context['history'] = list(conversation_history)
-                                    mock_hydrator.hydrate = AsyncMock(return_value=current_context)
-
-                                req = MessageRequest(
-                                    from_phone='+15551112222',
-                                    to_phone='+15550000000',
-                                    body=msg['content'],
-                                    message_sid=f"msg-{datetime.now().timestamp()}",
-                                    clinic_id=args.clinic_id,
-                                    clinic_name='Test Dental Clinic'
-                                )
-
-                                # Process Message - agent will execute its full tool chain internally
-                                response = await processor.process_message(req)
-                                agent_response_text = response.message
-                                last_agent_response = agent_response_text
-
-                                # Phase 6: Capture internal tool tracking from response metadata
-                                response_meta = getattr(response, 'metadata', {}) or {}
-                                internal_tools = response_meta.get('internal_tools_called', [])
-                                internal_tools_failed = response_meta.get('internal_tools_failed', [])
-                                validation_errors = response_meta.get('executor_validation_errors', [])
-                                hallucination_blocked = response_meta.get('hallucination_blocked', False)
-
-                                # Language inertia fix: Capture detected_language for next turn
-                                if not args.real_data:
-                                    detected_lang = getattr(response, 'detected_language', 'unknown')
-                                    if detected_lang and detected_lang != 'unknown':
-                                        session_state['session_language'] = detected_lang
-
-                                print(f"  Agent says: {agent_response_text}")
-                                if captured_tool_calls:
-                                    actual_tools = [t['name'] for t in captured_tool_calls]
-                                    print(f"  LLM Tools called: {actual_tools}")
-                                if internal_tools:
-                                    print(f"  Internal tools executed: {internal_tools}")
-                                if internal_tools_failed:
-                                    print(f"  ⚠️ Internal tools failed: {internal_tools_failed}")
-                                if hallucination_blocked:
-                                    print(f"  ✓ Hallucination blocked by validator")
-
-                                # Update history
-                                conversation_history.append({"role": "user", "content": msg['content']})
-
-                                # Append tool outputs as SYSTEM messages
-                                if captured_tool_outputs:
-                                    for tool_out in captured_tool_outputs:
-                                        output_text = f"Tool '{tool_out['name']}' output: {tool_out['output']}"
-                                        conversation_history.append({
-                                            "role": "system",
-                                            "content": output_text
-                                        })
-
-                                conversation_history.append({"role": "assistant", "content": agent_response_text})
-
+                                out(f"  Turn {turn['turn_id']}: User says '{msg['content']}'")
+                                last_turn = await process_turn(state, msg['content'], out)
                             elif msg['role'] == 'assistant':
-                                if conversation_history and conversation_history[-1]['role'] == 'assistant':
-                                    print(f"  (Overriding Agent response with: '{msg['content']}')")
-                                    conversation_history[-1] = msg
-                                else:
-                                    conversation_history.append(msg)
+                                apply_assistant_override(state, msg, out)
 
                     # After all user turns processed, evaluate the complete scenario
                     # Use scenario-level or last turn's expected_behavior/criteria
@@ -965,14 +1104,13 @@ async def run_evals():
 
                     # Get the last user message for context
                     last_user_msg = ''
-                    for msg in reversed(conversation_history):
+                    for msg in reversed(state.conversation_history):
                         if msg.get('role') == 'user':
                             last_user_msg = msg.get('content', '')
                             break
 
                     # Validate tool chain - check if expected tools were called in order
-                    actual_tool_names = [t['name'] for t in captured_tool_calls]
-                    tool_chain_valid = True
+                    actual_tool_names = [t['name'] for t in state.captured_tool_calls]
                     expected_idx = 0
                     for actual_tool in actual_tool_names:
                         if expected_idx < len(all_expected_tools) and actual_tool == all_expected_tools[expected_idx]:
@@ -980,164 +1118,104 @@ async def run_evals():
                     tool_chain_valid = expected_idx == len(all_expected_tools)
 
                     if not tool_chain_valid:
-                        print(f"  ⚠️ Tool chain mismatch: expected {all_expected_tools}, got {actual_tool_names}")
-
-                    # Judge Response - Phase 6: Include internal tool tracking
-                    eval_result = judge.evaluate_response(
-                        user_input=last_user_msg,
-                        agent_response=last_agent_response or '',
-                        expected_behavior=expected_behavior,
-                        criteria=criteria,
-                        tool_calls=captured_tool_calls,
-                        tool_outputs=captured_tool_outputs,
-                        # Phase 6: Internal tool tracking
-                        internal_tools_called=internal_tools,
-                        internal_tools_failed=internal_tools_failed,
-                        validation_errors=validation_errors,
-                        hallucination_blocked=hallucination_blocked,
-                        requires_availability_check=scenario.get('requires_availability_check', False),
-                        requires_pricing_tool=scenario.get('requires_pricing_tool', False),
-                    )
+                        out(f"  ⚠️ Tool chain mismatch: expected {all_expected_tools}, got {actual_tool_names}")
 
-                    print(f"  Score: {eval_result['score']}/10")
-                    print(f"  Pass: {'✅' if eval_result['pass'] else '❌'}")
-                    print(f"  Reasoning: {eval_result['reasoning']}\n")
+                    eval_result = await judge_turn(
+                        state, scenario, last_user_msg, last_turn["response"] or '',
+                        expected_behavior, criteria, last_turn, out
+                    )
 
                     # Phase 6: Include internal tool tracking in results
-                    results.append({
+                    return {"result": {
                         "scenario": scenario['name'],
                         "result": eval_result,
-                        "transcript": conversation_history,
+                        "transcript": state.conversation_history,
                         "expected_tool_chain": all_expected_tools,
                         "actual_tool_chain": actual_tool_names,
                         "tool_chain_valid": tool_chain_valid,
                         # Phase 6: Internal tool tracking
-                        "internal_tools_called": internal_tools,
-                        "internal_tools_failed": internal_tools_failed,
-                        "validation_errors": validation_errors,
-                        "hallucination_blocked": hallucination_blocked,
-                    })
-
-                else:
-                    # STANDARD SINGLE-TURN SCENARIO PROCESSING
-                    scenario_messages = scenario.get('messages', [])
-
-                    # Iterate through messages
-                    for i, msg in enumerate(scenario_messages):
-                        if msg['role'] == 'user':
-                            print(f"  Turn {i+1}: User says '{msg['content']}'")
-
-                            # Update mock memory with current history (only if mocked)
-                            if not args.real_data:
-                                mock_mm.get_conversation_history = AsyncMock(return_value=conversation_history)
-                                current_context = mock_hydrator.hydrate.return_value
-                                current_context['history'] = list(conversation_history)
-                                mock_hydrator.hydrate = AsyncMock(return_value=current_context)
-
-                            req = MessageRequest(
-                                from_phone='+15551112222',
-                                to_phone='+15550000000',
-                                body=msg['content'],
-                                message_sid=f"msg-{datetime.now().timestamp()}",
-                                clinic_id=args.clinic_id,
-                                clinic_name='Test Dental Clinic'
+                        "internal_tools_called": last_turn["internal_tools_called"],
+                        "internal_tools_failed": last_turn["internal_tools_failed"],
+                        "validation_errors": last_turn["validation_errors"],
+                        "hallucination_blocked": last_turn["hallucination_blocked"],
+                        "turn_latencies_ms": state.turn_latencies_ms,
+                        "turn_input_tokens": state.turn_input_tokens,
+                    }, "turn_latencies_ms": state.turn_latencies_ms, "turn_input_tokens": state.turn_input_tokens}
+
+                # STANDARD SINGLE-TURN SCENARIO PROCESSING
+                scenario_messages = scenario.get('messages', [])
+                result = None
+
+                # Iterate through messages
+                for i, msg in enumerate(scenario_messages):
+                    if msg['role'] == 'user':
+                        out(f"  Turn {i+1}: User says '{msg['content']}'")
+                        turn = await process_turn(state, msg['content'], out)
+
+                        # Check if this is the last message in the scenario
+                        if i == len(scenario_messages) - 1:
+                            eval_result = await judge_turn(
+                                state, scenario, msg['content'], turn["response"],
+                                scenario.get('expected_behavior', ''), scenario.get('criteria', []),
+                                turn, out
                             )
 
-                            # Process Message
-                            response = await processor.process_message(req)
-                            agent_response_text = response.message
-                            last_agent_response = agent_response_text
-
-                            # Phase 6: Capture internal tool tracking
-                            response_meta = getattr(response, 'metadata', {}) or {}
-                            internal_tools = response_meta.get('internal_tools_called', [])
-                            internal_tools_failed = response_meta.get('internal_tools_failed', [])
-                            validation_errors = response_meta.get('executor_validation_errors', [])
-                            hallucination_blocked = response_meta.get('hallucination_blocked', False)
-
-                            # Language inertia fix: Capture detected_language for next turn
-                            if not args.real_data:
-                                detected_lang = getattr(response, 'detected_language', 'unknown')
-                                if detected_lang and detected_lang != 'unknown':
-                                    session_state['session_language'] = detected_lang
-
-                            print(f"  Agent says: {agent_response_text}")
-                            if captured_tool_calls:
-                                print(f"  LLM Tools called: {[t['name'] for t in captured_tool_calls]}")
-                            if internal_tools:
-                                print(f"  Internal tools executed: {internal_tools}")
-                            if internal_tools_failed:
-                                print(f"  ⚠️ Internal tools failed: {internal_tools_failed}")
-                            if hallucination_blocked:
-                                print(f"  ✓ Hallucination blocked")
-
-                            # Update history
-                            conversation_history.append({"role": "user", "content": msg['content']})
-
-                            # Append tool outputs as SYSTEM messages
-                            if captured_tool_outputs:
-                                for tool_out in captured_tool_outputs:
-                                    output_text = f"Tool '{tool_out['name']}' output: {tool_out['output']}"
-                                    conversation_history.append({
-                                        "role": "system",
-                                        "content": output_text
-                                    })
-
-                            conversation_history.append({"role": "assistant", "content": agent_response_text})
-
-                            # Check if this is the last message in the scenario
-                            if i == len(scenario_messages) - 1:
-                                expected_behavior = scenario.get('expected_behavior', '')
-                                criteria = scenario.get('criteria', [])
-
-                                # Judge Response - Phase 6: Include internal tool tracking
-                                eval_result = judge.evaluate_response(
-                                    user_input=msg['content'],
-                                    agent_response=agent_response_text,
-                                    expected_behavior=expected_behavior,
-                                    criteria=criteria,
-                                    tool_calls=captured_tool_calls,
-                                    tool_outputs=captured_tool_outputs,
-                                    # Phase 6: Internal tool tracking
-                                    internal_tools_called=internal_tools,
-                                    internal_tools_failed=internal_tools_failed,
-                                    validation_errors=validation_errors,
-                                    hallucination_blocked=hallucination_blocked,
-                                    requires_availability_check=scenario.get('requires_availability_check', False),
-                                    requires_pricing_tool=scenario.get('requires_pricing_tool', False),
-                                )
-
-                                print(f"  Score: {eval_result['score']}/10")
-                                print(f"  Pass: {'✅' if eval_result['pass'] else '❌'}")
-                                print(f"  Reasoning: {eval_result['reasoning']}\n")
-
-                                # Phase 6: Include internal tool tracking
-                                results.append({
-                                    "scenario": scenario['name'],
-                                    "result": eval_result,
-                                    "transcript": conversation_history,
-                                    "internal_tools_called": internal_tools,
-                                    "internal_tools_failed": internal_tools_failed,
-                                    "validation_errors": validation_errors,
-                                    "hallucination_blocked": hallucination_blocked,
-                                })
-
-                        elif msg['role'] == 'assistant':
-                            # If the scenario defines an assistant message, it overrides the actual agent response
-                            if conversation_history and conversation_history[-1]['role'] == 'assistant':
-                                print(f"  (Overriding Agent response with: '{msg['content']}')")
-                                conversation_history[-1] = msg
-                            else:
-                                conversation_history.append(msg)
+                            # Phase 6: Include internal tool tracking
+                            result = {
+                                "scenario": scenario['name'],
+                                "result": eval_result,
+                                "transcript": state.conversation_history,
+                                "internal_tools_called": turn["internal_tools_called"],
+                                "internal_tools_failed": turn["internal_tools_failed"],
+                                "validation_errors": turn["validation_errors"],
+                                "hallucination_blocked": turn["hallucination_blocked"],
+                                "turn_latencies_ms": state.turn_latencies_ms,
+                                "turn_input_tokens": state.turn_input_tokens,
+                            }
+
+                    elif msg['role'] == 'assistant':
+                        apply_assistant_override(state, msg, out)
+
+                return {"result": result, "turn_latencies_ms": state.turn_latencies_ms, "turn_input_tokens": state.turn_input_tokens}
 
             except Exception as e:
-                print(f"❌ Error running scenario '{scenario['name']}': {e}\n")
+                out(f"❌ Error running scenario '{scenario['name']}': {e}\n")
                 import traceback
                 traceback.print_exc()
-                errors.append({
-                    "scenario": scenario['name'],
-                    "error": str(e)
-                })
+                return {
+                    "error": {"scenario": scenario['name'], "error": str(e)},
+                    "turn_latencies_ms": state.turn_latencies_ms,
+                    "turn_input_tokens": state.turn_input_tokens,
+                }
+            finally:
+                LangGraphExecutionStep._in_memory_state_store.pop(state.session_id, None)
+
+        semaphore = asyncio.Semaphore(workers)
+
+        async def run_limited(scenario):
+            async with semaphore:
+                return await run_scenario(scenario)
+
+        run_started = time.perf_counter()
+        outcomes = await asyncio.gather(*(
+            asyncio.create_task(run_limited(scenario)) for scenario in scenarios
+        ))
+        wall_time_s = time.perf_counter() - run_started
+
+        # Keep scenario order in the report regardless of completion order
+        results = []
+        errors = []
+        all_turn_latencies = []
+        all_turn_input_tokens = []
+        for outcome in outcomes:
+            if outcome.get("error"):
+                errors.append(outcome["error"])
+            elif outcome.get("result"):
+                results.append(outcome["result"])
+            all_turn_latencies.extend(outcome.get("turn_latencies_ms", []))
+            all_turn_input_tokens.extend(outcome.get("turn_input_tokens", []))
+        latency = latency_percentiles(all_turn_latencies)
+        input_tokens = input_token_summary(all_turn_input_tokens)
 
         # Summary
         print("--- Evaluation Summary ---")
@@ -1155,11 +1233,36 @@ async def run_evals():
         success_rate = (passed / total_defined * 100) if total_defined > 0 else 0
         print(f"Success Rate: {success_rate:.1f}%")
 
+        # Performance: per-turn pipeline latency (includes LLM time unless replaying)
+        print(f"Wall Time: {wall_time_s:.1f}s ({workers} workers)")
+        if latency.get("count"):
+            print(
+                f"Turn Latency: p50={latency['p50_ms']:.0f}ms p90={latency['p90_ms']:.0f}ms "
+                f"p95={latency['p95_ms']:.0f}ms p99={latency['p99_ms']:.0f}ms (n={latency['count']})"
+            )
+        if input_tokens.get("count"):
+            print(
+                f"Input Tokens/Turn: mean={input_tokens['mean']:.0f} p50={input_tokens['p50']} "
+                f"p95={input_tokens['p95']} max={input_tokens['max']} (n={input_tokens['count']})"
+            )
+        latency_gate_failed = (
+            args.max_p95_ms is not None
+            and latency.get("count", 0) > 0
+            and latency["p95_ms"] > args.max_p95_ms
+        )
+        if latency_gate_failed:
+            print(f"❌ p95 turn latency {latency['p95_ms']:.0f}ms exceeds --max-p95-ms {args.max_p95_ms:.0f}ms")
+
+        if cassette.enabled:
+            cassette.save()
+            stats = cassette.stats()
+            print(f"Cassette ({stats['mode']}): {stats['hits']} replayed, {stats['recorded']} recorded, {stats['misses']} missed -> {stats['path']}")
+
         # Save Results
         timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
         # Use absolute path relative to script location
         script_dir = os.path.dirname(os.path.abspath(__file__))
-        output_file = os.path.join(script_dir, f"results-{timestamp}.json")
+        output_file = args.output or os.path.join(script_dir, f"results-{timestamp}.json")
         with open(output_file, "w") as f:
             json.dump({
                 "timestamp": timestamp,
@@ -1169,6 +1272,16 @@ async def run_evals():
                     "failed": total_failed,
                     "success_rate": success_rate
                 },
+                "performance": {
+                    "workers": workers,
+                    "wall_time_s": round(wall_time_s, 2),
+                    "turn_latency": latency,
+                    "max_p95_ms": args.max_p95_ms,
+                    "latency_gate_passed": not latency_gate_failed,
+                    "input_tokens_per_turn": input_tokens,
+                    "compaction": args.compaction,
+                },
+                "cassette": cassette.stats() if cassette.enabled else None,
                 "results": results,
                 "errors": errors
             }, f, indent=2)
@@ -1183,7 +1296,7 @@ async def run_evals():
                 print(f"⚠️ Failed to flush Langfuse: {e}")
 
         # Exit Code
-        if total_failed > 0:
+        if total_failed > 0 or latency_gate_failed:
             sys.exit(1)
         sys.exit(0)
 
@@ -0,0 +1,3 @@
+"""
+Observability tests package
+"""
@@ -0,0 +1,68 @@
+"""
+track_io scopes: nested scopes are counted once, in the outermost scope's
+summary, and a scope that outlives its parent is emitted on its own.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.observability import io_accounting
+from app.observability.io_accounting import track_io
+
+
+@pytest.fixture
+def emitted(monkeypatch):
+    emitted = []
+    monkeypatch.setattr(io_accounting, "_installed", True)
+    monkeypatch.setattr(io_accounting, "_emit", emitted.append)
+    return emitted
+
+
+def call(backend, target):
+    io_accounting._record(backend, target, time.perf_counter(), sync=False, failed=False)
+
+
+def test_nested_scope_is_counted_once(emitted):
+    with track_io("http_request") as request:
+        call("db", "patients")
+        with track_io("whatsapp_message") as message:
+            call("redis", "GET")
+            call("redis", "SET")
+        call("http", "api.example.com")
+
+    assert emitted == [request]
+    assert message not in emitted
+    assert dict(request.calls) == {"db": 1, "redis": 2, "http": 1}
+    assert request.targets["redis:GET"] == 1
+    assert sum(sum(stats.calls.values()) for stats in emitted) == 4
+
+
+def test_calls_outside_any_scope_are_not_recorded(emitted):
+    call("db", "patients")
+    with track_io("http_request") as request:
+        pass
+
+    assert emitted == [request]
+    assert not request.calls
+
+
+async def test_scope_outliving_its_parent_is_emitted_on_its_own(emitted):
+    release = asyncio.Event()
+
+    async def background():
+        await release.wait()
+        with track_io("session_summary"):
+            call("db", "conversation_sessions")
+
+    with track_io("http_request") as request:
+        call("db", "patients")
+        task = asyncio.create_task(background())
+
+    release.set()
+    await task
+
+    assert [stats.kind for stats in emitted] == ["http_request", "session_summary"]
+    assert dict(request.calls) == {"db": 1}
+    assert dict(emitted[1].calls) == {"db": 1}
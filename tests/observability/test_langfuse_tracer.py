@@ -0,0 +1,58 @@
+"""
+LLMObservability scores: extraction_confidence and rag_relevance go to
+Langfuse with the session as trace id, alongside the buffered spans.
+"""
+
+import pytest
+
+from app.observability import langfuse_tracer
+from app.observability.langfuse_tracer import LLMObservability
+
+
+class FakeLangfuse:
+    def __init__(self):
+        self.scores = []
+
+    def create_score(self, **score):
+        self.scores.append(score)
+
+
+class FakeExtractor:
+    async def extract_slots(self, message, missing_slots, clinic_id):
+        return {"date": {"value": "2026-03-02", "confidence": 0.9}, "time": {"value": "10:00", "confidence": 0.5}}
+
+
+@pytest.fixture
+def langfuse(monkeypatch):
+    client = FakeLangfuse()
+    monkeypatch.setattr(langfuse_tracer, "langfuse_client", client)
+    monkeypatch.setattr(langfuse_tracer, "LANGFUSE_ENABLED", True)
+    return client
+
+
+async def test_slot_extraction_is_scored(langfuse):
+    result = await LLMObservability().extract_slots_with_tracing(
+        "monday at ten", ["date", "time"], "clinic-1", "session-1", "collecting_slots", FakeExtractor()
+    )
+
+    assert set(result) == {"date", "time"}
+    assert len(langfuse.scores) == 1
+    score = langfuse.scores[0]
+    assert (score["name"], score["trace_id"]) == ("extraction_confidence", "session-1")
+    assert score["value"] == pytest.approx(0.7)
+
+
+def test_rag_query_is_scored_when_documents_were_retrieved(langfuse):
+    observability = LLMObservability()
+    observability.track_rag_query("session-1", "price of a cleaning", [{"score": 0.8}, {"score": 0.6}], True)
+    observability.track_rag_query("session-1", "opening hours", [], False)
+
+    assert [(s["name"], s["trace_id"]) for s in langfuse.scores] == [("rag_relevance", "session-1")]
+    assert langfuse.scores[0]["value"] == pytest.approx(0.7)
+
+
+def test_scores_are_skipped_without_langfuse(monkeypatch):
+    monkeypatch.setattr(langfuse_tracer, "langfuse_client", None)
+    monkeypatch.setattr(langfuse_tracer, "LANGFUSE_ENABLED", False)
+
+    LLMObservability().track_rag_query("session-1", "price", [{"score": 0.8}], True)
@@ -0,0 +1,167 @@
+"""
+AdaptiveConcurrencyLimiter: shedding, priority order of queued calls,
+Retry-After holds and AIMD adaptation of the limit, plus a short run of the
+concurrency simulation against a provider with limited capacity.
+"""
+
+import asyncio
+import logging
+import time
+from argparse import Namespace
+
+import pytest
+
+from app.services.llm.concurrency import (
+    AdaptiveConcurrencyLimiter,
+    LLMOverloadedError,
+    LLMPriority,
+    retry_after_seconds,
+)
+from benchmarks.llm_concurrency_sim import FakeRateLimitError, check, run_mode
+
+
+def make_limiter(**kwargs):
+    kwargs.setdefault("initial_limit", 1)
+    kwargs.setdefault("min_limit", 1)
+    return AdaptiveConcurrencyLimiter("fake", "fake-model", **kwargs)
+
+
+async def fill(limiter):
+    while limiter.in_flight < limiter.current_limit:
+        await limiter.acquire(LLMPriority.NORMAL)
+
+
+async def test_queued_calls_are_granted_by_priority():
+    limiter = make_limiter()
+    await fill(limiter)
+    granted = []
+
+    async def call(priority):
+        async with limiter.slot(priority, queue_timeout=5):
+            granted.append(priority)
+
+    tasks = []
+    for priority in (LLMPriority.BACKGROUND, LLMPriority.NORMAL, LLMPriority.BACKGROUND, LLMPriority.INTERACTIVE):
+        tasks.append(asyncio.create_task(call(priority)))
+        await asyncio.sleep(0)
+    assert limiter.queue_depth == 4
+
+    limiter.release("success", 0.01)
+    await asyncio.gather(*tasks)
+
+    assert granted == [LLMPriority.INTERACTIVE, LLMPriority.NORMAL, LLMPriority.BACKGROUND, LLMPriority.BACKGROUND]
+    assert limiter.in_flight == 0 and limiter.queue_depth == 0
+
+
+async def test_call_is_shed_when_expected_wait_exceeds_its_budget():
+    limiter = make_limiter()
+    limiter.avg_latency = 1.0
+    await fill(limiter)
+
+    with pytest.raises(LLMOverloadedError) as shed:
+        await limiter.acquire(LLMPriority.INTERACTIVE, queue_timeout=0.5)
+
+    assert shed.value.reason == "estimated_wait"
+    assert shed.value.waited == 0.0
+    assert limiter.queue_depth == 0
+    assert limiter.stats["shed"] == 1
+
+
+async def test_call_is_shed_when_its_budget_runs_out_in_the_queue():
+    limiter = make_limiter()
+    await fill(limiter)
+
+    started = time.monotonic()
+    with pytest.raises(LLMOverloadedError) as shed:
+        await limiter.acquire(LLMPriority.INTERACTIVE, queue_timeout=0.05)
+
+    assert shed.value.reason == "queue_timeout"
+    assert 0.05 <= time.monotonic() - started < 0.5
+    assert limiter.queue_depth == 0
+
+    # The abandoned waiter does not take the freed slot
+    limiter.release("success", 0.01)
+    assert limiter.in_flight == 0
+
+
+async def test_retry_after_holds_queued_and_new_calls():
+    limiter = make_limiter(initial_limit=4, cooldown=0)
+
+    with pytest.raises(FakeRateLimitError):
+        async with limiter.slot(LLMPriority.INTERACTIVE):
+            raise FakeRateLimitError(retry_after=0.2)
+
+    assert limiter.stats["retry_after"] == 1
+    assert limiter.get_stats()["blocked_for"] > 0.1
+
+    started = time.monotonic()
+    waits = await asyncio.gather(*(limiter.acquire(LLMPriority.INTERACTIVE, queue_timeout=1) for _ in range(2)))
+    assert time.monotonic() - started >= 0.15
+    assert all(waited >= 0.15 for waited in waits)
+    assert limiter.in_flight == 2
+
+
+def test_retry_after_header_forms():
+    assert retry_after_seconds(FakeRateLimitError(retry_after=2)) == 2.0
+
+    class Response:
+        headers = {"retry-after-ms": "250"}
+
+    error = Exception("overloaded")
+    error.response = Response()
+    assert retry_after_seconds(error) == 0.25
+    assert retry_after_seconds(Exception("RESOURCE_EXHAUSTED retryDelay: '7s'")) == 7.0
+    assert retry_after_seconds(Exception("bad request")) is None
+
+
+async def test_overload_backs_off_once_per_cooldown_down_to_the_floor():
+    limiter = make_limiter(initial_limit=20, min_limit=2, backoff=0.5, cooldown=60)
+
+    for _ in range(3):
+        await limiter.acquire()
+        limiter.release("overload")
+    assert limiter.current_limit == 10
+    assert limiter.stats["overloads"] == 3
+
+    limiter.cooldown = 0
+    for _ in range(10):
+        await limiter.acquire()
+        limiter.release("overload")
+    assert limiter.current_limit == 2
+
+
+async def test_limit_grows_only_while_saturated():
+    limiter = make_limiter(initial_limit=4, max_limit=5)
+
+    for _ in range(10):
+        await limiter.acquire()
+        limiter.release("success", 0.01)
+    assert limiter.limit == 4.0
+
+    for _ in range(5):
+        await fill(limiter)
+        limiter.release("success", 0.01)
+        while limiter.in_flight:
+            limiter.release("success", 0.01)
+    assert limiter.current_limit == 5
+
+    for _ in range(5):
+        await fill(limiter)
+        while limiter.in_flight:
+            limiter.release("success", 0.01)
+    assert limiter.limit == 5.0
+
+
+async def test_simulation_limiter_beats_unlimited():
+    args = Namespace(
+        interactive_rps=30.0, duration=1.5, background=120, base_ms=50.0, knee=8, capacity=16,
+        slope=1.0, retry_after=0.2, initial_limit=8, turn_budget=0.5, background_timeout=30.0, seed=7,
+    )
+    logging.disable(logging.WARNING)
+    try:
+        unlimited = await run_mode(args, limited=False)
+        limited = await run_mode(args, limited=True)
+    finally:
+        logging.disable(logging.NOTSET)
+
+    assert check(unlimited, limited, args) == []
@@ -0,0 +1,103 @@
+"""
+Cursor pagination of appointment lists against the in-memory PostgREST
+double: cursors round-trip, and walking every page by cursor returns each
+row exactly once, in (appointment_date, id) order.
+"""
+
+import os
+import secrets
+
+# The service module builds clients and the compliance vault at import time
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test.test.test")
+os.environ.setdefault("MASTER_ENCRYPTION_SECRET", secrets.token_hex(32))
+os.environ.setdefault("ENCRYPTION_SALT", secrets.token_hex(16))
+
+import pytest  # noqa: E402
+
+from app.services.unified_appointment_service import (  # noqa: E402
+    UnifiedAppointmentService,
+    decode_appointment_cursor,
+    encode_appointment_cursor,
+)
+from benchmarks.fakes import FakeSupabaseClient, InMemoryDatabase  # noqa: E402
+
+
+def appointment(i, clinic_id="clinic-1"):
+    # Five rows share each date, so pages split inside a run of equal dates
+    return {
+        "id": f"apt-{(i * 37) % 1000:03d}",
+        "clinic_id": clinic_id,
+        "appointment_date": f"2026-03-{1 + i // 5:02d}",
+        "status": "scheduled",
+    }
+
+
+@pytest.fixture
+def db():
+    db = InMemoryDatabase()
+    db.seed({"public.appointments": [appointment(i) for i in range(53)]})
+    db.seed({"public.appointments": [appointment(i, "clinic-2") for i in range(53, 60)]})
+    return db
+
+
+@pytest.fixture
+def service(db):
+    return UnifiedAppointmentService(supabase=FakeSupabaseClient(db))
+
+
+def keyset_order(rows):
+    return [row["id"] for row in sorted(rows, key=lambda row: (row["appointment_date"], row["id"]))]
+
+
+async def walk(service, limit, **filters):
+    ids, cursor, pages = [], None, 0
+    while True:
+        rows, cursor = await service.get_appointments_page(limit=limit, cursor=cursor, **filters)
+        ids.extend(row["id"] for row in rows)
+        pages += 1
+        if cursor is None:
+            return ids, pages
+        assert pages <= 100, "cursor did not advance"
+
+
+def test_cursor_round_trip():
+    row = {"appointment_date": "2026-03-01T09:30:00+00:00", "id": "apt-001"}
+    cursor = encode_appointment_cursor(row)
+    assert "=" not in cursor
+    assert decode_appointment_cursor(cursor) == ("2026-03-01T09:30:00+00:00", "apt-001")
+
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor",
+    encode_appointment_cursor({"appointment_date": "2026-03-01", "id": "x),id.gt.(0"}),
+])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_appointment_cursor(cursor)
+
+
+@pytest.mark.parametrize("limit", [1, 4, 5, 7, 53, 100])
+async def test_cursor_pages_have_no_gaps_or_duplicates(service, db, limit):
+    ids, pages = await walk(service, limit, clinic_id="clinic-1")
+
+    expected = keyset_order(r for r in db.rows("public", "appointments") if r["clinic_id"] == "clinic-1")
+    assert ids == expected
+    assert pages == max(1, -(-len(expected) // limit))
+
+
+async def test_rows_inserted_behind_the_cursor_do_not_shift_later_pages(service, db):
+    first, cursor = await service.get_appointments_page(limit=10, clinic_id="clinic-1")
+    # A new row sorting before the cursor would push offset pagination back by one
+    db.rows("public", "appointments").append(
+        {"id": "apt-000a", "clinic_id": "clinic-1", "appointment_date": "2026-03-01", "status": "scheduled"}
+    )
+
+    ids = [row["id"] for row in first]
+    for _ in range(10):
+        if cursor is None:
+            break
+        rows, cursor = await service.get_appointments_page(limit=10, cursor=cursor, clinic_id="clinic-1")
+        ids.extend(row["id"] for row in rows)
+
+    assert len(ids) == len(set(ids)) == 53
@@ -0,0 +1,158 @@
+"""
+Bulk rescheduling against a stub Supabase client: a sick day that displaces
+50 or 200 appointments loads availability once per (doctor, duration) and
+never offers the same slot to two patients.
+"""
+
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app.services.automated_rescheduler import (
+    AutomatedRescheduler,
+    RescheduleReason,
+    RescheduleRequest,
+    RescheduleStrategy,
+)
+
+DOCTORS = [f"doctor-{i}" for i in range(4)]
+DURATIONS = [30, 60]
+
+
+class StubResponse:
+    def __init__(self, data):
+        self.data = data
+
+
+class StubQuery:
+    """Query builder over one table's rows, with the filters the rescheduler uses"""
+
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.rows = list(client.tables.get(table, []))
+
+    def select(self, *args, **kwargs):
+        return self
+
+    def in_(self, field, values):
+        values = set(values)
+        self.rows = [row for row in self.rows if row.get(field) in values]
+        return self
+
+    def eq(self, field, value):
+        self.rows = [row for row in self.rows if row.get(field) == value]
+        return self
+
+    def execute(self):
+        self.client.selects.append(self.table)
+        return StubResponse(self.rows)
+
+
+class StubRPC:
+    def __init__(self, client, params):
+        self.client = client
+        self.params = params
+
+    def execute(self):
+        self.client.rpc_calls.append(self.params)
+        return StubResponse(availability(self.params))
+
+
+class StubSupabase:
+    def __init__(self, tables):
+        self.tables = tables
+        self.selects = []
+        self.rpc_calls = []
+
+    def table(self, name):
+        return StubQuery(self, name)
+
+    def rpc(self, name, params):
+        assert name == "get_doctor_availability"
+        return StubRPC(self, params)
+
+
+class StubConflictPredictor:
+    def __init__(self):
+        self.calls = 0
+
+    async def assess_slot_risk(self, slot):
+        self.calls += 1
+        return {"overall_risk": 0.2}
+
+
+def availability(params):
+    """Every 30 minutes from 09:00 to 17:00 on weekdays, for the requested duration"""
+    duration = timedelta(minutes=params["p_duration_minutes"])
+    day = date.fromisoformat(params["p_start_date"])
+    end = date.fromisoformat(params["p_end_date"])
+    slots = []
+    while day <= end:
+        if day.weekday() < 5:
+            start = datetime.combine(day, datetime.min.time()).replace(hour=9)
+            while start + duration <= start.replace(hour=17):
+                slots.append({"start_time": start.isoformat(), "availability_score": 0.8})
+                start += timedelta(minutes=30)
+        day += timedelta(days=1)
+    return slots
+
+
+def displaced_appointments(count):
+    return [
+        {
+            "id": f"apt-{i:03d}",
+            "patient_id": f"patient-{i:03d}",
+            "doctor_id": DOCTORS[i % len(DOCTORS)],
+            "duration_minutes": DURATIONS[(i // len(DOCTORS)) % len(DURATIONS)],
+            "appointment_date": f"2026-03-02T{9 + i % 8:02d}:00:00",
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.mark.parametrize("count", [50, 200])
+async def test_bulk_reschedule_of_a_sick_day(count):
+    appointments = displaced_appointments(count)
+    supabase = StubSupabase({"appointments": appointments})
+    rescheduler = AutomatedRescheduler(supabase)
+    rescheduler._conflict_predictor = StubConflictPredictor()
+
+    requests = [
+        RescheduleRequest(
+            appointment_id=appointment["id"],
+            reason=RescheduleReason.DOCTOR_UNAVAILABLE,
+            strategy=RescheduleStrategy.BALANCED,
+            priority=i % 3,
+        )
+        for i, appointment in enumerate(appointments)
+    ]
+    results = await rescheduler.bulk_reschedule(requests)
+
+    assert [r["appointment_id"] for r in results] == [a["id"] for a in appointments]
+    assert all(r["success"] for r in results)
+
+    # One availability RPC per (doctor, duration) pair, two selects in total
+    pairs = Counter((c["p_doctor_id"], c["p_duration_minutes"]) for c in supabase.rpc_calls)
+    assert set(pairs) == {(a["doctor_id"], a["duration_minutes"]) for a in appointments}
+    assert set(pairs.values()) == {1}
+    assert supabase.selects == ["appointments", "patient_preferences"]
+
+    # Conflict risk once per distinct slot
+    distinct_slots = sum(len(availability(c)) for c in supabase.rpc_calls)
+    assert rescheduler._conflict_predictor.calls == distinct_slots
+
+    # No slot (or overlapping interval of the same doctor) is offered twice
+    durations = {a["id"]: timedelta(minutes=a["duration_minutes"]) for a in appointments}
+    offered = {}
+    for result in results:
+        assert 1 <= len(result["options"]) <= rescheduler.max_options
+        for option in result["options"]:
+            start = datetime.fromisoformat(option["datetime"])
+            offered.setdefault(option["doctor_id"], []).append(
+                (start, start + durations[result["appointment_id"]])
+            )
+    for intervals in offered.values():
+        intervals.sort()
+        assert all(end <= next_start for (_, end), (next_start, _) in zip(intervals, intervals[1:]))
@@ -0,0 +1,115 @@
+"""
+ConstraintEngine.load_window against the in-memory PostgREST double: loads
+page past the row cap, and a load that stops short of its count is treated
+as failed.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.scheduling import constraint_engine as engine_module
+from app.services.scheduling.constraint_engine import ConstraintEngine
+from benchmarks.fakes import FakeQueryBuilder, FakeSupabaseClient, InMemoryDatabase
+
+DAY = datetime(2026, 3, 2)  # a Monday
+
+
+class CountingQuery(FakeQueryBuilder):
+    """Records each executed table query; max_rows mimics PostgREST's db-max-rows"""
+
+    max_rows = None
+    executed = []
+
+    def _run(self):
+        type(self).executed.append(self._table)
+        response = super()._run()
+        if self.max_rows is not None and isinstance(response.data, list):
+            response.data = response.data[:self.max_rows]
+        return response
+
+
+class VanishingQuery(CountingQuery):
+    """Counts every row but returns nothing past the first page"""
+
+    def _run(self):
+        response = super()._run()
+        if self._offset and isinstance(response.data, list):
+            response.data = []
+        return response
+
+
+def make_client(db, builder):
+    builder.executed = []
+    client = FakeSupabaseClient(db)
+    client.builder_class = builder
+    return client
+
+
+def booking(i):
+    start = DAY + timedelta(days=i // 8, hours=9 + i % 8)
+    return {
+        "id": f"apt-{i:03d}",
+        "room_id": "room-1",
+        "status": "scheduled",
+        "start_time": start.isoformat(),
+        "end_time": (start + timedelta(minutes=30)).isoformat(),
+    }
+
+
+@pytest.fixture
+def db():
+    db = InMemoryDatabase()
+    db.seed({
+        "public.appointments": [booking(i) for i in range(24)],
+        "public.doctor_schedules": [
+            {"id": f"s{i}", "doctor_id": "doc-1", "day_of_week": day, "start_time": "09:00", "end_time": "17:00"}
+            for i, day in enumerate(["monday", "tuesday", "wednesday"])
+        ],
+    })
+    return db
+
+
+@pytest.fixture(autouse=True)
+def small_pages(monkeypatch):
+    monkeypatch.setattr(engine_module, "WINDOW_PAGE_SIZE", 10)
+
+
+async def load(client):
+    return await ConstraintEngine(client).load_window(["doc-1"], ["room-1"], DAY, DAY + timedelta(days=2))
+
+
+def booked_slots_free(window):
+    return [
+        window.room_free("room-1", datetime.fromisoformat(b["start_time"]), datetime.fromisoformat(b["end_time"]))
+        for b in map(booking, range(24))
+    ]
+
+
+async def test_bookings_past_one_page_are_all_loaded(db):
+    client = make_client(db, CountingQuery)
+    window = await load(client)
+
+    assert window.rooms_loaded
+    assert not any(booked_slots_free(window))
+    assert window.room_free("room-1", DAY.replace(hour=17), DAY.replace(hour=18))
+    assert CountingQuery.executed.count("appointments") == 3  # 10 + 10 + 4
+    assert window.doctor_scheduled("doc-1", DAY.replace(hour=9), 30)
+
+
+async def test_server_row_cap_below_page_size(db):
+    class CappedQuery(CountingQuery):
+        max_rows = 4
+
+    window = await load(make_client(db, CappedQuery))
+
+    assert window.rooms_loaded
+    assert not any(booked_slots_free(window))
+    assert CappedQuery.executed.count("appointments") == 6
+
+
+async def test_truncated_room_load_fails_closed(db):
+    window = await load(make_client(db, VanishingQuery))
+
+    assert not window.rooms_loaded
+    assert not window.room_free("room-1", DAY.replace(hour=17), DAY.replace(hour=18))
@@ -0,0 +1,203 @@
+"""
+SessionContextCompactor: the history sent per turn stays within the token
+budget (above the min_recent floor), rows the rolling summary covers and old
+tool output are left out, and folds run one per session, in the background.
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import context_compaction
+from app.services.context_compaction import SessionContextCompactor
+from app.utils import token_counter
+from app.utils.token_counter import count_message_tokens, count_tokens
+from benchmarks.fakes import FakeSupabaseClient, InMemoryDatabase
+
+SESSION_ID = "session-001"
+STARTED_AT = datetime(2026, 3, 2, 9, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture(autouse=True)
+def estimated_counts(monkeypatch):
+    """Count by length (10 tokens per 40 characters) without a tokenizer."""
+    monkeypatch.setattr(token_counter, "_encoding", None)
+    monkeypatch.setattr(context_compaction, "SESSION_COMPACTION_ENABLED", True)
+    monkeypatch.setattr(context_compaction, "SESSION_COMPACTION_TARGET_RATIO", 0.5)
+    count_tokens.cache_clear()
+    yield
+    count_tokens.cache_clear()
+
+
+class FakeLLM:
+    """generate_for_tier returns a summary once released; fails while failing is set"""
+
+    def __init__(self, failing=False):
+        self.failing = failing
+        self.calls = []
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def generate_for_tier(self, **kwargs):
+        self.calls.append(kwargs)
+        await self.release.wait()
+        if self.failing:
+            raise ConnectionError("provider unavailable")
+        return SimpleNamespace(content=f"summary {len(self.calls)}")
+
+
+def row(i, role=None, chars=40):
+    return {
+        "role": role or ("user" if i % 2 == 0 else "assistant"),
+        "message_content": f"{i:02d}".ljust(chars, "x"),
+        "created_at": (STARTED_AT + timedelta(minutes=i)).isoformat(),
+    }
+
+
+def make_ctx(history, session=None):
+    return SimpleNamespace(
+        session_id=SESSION_ID,
+        conversation_history=history,
+        session=session or {"id": SESSION_ID},
+        conversation_state=None,
+        constraints=None,
+        patient_name=None,
+        effective_clinic_id="clinic-1",
+        context_summary=None,
+        session_messages=None,
+    )
+
+
+@pytest.fixture
+def db():
+    db = InMemoryDatabase()
+    db.seed({"conversation_sessions": [{"id": SESSION_ID}]})
+    return db
+
+
+def make_compactor(db, llm, token_budget=50, min_recent=2):
+    async def factory():
+        return llm
+
+    return SessionContextCompactor(
+        supabase_client=FakeSupabaseClient(db),
+        llm_factory_getter=factory,
+        token_budget=token_budget,
+        min_recent=min_recent,
+    )
+
+
+def sent(ctx):
+    return [message["content"][:2] for message in ctx.session_messages]
+
+
+async def test_history_within_budget_is_sent_whole(db):
+    llm = FakeLLM()
+    compactor = make_compactor(db, llm)
+    ctx = make_ctx([row(i) for i in range(5)])
+
+    compactor.compact(ctx)
+    await compactor.drain()
+
+    assert sent(ctx) == ["00", "01", "02", "03", "04"]
+    assert ctx.context_summary is None
+    assert llm.calls == []
+
+
+async def test_min_recent_floor_goes_over_budget(db):
+    compactor = make_compactor(db, FakeLLM(), token_budget=50, min_recent=3)
+    ctx = make_ctx([row(i, chars=400) for i in range(6)])
+
+    compactor.compact(ctx)
+    await compactor.drain()
+
+    assert sent(ctx) == ["03", "04", "05"]
+
+
+async def test_fold_stores_the_summary_and_skips_covered_rows(db):
+    llm = FakeLLM()
+    compactor = make_compactor(db, llm)
+    history = [row(i) for i in range(10)]
+    ctx = make_ctx(history)
+
+    compactor.compact(ctx)
+    assert sent(ctx) == ["05", "06", "07", "08", "09"]
+    await compactor.drain()
+
+    assert compactor.stats["folds"] == 1
+    stored = db.rows("healthcare", "conversation_sessions")[0]
+    assert stored["context_summary"] == "summary 1"
+    # Folded down to half the budget: all but the two newest messages
+    assert stored["context_summary_through"] == history[7]["created_at"]
+
+    # The next turn, with the stored session, sends only rows after the summary
+    next_ctx = make_ctx(history + [row(10)], session=stored)
+    compactor.compact(next_ctx)
+
+    assert next_ctx.context_summary == "summary 1"
+    assert sent(next_ctx) == ["08", "09", "10"]
+
+
+async def test_remembered_fold_is_used_before_the_session_row_catches_up(db):
+    compactor = make_compactor(db, FakeLLM())
+    history = [row(i) for i in range(10)]
+    compactor.compact(make_ctx(history))
+    await compactor.drain()
+
+    stale_ctx = make_ctx(history, session={"id": SESSION_ID})
+    compactor.compact(stale_ctx)
+
+    assert stale_ctx.context_summary == "summary 1"
+    assert sent(stale_ctx) == ["08", "09"]
+
+
+async def test_tool_rows_are_dropped_outside_the_recent_window(db):
+    compactor = make_compactor(db, FakeLLM(), token_budget=200, min_recent=2)
+    history = [row(0), row(1, role="tool"), row(2), row(3, role="system"), row(4), row(5, role="tool")]
+    ctx = make_ctx(history)
+
+    compactor.compact(ctx)
+
+    assert sent(ctx) == ["00", "02", "04", "05"]
+    assert ctx.session_messages[-1]["role"] == "tool"
+
+
+async def test_one_fold_per_session_at_a_time(db):
+    llm = FakeLLM()
+    llm.release.clear()
+    compactor = make_compactor(db, llm)
+    history = [row(i) for i in range(10)]
+
+    compactor.compact(make_ctx(history))
+    await asyncio.sleep(0)
+    compactor.compact(make_ctx(history + [row(10)]))
+    await asyncio.sleep(0)
+
+    assert len(llm.calls) == 1
+    assert SESSION_ID in compactor._folding
+
+    llm.release.set()
+    await compactor.drain()
+
+    assert compactor.stats["folds"] == 1
+    assert compactor._folding == {}
+
+
+async def test_fold_failure_leaves_history_bounded(db):
+    llm = FakeLLM(failing=True)
+    compactor = make_compactor(db, llm)
+    history = [row(i) for i in range(30)]
+
+    for turn in range(3):
+        ctx = make_ctx(history[:20 + turn * 5])
+        compactor.compact(ctx)
+        await compactor.drain()
+
+        assert count_message_tokens(ctx.session_messages) <= compactor.token_budget
+        assert ctx.context_summary is None
+
+    assert compactor.stats["fold_failures"] == 3
+    assert compactor.stats["folds"] == 0
+    assert "context_summary" not in db.rows("healthcare", "conversation_sessions")[0]
@@ -0,0 +1,132 @@
+"""
+Round-trip tests for streaming Redis backups (full, incremental, deletions)
+against fakeredis.
+"""
+
+import os
+import time
+
+import fakeredis
+import pytest
+
+from app.services.external_backup_service import ExternalBackupService
+
+
+@pytest.fixture
+def redis_client():
+    return fakeredis.FakeAsyncRedis()
+
+
+@pytest.fixture
+def service(redis_client, tmp_path, monkeypatch):
+    monkeypatch.delenv("BACKUP_ENCRYPTION_KEY", raising=False)
+    # WhatsApp and configuration backups read and restore relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    return ExternalBackupService(redis_client, backup_dir=str(tmp_path / "backups"))
+
+
+async def snapshot(redis_client):
+    """Every key's DUMP payload and whether it has a TTL"""
+    keys = sorted(await redis_client.keys("*"))
+    return {
+        key: (await redis_client.dump(key), await redis_client.pttl(key) > 0)
+        for key in keys
+    }
+
+
+async def seed(redis_client):
+    await redis_client.set("session:1", "alice")
+    await redis_client.set("session:2", "bob", ex=3600)
+    await redis_client.hset("cache:appointments:clinic-1", mapping={"a": "1", "b": "2"})
+    await redis_client.rpush("hold:slot-9", "x", "y")
+    await redis_client.set("unrelated:key", "not backed up")
+
+
+async def restore_into_fresh(service, redis_client, tar_path, tmp_path, name):
+    """Restores an archive into an empty Redis from an empty backup directory"""
+    await redis_client.flushall()
+    fresh = ExternalBackupService(redis_client, backup_dir=str(tmp_path / name))
+    return await fresh.restore_from_backup(tar_path)
+
+
+async def test_full_backup_round_trip(service, redis_client, tmp_path):
+    await seed(redis_client)
+    await redis_client.delete("unrelated:key")
+    expected = await snapshot(redis_client)
+
+    tar_path = await service.create_complete_backup()
+
+    assert await restore_into_fresh(service, redis_client, tar_path, tmp_path, "restore")
+    assert await snapshot(redis_client) == expected
+
+
+async def test_incremental_backup_round_trip_with_deletions(service, redis_client, tmp_path):
+    await seed(redis_client)
+    await redis_client.delete("unrelated:key")
+    await service.create_complete_backup()
+
+    # Change one key, add one, delete one
+    await redis_client.set("session:1", "alice-updated")
+    await redis_client.set("session:3", "carol")
+    await redis_client.delete("hold:slot-9")
+
+    second = await service.create_complete_backup(incremental=True)
+    manifest = await service._find_latest_redis_manifest(None)
+    assert manifest["incremental"]
+    assert manifest["changed_count"] == 2
+    assert manifest["deleted_keys"] == ["hold:slot-9"]
+
+    # A third incremental on top, so the archive must carry a two-level chain
+    await redis_client.hset("cache:appointments:clinic-1", "c", "3")
+    expected = await snapshot(redis_client)
+    third = await service.create_complete_backup(incremental=True)
+    assert third != second
+
+    # The archive alone (without the original backup directory) is restorable
+    assert await restore_into_fresh(service, redis_client, third, tmp_path, "restore")
+    assert await snapshot(redis_client) == expected
+
+
+async def test_cleanup_keeps_bases_of_kept_incrementals(service, redis_client, tmp_path):
+    await seed(redis_client)
+    await redis_client.delete("unrelated:key")
+    await service.create_complete_backup()
+    base = await service._find_latest_redis_manifest(None)
+    base_dir = service._resolve_backup_path(base["path"])
+
+    # Age the full backup and everything written with it past the cutoff
+    old = time.time() - 30 * 86400
+    for path in service.backup_dir.iterdir():
+        os.utime(path, (old, old))
+
+    await redis_client.set("session:1", "alice-updated")
+    expected = await snapshot(redis_client)
+    await service.create_complete_backup(incremental=True)
+    latest = await service._find_latest_redis_manifest(None)
+
+    deleted = await service.cleanup_old_backups(days_to_keep=7)
+
+    # The old JSON and archive go; the Redis directory the incremental builds on stays
+    assert deleted == 2
+    assert base_dir.exists()
+
+    await redis_client.flushall()
+    assert await service.restore_redis_data(latest)
+    assert await snapshot(redis_client) == expected
+
+
+async def test_cleanup_deletes_unreferenced_old_redis_backups(service, redis_client):
+    await seed(redis_client)
+    await service.create_complete_backup()
+    base = await service._find_latest_redis_manifest(None)
+    base_dir = service._resolve_backup_path(base["path"])
+
+    old = time.time() - 30 * 86400
+    for path in service.backup_dir.iterdir():
+        os.utime(path, (old, old))
+
+    # A new full backup does not depend on the old one
+    await service.create_complete_backup()
+
+    assert await service.cleanup_old_backups(days_to_keep=7) == 3
+    assert not base_dir.exists()
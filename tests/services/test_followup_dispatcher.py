@@ -0,0 +1,145 @@
+"""
+FollowupDispatcher against fakeredis and the in-memory PostgREST double: a
+follow-up is acked only once its session update succeeds, and the index
+rebuild reads every pending session past the row cap.
+"""
+
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import fakeredis
+import pytest
+
+from app.jobs import followup_processor as processor_module
+from app.jobs.followup_processor import FollowupProcessor
+from app.services.followup_queue import DUE_KEY, PROCESSING_KEY, FollowupQueue
+from app.workers.followup_dispatcher import FollowupDispatcher
+from benchmarks.fakes import FakeQueryBuilder, FakeSupabaseClient, InMemoryDatabase
+
+LEASE_SECONDS = 60
+
+
+class FlakyQuery(FakeQueryBuilder):
+    """Fails session updates while failing_updates is set; max_rows mimics db-max-rows"""
+
+    failing_updates = False
+    max_rows = None
+
+    def _run(self):
+        if self._action == "update" and self.failing_updates:
+            raise ConnectionError("connection reset")
+        response = super()._run()
+        if self.max_rows is not None and isinstance(response.data, list):
+            response.data = response.data[:self.max_rows]
+        return response
+
+
+def session(i, **overrides):
+    row = {
+        "id": f"session-{i:03d}",
+        "user_identifier": f"+5550{i:03d}",
+        "scheduled_followup_at": (datetime.now(timezone.utc) - timedelta(minutes=5)).isoformat(),
+        "turn_status": "agent_action_pending",
+        "ended_at": None,
+        "metadata": {"clinic_id": f"clinic-{i % 3}"},
+    }
+    row.update(overrides)
+    return row
+
+
+@pytest.fixture
+def db():
+    db = InMemoryDatabase()
+    db.seed({"public.conversation_sessions": [session(i) for i in range(25)] + [
+        session(25, turn_status="user_turn"),
+        session(26, ended_at="2026-03-02T10:00:00+00:00"),
+        session(27, scheduled_followup_at=None),
+    ]})
+    return db
+
+
+def make_processor(db, builder=FlakyQuery):
+    client = FakeSupabaseClient(db)
+    client.builder_class = builder
+    return FollowupProcessor(manager=SimpleNamespace(supabase=client))
+
+
+@pytest.fixture
+def redis():
+    return fakeredis.FakeRedis(decode_responses=True)
+
+
+def make_dispatcher(db, redis, builder=FlakyQuery):
+    queue = FollowupQueue(redis, lease_seconds=LEASE_SECONDS)
+    return FollowupDispatcher(processor=make_processor(db, builder), queue=queue, rate_per_minute=0)
+
+
+async def test_failed_send_stays_claimed_until_lease_expiry(db, redis, monkeypatch):
+    monkeypatch.setattr(FlakyQuery, "failing_updates", True)
+    dispatcher = make_dispatcher(db, redis)
+    await dispatcher.rebuild()
+
+    assert await dispatcher.run_once() == 25
+    assert dispatcher.stats["failed"] == 25
+    assert dispatcher.stats["processed"] == 0
+    assert redis.zcard(PROCESSING_KEY) == 25
+    assert redis.zcard(DUE_KEY) == 0
+
+    monkeypatch.setattr(FlakyQuery, "failing_updates", False)
+    # Expire the leases; run_once requeues them before claiming
+    redis.zadd(PROCESSING_KEY, {member: 0 for member in redis.zrange(PROCESSING_KEY, 0, -1)})
+    assert await dispatcher.run_once() == 25
+    assert dispatcher.stats["processed"] == 25
+    assert redis.zcard(PROCESSING_KEY) == 0
+
+    pending = [row for row in db.rows("public", "conversation_sessions") if FollowupProcessor.is_pending(row)]
+    assert pending == []
+
+
+async def test_send_reports_a_failed_update(db, monkeypatch):
+    monkeypatch.setattr(FlakyQuery, "failing_updates", True)
+    processor = make_processor(db)
+
+    sent = [await processor.send_followup_message(row) for row in await processor.get_due_followups()]
+    assert sent == [False] * 25
+
+
+@pytest.mark.parametrize("max_rows", [None, 4])
+def test_pending_followups_page_past_the_row_cap(db, monkeypatch, max_rows):
+    monkeypatch.setattr(processor_module, "FOLLOWUP_PAGE_SIZE", 10)
+
+    class CappedQuery(FlakyQuery):
+        pass
+
+    CappedQuery.max_rows = max_rows
+    rows = make_processor(db, CappedQuery).get_pending_followups()
+
+    assert [row["id"] for row in rows] == [f"session-{i:03d}" for i in range(25)]
+
+
+def test_truncated_pending_followups_raise(db, monkeypatch):
+    monkeypatch.setattr(processor_module, "FOLLOWUP_PAGE_SIZE", 10)
+
+    class VanishingQuery(FlakyQuery):
+        def _run(self):
+            response = super()._run()
+            if self._offset:
+                response.data = []
+            return response
+
+    with pytest.raises(RuntimeError):
+        make_processor(db, VanishingQuery).get_pending_followups()
+
+
+async def test_cancelled_followup_leaves_the_index(db, redis, monkeypatch):
+    from app.services import followup_queue
+    from app.services.followup_scheduler import FollowupScheduler
+
+    dispatcher = make_dispatcher(db, redis)
+    await dispatcher.rebuild()
+    monkeypatch.setattr(followup_queue, "get_followup_queue", lambda: dispatcher.queue)
+
+    await FollowupScheduler().cancel_scheduled_followup("session-003")
+
+    assert redis.zscore(DUE_KEY, "session-003") is None
+    assert redis.zcard(DUE_KEY) == 24
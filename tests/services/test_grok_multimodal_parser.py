@@ -0,0 +1,97 @@
+"""
+GrokMultimodalParser content preparation for PDFs: text-only PDFs go as
+text, and PDFs with scanned pages go to the vision call with every page in
+order, images for the scanned pages and text for the rest, up to the page
+cap.
+"""
+
+import base64
+
+import fitz
+import pytest
+
+from app.services import grok_multimodal_parser
+from app.services.grok_multimodal_parser import GrokMultimodalParser
+
+PRICE_LINE = "Dental cleaning - 80 EUR, whitening - 250 EUR, implant consultation - free"
+
+
+def build_pdf(layout):
+    """One page per entry: 't' a page of text, 'i' a page with only a drawing."""
+    doc = fitz.open()
+    for number, kind in enumerate(layout, start=1):
+        page = doc.new_page()
+        if kind == "t":
+            page.insert_text((72, 72), f"Page {number}: {PRICE_LINE}", fontsize=9)
+        else:
+            page.draw_rect(fitz.Rect(72, 72, 300, 200), color=(0, 0, 0), fill=(0.2, 0.4, 0.8))
+    try:
+        return doc.tobytes()
+    finally:
+        doc.close()
+
+
+@pytest.fixture
+def parser():
+    return GrokMultimodalParser(api_key="test")
+
+
+def part_kinds(content):
+    return [part["type"] for part in content]
+
+
+def png_of(part):
+    url = part["image_url"]["url"]
+    assert url.startswith("data:image/png;base64,")
+    return base64.b64decode(url.split(",", 1)[1])
+
+
+async def test_text_only_pdf_is_sent_as_text(parser):
+    content = await parser._prepare_content(build_pdf("ttt"), "application/pdf")
+
+    assert content["type"] == "text"
+    assert [line.split(":")[0] for line in content["content"].splitlines()] == ["Page 1", "Page 2", "Page 3"]
+
+
+async def test_image_only_pdf_sends_every_page_as_an_image(parser):
+    content = await parser._prepare_content(build_pdf("ii"), "application/pdf")
+
+    assert content["type"] == "visual"
+    assert part_kinds(content["content"]) == ["image_url", "image_url"]
+    assert all(png_of(part).startswith(b"\x89PNG") for part in content["content"])
+
+
+async def test_mixed_pdf_keeps_text_pages_and_scanned_pages_in_order(parser):
+    content = await parser._prepare_content(build_pdf("titi"), "application/pdf")
+
+    assert content["type"] == "visual"
+    parts = content["content"]
+    assert part_kinds(parts) == ["text", "image_url", "text", "image_url"]
+    assert parts[0]["text"].startswith("Page 1:\nPage 1: Dental cleaning")
+    assert parts[2]["text"].startswith("Page 3:\n")
+
+
+async def test_pages_past_the_cap_are_not_extracted(parser, monkeypatch):
+    monkeypatch.setattr(grok_multimodal_parser, "MAX_PDF_PAGES", 3)
+
+    content = await parser._prepare_content(build_pdf("tititi"), "application/pdf")
+
+    assert part_kinds(content["content"]) == ["text", "image_url", "text"]
+
+
+async def test_mixed_pdf_goes_to_the_vision_call(parser, monkeypatch):
+    calls = []
+
+    async def vision(content_parts, prompt):
+        calls.append(content_parts)
+        return '{"detected_entities": [], "summary": {}}'
+
+    async def text(*_):
+        raise AssertionError("mixed PDF sent as text")
+
+    monkeypatch.setattr(parser, "_call_grok_vision", vision)
+    monkeypatch.setattr(parser, "_call_grok_text", text)
+
+    await parser.discover_entities(build_pdf("ti"), "application/pdf", "prices.pdf")
+
+    assert [part_kinds(parts) for parts in calls] == [["text", "image_url"]]
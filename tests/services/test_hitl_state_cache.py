@@ -0,0 +1,69 @@
+"""
+HITLStateCache against fakeredis: Redis calls run off the event loop, and
+a patient message stored for the operator drops the cached control state
+so the next status poll sees the new unread count.
+"""
+
+import threading
+
+import fakeredis
+import pytest
+
+from app.api.pipeline.steps.control_mode_step import ControlModeGateStep
+from app.services import hitl_state_cache
+from app.services.hitl_state_cache import (
+    HITLStateCache,
+    control_state_from_row,
+    publish_control_change,
+)
+from benchmarks.fakes import FakeSupabaseClient, InMemoryDatabase
+
+SESSION = {"id": "session-1", "control_mode": "human", "unread_for_human_count": 2}
+
+
+class RecordingRedis(fakeredis.FakeRedis):
+    """Records the thread each command runs on"""
+
+    threads = []
+
+    def execute_command(self, *args, **options):
+        self.threads.append(threading.get_ident())
+        return super().execute_command(*args, **options)
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    RecordingRedis.threads = []
+    cache = HITLStateCache(RecordingRedis(decode_responses=True))
+    monkeypatch.setattr(hitl_state_cache, "_hitl_state_cache", cache)
+    return cache
+
+
+async def test_cache_round_trip_runs_off_the_event_loop(cache):
+    state = control_state_from_row(SESSION)
+    await cache.set_session_state(state)
+    await cache.set_settings({"clinic_id": "clinic-1", "hitl_auto_release_hours": 12})
+
+    assert await cache.get_session_state("session-1") == state
+    assert (await cache.get_settings("clinic-1"))["hitl_auto_release_hours"] == 12
+    assert await cache.get_session_state("session-2") is None
+    assert RecordingRedis.threads
+    assert threading.get_ident() not in RecordingRedis.threads
+
+
+async def test_stored_message_for_human_invalidates_the_cached_unread_count(cache):
+    db = InMemoryDatabase()
+    db.seed({"public.conversation_sessions": [dict(SESSION)]})
+
+    def increment_unread_count(params):
+        row = db.rows("public", "conversation_sessions")[0]
+        row["unread_for_human_count"] += 1
+
+    db.register_rpc("increment_unread_count", increment_unread_count)
+    await publish_control_change(control_state_from_row(SESSION))
+    assert (await cache.get_session_state("session-1"))["unread_for_human_count"] == 2
+
+    await ControlModeGateStep(supabase_client=FakeSupabaseClient(db))._increment_unread_count("session-1")
+
+    assert await cache.get_session_state("session-1") is None
+    assert db.rows("public", "conversation_sessions")[0]["unread_for_human_count"] == 3
@@ -0,0 +1,65 @@
+"""
+MessageAnalysis fields equal the per-module outputs they replaced, on the
+benchmark corpus (benchmarks/message_analysis_bench.py holds the legacy
+reference implementations).
+"""
+
+import pytest
+
+from app.services.direct_lane.tool_intent_classifier import ToolIntentClassifier
+from app.services.language_service import get_language_service
+from app.services.message_analysis import MessageAnalysis
+from app.services.orchestrator.fsm.text_utils import has_time_anchor, normalize_tokens
+from app.services.text_normalization import get_normalizer
+from app.utils.text_normalization import normalize_query
+from benchmarks.message_analysis_bench import (
+    MESSAGES,
+    NORMALIZER_LANGUAGES,
+    legacy_parse_date,
+    legacy_parse_time,
+    legacy_price_tool_language,
+)
+
+
+@pytest.fixture(params=MESSAGES, ids=repr)
+def text(request):
+    return request.param
+
+
+def test_language_matches_language_service(text):
+    analysis = MessageAnalysis(text)
+    assert analysis.language == get_language_service().detect_sync(text.strip())
+    assert 0.0 <= analysis.language_confidence <= 1.0
+
+
+def test_tool_intent_classifier_language_matches_lowercased_detection(text):
+    # The classifier used to detect on message.lower(); it now reads the shared analysis
+    match = ToolIntentClassifier().classify(text)
+    assert match.language == get_language_service().detect_sync(text.lower())
+
+
+def test_normalization_matches(text):
+    analysis = MessageAnalysis(text)
+    assert analysis.normalizer_language == get_normalizer().detect_language(text)
+    assert analysis.normalized == normalize_query(text)
+    assert list(analysis.tokens) == normalize_tokens(text)
+
+
+def test_search_terms_match_normalizer(text):
+    analysis = MessageAnalysis(text)
+    normalizer = get_normalizer()
+    for language in NORMALIZER_LANGUAGES + (analysis.language,):
+        assert analysis.search_terms(language) == normalizer.normalize(text, language)
+
+
+def test_time_and_date_anchors_match_intent_router(text):
+    analysis = MessageAnalysis(text)
+    assert analysis.has_time_anchor == has_time_anchor(text)
+    assert analysis.time_of_day == legacy_parse_time(text)
+    assert analysis.date_reference == legacy_parse_date(text)
+
+
+def test_price_tool_language_matches(text):
+    analysis = MessageAnalysis(text)
+    language = 'ru' if analysis.has_cyrillic else 'es' if analysis.has_latin_accents else 'en'
+    assert language == legacy_price_tool_language(text)
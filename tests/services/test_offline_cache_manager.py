@@ -0,0 +1,94 @@
+"""
+Tests for OfflineCacheManager entry storage: unchanged reloads only extend
+TTLs, and checksums expire with their entries.
+"""
+
+import json
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+import fakeredis
+import pytest
+
+from app.services.offline_cache_manager import CacheEntry, OfflineCacheManager
+
+
+@pytest.fixture
+def redis_client():
+    return fakeredis.FakeAsyncRedis()
+
+
+@pytest.fixture
+def manager(redis_client):
+    return OfflineCacheManager(redis_client, MagicMock())
+
+
+def make_entry(manager, timestamp, value=None, ttl=300):
+    return CacheEntry(
+        key=manager._build_cache_key("appointments", "2026-01-05", "clinic-1"),
+        value=value or [{"id": "apt-1", "time": "09:00"}],
+        timestamp=timestamp,
+        ttl=ttl,
+        tenant_id="clinic-1",
+    )
+
+
+async def test_unchanged_reload_keeps_entry_fresh(manager, redis_client):
+    # Written long enough ago that the entry's own timestamp is past its TTL
+    written_at = datetime.now(timezone.utc) - timedelta(seconds=600)
+    assert await manager._store_cache_entries([make_entry(manager, written_at)]) == 0
+
+    # Same data again: the payload is not rewritten, only the TTL is extended
+    reloaded = make_entry(manager, datetime.now(timezone.utc))
+    assert await manager._store_cache_entries([reloaded]) == 1
+    stored = CacheEntry.from_dict(json.loads(await redis_client.get(reloaded.key)))
+    assert stored.timestamp == written_at
+
+    value = await manager.get_cached_data(
+        "appointments", "2026-01-05", "clinic-1", fallback_to_stale=False
+    )
+    assert value == reloaded.value
+
+    stats = await manager.get_cache_statistics()
+    assert stats["total_keys"] == 1
+    assert stats["expired_keys"] == 0
+
+
+async def test_changed_reload_rewrites_entry(manager):
+    now = datetime.now(timezone.utc)
+    await manager._store_cache_entries([make_entry(manager, now)])
+
+    changed = make_entry(manager, now, value=[{"id": "apt-2", "time": "10:00"}])
+    assert await manager._store_cache_entries([changed]) == 0
+
+    assert await manager.get_cached_data("appointments", "2026-01-05", "clinic-1") == changed.value
+
+
+async def test_checksums_expire_with_entries(manager, redis_client):
+    entry = make_entry(manager, datetime.now(timezone.utc), ttl=120)
+    await manager._store_cache_entries([entry])
+
+    checksum_key = manager._checksum_key(entry.key)
+    assert await redis_client.get(checksum_key) == entry.checksum.encode()
+    assert 0 < await redis_client.ttl(checksum_key) <= 120
+
+    # Once the entry expires, its checksum is gone too, and the next store rewrites it
+    await redis_client.delete(entry.key, checksum_key)
+    assert await manager._store_cache_entries([entry]) == 0
+    assert await redis_client.exists(entry.key) == 1
+
+
+async def test_invalidate_removes_checksums(manager, redis_client):
+    entry = make_entry(manager, datetime.now(timezone.utc))
+    await manager._store_cache_entries([entry])
+
+    assert await manager.invalidate_cache("appointments", tenant_id="clinic-1") == 1
+    assert await redis_client.exists(entry.key, manager._checksum_key(entry.key)) == 0
+
+
+def test_entry_without_redis_ttl_uses_timestamp():
+    old = datetime.now(timezone.utc) - timedelta(seconds=600)
+    entry = CacheEntry(key="k", value=1, timestamp=old, ttl=300)
+    assert entry.is_expired()
+    assert entry.is_expired(-1)
+    assert not entry.is_expired(120)
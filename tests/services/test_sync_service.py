@@ -0,0 +1,223 @@
+"""
+DataSyncService against a fake NocoDB server (aiohttp) and an in-memory
+Supabase table: queue order across upserts and deletes, and watermarks
+that survive a new service instance and are read and written off the loop.
+"""
+
+import re
+import threading
+
+import fakeredis
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from app.services.sync_service import DataSyncService, SyncDirection
+
+CLINIC_ID = "clinic-1"
+
+
+class FakeNocoDB:
+    """Just enough of the NocoDB v1 data API: list by id, bulk insert/update, delete"""
+
+    def __init__(self):
+        self.tables = {}  # table -> id -> row
+        self.requests = []
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/api/v1/db/data/noco/healthcare/{table}", self.list_rows)
+        app.router.add_post("/api/v1/db/data/bulk/noco/healthcare/{table}", self.bulk_insert)
+        app.router.add_patch("/api/v1/db/data/bulk/noco/healthcare/{table}", self.bulk_update)
+        app.router.add_delete("/api/v1/db/data/noco/healthcare/{table}/{id}", self.delete_row)
+        return app
+
+    def rows(self, request):
+        return self.tables.setdefault(request.match_info["table"], {})
+
+    async def list_rows(self, request):
+        self.requests.append(("GET", request.match_info["table"]))
+        rows = self.rows(request)
+        match = re.fullmatch(r"\(id,in,(.*)\)", request.query.get("where", ""))
+        if match:
+            ids = set(match.group(1).split(","))
+            return web.json_response({"list": [row for key, row in rows.items() if key in ids]})
+        return web.json_response({"list": list(rows.values())})
+
+    async def bulk_insert(self, request):
+        self.requests.append(("POST", request.match_info["table"]))
+        rows = self.rows(request)
+        for row in await request.json():
+            rows[str(row["id"])] = row
+        return web.json_response([])
+
+    async def bulk_update(self, request):
+        self.requests.append(("PATCH", request.match_info["table"]))
+        rows = self.rows(request)
+        for row in await request.json():
+            rows[str(row["id"])].update(row)
+        return web.json_response([])
+
+    async def delete_row(self, request):
+        self.requests.append(("DELETE", request.match_info["table"]))
+        self.rows(request).pop(request.match_info["id"], None)
+        return web.json_response(1)
+
+
+class FakeQuery:
+    """Supabase query builder over a list of rows, with the keyset filter sync uses"""
+
+    def __init__(self, rows, log):
+        self.rows = rows
+        self.log = log
+        self.after = None
+        self.limit_count = None
+
+    def select(self, *args):
+        return self
+
+    def eq(self, field, value):
+        self.rows = [row for row in self.rows if row.get(field) == value]
+        return self
+
+    def or_(self, expression):
+        updated_at, record_id = re.search(r'updated_at\.eq\."([^"]+)",id\.gt\.([^)]+)\)', expression).groups()
+        self.after = (updated_at, record_id)
+        return self
+
+    def order(self, field):
+        return self
+
+    def limit(self, count):
+        self.limit_count = count
+        return self
+
+    def execute(self):
+        self.log.append(self.after)
+        rows = sorted(self.rows, key=lambda row: (row["updated_at"], row["id"]))
+        if self.after:
+            rows = [row for row in rows if (row["updated_at"], row["id"]) > self.after]
+        return type("Response", (), {"data": rows[:self.limit_count]})()
+
+
+class FakeSupabase:
+    def __init__(self, rows):
+        self.rows = rows
+        self.fetches = []
+
+    def table(self, name):
+        return FakeQuery(list(self.rows), self.fetches)
+
+
+@pytest.fixture
+async def nocodb():
+    fake = FakeNocoDB()
+    server = TestServer(fake.app())
+    await server.start_server()
+    fake.url = str(server.make_url("")).rstrip("/")
+    yield fake
+    await server.close()
+
+
+@pytest.fixture
+def redis_client():
+    return fakeredis.FakeRedis(decode_responses=True)
+
+
+def make_service(nocodb, redis_client, supabase_rows=(), page_size=2):
+    return DataSyncService(
+        FakeSupabase(list(supabase_rows)),
+        nocodb.url,
+        "token",
+        page_size=page_size,
+        redis_client=redis_client,
+    )
+
+
+def item(operation, record_id, **data):
+    return {
+        "table": "doctors",
+        "record_id": record_id,
+        "operation": operation,
+        "clinic_id": CLINIC_ID,
+        "source": "supabase",
+        "data": {"id": record_id, "clinic_id": CLINIC_ID, **data},
+    }
+
+
+async def test_update_then_delete_in_one_drain_stays_deleted(nocodb, redis_client):
+    nocodb.tables["t1_doctors"] = {"d1": {"id": "d1", "name": "Dr. A"}}
+
+    async with make_service(nocodb, redis_client) as service:
+        await service._sync_batch([
+            item("UPDATE", "d1", name="Dr. A (updated)"),
+            item("INSERT", "d2", name="Dr. B"),
+            item("DELETE", "d1"),
+        ])
+
+    assert set(nocodb.tables["t1_doctors"]) == {"d2"}
+
+
+async def test_delete_then_recreate_keeps_the_new_row(nocodb, redis_client):
+    nocodb.tables["t1_doctors"] = {"d1": {"id": "d1", "name": "Dr. A"}}
+
+    async with make_service(nocodb, redis_client) as service:
+        await service._sync_batch([
+            item("DELETE", "d1"),
+            item("INSERT", "d1", name="Dr. A again"),
+        ])
+
+    assert nocodb.tables["t1_doctors"]["d1"]["name"] == "Dr. A again"
+
+
+async def test_repeated_updates_send_the_last_one_once(nocodb, redis_client):
+    nocodb.tables["t1_doctors"] = {"d1": {"id": "d1", "name": "Dr. A"}}
+
+    async with make_service(nocodb, redis_client) as service:
+        await service._sync_batch([
+            item("UPDATE", "d1", name="first"),
+            item("UPDATE", "d1", name="second"),
+        ])
+
+    assert nocodb.tables["t1_doctors"]["d1"]["name"] == "second"
+    assert nocodb.requests.count(("PATCH", "t1_doctors")) == 1
+
+
+async def test_watermark_survives_a_new_instance(nocodb, redis_client):
+    rows = [
+        {"id": f"d{i}", "clinic_id": CLINIC_ID, "name": f"Dr. {i}", "updated_at": f"2026-01-0{i}T00:00:00+00:00"}
+        for i in range(1, 6)
+    ]
+
+    async with make_service(nocodb, redis_client, rows) as first:
+        await first.sync_table_data("doctors", CLINIC_ID, SyncDirection.TO_NOCODB)
+    assert len(nocodb.tables["t1_doctors"]) == 5
+
+    # A restarted (or another) instance resumes after the last synced record
+    nocodb.requests.clear()
+    async with make_service(nocodb, redis_client, rows) as second:
+        await second.sync_table_data("doctors", CLINIC_ID, SyncDirection.TO_NOCODB)
+        assert second.supabase.fetches == [("2026-01-05T00:00:00+00:00", "d5")]
+    assert nocodb.requests == []
+
+    # full=True drops the shared watermark and resyncs everything
+    async with make_service(nocodb, redis_client, rows) as third:
+        await third.sync_table_data("doctors", CLINIC_ID, SyncDirection.TO_NOCODB, full=True)
+        assert third.supabase.fetches[0] is None
+    assert nocodb.requests.count(("PATCH", "t1_doctors")) == 3  # pages of 2, 2 and 1
+
+
+async def test_watermark_redis_calls_run_off_the_event_loop(nocodb):
+    rows = [{"id": "d1", "clinic_id": CLINIC_ID, "name": "Dr. 1", "updated_at": "2026-01-01T00:00:00+00:00"}]
+    threads = []
+
+    class RecordingRedis(fakeredis.FakeRedis):
+        def execute_command(self, *args, **options):
+            threads.append(threading.get_ident())
+            return super().execute_command(*args, **options)
+
+    async with make_service(nocodb, RecordingRedis(decode_responses=True), rows) as service:
+        await service.sync_table_data("doctors", CLINIC_ID, SyncDirection.TO_NOCODB, full=True)
+
+    assert threads
+    assert threading.get_ident() not in threads
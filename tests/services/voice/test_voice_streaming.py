@@ -0,0 +1,102 @@
+"""
+Time to first chunk of the voice stream, with FSMOrchestrator.process
+replaced by a fake that takes a fixed time: a slow turn yields a holding
+phrase before it finishes, and state is committed even after barge-in.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.services.orchestrator.fsm_orchestrator import FSMOrchestrator
+from app.services.voice.langgraph_adapter import LangGraphVoiceAdapter
+
+RESPONSE = "We have an opening on Monday at ten. Would you like me to book it for you?"
+
+
+class SlowOrchestrator(FSMOrchestrator):
+    """Real process_stream over a process() that takes turn_seconds"""
+
+    def __init__(self, turn_seconds):
+        super().__init__(clinic_id="clinic-1", llm_factory=None)
+        self.turn_seconds = turn_seconds
+        self.finished_at = None
+
+    async def process(self, message, session_id, state=None, language="en", user_phone=None, user_name=None):
+        await asyncio.sleep(self.turn_seconds)
+        self.finished_at = time.perf_counter()
+        return {
+            "response": RESPONSE,
+            "state": {"stage": "offering", "turn": (state or {}).get("turn", 0) + 1},
+            "tools_called": ["check_availability"],
+            "route": "scheduling",
+        }
+
+
+def make_adapter(turn_seconds, holding_after_ms):
+    adapter = LangGraphVoiceAdapter(clinic_id="clinic-1", holding_phrase_after_ms=holding_after_ms)
+    adapter._orchestrator = SlowOrchestrator(turn_seconds)
+    return adapter
+
+
+async def timed_chunks(adapter, session_id="s1"):
+    started = time.perf_counter()
+    chunks = []
+    async for chunk in adapter.stream_response("any slots monday?", session_id, {"language": "en"}):
+        chunks.append((time.perf_counter() - started, chunk))
+    return started, chunks
+
+
+async def test_slow_turn_speaks_before_it_finishes():
+    adapter = make_adapter(turn_seconds=0.4, holding_after_ms=50)
+    started, chunks = await timed_chunks(adapter)
+
+    first_at, first = chunks[0]
+    assert first.content == "One moment, please."
+    assert not first.is_final
+    assert first_at < 0.2
+    assert started + first_at < adapter._orchestrator.finished_at
+
+    spoken = [chunk.content for _, chunk in chunks[1:-1]]
+    assert " ".join(spoken) == RESPONSE
+    assert len(spoken) == 2
+
+    final = chunks[-1][1]
+    assert final.is_final and final.content == ""
+    assert final.metadata["chunks_yielded"] == 3
+    assert final.metadata["holding_phrase"] is True
+    assert final.metadata["ttft_ms"] < 200
+    assert final.metadata["route"] == "scheduling"
+
+
+async def test_fast_turn_has_no_holding_phrase():
+    adapter = make_adapter(turn_seconds=0.01, holding_after_ms=300)
+    _, chunks = await timed_chunks(adapter)
+
+    assert [chunk.content for _, chunk in chunks[:-1]] == [
+        "We have an opening on Monday at ten.",
+        "Would you like me to book it for you?",
+    ]
+    assert chunks[-1][1].metadata["holding_phrase"] is False
+
+
+async def test_holding_phrase_is_opt_in():
+    adapter = LangGraphVoiceAdapter(clinic_id="clinic-1")
+    adapter._orchestrator = SlowOrchestrator(turn_seconds=0.2)
+    _, chunks = await timed_chunks(adapter)
+
+    assert chunks[0][1].content == "We have an opening on Monday at ten."
+    assert chunks[-1][1].metadata["holding_phrase"] is False
+
+
+@pytest.mark.parametrize("holding_after_ms", [None, 50])
+async def test_state_committed_after_barge_in(holding_after_ms):
+    adapter = make_adapter(turn_seconds=0.1, holding_after_ms=holding_after_ms)
+
+    stream = adapter.stream_response("any slots monday?", "s1", {"language": "en"})
+    await stream.__anext__()
+    await stream.aclose()  # caller barged in after the first chunk
+
+    await asyncio.sleep(0.2)
+    assert adapter._fsm_states["s1"] == {"stage": "offering", "turn": 1}
@@ -0,0 +1,101 @@
+"""
+_DeferredQueueHandler: only LazyJSON records skip formatting on the
+calling thread; everything else is formatted before the argument can change.
+"""
+
+import logging
+import queue
+import threading
+from logging.handlers import QueueListener
+
+import pytest
+
+from app.utils.logging_config import LazyJSON, _DeferredQueueHandler
+
+
+class CollectingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(self.format(record))
+
+
+class ThreadRecorder:
+    """JSON-serializable via default=str; records which thread serialized it"""
+
+    def __init__(self):
+        self.threads = []
+
+    def __str__(self):
+        self.threads.append(threading.current_thread().name)
+        return "recorded"
+
+
+@pytest.fixture
+def queued_logger():
+    log_queue = queue.SimpleQueue()
+    sink = CollectingHandler()
+    listener = QueueListener(log_queue, sink)
+    listener.start()
+    logger = logging.getLogger("tests.deferred_queue")
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    handler = _DeferredQueueHandler(log_queue)
+    logger.addHandler(handler)
+
+    def drain():
+        if listener._thread is not None:
+            listener.stop()
+
+    yield logger, drain, sink
+    logger.removeHandler(handler)
+    drain()
+
+
+def test_mutable_arguments_are_formatted_at_the_call(queued_logger):
+    logger, drain, sink = queued_logger
+    payload = {"status": "received"}
+
+    logger.info("payload=%s", payload)
+    payload["status"] = "mutated"
+    drain()
+
+    assert sink.lines == ["payload={'status': 'received'}"]
+
+
+def test_lazy_json_is_serialized_on_the_listener_thread(queued_logger):
+    logger, drain, sink = queued_logger
+    recorder = ThreadRecorder()
+
+    logger.info("bytes=%d payload=%s", 12, LazyJSON({"who": recorder}))
+    drain()
+
+    assert sink.lines[0].startswith("bytes=12 payload={") and "recorded" in sink.lines[0]
+    assert recorder.threads and threading.main_thread().name not in recorder.threads
+
+
+def test_lazy_json_next_to_a_mutable_argument_is_formatted_at_the_call(queued_logger):
+    logger, drain, sink = queued_logger
+    recorder = ThreadRecorder()
+    items = ["a"]
+
+    logger.info("items=%s payload=%s", items, LazyJSON({"who": recorder}))
+    items.append("b")
+    drain()
+
+    assert sink.lines[0].startswith("items=['a'] payload=")
+    assert recorder.threads == [threading.main_thread().name]
+
+
+def test_exceptions_keep_their_traceback(queued_logger):
+    logger, drain, sink = queued_logger
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.exception("failed")
+    drain()
+
+    assert sink.lines[0].startswith("failed\nTraceback")
+    assert "ValueError: boom" in sink.lines[0]
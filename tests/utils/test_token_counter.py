@@ -0,0 +1,76 @@
+"""
+Token counting: split_to_budget keeps the newest messages that fit, never
+fewer than min_recent, and counting never loads the tokenizer itself.
+"""
+
+import pytest
+
+from app.utils import token_counter
+from app.utils.token_counter import count_tokens, split_to_budget
+
+
+@pytest.fixture(autouse=True)
+def estimated_counts(monkeypatch):
+    """Count by length (10 tokens per 40 characters) without a tokenizer."""
+    monkeypatch.setattr(token_counter, "_encoding", None)
+    count_tokens.cache_clear()
+    yield
+    count_tokens.cache_clear()
+
+
+def messages(count, chars=40):
+    return [{"role": "user", "content": f"{i:02d}".ljust(chars, "x")} for i in range(count)]
+
+
+def test_recent_is_the_longest_suffix_within_budget():
+    history = messages(10)
+
+    older, recent = split_to_budget(history, max_tokens=35)
+
+    assert recent == history[-3:]
+    assert older == history[:-3]
+
+
+def test_min_recent_floor_goes_over_budget():
+    history = messages(6, chars=400)
+
+    older, recent = split_to_budget(history, max_tokens=150, min_recent=3)
+
+    assert recent == history[-3:]
+    assert older == history[:3]
+
+
+def test_empty_history():
+    assert split_to_budget([], max_tokens=100, min_recent=4) == ([], [])
+
+
+def test_counting_does_not_load_the_tokenizer(monkeypatch):
+    def download(_):
+        raise AssertionError("tokenizer loaded on the counting path")
+
+    monkeypatch.setattr(token_counter.tiktoken, "get_encoding", download)
+
+    assert count_tokens("x" * 40) == 10
+
+
+def test_load_encoding_drops_estimated_counts(monkeypatch):
+    class Encoding:
+        def encode(self, text, disallowed_special=()):
+            return text.split()
+
+    monkeypatch.setattr(token_counter.tiktoken, "get_encoding", lambda _: Encoding())
+    text = "one two three " * 4
+    assert count_tokens(text) == len(text) // 4
+
+    assert token_counter.load_encoding() is True
+    assert count_tokens(text) == 12
+
+
+def test_failed_load_keeps_estimating(monkeypatch):
+    def offline(_):
+        raise ConnectionError("no network")
+
+    monkeypatch.setattr(token_counter.tiktoken, "get_encoding", offline)
+
+    assert token_counter.load_encoding() is False
+    assert count_tokens("x" * 40) == 10